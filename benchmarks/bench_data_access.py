@@ -0,0 +1,91 @@
+"""
+Benchmark: consultas sequenciais vs `gather_queries` nas rotas com várias consultas.
+
+Cada consulta simulada bloqueia a thread do pool do banco pelo tempo de uma
+ida ao PostgREST (latência configurável, com jitter). Para cada rota mede a
+latência com as consultas aguardadas uma após a outra (antes) e com
+`gather_queries` (depois):
+
+- /api/auth/me: subscription + uso do mês (que pode inserir a linha)
+- /api/usage: estatísticas de uso + subscription
+- abrir conversa: conversa + mensagens
+
+Uso:
+    python -m benchmarks.bench_data_access [--latency-ms 40] [--runs 20]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+from src.data_access import gather_queries, run_db
+
+# Idas ao banco de cada consulta da rota (o uso do mês pode fazer select + insert)
+ROUTES: Dict[str, Dict[str, int]] = {
+    "/api/auth/me": {"subscription": 1, "usage": 2},
+    "/api/usage": {"stats": 1, "subscription": 1},
+    "abrir conversa": {"conversation": 1, "messages": 1},
+}
+
+
+def simulated_query(round_trips: int, latency: float, jitter: float) -> List[Any]:
+    """Bloqueia como o cliente síncrono do Supabase durante `round_trips` idas ao banco."""
+    for _ in range(round_trips):
+        time.sleep(max(0.0, random.gauss(latency, jitter)))
+    return []
+
+
+async def sequential(queries: Dict[str, int], latency: float, jitter: float) -> Dict[str, Any]:
+    """Como as rotas faziam antes: uma consulta por vez."""
+    return {
+        name: await run_db(simulated_query, round_trips, latency, jitter)
+        for name, round_trips in queries.items()
+    }
+
+
+async def fanned_out(queries: Dict[str, int], latency: float, jitter: float) -> Dict[str, Any]:
+    """Como as rotas fazem agora: consultas independentes em paralelo."""
+    return await gather_queries(**{
+        name: run_db(simulated_query, round_trips, latency, jitter)
+        for name, round_trips in queries.items()
+    })
+
+
+async def measure(strategy, queries: Dict[str, int], latency: float, jitter: float, runs: int) -> Dict[str, float]:
+    """Mediana e p95 (ms) da latência de uma rota."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await strategy(queries, latency, jitter)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {"p50": statistics.median(samples), "p95": samples[int(0.95 * (len(samples) - 1))]}
+
+
+async def run(latency: float, jitter: float, runs: int) -> None:
+    print(f"Latência simulada por ida ao banco: {latency * 1000:.0f} ms (jitter {jitter * 1000:.0f} ms), {runs} execuções")
+    print(f"  {'rota':<16} {'antes p50':>10} {'depois p50':>11} {'antes p95':>10} {'depois p95':>11}")
+    for route, queries in ROUTES.items():
+        before = await measure(sequential, queries, latency, jitter, runs)
+        after = await measure(fanned_out, queries, latency, jitter, runs)
+        print(
+            f"  {route:<16} {before['p50']:>10.1f} {after['p50']:>11.1f} "
+            f"{before['p95']:>10.1f} {after['p95']:>11.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="Latência de uma ida ao banco")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Desvio padrão da latência")
+    parser.add_argument("--runs", type=int, default=20, help="Execuções por rota e estratégia")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.latency_ms / 1000, args.jitter_ms / 1000, args.runs))
+
+
+if __name__ == "__main__":
+    main()
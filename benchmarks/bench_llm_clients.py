@@ -0,0 +1,98 @@
+"""
+Benchmark: ChatOpenAI (LangChain) vs cliente direto OpenAI-compatível.
+
+Mede, contra o FakeLLMServer local (sem rede externa):
+- tempo de importação de cada caminho (em subprocesso limpo)
+- CPU por chunk consumida pelo cliente ao processar um stream
+- pico de memória alocada durante um stream completo
+
+Uso:
+    python -m benchmarks.bench_llm_clients [--chunks 2000] [--runs 5]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from src.agents.llm_client import BACKEND_DIRECT, BACKEND_LANGCHAIN, OpenAICompatibleClient
+from src.testing import FakeLLMServer
+
+MESSAGES = [{"role": "system", "content": "Você é um assistente."}, {"role": "user", "content": "oi"}]
+
+IMPORT_STATEMENTS = {
+    BACKEND_LANGCHAIN: "from langchain_openai import ChatOpenAI",
+    BACKEND_DIRECT: "import src.agents.llm_client",
+}
+
+
+def measure_import(statement: str, runs: int) -> float:
+    """Mediana (ms) do tempo de importação em um interpretador novo."""
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(float(output.strip()) * 1000)
+    return statistics.median(samples)
+
+
+def build_clients(base_url: str) -> Dict[str, Any]:
+    from langchain_openai import ChatOpenAI  # pylint: disable=import-outside-toplevel
+
+    return {
+        BACKEND_LANGCHAIN: ChatOpenAI(
+            model="fake-model", api_key="fake", base_url=base_url, max_retries=0, streaming=True
+        ),
+        BACKEND_DIRECT: OpenAICompatibleClient(model="fake-model", api_key="fake", base_url=base_url),
+    }
+
+
+def measure_stream(stream: Callable[[], Any], chunks: int, runs: int) -> Dict[str, float]:
+    """CPU por chunk (µs, tempo da thread) e pico de memória (KiB) de um stream completo."""
+    cpu_samples: List[float] = []
+    peaks: List[float] = []
+    for _ in range(runs):
+        tracemalloc.start()
+        started = time.thread_time()
+        received = sum(1 for chunk in stream() if chunk.content)
+        elapsed = time.thread_time() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        if received != chunks:
+            raise RuntimeError(f"Esperados {chunks} chunks, recebidos {received}")
+        cpu_samples.append(elapsed / chunks * 1_000_000)
+        peaks.append(peak / 1024)
+
+    return {"cpu_us_per_chunk": statistics.median(cpu_samples), "peak_kib": statistics.median(peaks)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000, help="Chunks por resposta")
+    parser.add_argument("--runs", type=int, default=5, help="Repetições por medida")
+    args = parser.parse_args()
+
+    print("Tempo de importação (mediana, ms)")
+    for backend, statement in IMPORT_STATEMENTS.items():
+        print(f"  {backend:<10} {measure_import(statement, args.runs):8.1f}")
+
+    with FakeLLMServer(reply="x" * args.chunks, chunk_size=1) as server:
+        clients = build_clients(server.base_url)
+
+        print(f"\nStream de {args.chunks} chunks (mediana de {args.runs})")
+        print(f"  {'backend':<10} {'CPU/chunk (µs)':>15} {'pico (KiB)':>12}")
+        for backend, client in clients.items():
+            # Aquecimento: abre a conexão e carrega caminhos preguiçosos
+            list(client.stream(MESSAGES))
+            result = measure_stream(lambda c=client: c.stream(MESSAGES), args.chunks, args.runs)
+            print(f"  {backend:<10} {result['cpu_us_per_chunk']:>15.1f} {result['peak_kib']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: cliente do Supabase por chamada vs cliente do processo com pool.
+
+Roda contra o `LocalPostgREST` (sem rede externa), com latência simulada
+por requisição. Mede:
+
+- primeira consulta: cliente criado na hora (sem aquecimento) vs cliente já
+  criado e aquecido por `warm_up_supabase` no startup
+- consultas concorrentes (threads do pool do banco): um cliente novo por
+  consulta (conexão nova a cada vez) vs o cliente compartilhado com keep-alive
+
+Uso:
+    python -m benchmarks.bench_supabase_client [--latency-ms 5] [--threads 16] [--queries 400]
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from src.database import create_supabase_client, set_supabase_client, warm_up_supabase
+from src.testing import LocalPostgREST
+
+
+def seed(server: LocalPostgREST, conversations: int = 200) -> None:
+    server.tables["conversations"] = [
+        {"id": f"conv-{n:04d}", "user_id": f"user-{n % 20}", "title": f"Conversa {n}",
+         "created_at": f"2026-10-{1 + n % 28:02d}T12:00:00+00:00", "updated_at": f"2026-10-{1 + n % 28:02d}T12:00:00+00:00"}
+        for n in range(conversations)
+    ]
+
+
+def query(client) -> None:
+    client.table("conversations").select("id,title,updated_at").eq("user_id", "user-3")\
+        .order("updated_at", desc=True).limit(20).execute()
+
+
+def first_query(server: LocalPostgREST, warm: bool) -> float:
+    """Latência (ms) da primeira consulta de um worker."""
+    if warm:
+        client = create_supabase_client(url=server.url, key="local")
+        set_supabase_client(client)
+        warm_up_supabase()
+        started = time.perf_counter()
+    else:
+        started = time.perf_counter()
+        client = create_supabase_client(url=server.url, key="local")
+    query(client)
+    elapsed = (time.perf_counter() - started) * 1000
+    set_supabase_client(None)
+    return elapsed
+
+
+def concurrent(run_one: Callable[[], None], threads: int, queries: int) -> List[float]:
+    """Latências (ms) de `queries` consultas em `threads` threads."""
+    def timed(_: int) -> float:
+        started = time.perf_counter()
+        run_one()
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(timed, range(queries)))
+
+
+def summary(samples: List[float]) -> str:
+    samples = sorted(samples)
+    return f"p50 {statistics.median(samples):7.1f} ms  p95 {samples[int(0.95 * (len(samples) - 1))]:7.1f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Latência simulada de cada requisição")
+    parser.add_argument("--threads", type=int, default=16, help="Threads concorrentes (DB_POOL_WORKERS)")
+    parser.add_argument("--queries", type=int, default=400, help="Consultas na etapa concorrente")
+    parser.add_argument("--runs", type=int, default=10, help="Repetições da primeira consulta")
+    args = parser.parse_args()
+
+    with LocalPostgREST(latency=args.latency_ms / 1000) as server:
+        seed(server)
+        print(f"PostgREST local, latência {args.latency_ms:.0f} ms por requisição")
+
+        cold = [first_query(server, warm=False) for _ in range(args.runs)]
+        warm = [first_query(server, warm=True) for _ in range(args.runs)]
+        print("Primeira consulta do worker")
+        print(f"  {'sem aquecimento':<28} {summary(cold)}")
+        print(f"  {'aquecido no startup':<28} {summary(warm)}")
+
+        shared = create_supabase_client(url=server.url, key="local")
+        per_call = concurrent(lambda: query(create_supabase_client(url=server.url, key="local")), args.threads, args.queries)
+        pooled = concurrent(lambda: query(shared), args.threads, args.queries)
+        print(f"{args.queries} consultas em {args.threads} threads")
+        print(f"  {'cliente novo por consulta':<28} {summary(per_call)}")
+        print(f"  {'cliente do processo (pool)':<28} {summary(pooled)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Controle de admissão das chamadas ao LLM.
+
+Limita quantas gerações rodam ao mesmo tempo em um worker e organiza as
+demais em uma fila limitada. Usuários premium têm prioridade e, dentro de
+cada classe, a fila alterna entre usuários para que uma rajada de um único
+usuário não bloqueie os demais.
+"""
+
+import itertools
+import threading
+from typing import Any, Dict, List, Optional
+
+from ..config import GEMConfig
+
+# Classes de prioridade (menor valor = atendido primeiro)
+PRIORITY_PREMIUM = 0
+PRIORITY_FREE = 1
+
+ANONYMOUS_USER = "anonymous"
+
+
+class AdmissionRejected(Exception):
+    """Indica que a fila de admissão está cheia ou que a espera expirou."""
+
+
+class AdmissionTicket:
+    """
+    Representa uma solicitação de execução na fila de admissão.
+
+    `weight` é o número de vagas ocupadas (ex: um turno do painel chama
+    vários modelos ao mesmo tempo).
+    """
+
+    def __init__(self, controller: "AdmissionController", user_key: str, priority: int, seq: int, weight: int = 1):
+        self._controller = controller
+        self.user_key = user_key
+        self.priority = priority
+        self.seq = seq
+        self.weight = weight
+        self.admitted = False
+        self.released = False
+
+    @property
+    def position(self) -> int:
+        """Posição atual na fila (1 = próximo a ser atendido, 0 = já admitido)."""
+        return self._controller.position(self)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda a admissão por até `timeout` segundos."""
+        return self._controller.wait(self, timeout)
+
+    def release(self) -> None:
+        """Libera a vaga (ou sai da fila, se ainda não foi admitido)."""
+        self._controller.release(self)
+
+    def __enter__(self) -> "AdmissionTicket":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """
+    Controlador de concorrência das chamadas ao LLM.
+
+    Regras de ordenação da fila:
+    - Premium antes de free
+    - Entre usuários da mesma classe, quem tem menos gerações em andamento
+    - Por fim, ordem de chegada
+    """
+
+    def __init__(self, max_concurrency: int = 4, max_queue_size: int = 32):
+        """
+        Inicializa o controlador.
+
+        Args:
+            max_concurrency: Número máximo de chamadas simultâneas ao LLM
+            max_queue_size: Número máximo de solicitações aguardando na fila
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_size = max(0, max_queue_size)
+
+        self._cond = threading.Condition()
+        self._waiting: List[AdmissionTicket] = []
+        self._active_by_user: Dict[str, int] = {}
+        self._active = 0
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_config(cls) -> "AdmissionController":
+        """Cria um controlador com os limites definidos em GEMConfig."""
+        config = GEMConfig.get_admission_config()
+        return cls(
+            max_concurrency=config["max_concurrency"],
+            max_queue_size=config["max_queue_size"],
+        )
+
+    def enqueue(self, user_id: Optional[str] = None, is_premium: bool = False, weight: int = 1) -> AdmissionTicket:
+        """
+        Solicita uma vaga para chamar o LLM.
+
+        Args:
+            user_id: ID do usuário (None para anônimos)
+            is_premium: Se o usuário tem plano premium
+            weight: Vagas ocupadas pela execução (limitado a `max_concurrency`)
+
+        Returns:
+            AdmissionTicket já admitido ou aguardando na fila
+
+        Raises:
+            AdmissionRejected: Se a fila estiver cheia
+        """
+        priority = PRIORITY_PREMIUM if is_premium else PRIORITY_FREE
+
+        with self._cond:
+            weight = min(max(1, weight), self.max_concurrency)
+            ticket = AdmissionTicket(self, user_id or ANONYMOUS_USER, priority, next(self._seq), weight)
+
+            if self._active + weight <= self.max_concurrency and not self._waiting:
+                self._admit(ticket)
+                return ticket
+
+            if len(self._waiting) >= self.max_queue_size:
+                raise AdmissionRejected(
+                    "Muitas solicitações simultâneas no momento. Tente novamente em instantes."
+                )
+
+            self._waiting.append(ticket)
+            self._dispatch()
+            return ticket
+
+    def wait(self, ticket: AdmissionTicket, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até o ticket ser admitido ou o timeout expirar."""
+        with self._cond:
+            return self._cond.wait_for(lambda: ticket.admitted or ticket.released, timeout) and ticket.admitted
+
+    def position(self, ticket: AdmissionTicket) -> int:
+        """Calcula a posição do ticket na fila segundo as regras de prioridade."""
+        with self._cond:
+            if ticket.admitted or ticket not in self._waiting:
+                return 0
+            ordered = sorted(self._waiting, key=self._sort_key)
+            return ordered.index(ticket) + 1
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """Libera a vaga de um ticket admitido ou o remove da fila."""
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+
+            if ticket.admitted:
+                self._active -= ticket.weight
+                remaining = self._active_by_user.get(ticket.user_key, 1) - 1
+                if remaining > 0:
+                    self._active_by_user[ticket.user_key] = remaining
+                else:
+                    self._active_by_user.pop(ticket.user_key, None)
+            elif ticket in self._waiting:
+                self._waiting.remove(ticket)
+
+            self._dispatch()
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna um retrato da ocupação atual."""
+        with self._cond:
+            return {
+                "active": self._active,
+                "waiting": len(self._waiting),
+                "max_concurrency": self.max_concurrency,
+                "max_queue_size": self.max_queue_size,
+            }
+
+    def _sort_key(self, ticket: AdmissionTicket) -> tuple:
+        return (ticket.priority, self._active_by_user.get(ticket.user_key, 0), ticket.seq)
+
+    def _admit(self, ticket: AdmissionTicket) -> None:
+        ticket.admitted = True
+        self._active += ticket.weight
+        self._active_by_user[ticket.user_key] = self._active_by_user.get(ticket.user_key, 0) + 1
+
+    def _dispatch(self) -> None:
+        """Admite os próximos da fila enquanto houver vagas (requer o lock)."""
+        admitted_any = False
+        while self._waiting:
+            ticket = min(self._waiting, key=self._sort_key)
+            # O próximo da fila espera vagas suficientes (os menores não passam na frente)
+            if self._active + ticket.weight > self.max_concurrency:
+                break
+            self._waiting.remove(ticket)
+            self._admit(ticket)
+            admitted_any = True
+
+        if admitted_any:
+            self._cond.notify_all()
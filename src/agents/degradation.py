@@ -0,0 +1,172 @@
+"""
+Degradação adaptativa sob carga.
+
+Quando a fila de admissão fica profunda ou o tempo até o primeiro token
+(TTFT) sobe demais, o serviço passa a usar um perfil mais leve: histórico
+menor, contexto compartilhado compacto, menos tokens de saída e,
+opcionalmente, um modelo mais rápido. O retorno ao modo normal usa
+histerese para evitar oscilação.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from ..config import GEMConfig
+from ..metrics import metrics
+
+MODE_NORMAL = "normal"
+MODE_DEGRADED = "degraded"
+
+
+@dataclass(frozen=True)
+class LoadProfile:
+    """Parâmetros aplicados a uma chamada ao LLM conforme o modo de carga."""
+
+    mode: str = MODE_NORMAL
+    history_window: Optional[int] = None  # Nº de mensagens recentes mantidas (None = todas)
+    compact_context: bool = False
+    max_tokens: Optional[int] = None  # None = valor padrão do cliente
+    model: Optional[str] = None  # None = modelo padrão do cliente
+
+    @property
+    def is_degraded(self) -> bool:
+        return self.mode == MODE_DEGRADED
+
+    def llm_kwargs(self) -> Dict[str, Any]:
+        """Parâmetros extras repassados à chamada do LLM."""
+        kwargs: Dict[str, Any] = {}
+        if self.max_tokens:
+            kwargs["max_tokens"] = self.max_tokens
+        if self.model:
+            kwargs["model"] = self.model
+        return kwargs
+
+
+NORMAL_PROFILE = LoadProfile()
+
+
+class DegradationController:
+    """
+    Decide o modo de carga a partir da fila de admissão e do TTFT observado.
+
+    Entra em modo degradado quando a fila ou o TTFT médio ultrapassam os
+    limites; volta ao normal quando ambos caem abaixo de
+    `limite * recovery_ratio` e o modo degradado já durou `min_hold_seconds`.
+    """
+
+    def __init__(
+        self,
+        queue_threshold: int = 8,
+        ttft_threshold: float = 8.0,
+        recovery_ratio: float = 0.5,
+        min_hold_seconds: float = 30.0,
+        degraded_profile: Optional[LoadProfile] = None,
+        ewma_alpha: float = 0.3,
+    ):
+        """
+        Inicializa o controlador.
+
+        Args:
+            queue_threshold: Solicitações aguardando na fila que disparam a degradação
+            ttft_threshold: TTFT médio (segundos) que dispara a degradação
+            recovery_ratio: Fração dos limites abaixo da qual o modo normal retorna
+            min_hold_seconds: Tempo mínimo em modo degradado antes de voltar
+            degraded_profile: Perfil aplicado em modo degradado
+            ewma_alpha: Peso da observação mais recente na média do TTFT
+        """
+        self.queue_threshold = queue_threshold
+        self.ttft_threshold = ttft_threshold
+        self.recovery_ratio = recovery_ratio
+        self.min_hold_seconds = min_hold_seconds
+        self.degraded_profile = degraded_profile or LoadProfile(mode=MODE_DEGRADED)
+        self.ewma_alpha = ewma_alpha
+
+        self._lock = threading.Lock()
+        self._mode = MODE_NORMAL
+        self._entered_at = 0.0
+        self._ttft_ewma: Optional[float] = None
+        self._ttft_observed_at = 0.0
+
+        metrics.set_gauge("llm_degraded_mode", 0)
+
+    @classmethod
+    def from_config(cls) -> "DegradationController":
+        """Cria um controlador com os limites definidos em GEMConfig."""
+        config = GEMConfig.get_degradation_config()
+        return cls(
+            queue_threshold=config["queue_threshold"],
+            ttft_threshold=config["ttft_threshold"],
+            recovery_ratio=config["recovery_ratio"],
+            min_hold_seconds=config["min_hold_seconds"],
+            degraded_profile=LoadProfile(
+                mode=MODE_DEGRADED,
+                history_window=config["history_window"],
+                compact_context=True,
+                max_tokens=config["max_tokens"],
+                model=config["model"] or None,
+            ),
+        )
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def ttft_average(self) -> Optional[float]:
+        return self._ttft_ewma
+
+    def observe_ttft(self, seconds: float) -> None:
+        """Registra o tempo até o primeiro token de uma chamada."""
+        with self._lock:
+            if self._ttft_ewma is None:
+                self._ttft_ewma = seconds
+            else:
+                self._ttft_ewma = self.ewma_alpha * seconds + (1 - self.ewma_alpha) * self._ttft_ewma
+            self._ttft_observed_at = time.monotonic()
+            metrics.set_gauge("llm_ttft_ewma_seconds", self._ttft_ewma)
+
+    def evaluate(self, queue_depth: int) -> LoadProfile:
+        """
+        Atualiza o modo a partir da profundidade atual da fila.
+
+        Args:
+            queue_depth: Número de solicitações aguardando admissão
+
+        Returns:
+            LoadProfile a ser aplicado na próxima chamada
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            # Um TTFT antigo não representa mais a carga atual
+            ttft = self._ttft_ewma
+            if ttft is not None and now - self._ttft_observed_at > self.min_hold_seconds:
+                ttft = None
+
+            if self._mode == MODE_NORMAL:
+                overloaded = queue_depth >= self.queue_threshold or (
+                    ttft is not None and ttft >= self.ttft_threshold
+                )
+                if overloaded:
+                    self._transition(MODE_DEGRADED, now)
+            else:
+                relieved = queue_depth <= self.queue_threshold * self.recovery_ratio and (
+                    ttft is None or ttft <= self.ttft_threshold * self.recovery_ratio
+                )
+                if relieved and now - self._entered_at >= self.min_hold_seconds:
+                    self._transition(MODE_NORMAL, now)
+
+            profile = self.degraded_profile if self._mode == MODE_DEGRADED else NORMAL_PROFILE
+
+        metrics.inc("llm_requests_by_mode", mode=profile.mode)
+        return profile
+
+    def _transition(self, mode: str, now: float) -> None:
+        """Troca de modo e registra a transição (requer o lock)."""
+        print(f"[DEBUG] Modo de carga do LLM: {self._mode} -> {mode}")
+        self._mode = mode
+        self._entered_at = now
+        metrics.inc("llm_degradation_transitions", to=mode)
+        metrics.set_gauge("llm_degraded_mode", 1 if mode == MODE_DEGRADED else 0)
@@ -3,13 +3,43 @@ Serviço principal do Sistema SAC Learning GEMS.
 Integra o orquestrador com os agentes GEM especializados.
 """
 
+import os
+import threading
+import time
 from dataclasses import dataclass
-from typing import Dict, Generator, Optional, Any, List, Tuple
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING, Dict, Generator, Iterator, Optional, Any, List, Tuple
 
 from ..config import GEMConfig
+from ..metrics import metrics
+from .admission import AdmissionController, AdmissionRejected, AdmissionTicket
+from .degradation import MODE_NORMAL, DegradationController, LoadProfile
+from .http_pool import pool_stats, warm_up
+from .llm_client import create_llm, iter_text_chunks
+from .panel import Panel, PanelistResult, build_synthesis_messages, format_panel_answer
+from .openings import OPENING_USER_MESSAGE, OpeningCache, is_opening_message, opening_gem_ids
+from .response_cache import ResponseCache, cache_key
+from .speculation import SpeculativeBudget
+from .stop_conditions import (
+    StopCondition,
+    StructuredOutputDetector,
+    TailEstimator,
+    estimate_tokens,
+    get_stop_condition,
+    trim_after_close,
+)
+from .resilience import (
+    STATE_CLOSED,
+    CircuitBreaker,
+    counts_as_backend_failure,
+    get_circuit_breaker,
+    is_transient_error,
+    jittered_delays,
+)
 from .orchestrator import GEMOrchestrator
-from .gems import get_gem_info
+from .gems import GEMS_SEQUENCE, get_gem_info
+
+if TYPE_CHECKING:  # pragma: no cover - apenas para anotações
+    from langchain_openai import ChatOpenAI
 
 
 @dataclass
@@ -21,6 +51,7 @@ class GEMResponse:
     gem_name: Optional[str] = None
     is_orchestrator: bool = False
     error: Optional[str] = None
+    mode: str = "normal"
 
 
 class GEMService:
@@ -32,39 +63,77 @@ class GEMService:
     - Processar comandos do sistema
     - Rotear mensagens para o GEM apropriado
     - Compartilhar contexto entre GEMs para personalização
+    - Limitar chamadas simultâneas ao LLM via fila de admissão
+    - Reduzir o custo das chamadas quando o sistema está sob carga
+    - Falhar rápido (circuit breaker) durante quedas do provedor
+    - Reaproveitar respostas de chamadas idênticas ao LLM
+    - Servir aberturas pré-computadas no primeiro turno de cada GEM
+    - Aquecer o próximo GEM em background assim que o atual é concluído
+    - Consultar um painel de modelos em paralelo (GEM 4)
     """
 
     def __init__(
         self,
-        llm: Optional[ChatOpenAI] = None,
-        state_file: str = "user_journey.json"
+        llm: Optional["ChatOpenAI"] = None,
+        state_file: str = "user_journey.json",
+        admission: Optional[AdmissionController] = None,
+        degradation: Optional[DegradationController] = None,
+        response_cache: Optional[ResponseCache] = None,
+        openings: Optional[OpeningCache] = None,
+        panel: Optional[Panel] = None
     ):
         """
         Inicializa o serviço GEMS.
 
         Args:
-            llm: Instância do LLM (padrão: Qwen via Alibaba Cloud API)
+            llm: Instância do LLM (padrão: Qwen via Alibaba Cloud API, backend de GEMConfig.LLM_BACKEND)
             state_file: Arquivo para persistir estado da jornada
+            admission: Controlador de admissão (padrão: limites de GEMConfig)
+            degradation: Controlador de degradação sob carga (padrão: limites de GEMConfig)
+            response_cache: Cache de respostas do LLM (padrão: backend de GEMConfig)
+            openings: Aberturas pré-computadas (padrão: arquivo ao lado do state_file)
+            panel: Painel multi-modelo (padrão: GEMConfig, desabilitado por padrão)
         """
-        # Configuração do LLM Qwen
-        llm_config = GEMConfig.get_llm_config()
+        self._resilience_config = GEMConfig.get_resilience_config()
 
         if llm:
             self.llm = llm
         else:
-            # Cria cliente ChatOpenAI apontando para Qwen API
-            self.llm = ChatOpenAI(
-                model=llm_config["model"],
-                temperature=llm_config["temperature"],
-                max_tokens=llm_config["max_tokens"],
-                timeout=llm_config["timeout"],
-                api_key=llm_config["api_key"],
-                base_url=llm_config["base_url"],
-                streaming=True,  # Habilita streaming
-            )
+            # Cria o cliente (LangChain ou direto) apontando para Qwen API
+            self.llm = create_llm()
+        # Circuit breaker compartilhado por todos os serviços do mesmo backend
+        self.circuit_breaker = get_circuit_breaker(self._llm_backend(self.llm))
 
         self.orchestrator = GEMOrchestrator(state_file=state_file)
 
+        # Fila de admissão compartilhada por todas as chamadas ao LLM deste serviço
+        self.admission = admission or AdmissionController.from_config()
+        self._admission_config = GEMConfig.get_admission_config()
+
+        # Perfil mais leve (contexto, tokens, modelo) quando a fila ou o TTFT sobem
+        self.degradation = degradation or DegradationController.from_config()
+
+        # Respostas para mensagens idênticas (retentativas, cliques duplos, reconexões)
+        self.response_cache = response_cache or ResponseCache.from_config()
+
+        # Primeiro turno de cada GEM gerado antecipadamente
+        self.openings = openings or OpeningCache.from_config(
+            f"{os.path.splitext(state_file)[0]}.openings.json"
+        )
+
+        # Painel multi-modelo para os GEMs configurados (GEM 4 por padrão)
+        self.panel = panel or Panel.from_config()
+        self._panel_gems = set(GEMConfig.get_panel_config()["gems"])
+
+        # Aquecimento do próximo GEM logo após uma conclusão
+        self._speculation_config = GEMConfig.get_speculation_config()
+        self.speculative_budget = SpeculativeBudget.from_config()
+        self._warmup_thread: Optional[threading.Thread] = None
+
+        # Encerramento da geração após o output estruturado
+        self._stop_config = GEMConfig.get_stop_config()
+        self.tail_estimator = TailEstimator(self._stop_config["tail_tokens"])
+
         # Histórico de mensagens por GEM durante a sessão
         self.gem_histories: Dict[str, List[Dict[str, str]]] = {}
 
@@ -82,12 +151,19 @@ class GEMService:
         """Lida com o comando de conclusão forçada."""
         return True  # Retorna True para indicar que é um comando de conclusão
 
-    def process_message(self, user_message: str) -> GEMResponse:
+    def process_message(
+        self,
+        user_message: str,
+        user_id: Optional[str] = None,
+        is_premium: bool = False
+    ) -> GEMResponse:
         """
         Processa uma mensagem do usuário.
 
         Args:
             user_message: Mensagem enviada pelo usuário
+            user_id: ID do usuário autenticado (usado na fila de admissão)
+            is_premium: Se o usuário tem prioridade na fila de admissão
 
         Returns:
             GEMResponse com a resposta apropriada
@@ -114,7 +190,7 @@ class GEMService:
                 )
 
             # Processa com o GEM atual
-            return self._handle_gem_interaction(current_gem, user_message)
+            return self._handle_gem_interaction(current_gem, user_message, user_id, is_premium)
 
         except Exception as e:
             return GEMResponse(
@@ -122,8 +198,18 @@ class GEMService:
                 error=str(e)
             )
 
-    def process_message_stream(self, user_message: str) -> Generator[Dict[str, Any], None, None]:
-        """Processa uma mensagem retornando chunks de resposta em streaming."""
+    def process_message_stream(
+        self,
+        user_message: str,
+        user_id: Optional[str] = None,
+        is_premium: bool = False
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Processa uma mensagem retornando chunks de resposta em streaming.
+
+        Enquanto aguarda vaga na fila de admissão, emite eventos do tipo
+        'queued' com a posição atual do usuário.
+        """
         try:
             response, gem_id = self.orchestrator.handle_command(user_message)
 
@@ -170,7 +256,7 @@ class GEMService:
                 }
                 return
 
-            gem_response = self._stream_gem_interaction(current_gem, user_message)
+            gem_response = self._stream_gem_interaction(current_gem, user_message, user_id, is_premium)
             yield from gem_response
 
         except Exception as e:  # pylint: disable=broad-except
@@ -179,40 +265,41 @@ class GEMService:
                 "error": str(e),
             }
 
-    def _handle_gem_interaction(self, gem_id: str, user_message: str) -> GEMResponse:
+    def _handle_gem_interaction(
+        self,
+        gem_id: str,
+        user_message: str,
+        user_id: Optional[str] = None,
+        is_premium: bool = False
+    ) -> GEMResponse:
         """
         Processa interação com um GEM específico.
 
         Args:
             gem_id: ID do GEM
             user_message: Mensagem do usuário
+            user_id: ID do usuário (fila de admissão)
+            is_premium: Prioridade na fila de admissão
 
         Returns:
             GEMResponse com resposta do GEM
         """
         gem_info = get_gem_info(gem_id)
 
-        try:
-            force_completion = self._is_force_completion_command(user_message)
-
-            self._ensure_gem_history(gem_id, gem_info)
-            self._append_user_message(gem_id, user_message, gem_info, force_completion)
-
-            messages = self.gem_histories[gem_id]
-
-            response = self.llm.invoke(messages)
-            answer = getattr(response, "content", str(response)).strip()
-
-            self._append_assistant_response(gem_id, answer)
-
-            final_answer, _ = self._finalize_interaction(gem_id, answer, gem_info, force_completion)
-
+        opening = self._precomputed_opening(gem_id, user_message)
+        if opening:
+            final_answer = self._apply_opening(gem_id, user_message, gem_info, opening)
             return GEMResponse(
                 answer=final_answer,
                 gem_id=gem_id,
-                gem_name=gem_info['name']
+                gem_name=gem_info['name'],
+                mode=self.get_load_mode()
             )
 
+        try:
+            with self._acquire_admission(user_id, is_premium, self._admission_weight(gem_id, user_message)):
+                return self._run_gem_interaction(gem_id, user_message, gem_info)
+
         except Exception as e:  # pylint: disable=broad-except
             return GEMResponse(
                 answer=f"Erro ao processar com {gem_info['name']}: {str(e)}",
@@ -221,6 +308,143 @@ class GEMService:
                 error=str(e)
             )
 
+    def _run_gem_interaction(self, gem_id: str, user_message: str, gem_info: Dict[str, str]) -> GEMResponse:
+        """Executa a interação síncrona com o GEM (já com vaga de admissão)."""
+
+        force_completion = self._is_force_completion_command(user_message)
+
+        self._ensure_gem_history(gem_id, gem_info)
+        self._append_user_message(gem_id, user_message, gem_info, force_completion)
+
+        profile = self._current_load_profile()
+        messages = self._build_llm_messages(gem_id, gem_info, profile)
+
+        answer = None
+        if self._uses_panel(gem_id, force_completion):
+            results = self._collect_panel(messages)
+            if self.panel.synthesis:
+                messages = build_synthesis_messages(messages, results)
+            else:
+                answer = format_panel_answer(results)
+
+        if answer is None:
+            response = self._invoke_llm(messages, **profile.llm_kwargs(), **self._stop_kwargs(gem_id))
+            answer = self._trim_structured_output(gem_id, getattr(response, "content", str(response)).strip())
+
+        self._append_assistant_response(gem_id, answer)
+
+        final_answer, _ = self._finalize_interaction(gem_id, answer, gem_info, force_completion)
+
+        return GEMResponse(
+            answer=final_answer,
+            gem_id=gem_id,
+            gem_name=gem_info['name'],
+            mode=profile.mode
+        )
+
+    def get_load_mode(self) -> str:
+        """
+        Retorna o modo de carga atual ('normal' ou 'degraded').
+
+        Reavalia a fila e o TTFT antes de responder: o modo guardado só muda
+        quando alguém avalia a carga, e o frame 'start' sai antes da chamada.
+        """
+        return self._current_load_profile().mode
+
+    def _current_load_profile(self) -> LoadProfile:
+        """Avalia a pressão atual (fila de admissão e TTFT) e retorna o perfil a aplicar."""
+        return self.degradation.evaluate(self.admission.stats()["waiting"])
+
+    def _build_llm_messages(
+        self,
+        gem_id: str,
+        gem_info: Dict[str, str],
+        profile: LoadProfile
+    ) -> List[Dict[str, str]]:
+        """
+        Monta a lista de mensagens enviada ao LLM conforme o perfil de carga.
+
+        No modo normal envia o histórico completo. No modo degradado troca o
+        prompt de sistema por uma versão com contexto compacto e mantém apenas
+        as mensagens mais recentes.
+        """
+        history = self.gem_histories[gem_id]
+
+        if not profile.is_degraded or not history or history[0]["role"] != "system":
+            return history
+
+        system_message = {"role": "system", "content": self._build_system_prompt(
+            gem_info,
+            self.orchestrator.get_shared_context(compact=profile.compact_context)
+        )}
+        recent = history[1:]
+        if profile.history_window:
+            recent = recent[-profile.history_window:]
+
+        return [system_message, *recent]
+
+    def _admission_weight(self, gem_id: str, user_message: str) -> int:
+        """Vagas de admissão do turno: uma por painelista quando o GEM usa o painel."""
+        if self._uses_panel(gem_id, self._is_force_completion_command(user_message)):
+            return self.panel.width
+        return 1
+
+    def _acquire_admission(self, user_id: Optional[str], is_premium: bool, weight: int = 1) -> AdmissionTicket:
+        """
+        Obtém vagas na fila de admissão, bloqueando até o timeout configurado.
+
+        Raises:
+            AdmissionRejected: Se a fila estiver cheia ou a espera expirar
+        """
+        ticket = self.admission.enqueue(user_id, is_premium, weight)
+        if not ticket.wait(self._admission_config["queue_timeout"]):
+            ticket.release()
+            raise AdmissionRejected("Tempo de espera na fila esgotado. Tente novamente em instantes.")
+        return ticket
+
+    def _wait_for_admission(
+        self,
+        user_id: Optional[str],
+        is_premium: bool,
+        weight: int = 1
+    ) -> Generator[Dict[str, Any], None, AdmissionTicket]:
+        """
+        Aguarda vaga na fila emitindo eventos 'queued' quando a posição muda.
+
+        Returns:
+            AdmissionTicket admitido (via `yield from`)
+
+        Raises:
+            AdmissionRejected: Se a fila estiver cheia ou a espera expirar
+        """
+        ticket = self.admission.enqueue(user_id, is_premium, weight)
+        deadline = time.monotonic() + self._admission_config["queue_timeout"]
+        poll_interval = self._admission_config["poll_interval"]
+        last_position = None
+
+        try:
+            while not ticket.admitted:
+                position = ticket.position
+                if position and position != last_position:
+                    last_position = position
+                    yield {
+                        "type": "queued",
+                        "position": position,
+                        "queue_size": self.admission.stats()["waiting"],
+                    }
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AdmissionRejected("Tempo de espera na fila esgotado. Tente novamente em instantes.")
+
+                ticket.wait(min(poll_interval, remaining))
+        except BaseException:
+            # Cliente desconectou ou a espera expirou: sai da fila
+            ticket.release()
+            raise
+
+        return ticket
+
     def _is_gem_complete(self, response: str, gem_id: str) -> bool:
         """
         Detecta se um GEM completou sua tarefa.
@@ -302,10 +526,16 @@ class GEMService:
             self.gem_histories[gem_id] = saved_conversations[gem_id].copy()
         else:
             # Inicializa novo histórico
-            self.gem_histories[gem_id] = []
             shared_context = self.orchestrator.get_shared_context()
+            self.gem_histories[gem_id] = [{
+                "role": "system",
+                "content": self._build_system_prompt(gem_info, shared_context)
+            }]
+
+    def _build_system_prompt(self, gem_info: Dict[str, str], shared_context: str) -> str:
+        """Monta o prompt de sistema de um GEM com o contexto compartilhado."""
 
-            system_message = f"""Você é o {gem_info['name']} ({gem_info['emoji']}).
+        return f"""Você é o {gem_info['name']} ({gem_info['emoji']}).
 
 {gem_info['instructions']}
 
@@ -320,11 +550,6 @@ IMPORTANTE:
 
 Comece se apresentando e iniciando o protocolo."""
 
-            self.gem_histories[gem_id].append({
-                "role": "system",
-                "content": system_message
-            })
-
     def _append_user_message(
         self,
         gem_id: str,
@@ -414,8 +639,8 @@ Gere este output AGORA e ENCERRE."""
 
             # Regenera resposta com o prompt de força
             messages = self.gem_histories[gem_id]
-            response = self.llm.invoke(messages)
-            answer = getattr(response, "content", str(response)).strip()
+            response = self._invoke_llm(messages, **self._stop_kwargs(gem_id))
+            answer = self._trim_structured_output(gem_id, getattr(response, "content", str(response)).strip())
 
             # Atualiza histórico com a nova resposta
             self.gem_histories[gem_id].append({
@@ -431,7 +656,7 @@ Gere este output AGORA e ENCERRE."""
         output = self._extract_gem_output(answer, gem_id)
 
         # Completa o GEM e obtém mensagem de conclusão
-        completion_msg, _ = self.orchestrator.complete_gem(
+        completion_msg, next_gem_id = self.orchestrator.complete_gem(
             gem_id,
             output
         )
@@ -446,8 +671,69 @@ Gere este output AGORA e ENCERRE."""
 
         if gem_id in self.gem_histories:
             del self.gem_histories[gem_id]
+
+        if next_gem_id:
+            self._start_next_gem_warmup(next_gem_id)
+
         return final_answer, True
 
+    def _start_next_gem_warmup(self, gem_id: str) -> None:
+        """Dispara em background o aquecimento do próximo GEM da jornada."""
+        if not self._speculation_config["warmup_enabled"]:
+            return
+
+        self._warmup_thread = threading.Thread(
+            target=self._warm_up_gem, args=(gem_id,), name="gem-warmup", daemon=True
+        )
+        self._warmup_thread.start()
+
+    def _warm_up_gem(self, gem_id: str) -> None:
+        """
+        Prepara um GEM antes da primeira mensagem do usuário.
+
+        - Monta o prompt de sistema com o contexto compartilhado atualizado
+        - Abre (keep-alive) a conexão com o backend do LLM
+        - Opcionalmente gera a abertura, dentro do orçamento especulativo
+        """
+        started_at = time.monotonic()
+        try:
+            gem_info = get_gem_info(gem_id)
+            shared_context = self.orchestrator.get_shared_context()
+
+            if not self.orchestrator.state.get("gem_conversations", {}).get(gem_id):
+                # setdefault não sobrescreve um histórico criado pela requisição do usuário
+                self.gem_histories.setdefault(gem_id, [{
+                    "role": "system",
+                    "content": self._build_system_prompt(gem_info, shared_context)
+                }])
+
+            base_url = getattr(self.llm, "openai_api_base", None)
+            if isinstance(base_url, str) and not pool_stats()["idle_connections"]:
+                warm_up(base_url, GEMConfig.QWEN_API_KEY)
+
+            if self._should_speculate_opening(gem_id, gem_info, shared_context):
+                self._schedule_opening(
+                    gem_id, shared_context, max_tokens=self._speculation_config["max_tokens"]
+                )
+        except Exception as error:  # pylint: disable=broad-except
+            print(f"[ERROR] Falha no aquecimento de {gem_id}: {error}")
+            return
+
+        metrics.observe("gem_warmup_seconds", time.monotonic() - started_at)
+        print(f"[DEBUG] {gem_id} aquecido em {time.monotonic() - started_at:.2f}s")
+
+    def _should_speculate_opening(self, gem_id: str, gem_info: Dict[str, str], shared_context: str) -> bool:
+        """Gera a abertura só com folga no sistema e dentro do orçamento especulativo."""
+        if not self._speculation_config["opening_enabled"] or not self.openings:
+            return False
+        if self.openings.has(gem_id, self._build_system_prompt(gem_info, ""), shared_context):
+            return False
+        if self.get_load_mode() != MODE_NORMAL or self.circuit_breaker.state != STATE_CLOSED:
+            return False
+        if self.admission.stats()["waiting"]:
+            return False
+        return self.speculative_budget.try_acquire()
+
     def _build_force_completion_prompt(self, gem_info: Dict[str, str]) -> str:
         """Instrui o LLM a fornecer o output final estruturado."""
 
@@ -468,11 +754,136 @@ Gere este output AGORA e ENCERRE."""
         return command in self._force_completion_commands
 
     def _stream_gem_interaction(
+        self,
+        gem_id: str,
+        user_message: str,
+        user_id: Optional[str] = None,
+        is_premium: bool = False
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Realiza interação com streaming com um GEM, respeitando a fila de admissão."""
+
+        opening = self._precomputed_opening(gem_id, user_message)
+        if opening:
+            # Abertura pronta: não ocupa vaga na fila nem chama o LLM
+            yield from self._stream_opening(gem_id, user_message, opening)
+            return
+
+        try:
+            ticket = yield from self._wait_for_admission(
+                user_id, is_premium, self._admission_weight(gem_id, user_message)
+            )
+        except AdmissionRejected as rejected:
+            yield {
+                "type": "error",
+                "error": str(rejected),
+            }
+            return
+
+        try:
+            yield from self._stream_admitted_interaction(gem_id, user_message)
+        finally:
+            ticket.release()
+
+    def precompute_openings(self) -> int:
+        """
+        Agenda em background as aberturas dos GEMs ainda não concluídos.
+
+        Aberturas prontas para as instruções e o contexto atuais são mantidas;
+        as geradas com instruções antigas são substituídas quando a nova
+        versão fica pronta.
+
+        Returns:
+            Número de gerações agendadas
+        """
+        if not self.openings:
+            return 0
+
+        shared_context = self.orchestrator.get_shared_context()
+        completed = self.orchestrator.state.get("completed_gems", [])
+        return sum(
+            self._schedule_opening(gem_id, shared_context)
+            for gem_id in opening_gem_ids(GEMS_SEQUENCE, completed)
+        )
+
+    def _schedule_opening(self, gem_id: str, shared_context: str, **llm_kwargs: Any) -> bool:
+        """Agenda a geração da abertura de um GEM para o contexto informado."""
+        gem_info = get_gem_info(gem_id)
+        messages = [
+            {"role": "system", "content": self._build_system_prompt(gem_info, shared_context)},
+            {"role": "user", "content": OPENING_USER_MESSAGE},
+        ]
+        return self.openings.schedule(
+            gem_id,
+            self._build_system_prompt(gem_info, ""),
+            shared_context,
+            lambda: self._extract_chunk_content(self._invoke_llm(messages, **llm_kwargs)).strip(),
+        )
+
+    def _precomputed_opening(self, gem_id: str, user_message: str) -> Optional[str]:
+        """Retorna a abertura pronta quando esta é a primeira mensagem (um cumprimento) ao GEM."""
+        if not self.openings or not is_opening_message(user_message):
+            return None
+
+        history = self.gem_histories.get(gem_id)
+        if history and len(history) > 1:
+            return None
+        if self.orchestrator.state.get("gem_conversations", {}).get(gem_id):
+            return None
+
+        return self.openings.get(
+            gem_id,
+            self._build_system_prompt(get_gem_info(gem_id), ""),
+            self.orchestrator.get_shared_context(),
+        )
+
+    def _apply_opening(self, gem_id: str, user_message: str, gem_info: Dict[str, str], opening: str) -> str:
+        """Registra a abertura no histórico como se viesse do LLM e retorna a resposta final."""
+        self._ensure_gem_history(gem_id, gem_info)
+        self._append_user_message(gem_id, user_message, gem_info, False)
+        self._append_assistant_response(gem_id, opening)
+        final_answer, _ = self._finalize_interaction(gem_id, opening, gem_info, False)
+        return final_answer
+
+    def _stream_opening(
+        self,
+        gem_id: str,
+        user_message: str,
+        opening: str
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Reproduz a abertura pré-computada como stream."""
+
+        gem_info = get_gem_info(gem_id)
+        final_answer = self._apply_opening(gem_id, user_message, gem_info, opening)
+
+        accumulated = ""
+        for chunk in iter_text_chunks(opening, GEMConfig.LLM_CACHE_REPLAY_CHUNK_SIZE):
+            accumulated += chunk.content
+            yield {
+                "type": "chunk",
+                "content": chunk.content,
+                "accumulated": accumulated,
+                "gem_id": gem_id,
+                "gem_name": gem_info['name'],
+                "is_orchestrator": False,
+            }
+
+        yield {
+            "type": "done",
+            "message": user_message,
+            "answer": final_answer,
+            "gem_id": gem_id,
+            "gem_name": gem_info['name'],
+            "is_orchestrator": False,
+            "error": None,
+            "mode": self.get_load_mode(),
+        }
+
+    def _stream_admitted_interaction(
         self,
         gem_id: str,
         user_message: str
     ) -> Generator[Dict[str, Any], None, None]:
-        """Realiza interação com streaming com um GEM."""
+        """Executa a interação em streaming com o GEM (já com vaga de admissão)."""
 
         gem_info = get_gem_info(gem_id)
         force_completion = self._is_force_completion_command(user_message)
@@ -480,11 +891,31 @@ Gere este output AGORA e ENCERRE."""
         self._ensure_gem_history(gem_id, gem_info)
         self._append_user_message(gem_id, user_message, gem_info, force_completion)
 
-        messages = self.gem_histories[gem_id]
+        profile = self._current_load_profile()
+        messages = self._build_llm_messages(gem_id, gem_info, profile)
+        llm_kwargs = {**profile.llm_kwargs(), **self._stop_kwargs(gem_id)}
+        # Etapas antes do primeiro token (o SSE repete a última enquanto espera)
+        # O perfil deste turno (escolhido depois da fila de admissão)
+        yield {"type": "progress", "stage": "prompt_ready", "gem_id": gem_id, "mode": profile.mode}
+
+        if self._uses_panel(gem_id, force_completion):
+            # Painelistas em paralelo, cada um no seu canal ('panel_chunk')
+            results = yield from self.panel.run(
+                messages,
+                event_fields={"gem_id": gem_id, "gem_name": gem_info['name']},
+                stream_llm=self._stream_panelist,
+            )
+            if not self.panel.synthesis:
+                yield from self._finish_panel_turn(gem_id, user_message, gem_info, results, profile)
+                return
+            # A síntese segue o caminho normal de streaming
+            messages = build_synthesis_messages(messages, results)
+
+        yield {"type": "progress", "stage": "waiting_model", "gem_id": gem_id}
 
         if not hasattr(self.llm, "stream"):
-            response = self.llm.invoke(messages)
-            answer = getattr(response, "content", str(response)).strip()
+            response = self._invoke_llm(messages, **llm_kwargs)
+            answer = self._trim_structured_output(gem_id, getattr(response, "content", str(response)).strip())
             self._append_assistant_response(gem_id, answer)
             final_answer, _ = self._finalize_interaction(gem_id, answer, gem_info, force_completion)
             yield {
@@ -503,27 +934,47 @@ Gere este output AGORA e ENCERRE."""
                 "gem_name": gem_info['name'],
                 "is_orchestrator": False,
                 "error": None,
+                "mode": profile.mode,
             }
             return
 
         accumulated = ""
+        started_at = time.monotonic()
+        condition = self._stop_condition(gem_id)
+        detector = StructuredOutputDetector(condition) if condition else None
+        stream = self._stream_llm(messages, **llm_kwargs)
 
         try:
-            for chunk in self.llm.stream(messages):
+            for chunk in stream:
                 text = self._extract_chunk_content(chunk)
                 if not text:
                     continue
 
-                accumulated += text
-
-                yield {
-                    "type": "chunk",
-                    "content": text,
-                    "accumulated": accumulated,
-                    "gem_id": gem_id,
-                    "gem_name": gem_info['name'],
-                    "is_orchestrator": False,
-                }
+                if not accumulated:
+                    ttft = time.monotonic() - started_at
+                    self.degradation.observe_ttft(ttft)
+                    metrics.observe("llm_ttft_seconds", ttft, mode=profile.mode)
+
+                if detector:
+                    text = detector.feed(text)
+
+                if text:
+                    accumulated += text
+
+                    yield {
+                        "type": "chunk",
+                        "content": text,
+                        "accumulated": accumulated,
+                        "gem_id": gem_id,
+                        "gem_name": gem_info['name'],
+                        "is_orchestrator": False,
+                    }
+
+                if detector and detector.closed:
+                    # Output estruturado fechado: encerra a requisição ao provedor
+                    stream.close()
+                    self._record_early_stop(gem_id, detector)
+                    break
         except Exception as stream_error:
             # Handle errors that occur during streaming
             # If we have accumulated content, send it as a chunk before the error
@@ -561,8 +1012,238 @@ Gere este output AGORA e ENCERRE."""
             "gem_name": gem_info['name'],
             "is_orchestrator": False,
             "error": None,
+            "mode": profile.mode,
+        }
+
+    def _uses_panel(self, gem_id: str, force_completion: bool) -> bool:
+        """O painel atende os GEMs configurados, exceto no comando de conclusão forçada."""
+        return bool(self.panel) and gem_id in self._panel_gems and not force_completion
+
+    def _collect_panel(self, messages: List[Dict[str, str]]) -> Dict[str, PanelistResult]:
+        """Executa o painel sem streaming e retorna o resultado de cada painelista."""
+        run = self.panel.run(messages, stream_llm=self._stream_panelist)
+        while True:
+            try:
+                next(run)
+            except StopIteration as finished:
+                return finished.value
+
+    def _finish_panel_turn(
+        self,
+        gem_id: str,
+        user_message: str,
+        gem_info: Dict[str, str],
+        results: Dict[str, PanelistResult],
+        profile: LoadProfile
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Encerra um turno de painel sem síntese: a resposta reúne os painelistas."""
+        answer = format_panel_answer(results)
+        self._append_assistant_response(gem_id, answer)
+        final_answer, _ = self._finalize_interaction(gem_id, answer, gem_info, False)
+
+        yield {
+            "type": "chunk",
+            "content": answer,
+            "accumulated": answer,
+            "gem_id": gem_id,
+            "gem_name": gem_info['name'],
+            "is_orchestrator": False,
+        }
+        yield {
+            "type": "done",
+            "message": user_message,
+            "answer": final_answer,
+            "gem_id": gem_id,
+            "gem_name": gem_info['name'],
+            "is_orchestrator": False,
+            "error": None,
+            "mode": profile.mode,
         }
 
+    def _stop_condition(self, gem_id: str) -> Optional[StopCondition]:
+        """Retorna a condição de parada do GEM, se habilitada."""
+        if not self._stop_config["enabled"]:
+            return None
+        return get_stop_condition(gem_id)
+
+    def _stop_kwargs(self, gem_id: str) -> Dict[str, Any]:
+        """Stop sequences do GEM repassadas ao provedor."""
+        condition = self._stop_condition(gem_id)
+        if not condition or not condition.stop_sequences:
+            return {}
+        return {"stop": list(condition.stop_sequences)}
+
+    def _trim_structured_output(self, gem_id: str, answer: str) -> str:
+        """Remove de uma resposta completa o que o modelo escreveu após a moldura de fechamento."""
+        condition = self._stop_condition(gem_id)
+        if not condition:
+            return answer
+
+        trimmed, excess = trim_after_close(answer, condition)
+        if excess is None:
+            return answer
+
+        # Respostas completas mostram quanto o modelo escreve depois do fechamento
+        tokens = estimate_tokens(excess.strip())
+        self.tail_estimator.observe(tokens)
+        if tokens:
+            metrics.inc("llm_trimmed_output_tokens", tokens, gem=gem_id)
+        return trimmed.strip()
+
+    def _record_early_stop(self, gem_id: str, detector: StructuredOutputDetector) -> None:
+        """Contabiliza os tokens de saída economizados ao encerrar o stream após o fechamento."""
+        saved = max(0, round(self.tail_estimator.value) - estimate_tokens(detector.discarded.strip()))
+        metrics.inc("llm_early_stops", gem=gem_id)
+        metrics.inc("llm_saved_output_tokens", saved, gem=gem_id)
+        metrics.observe("llm_saved_output_tokens_per_completion", saved, gem=gem_id)
+        print(f"[DEBUG] Stream de {gem_id} encerrado após o output estruturado (~{saved} tokens economizados)")
+
+    def _invoke_llm(self, messages: List[Dict[str, str]], **kwargs: Any) -> Any:
+        """
+        Chama `llm.invoke` passando pelo circuit breaker.
+
+        Falhas de conexão transitórias são repetidas com backoff e jitter.
+
+        Raises:
+            CircuitOpenError: Se o circuito do backend estiver aberto
+        """
+        key = self._response_cache_key(messages, kwargs)
+        if key:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return self.response_cache.as_message(cached)
+
+        delays = jittered_delays(
+            self._resilience_config["max_retries"],
+            self._resilience_config["retry_base_delay"],
+            self._resilience_config["retry_max_delay"],
+        )
+
+        while True:
+            self.circuit_breaker.before_call()
+            try:
+                response = self.llm.invoke(messages, **kwargs)
+            except Exception as error:
+                self._record_llm_failure(error)
+                delay = next(delays, None) if is_transient_error(error) else None
+                if delay is None:
+                    raise
+                metrics.inc("llm_retries", backend=self.circuit_breaker.name)
+                time.sleep(delay)
+                continue
+
+            self.circuit_breaker.record_success()
+            if key:
+                self.response_cache.set(key, self._extract_chunk_content(response))
+            return response
+
+    def _stream_llm(self, messages: List[Dict[str, str]], llm: Any = None, **kwargs: Any) -> Iterator[Any]:
+        """
+        Chama `llm.stream` passando pelo circuit breaker.
+
+        Falhas de conexão transitórias só são repetidas antes do primeiro
+        chunk; depois disso o erro é propagado para não duplicar texto.
+
+        Respostas em cache são reproduzidas como chunks sem chamar o backend.
+
+        Args:
+            messages: Mensagens role/content
+            llm: Cliente a usar (padrão: o do serviço; painelistas passam o seu)
+            **kwargs: Parâmetros repassados a `stream`
+
+        Raises:
+            CircuitOpenError: Se o circuito do backend estiver aberto
+        """
+        llm = llm or self.llm
+        breaker = self._circuit_breaker_for(llm)
+        key = self._response_cache_key(messages, kwargs, llm)
+        if key:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                yield from self.response_cache.replay(cached)
+                return
+
+        delays = jittered_delays(
+            self._resilience_config["max_retries"],
+            self._resilience_config["retry_base_delay"],
+            self._resilience_config["retry_max_delay"],
+        )
+
+        while True:
+            breaker.before_call()
+            received = False
+            parts: List[str] = []
+            try:
+                for chunk in llm.stream(messages, **kwargs):
+                    if not received:
+                        received = True
+                        # O backend respondeu: falhas posteriores não devem ser repetidas
+                        breaker.record_success()
+                    if key:
+                        parts.append(self._extract_chunk_content(chunk))
+                    yield chunk
+            except Exception as error:
+                self._record_llm_failure(error, breaker)
+                delay = None
+                if not received and is_transient_error(error):
+                    delay = next(delays, None)
+                if delay is None:
+                    raise
+                metrics.inc("llm_retries", backend=breaker.name)
+                time.sleep(delay)
+                continue
+
+            if not received:
+                breaker.record_success()
+            if key:
+                # Só respostas completas entram no cache
+                self.response_cache.set(key, "".join(parts))
+            return
+
+    def _stream_panelist(self, llm: Any, messages: List[Dict[str, str]], **kwargs: Any) -> Iterator[Any]:
+        """Chamada de um painelista: mesmo breaker, retentativas e cache do `_stream_llm`."""
+        return self._stream_llm(messages, llm=llm, **kwargs)
+
+    @staticmethod
+    def _llm_backend(llm: Any) -> str:
+        """Nome do backend do cliente (chave do circuit breaker)."""
+        return getattr(llm, "openai_api_base", None) or type(llm).__name__
+
+    def _circuit_breaker_for(self, llm: Any) -> CircuitBreaker:
+        """Circuit breaker do backend do cliente (o do serviço para `self.llm`)."""
+        if llm is self.llm:
+            return self.circuit_breaker
+        return get_circuit_breaker(self._llm_backend(llm))
+
+    def _response_cache_key(
+        self,
+        messages: List[Dict[str, str]],
+        kwargs: Dict[str, Any],
+        llm: Any = None
+    ) -> Optional[str]:
+        """Calcula a chave do cache para a chamada (None quando o cache está desabilitado)."""
+        if not self.response_cache:
+            return None
+
+        llm = llm or self.llm
+        params: Dict[str, Any] = {}
+        for name in ("temperature", "max_tokens"):
+            value = getattr(llm, name, None)
+            if isinstance(value, (int, float)):
+                params[name] = value
+        params.update({name: value for name, value in kwargs.items() if name != "model"})
+
+        model = kwargs.get("model") or getattr(llm, "model_name", None) or getattr(llm, "model", None)
+        if not isinstance(model, str):
+            model = type(llm).__name__
+
+        return cache_key(model, params, messages)
+
+    def _record_llm_failure(self, error: Exception, breaker: Optional[CircuitBreaker] = None) -> None:
+        """Contabiliza a falha no circuit breaker quando ela indica problema no backend."""
+        if counts_as_backend_failure(error):
+            (breaker or self.circuit_breaker).record_failure()
+
     def _extract_chunk_content(self, chunk: Any) -> str:
         """Extrai texto de um chunk retornado pelo modelo."""
 
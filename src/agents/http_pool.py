@@ -0,0 +1,224 @@
+"""
+Pool HTTP compartilhado por todos os clientes de LLM do processo.
+
+Um único `httpx.Client` (e seu par assíncrono) com keep-alive e HTTP/2,
+quando disponível, evita que cada cliente abra conexões próprias e pague o
+handshake TLS em chamadas frias. O pool é recriado automaticamente após um
+fork (ex: workers do gunicorn com preload).
+"""
+
+import os
+import threading
+from typing import Any, Dict, Iterator, AsyncIterator, Optional
+
+import httpx
+
+from ..config import GEMConfig
+from ..metrics import metrics
+
+_lock = threading.Lock()
+_sync_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_owner_pid: Optional[int] = None
+
+# Requisições em andamento (síncronas + assíncronas) passando pelo pool
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def http2_available() -> bool:
+    """Retorna True se o pacote `h2` estiver instalado (requisito do HTTP/2 no httpx)."""
+    try:
+        import h2  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        return False
+    return True
+
+
+def _track(delta: int) -> None:
+    """Atualiza o número de requisições em andamento e os gauges de saturação."""
+    global _in_flight  # pylint: disable=global-statement
+    with _in_flight_lock:
+        _in_flight += delta
+        in_flight = _in_flight
+
+    max_connections = GEMConfig.HTTP_POOL_MAX_CONNECTIONS
+    metrics.set_gauge("http_pool_in_flight", in_flight)
+    metrics.set_gauge("http_pool_saturation", in_flight / max_connections if max_connections else 0)
+    metrics.set_gauge("http_pool_waiting", max(0, in_flight - max_connections))
+
+
+class _TrackedStream(httpx.SyncByteStream):
+    """Corpo de resposta que libera a contagem de requisições ao ser fechado."""
+
+    def __init__(self, stream: httpx.SyncByteStream):
+        self._stream = stream
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            _track(-1)
+        self._stream.close()
+
+
+class _AsyncTrackedStream(httpx.AsyncByteStream):
+    """Versão assíncrona de `_TrackedStream`."""
+
+    def __init__(self, stream: httpx.AsyncByteStream):
+        self._stream = stream
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            _track(-1)
+        await self._stream.aclose()
+
+
+class _InstrumentedTransport(httpx.HTTPTransport):
+    """Transporte síncrono que mede ocupação do pool."""
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        _track(1)
+        metrics.inc("http_pool_requests")
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            _track(-1)
+            raise
+        response.stream = _TrackedStream(response.stream)
+        return response
+
+
+class _AsyncInstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Transporte assíncrono que mede ocupação do pool."""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        _track(1)
+        metrics.inc("http_pool_requests")
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            _track(-1)
+            raise
+        response.stream = _AsyncTrackedStream(response.stream)
+        return response
+
+
+def _pool_options() -> Dict[str, Any]:
+    config = GEMConfig.get_http_pool_config()
+    return {
+        "limits": httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=config["keepalive_expiry"],
+        ),
+        "http2": config["http2"] and http2_available(),
+    }
+
+
+def _ensure_current_process() -> None:
+    """Descarta clientes herdados de outro processo (requer o lock)."""
+    global _sync_client, _async_client, _owner_pid  # pylint: disable=global-statement
+    if _owner_pid != os.getpid():
+        # Conexões herdadas via fork não podem ser compartilhadas com o processo pai
+        _sync_client = None
+        _async_client = None
+        _owner_pid = os.getpid()
+
+
+def get_http_client() -> httpx.Client:
+    """Retorna o cliente HTTP síncrono compartilhado do processo."""
+    global _sync_client  # pylint: disable=global-statement
+    with _lock:
+        _ensure_current_process()
+        if _sync_client is None:
+            options = _pool_options()
+            _sync_client = httpx.Client(transport=_InstrumentedTransport(**options))
+        return _sync_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Retorna o cliente HTTP assíncrono compartilhado do processo."""
+    global _async_client  # pylint: disable=global-statement
+    with _lock:
+        _ensure_current_process()
+        if _async_client is None:
+            options = _pool_options()
+            _async_client = httpx.AsyncClient(transport=_AsyncInstrumentedTransport(**options))
+        return _async_client
+
+
+def warm_up(base_url: str, api_key: str = "", timeout: float = 5.0) -> bool:
+    """
+    Abre (e mantém em keep-alive) uma conexão com o backend do LLM.
+
+    Args:
+        base_url: URL base da API OpenAI-compatível
+        api_key: Chave da API (apenas para não gerar ruído de 401 nos logs do provedor)
+        timeout: Timeout da requisição de aquecimento
+
+    Returns:
+        True se a conexão foi estabelecida (qualquer status HTTP conta)
+    """
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+    try:
+        get_http_client().get(f"{base_url.rstrip('/')}/models", headers=headers, timeout=timeout)
+        metrics.inc("http_pool_warmups", result="ok")
+        return True
+    except httpx.HTTPError as error:
+        print(f"[ERROR] Falha ao aquecer conexão com {base_url}: {error}")
+        metrics.inc("http_pool_warmups", result="error")
+        return False
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Retorna ocupação atual do pool (conexões abertas, ociosas e requisições em andamento)."""
+    with _lock:
+        client = _sync_client
+
+    connections = idle = 0
+    if client is not None:
+        pool = getattr(client._transport, "_pool", None)  # pylint: disable=protected-access
+        for connection in getattr(pool, "connections", []):
+            connections += 1
+            if connection.is_idle():
+                idle += 1
+
+    with _in_flight_lock:
+        in_flight = _in_flight
+
+    max_connections = GEMConfig.HTTP_POOL_MAX_CONNECTIONS
+    metrics.set_gauge("http_pool_connections", connections)
+    metrics.set_gauge("http_pool_idle_connections", idle)
+
+    return {
+        "max_connections": max_connections,
+        "connections": connections,
+        "idle_connections": idle,
+        "in_flight": in_flight,
+        "saturation": in_flight / max_connections if max_connections else 0,
+        "http2": _pool_options()["http2"],
+    }
+
+
+async def close_http_clients() -> None:
+    """Fecha os clientes compartilhados (chamado no shutdown da aplicação)."""
+    global _sync_client, _async_client  # pylint: disable=global-statement
+    with _lock:
+        sync_client, async_client = _sync_client, _async_client
+        _sync_client = None
+        _async_client = None
+
+    if sync_client is not None:
+        sync_client.close()
+    if async_client is not None:
+        await async_client.aclose()
@@ -0,0 +1,257 @@
+"""
+Clientes de LLM usados pelo GEMService.
+
+Além do `ChatOpenAI` do LangChain, oferece um cliente enxuto que conversa
+direto com o endpoint OpenAI-compatível. O serviço só usa `invoke` e
+`stream` sobre listas de dicionários role/content, então o cliente direto
+evita o custo de importação do LangChain e a criação de objetos por chunk.
+O backend é escolhido por `GEMConfig.LLM_BACKEND`.
+"""
+
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+
+from ..config import GEMConfig
+from .http_pool import get_async_http_client, get_http_client
+
+BACKEND_LANGCHAIN = "langchain"
+BACKEND_DIRECT = "direct"
+
+# Sentinela para o fim do stream
+_DONE = object()
+
+
+class LLMHTTPError(Exception):
+    """Erro HTTP retornado pelo endpoint do LLM."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Erro {status_code} do LLM: {message}")
+        self.status_code = status_code
+
+
+class LLMMessage:
+    """Resposta completa (mesmo contrato de `AIMessage.content`)."""
+
+    __slots__ = ("content",)
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class LLMChunk:
+    """Trecho de resposta em streaming (mesmo contrato de `AIMessageChunk.content`)."""
+
+    __slots__ = ("content",)
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+def iter_text_chunks(text: str, chunk_size: int) -> Iterator[LLMChunk]:
+    """Divide um texto pronto em chunks (reprodução de respostas já conhecidas como stream)."""
+    size = max(1, chunk_size)
+    for start in range(0, len(text), size):
+        yield LLMChunk(text[start:start + size])
+
+
+class OpenAICompatibleClient:
+    """
+    Cliente mínimo para `/chat/completions` de APIs OpenAI-compatíveis.
+
+    Expõe `invoke`/`stream` (síncronos) e `ainvoke`/`astream` (assíncronos)
+    com a mesma assinatura usada pelo GEMService com o ChatOpenAI.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        api_key: str,
+        base_url: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+        http_client: Optional[httpx.Client] = None,
+        http_async_client: Optional[httpx.AsyncClient] = None,
+    ):
+        """
+        Inicializa o cliente.
+
+        Args:
+            model: Nome do modelo
+            api_key: Chave da API
+            base_url: URL base (ex: https://.../compatible-mode/v1)
+            temperature: Temperatura padrão
+            max_tokens: Máximo de tokens padrão
+            timeout: Timeout de leitura (segundos)
+            connect_timeout: Timeout de conexão (segundos)
+            http_client: Cliente síncrono (padrão: pool compartilhado)
+            http_async_client: Cliente assíncrono (padrão: pool compartilhado)
+        """
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.openai_api_base = base_url.rstrip("/")
+        self._url = f"{self.openai_api_base}/chat/completions"
+        self._headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._http_client = http_client
+        self._http_async_client = http_async_client
+
+    @property
+    def http_client(self) -> httpx.Client:
+        return self._http_client or get_http_client()
+
+    @property
+    def http_async_client(self) -> httpx.AsyncClient:
+        return self._http_async_client or get_async_http_client()
+
+    def invoke(self, messages: List[Dict[str, str]], **kwargs: Any) -> LLMMessage:
+        """Gera a resposta completa."""
+        response = self.http_client.post(
+            self._url,
+            content=self._build_body(messages, stream=False, **kwargs),
+            headers=self._headers,
+            timeout=self._timeout,
+        )
+        if response.status_code >= 400:
+            raise LLMHTTPError(response.status_code, response.text[:500])
+        return LLMMessage(self._parse_completion(response.content))
+
+    def stream(self, messages: List[Dict[str, str]], **kwargs: Any) -> Iterator[LLMChunk]:
+        """Gera a resposta em chunks à medida que chegam."""
+        body = self._build_body(messages, stream=True, **kwargs)
+        with self.http_client.stream(
+            "POST", self._url, content=body, headers=self._headers, timeout=self._timeout
+        ) as response:
+            if response.status_code >= 400:
+                raise LLMHTTPError(response.status_code, response.read().decode("utf-8", "replace")[:500])
+
+            for line in response.iter_lines():
+                content = self._parse_stream_line(line)
+                if content is None:
+                    continue
+                if content is _DONE:
+                    return
+                yield LLMChunk(content)
+
+    async def ainvoke(self, messages: List[Dict[str, str]], **kwargs: Any) -> LLMMessage:
+        """Versão assíncrona de `invoke`."""
+        response = await self.http_async_client.post(
+            self._url,
+            content=self._build_body(messages, stream=False, **kwargs),
+            headers=self._headers,
+            timeout=self._timeout,
+        )
+        if response.status_code >= 400:
+            raise LLMHTTPError(response.status_code, response.text[:500])
+        return LLMMessage(self._parse_completion(response.content))
+
+    async def astream(self, messages: List[Dict[str, str]], **kwargs: Any) -> AsyncIterator[LLMChunk]:
+        """Versão assíncrona de `stream`."""
+        body = self._build_body(messages, stream=True, **kwargs)
+        async with self.http_async_client.stream(
+            "POST", self._url, content=body, headers=self._headers, timeout=self._timeout
+        ) as response:
+            if response.status_code >= 400:
+                raw = await response.aread()
+                raise LLMHTTPError(response.status_code, raw.decode("utf-8", "replace")[:500])
+
+            async for line in response.aiter_lines():
+                content = self._parse_stream_line(line)
+                if content is None:
+                    continue
+                if content is _DONE:
+                    return
+                yield LLMChunk(content)
+
+    def _build_body(self, messages: List[Dict[str, str]], stream: bool, **kwargs: Any) -> bytes:
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "messages": [{"role": m["role"], "content": m["content"]} for m in messages],
+            "temperature": self.temperature,
+            "stream": stream,
+        }
+        if self.max_tokens:
+            payload["max_tokens"] = self.max_tokens
+        payload.update(kwargs)
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    @staticmethod
+    def _parse_completion(raw: bytes) -> str:
+        data = json.loads(raw)
+        choices = data.get("choices") or [{}]
+        return (choices[0].get("message") or {}).get("content") or ""
+
+    @staticmethod
+    def _parse_stream_line(line: str) -> Any:
+        """Retorna o texto do chunk, `_DONE` no fim do stream ou None para linhas sem texto."""
+        if not line.startswith("data:"):
+            return None
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return _DONE
+        if not data:
+            return None
+        choices = json.loads(data).get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content") or None
+
+
+def create_llm(
+    model: Optional[str] = None,
+    backend: Optional[str] = None,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> Any:
+    """
+    Cria o cliente de LLM configurado em GEMConfig.
+
+    Args:
+        model: Modelo a usar (padrão: GEMConfig.LLM_MODEL)
+        backend: 'langchain' ou 'direct' (padrão: GEMConfig.LLM_BACKEND)
+        base_url: URL da API OpenAI-compatível (padrão: GEMConfig.QWEN_BASE_URL)
+        api_key: Chave da API (padrão: GEMConfig.QWEN_API_KEY)
+        timeout: Timeout de leitura em segundos (padrão: GEMConfig.LLM_REQUEST_TIMEOUT)
+
+    Returns:
+        Cliente com `invoke(messages)` e `stream(messages)`
+    """
+    llm_config = GEMConfig.get_llm_config()
+    resilience_config = GEMConfig.get_resilience_config()
+    backend = backend or GEMConfig.LLM_BACKEND
+    model = model or llm_config["model"]
+    base_url = base_url or llm_config["base_url"]
+    api_key = api_key or llm_config["api_key"]
+    timeout = timeout or llm_config["timeout"]
+
+    if backend == BACKEND_DIRECT:
+        return OpenAICompatibleClient(
+            model=model,
+            api_key=api_key,
+            base_url=base_url,
+            temperature=llm_config["temperature"],
+            max_tokens=llm_config["max_tokens"],
+            timeout=timeout,
+            connect_timeout=resilience_config["connect_timeout"],
+        )
+
+    # Importação tardia: o LangChain só é carregado quando realmente usado
+    from langchain_openai import ChatOpenAI  # pylint: disable=import-outside-toplevel
+
+    return ChatOpenAI(
+        model=model,
+        temperature=llm_config["temperature"],
+        max_tokens=llm_config["max_tokens"],
+        # Conexão falha rápido; a leitura mantém o timeout completo
+        timeout=httpx.Timeout(timeout, connect=resilience_config["connect_timeout"]),
+        max_retries=0,  # Retentativas ficam a cargo do GEMService
+        api_key=api_key,
+        base_url=base_url,
+        streaming=True,  # Habilita streaming
+        # Conexões keep-alive compartilhadas por todos os clientes do processo
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    )
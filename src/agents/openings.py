@@ -0,0 +1,247 @@
+"""
+Aberturas pré-computadas dos GEMs.
+
+O primeiro turno de cada GEM, quando o usuário apenas cumprimenta, é
+praticamente a saudação fixa descrita nas instruções, mas custa uma ida
+completa ao LLM com o maior prompt da conversa. As aberturas são geradas
+antecipadamente (em background) por GEM e por fingerprint do contexto
+compartilhado, persistidas em JSON e servidas na primeira mensagem.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import GEMConfig
+from ..metrics import metrics
+
+# Mensagem do usuário usada para gerar as aberturas
+OPENING_USER_MESSAGE = "Olá"
+
+# Primeiras mensagens que recebem a abertura pré-computada (normalizadas)
+OPENING_TRIGGERS = frozenset({
+    "oi",
+    "ola",
+    "oie",
+    "bom dia",
+    "boa tarde",
+    "boa noite",
+    "comecar",
+    "vamos",
+    "vamos la",
+    "vamos comecar",
+    "pronto",
+    "estou pronto",
+    "estou pronta",
+    "estou pronto para comecar",
+    "estou pronta para comecar",
+    "pode comecar",
+    "ok",
+    "sim",
+})
+
+
+def normalize_message(text: str) -> str:
+    """Minúsculas, sem acentos, pontuação ou espaços repetidos."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w\s]", " ", without_accents).split())
+
+
+def is_opening_message(text: str) -> bool:
+    """Retorna True se a mensagem é só um cumprimento/pedido para começar."""
+    return normalize_message(text or "") in OPENING_TRIGGERS
+
+
+def fingerprint(text: str) -> str:
+    """Hash curto e estável de um texto (instruções ou contexto compartilhado)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class OpeningCache:
+    """
+    Aberturas por (GEM, instruções, contexto compartilhado).
+
+    Uma mudança nas instruções gera uma nova chave; a entrada antiga do
+    mesmo GEM e contexto é descartada quando a nova é gravada.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 200, max_workers: int = 1):
+        """
+        Inicializa o cache.
+
+        Args:
+            path: Arquivo JSON de persistência (None = apenas memória)
+            max_entries: Máximo de aberturas mantidas (as mais antigas saem primeiro)
+            max_workers: Gerações simultâneas em background
+        """
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.max_workers = max(1, max_workers)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._pending: Dict[str, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_config(cls, path: Optional[str]) -> Optional["OpeningCache"]:
+        """Cria o cache a partir de GEMConfig (None quando desabilitado)."""
+        config = GEMConfig.get_opening_cache_config()
+        if not config["enabled"]:
+            return None
+        return cls(path, max_entries=config["max_entries"], max_workers=config["max_workers"])
+
+    @staticmethod
+    def key(gem_id: str, instructions: str, shared_context: str) -> str:
+        return f"{gem_id}:{fingerprint(instructions)}:{fingerprint(shared_context)}"
+
+    def get(self, gem_id: str, instructions: str, shared_context: str) -> Optional[str]:
+        """Retorna a abertura pronta, se houver."""
+        with self._lock:
+            entry = self._entries.get(self.key(gem_id, instructions, shared_context))
+
+        metrics.inc("gem_opening_requests", result="hit" if entry else "miss")
+        return entry["answer"] if entry else None
+
+    def has(self, gem_id: str, instructions: str, shared_context: str) -> bool:
+        """Retorna True se a abertura já existe ou está sendo gerada (sem contar métricas)."""
+        key = self.key(gem_id, instructions, shared_context)
+        with self._lock:
+            return key in self._entries or key in self._pending
+
+    def store(self, gem_id: str, instructions: str, shared_context: str, answer: str) -> None:
+        """Grava uma abertura e descarta versões geradas com instruções antigas."""
+        if not answer:
+            return
+
+        instructions_hash = fingerprint(instructions)
+        context_hash = fingerprint(shared_context)
+        key = self.key(gem_id, instructions, shared_context)
+
+        with self._lock:
+            stale = [
+                existing for existing, entry in self._entries.items()
+                if entry["gem_id"] == gem_id
+                and entry["context"] == context_hash
+                and entry["instructions"] != instructions_hash
+            ]
+            for existing in stale:
+                del self._entries[existing]
+
+            self._entries[key] = {
+                "gem_id": gem_id,
+                "instructions": instructions_hash,
+                "context": context_hash,
+                "answer": answer,
+                "created_at": time.time(),
+            }
+
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                oldest = sorted(self._entries, key=lambda k: self._entries[k]["created_at"])[:overflow]
+                for existing in oldest:
+                    del self._entries[existing]
+
+            self._persist(self._entries)
+
+    def schedule(
+        self,
+        gem_id: str,
+        instructions: str,
+        shared_context: str,
+        generate: Callable[[], str]
+    ) -> bool:
+        """
+        Agenda a geração de uma abertura em background.
+
+        Args:
+            gem_id: ID do GEM
+            instructions: Prompt de sistema sem contexto (define a versão das instruções)
+            shared_context: Contexto compartilhado usado na geração
+            generate: Função que chama o LLM e retorna o texto da abertura
+
+        Returns:
+            True se uma nova geração foi agendada
+        """
+        key = self.key(gem_id, instructions, shared_context)
+
+        with self._lock:
+            if key in self._entries or key in self._pending:
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="gem-openings"
+                )
+            future = self._executor.submit(self._generate, gem_id, instructions, shared_context, generate)
+            self._pending[key] = future
+
+        future.add_done_callback(lambda _: self._forget(key))
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Aguarda as gerações em andamento (usado em testes e no shutdown)."""
+        with self._lock:
+            pending = list(self._pending.values())
+        wait(pending, timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna o número de aberturas prontas e de gerações em andamento."""
+        with self._lock:
+            return {"entries": len(self._entries), "pending": len(self._pending)}
+
+    def _generate(
+        self,
+        gem_id: str,
+        instructions: str,
+        shared_context: str,
+        generate: Callable[[], str]
+    ) -> None:
+        started_at = time.monotonic()
+        try:
+            answer = generate()
+        except Exception as error:  # pylint: disable=broad-except
+            print(f"[ERROR] Falha ao gerar abertura de {gem_id}: {error}")
+            metrics.inc("gem_opening_generations", result="error")
+            return
+
+        self.store(gem_id, instructions, shared_context, answer)
+        metrics.inc("gem_opening_generations", result="ok")
+        metrics.observe("gem_opening_generation_seconds", time.monotonic() - started_at)
+        print(f"[DEBUG] Abertura de {gem_id} pré-computada")
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as error:
+            print(f"[ERROR] Cache de aberturas ignorado ({self.path}): {error}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _persist(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as error:
+            print(f"[ERROR] Falha ao salvar cache de aberturas: {error}")
+
+
+def opening_gem_ids(sequence: List[str], completed: List[str]) -> List[str]:
+    """GEMs que ainda não foram concluídos (os únicos que terão abertura)."""
+    return [gem_id for gem_id in sequence if gem_id not in completed]
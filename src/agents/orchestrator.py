@@ -327,18 +327,24 @@ Digite 'status' para revisar seu progresso
         self.state["gem_conversations"][gem_id] = messages
         self._save_state()
 
-    def get_shared_context(self) -> str:
+    def get_shared_context(self, compact: bool = False) -> str:
         """
         Constrói contexto compartilhado com HISTÓRICO COMPLETO de GEMs anteriores.
 
         IMPORTANTE: Compartilha conversas completas para continuidade da experiência.
 
+        Args:
+            compact: Se True, inclui apenas os outputs estruturados (usado sob carga)
+
         Returns:
             String com contexto formatado incluindo histórico de conversas
         """
         if not self.state.get("completed_gems"):
             return ""
 
+        if compact:
+            return self._get_compact_shared_context()
+
         context_parts = ["**📚 CONTEXTO DA SUA JORNADA (GEMs anteriores):**\n"]
         context_parts.append("Use as informações abaixo para personalizar sua abordagem.\n")
 
@@ -390,6 +396,20 @@ Digite 'status' para revisar seu progresso
 
         return "\n".join(context_parts)
 
+    def _get_compact_shared_context(self) -> str:
+        """Versão enxuta do contexto compartilhado: apenas os outputs de cada GEM."""
+        context_parts = ["**📚 CONTEXTO DA SUA JORNADA (resumo):**"]
+
+        for gem_id in self.state["completed_gems"]:
+            gem_info = get_gem_info(gem_id)
+            output_text = self.state.get("gem_outputs", {}).get(gem_id, {}).get("output", "")
+            if len(output_text) > 300:
+                output_text = output_text[:300] + "..."
+            context_parts.append(f"- {gem_info['emoji']} {gem_info['name']}: {output_text}")
+
+        context_parts.append("\nUse essas informações para NÃO pedir dados que já foram coletados.")
+        return "\n".join(context_parts)
+
     def update_shared_context(self, gem_id: str, summary: str) -> None:
         """
         Atualiza o contexto compartilhado com informações de um GEM.
@@ -0,0 +1,286 @@
+"""
+Painel multi-modelo do GEM 4 (Laboratório Científico).
+
+Um turno do usuário é enviado em paralelo a N modelos (grupos do
+`config/litellm_config.yaml` via proxy LiteLLM, ou modelos locais
+equivalentes). Cada painelista transmite sua resposta em um canal próprio
+(eventos 'panel_chunk' com o nome do painelista) e um passo opcional de
+síntese consolida o painel. O tempo total é o do painelista mais lento,
+limitado por um timeout por painelista.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional
+
+from ..config import GEMConfig
+from ..metrics import metrics
+from .llm_client import create_llm
+
+PANELIST_OK = "ok"
+PANELIST_TIMEOUT = "timeout"
+PANELIST_ERROR = "error"
+
+# (cliente, mensagens, **kwargs) -> chunks; o GEMService passa o seu `_stream_llm`
+StreamLLM = Callable[..., Iterator[Any]]
+
+PANELIST_PROMPT = (
+    "Você participa de um painel multi-IA como especialista independente. "
+    "Responda à última mensagem do usuário com sua própria análise, citando "
+    "métodos e evidências. Outro passo fará a síntese do painel."
+)
+
+
+def load_panel_models(path: str) -> List[str]:
+    """
+    Lê os grupos de modelos (`model_name`) de um arquivo de configuração do LiteLLM.
+
+    Returns:
+        Lista de nomes de modelos (vazia se o arquivo ou o PyYAML não estiverem disponíveis)
+    """
+    try:
+        import yaml  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        print("[ERROR] PyYAML não instalado; defina PANEL_MODELS para configurar o painel")
+        return []
+
+    config_path = Path(path)
+    if not config_path.exists():
+        print(f"[ERROR] Configuração do painel não encontrada: {path}")
+        return []
+
+    with config_path.open("r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+
+    return [entry["model_name"] for entry in config.get("model_list", []) if entry.get("model_name")]
+
+
+@dataclass
+class PanelistResult:
+    """Resultado de um painelista."""
+
+    name: str
+    text: str = ""
+    status: str = PANELIST_OK
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+class Panel:
+    """
+    Executa um turno em paralelo em vários modelos.
+
+    Exemplo:
+        panel = Panel({"qwen-max": llm_a, "qwen-plus": llm_b}, timeout=30)
+        results = yield from panel.run(messages)
+    """
+
+    def __init__(self, panelists: Dict[str, Any], timeout: float = 60.0, synthesis: bool = True):
+        """
+        Inicializa o painel.
+
+        Args:
+            panelists: Nome do painelista -> cliente de LLM (com `stream`)
+            timeout: Tempo máximo de cada painelista (segundos)
+            synthesis: Se o painel termina com um passo de síntese
+        """
+        self.panelists = panelists
+        self.timeout = timeout
+        self.synthesis = synthesis
+        # Algumas execuções simultâneas do painel sem criar threads por requisição
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(panelists)) * 4, thread_name_prefix="gem-panel"
+        )
+
+    @classmethod
+    def from_config(cls) -> Optional["Panel"]:
+        """Cria o painel a partir de GEMConfig (None quando desabilitado ou sem modelos)."""
+        config = GEMConfig.get_panel_config()
+        if not config["enabled"]:
+            return None
+
+        models = config["models"] or load_panel_models(config["config_path"])
+        if not models:
+            return None
+
+        panelists = {
+            model: create_llm(
+                model=model,
+                base_url=config["base_url"] or None,
+                api_key=config["api_key"] or None,
+                timeout=config["timeout"],
+            )
+            for model in models
+        }
+        return cls(panelists, timeout=config["timeout"], synthesis=config["synthesis"])
+
+    @property
+    def width(self) -> int:
+        """Chamadas simultâneas ao LLM em um turno do painel."""
+        return max(1, len(self.panelists))
+
+    def run(
+        self,
+        messages: List[Dict[str, str]],
+        event_fields: Optional[Dict[str, Any]] = None,
+        stream_llm: Optional[StreamLLM] = None,
+        **kwargs: Any
+    ) -> Generator[Dict[str, Any], None, Dict[str, PanelistResult]]:
+        """
+        Envia as mensagens a todos os painelistas e transmite as respostas.
+
+        Emite eventos 'panel_chunk' (texto de um painelista) e 'panel_status'
+        (painelista concluído, com erro ou sem resposta no prazo).
+
+        Args:
+            messages: Mensagens role/content do GEM
+            event_fields: Campos extras incluídos em cada evento (ex: gem_id)
+            stream_llm: Faz a chamada de cada painelista (padrão: `llm.stream` direto,
+                sem circuit breaker, retentativas nem cache)
+            **kwargs: Parâmetros repassados a `stream`
+
+        Returns:
+            Resultado de cada painelista (valor de retorno do gerador)
+        """
+        fields = event_fields or {}
+        panel_messages = [*messages, {"role": "system", "content": PANELIST_PROMPT}]
+        events: "queue.Queue[tuple]" = queue.Queue()
+        cancel = threading.Event()
+        started_at = time.monotonic()
+        deadline = started_at + self.timeout
+
+        results = {name: PanelistResult(name) for name in self.panelists}
+        pending = set(self.panelists)
+
+        stream_llm = stream_llm or _direct_stream
+        for name, llm in self.panelists.items():
+            self._executor.submit(
+                self._run_panelist, name, llm, stream_llm, panel_messages, kwargs, events, cancel
+            )
+
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    name, kind, payload = events.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+                result = results[name]
+                if kind == "chunk":
+                    result.text += payload
+                    yield {
+                        **fields,
+                        "type": "panel_chunk",
+                        "panelist": name,
+                        "content": payload,
+                        "accumulated": result.text,
+                    }
+                    continue
+
+                pending.discard(name)
+                result.elapsed = time.monotonic() - started_at
+                if kind == "error":
+                    result.status = PANELIST_ERROR
+                    result.error = payload
+                yield self._status_event(fields, result)
+
+            for name in sorted(pending):
+                result = results[name]
+                result.status = PANELIST_TIMEOUT
+                result.elapsed = time.monotonic() - started_at
+                yield self._status_event(fields, result)
+        finally:
+            # Painelistas atrasados param no próximo chunk
+            cancel.set()
+
+        for result in results.values():
+            metrics.inc("panel_panelists", panelist=result.name, status=result.status)
+            metrics.observe("panel_panelist_seconds", result.elapsed, panelist=result.name)
+        metrics.observe("panel_wall_seconds", time.monotonic() - started_at)
+
+        return results
+
+    @staticmethod
+    def _status_event(fields: Dict[str, Any], result: PanelistResult) -> Dict[str, Any]:
+        return {
+            **fields,
+            "type": "panel_status",
+            "panelist": result.name,
+            "status": result.status,
+            "error": result.error,
+            "elapsed": round(result.elapsed, 3),
+        }
+
+    @staticmethod
+    def _run_panelist(
+        name: str,
+        llm: Any,
+        stream_llm: StreamLLM,
+        messages: List[Dict[str, str]],
+        kwargs: Dict[str, Any],
+        events: "queue.Queue[tuple]",
+        cancel: threading.Event
+    ) -> None:
+        """Transmite a resposta de um painelista para a fila de eventos."""
+        try:
+            stream = stream_llm(llm, messages, **kwargs)
+            try:
+                for chunk in stream:
+                    if cancel.is_set():
+                        return
+                    text = getattr(chunk, "content", chunk)
+                    if isinstance(text, str) and text:
+                        events.put((name, "chunk", text))
+            finally:
+                close = getattr(stream, "close", None)
+                if close:
+                    close()
+        except Exception as error:  # pylint: disable=broad-except
+            print(f"[ERROR] Painelista {name} falhou: {error}")
+            events.put((name, "error", str(error)))
+            return
+
+        events.put((name, "done", None))
+
+
+def _direct_stream(llm: Any, messages: List[Dict[str, str]], **kwargs: Any) -> Iterator[Any]:
+    return llm.stream(messages, **kwargs)
+
+
+def build_synthesis_messages(
+    messages: List[Dict[str, str]],
+    results: Dict[str, PanelistResult]
+) -> List[Dict[str, str]]:
+    """Acrescenta as respostas do painel às mensagens do GEM para o passo de síntese."""
+    answered = [result for result in results.values() if result.text.strip()]
+    panel_text = "\n\n".join(f"### {result.name}\n{result.text.strip()}" for result in answered)
+    return [
+        *messages,
+        {
+            "role": "system",
+            "content": (
+                "RESPOSTAS DO PAINEL MULTI-IA:\n\n"
+                f"{panel_text or '(nenhum painelista respondeu a tempo)'}\n\n"
+                "Sintetize o painel para o usuário seguindo seu protocolo: consensos, "
+                "divergências, evidências mais fortes e lacunas."
+            ),
+        },
+    ]
+
+
+def format_panel_answer(results: Dict[str, PanelistResult]) -> str:
+    """Resposta final quando o painel roda sem síntese."""
+    parts = []
+    for result in results.values():
+        if result.status == PANELIST_OK and result.text.strip():
+            parts.append(f"**🤖 {result.name}**\n\n{result.text.strip()}")
+        else:
+            parts.append(f"**🤖 {result.name}**\n\n_(sem resposta: {result.status})_")
+    return "\n\n---\n\n".join(parts)
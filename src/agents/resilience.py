@@ -0,0 +1,190 @@
+"""
+Resiliência das chamadas ao LLM: circuit breaker e retry com jitter.
+
+Durante uma queda do provedor, cada requisição esperaria o timeout completo
+antes de falhar, prendendo vagas da fila de admissão. O circuit breaker
+passa a falhar imediatamente depois de uma sequência de erros e libera uma
+chamada de teste (half-open) após o período de recuperação.
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+import httpx
+import openai
+
+from ..config import GEMConfig
+from ..metrics import metrics
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+_STATE_GAUGE = {STATE_CLOSED: 0, STATE_OPEN: 1, STATE_HALF_OPEN: 2}
+
+# Erros de conexão que valem uma nova tentativa antes do primeiro token
+TRANSIENT_ERRORS = (
+    openai.APIConnectionError,  # Inclui APITimeoutError
+    httpx.TransportError,
+    ConnectionError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Indica que o circuito do backend está aberto e a chamada foi recusada."""
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Retorna True para falhas de conexão que podem ser repetidas com segurança."""
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def counts_as_backend_failure(error: BaseException) -> bool:
+    """
+    Decide se um erro indica problema no backend.
+
+    Erros 4xx (exceto 408 e 429) são causados pela requisição e não devem
+    abrir o circuito.
+    """
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int) and 400 <= status_code < 500:
+        return status_code in (408, 429)
+    return True
+
+
+def jittered_delays(max_retries: int, base_delay: float, max_delay: float) -> Iterator[float]:
+    """
+    Gera os intervalos entre tentativas com backoff exponencial e full jitter.
+
+    Args:
+        max_retries: Número máximo de novas tentativas
+        base_delay: Intervalo base (segundos)
+        max_delay: Teto do intervalo (segundos)
+    """
+    for attempt in range(max_retries):
+        yield random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker clássico (closed → open → half-open → closed).
+
+    - closed: chamadas liberadas; falhas consecutivas são contadas
+    - open: chamadas recusadas até `recovery_timeout` expirar
+    - half-open: uma chamada de teste; sucesso fecha, falha reabre
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        """
+        Inicializa o circuit breaker.
+
+        Args:
+            name: Identificador do backend (usado nas métricas)
+            failure_threshold: Falhas consecutivas que abrem o circuito
+            recovery_timeout: Tempo (segundos) em aberto antes do teste half-open
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+
+        metrics.set_gauge("llm_circuit_state", _STATE_GAUGE[STATE_CLOSED], backend=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh_state(time.monotonic())
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Verifica se a chamada pode prosseguir.
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto (ou o teste half-open em andamento)
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._refresh_state(now)
+
+            if self._state == STATE_CLOSED:
+                return
+
+            if self._state == STATE_HALF_OPEN:
+                # Apenas uma chamada de teste por vez; um teste abandonado expira
+                probe_stale = (
+                    self._probe_started_at is not None
+                    and now - self._probe_started_at >= self.recovery_timeout
+                )
+                if self._probe_started_at is None or probe_stale:
+                    self._probe_started_at = now
+                    return
+
+        metrics.inc("llm_circuit_rejections", backend=self.name)
+        raise CircuitOpenError(
+            "O serviço de IA está temporariamente indisponível. Tente novamente em instantes."
+        )
+
+    def record_success(self) -> None:
+        """Registra uma chamada bem-sucedida."""
+        with self._lock:
+            self._failures = 0
+            self._probe_started_at = None
+            if self._state != STATE_CLOSED:
+                self._transition(STATE_CLOSED)
+
+    def record_failure(self) -> None:
+        """Registra uma falha do backend."""
+        now = time.monotonic()
+        with self._lock:
+            self._failures += 1
+            self._probe_started_at = None
+
+            if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = now
+                if self._state != STATE_OPEN:
+                    self._transition(STATE_OPEN)
+
+    def _refresh_state(self, now: float) -> None:
+        """Move de open para half-open quando o período de recuperação expira (requer o lock)."""
+        if self._state == STATE_OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._transition(STATE_HALF_OPEN)
+
+    def _transition(self, state: str) -> None:
+        """Troca de estado e registra a transição (requer o lock)."""
+        print(f"[DEBUG] Circuit breaker {self.name}: {self._state} -> {state}")
+        metrics.inc("llm_circuit_transitions", backend=self.name, to=state)
+        metrics.set_gauge("llm_circuit_state", _STATE_GAUGE[state], backend=self.name)
+        self._state = state
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(backend: str) -> CircuitBreaker:
+    """Retorna o circuit breaker do backend, criando-o com os limites de GEMConfig."""
+    with _breakers_lock:
+        breaker = _breakers.get(backend)
+        if breaker is None:
+            config = GEMConfig.get_resilience_config()
+            breaker = CircuitBreaker(
+                backend,
+                failure_threshold=config["failure_threshold"],
+                recovery_timeout=config["recovery_timeout"],
+            )
+            _breakers[backend] = breaker
+        return breaker
+
+
+def reset_circuit_breakers() -> None:
+    """Descarta todos os circuit breakers (útil em testes)."""
+    with _breakers_lock:
+        _breakers.clear()
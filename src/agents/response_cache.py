@@ -0,0 +1,234 @@
+"""
+Cache de respostas do LLM por correspondência exata.
+
+Retentativas, cliques duplos e reconexões reenviam listas de mensagens
+idênticas ao LLM. A chave do cache é um hash estável de (modelo,
+parâmetros, mensagens); respostas em cache são devolvidas como stream
+para que o caminho SSE do cliente não mude.
+
+Backends disponíveis:
+- memory: LRU em memória do processo
+- sqlite: arquivo SQLite compartilhado entre workers
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..config import GEMConfig
+from ..metrics import metrics
+from .llm_client import LLMChunk, LLMMessage, iter_text_chunks
+
+BACKEND_MEMORY = "memory"
+BACKEND_SQLITE = "sqlite"
+BACKEND_NONE = "none"
+
+
+def cache_key(model: str, params: Dict[str, Any], messages: List[Dict[str, str]]) -> str:
+    """
+    Gera a chave estável de uma chamada ao LLM.
+
+    Args:
+        model: Nome do modelo
+        params: Parâmetros de geração (temperature, max_tokens, ...)
+        messages: Mensagens role/content enviadas
+
+    Returns:
+        Hash SHA-256 em hexadecimal
+    """
+    payload = {
+        "model": model,
+        "params": {key: params[key] for key in sorted(params) if params[key] is not None},
+        "messages": [{"role": m["role"], "content": m["content"]} for m in messages],
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """LRU em memória com TTL e limite de entradas."""
+
+    name = BACKEND_MEMORY
+
+    def __init__(self, max_entries: int = 256, ttl: float = 600.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """Cache em arquivo SQLite com TTL e despejo das entradas menos usadas."""
+
+    name = BACKEND_SQLITE
+
+    def __init__(self, path: str, max_entries: int = 1024, ttl: float = 600.0):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_response_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_response_cache_accessed ON llm_response_cache (accessed_at)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_response_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_response_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.ttl:
+                self._conn.execute("DELETE FROM llm_response_cache WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM llm_response_cache WHERE key IN ("
+                " SELECT key FROM llm_response_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_response_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Cache de respostas com contagem de acertos e falhas.
+
+    Respostas em cache são devolvidas como `LLMMessage` (invoke) ou como
+    uma sequência de `LLMChunk` (stream), o mesmo contrato dos clientes.
+    """
+
+    def __init__(self, backend: Any, replay_chunk_size: int = 24):
+        """
+        Inicializa o cache.
+
+        Args:
+            backend: Backend de armazenamento (MemoryCacheBackend ou SQLiteCacheBackend)
+            replay_chunk_size: Caracteres por chunk ao reproduzir uma resposta em stream
+        """
+        self.backend = backend
+        self.replay_chunk_size = max(1, replay_chunk_size)
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> Optional["ResponseCache"]:
+        """Cria o cache a partir de GEMConfig (None quando desabilitado)."""
+        config = GEMConfig.get_response_cache_config()
+        if config["backend"] == BACKEND_SQLITE:
+            backend: Any = SQLiteCacheBackend(config["path"], config["max_entries"], config["ttl"])
+        elif config["backend"] == BACKEND_MEMORY:
+            backend = MemoryCacheBackend(config["max_entries"], config["ttl"])
+        else:
+            return None
+        return cls(backend, replay_chunk_size=config["replay_chunk_size"])
+
+    def get(self, key: str) -> Optional[str]:
+        """Busca uma resposta e contabiliza o acerto ou a falha."""
+        try:
+            value = self.backend.get(key)
+        except sqlite3.Error as error:
+            print(f"[ERROR] Falha ao ler cache de respostas: {error}")
+            value = None
+
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            hits, misses = self._hits, self._misses
+
+        metrics.inc("llm_cache_requests", result="miss" if value is None else "hit")
+        metrics.set_gauge("llm_cache_hit_ratio", hits / (hits + misses))
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """Armazena uma resposta completa (respostas vazias são ignoradas)."""
+        if not value:
+            return
+        try:
+            self.backend.set(key, value)
+        except sqlite3.Error as error:
+            print(f"[ERROR] Falha ao gravar cache de respostas: {error}")
+
+    def as_message(self, value: str) -> LLMMessage:
+        """Devolve a resposta em cache no formato de `invoke`."""
+        return LLMMessage(value)
+
+    def replay(self, value: str) -> Iterator[LLMChunk]:
+        """Reproduz a resposta em cache como stream de chunks."""
+        return iter_text_chunks(value, self.replay_chunk_size)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna acertos, falhas, taxa de acerto e tamanho atual do cache."""
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        total = hits + misses
+        return {
+            "backend": self.backend.name,
+            "entries": len(self.backend),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+        }
@@ -0,0 +1,66 @@
+"""
+Orçamento do trabalho especulativo.
+
+Depois que um GEM é concluído, o serviço pode gerar antecipadamente a
+abertura do próximo GEM. Essas chamadas são gastas mesmo que o usuário
+nunca continue a jornada, então ficam limitadas a um número de gerações
+por janela de tempo (cada uma com teto de tokens).
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+from ..config import GEMConfig
+from ..metrics import metrics
+
+
+class SpeculativeBudget:
+    """Limite de gerações especulativas em uma janela deslizante."""
+
+    def __init__(self, max_generations: int = 20, window_seconds: float = 3600.0):
+        """
+        Inicializa o orçamento.
+
+        Args:
+            max_generations: Gerações permitidas por janela
+            window_seconds: Tamanho da janela (segundos)
+        """
+        self.max_generations = max(0, max_generations)
+        self.window_seconds = window_seconds
+        self._spent: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "SpeculativeBudget":
+        """Cria o orçamento a partir de GEMConfig."""
+        config = GEMConfig.get_speculation_config()
+        return cls(config["max_generations"], config["window_seconds"])
+
+    def try_acquire(self) -> bool:
+        """Reserva uma geração; retorna False quando o orçamento da janela acabou."""
+        now = time.monotonic()
+        with self._lock:
+            while self._spent and now - self._spent[0] > self.window_seconds:
+                self._spent.popleft()
+            if len(self._spent) >= self.max_generations:
+                metrics.inc("speculative_generations", result="over_budget")
+                return False
+            self._spent.append(now)
+            remaining = self.max_generations - len(self._spent)
+
+        metrics.inc("speculative_generations", result="accepted")
+        metrics.set_gauge("speculative_budget_remaining", remaining)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna o uso atual do orçamento."""
+        now = time.monotonic()
+        with self._lock:
+            spent = sum(1 for at in self._spent if now - at <= self.window_seconds)
+        return {
+            "spent": spent,
+            "max_generations": self.max_generations,
+            "window_seconds": self.window_seconds,
+        }
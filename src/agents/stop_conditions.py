@@ -0,0 +1,155 @@
+"""
+Condições de parada por GEM.
+
+As instruções pedem que cada GEM ENCERRE após o output estruturado, mas
+o modelo frequentemente continua escrevendo (perguntas de follow-up,
+repetição das regras), e esse texto é cobrado e transmitido. Dois
+mecanismos cortam a geração:
+
+- stop sequences enviadas ao provedor (trechos que só aparecem quando o
+  modelo repete as instruções)
+- um detector local no stream que encerra a geração assim que a moldura
+  `════` de fechamento do output estruturado é emitida (depois do ID do
+  GEM e da marca "COMPLETA")
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# Trechos das instruções que o modelo repete quando não encerra
+DEFAULT_STOP_SEQUENCES: Tuple[str, ...] = (
+    "**IMPORTANTE**: Após gerar",
+    "**REGRAS FINAIS**",
+)
+
+COMPLETION_MARKER = "COMPLETA"
+
+# Linha composta apenas pela moldura (terminada por quebra de linha)
+_FRAME_LINE = re.compile(r"^[ \t]*═{8,}[ \t]*\r?\n", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class StopCondition:
+    """Marcas que indicam o fim do output estruturado de um GEM."""
+
+    id_marker: str
+    completion_marker: str = COMPLETION_MARKER
+    stop_sequences: Tuple[str, ...] = DEFAULT_STOP_SEQUENCES
+
+
+GEM_STOP_CONDITIONS: Dict[str, StopCondition] = {
+    "gem1_mestre_mapeamento": StopCondition("MAPA-"),
+    "gem2_diagnosticador_foco": StopCondition("FOCO-"),
+    "gem3_validador_estrategico": StopCondition("VALIDACAO-"),
+    "gem4_laboratorio_cientifico": StopCondition("METODO-"),
+    "gem5_tutor_socratico": StopCondition("CERTIFICACAO-"),
+    "gem6_arquiteto_implementacao": StopCondition("PLANO-"),
+    "gem7_construtor_sistemas": StopCondition("KBF-"),
+}
+
+
+def get_stop_condition(gem_id: str) -> Optional[StopCondition]:
+    """Retorna a condição de parada do GEM (None se não houver)."""
+    return GEM_STOP_CONDITIONS.get(gem_id)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa simples de tokens (~4 caracteres por token)."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def find_output_close(text: str, condition: StopCondition) -> Optional[int]:
+    """
+    Localiza o fim da moldura que fecha o output estruturado.
+
+    Returns:
+        Posição logo após a moldura de fechamento, ou None se ainda não fechou
+    """
+    id_position = text.find(condition.id_marker)
+    if id_position < 0:
+        return None
+
+    completion_position = text.find(condition.completion_marker, id_position)
+    if completion_position < 0:
+        return None
+
+    match = _FRAME_LINE.search(text, completion_position)
+    if not match:
+        return None
+
+    return len(text[:match.end()].rstrip())
+
+
+def trim_after_close(text: str, condition: StopCondition) -> Tuple[str, Optional[str]]:
+    """
+    Separa uma resposta completa em (output até o fechamento, excedente).
+
+    Returns:
+        Tupla (texto a manter, excedente). O excedente é None quando o
+        output estruturado não foi fechado e "" quando a resposta termina
+        na própria moldura.
+    """
+    close = find_output_close(text if text.endswith("\n") else f"{text}\n", condition)
+    if close is None:
+        return text, None
+    return text[:close], text[close:]
+
+
+class StructuredOutputDetector:
+    """
+    Acompanha o stream e sinaliza quando o output estruturado foi fechado.
+
+    Exemplo:
+        detector = StructuredOutputDetector(get_stop_condition(gem_id))
+        for text in chunks:
+            text = detector.feed(text)  # Parte a emitir
+            if detector.closed:
+                break
+    """
+
+    def __init__(self, condition: StopCondition):
+        self.condition = condition
+        self.closed = False
+        self.discarded = ""  # Texto recebido depois da moldura (não emitido)
+        self._text = ""
+
+    def feed(self, text: str) -> str:
+        """Recebe um trecho do stream e retorna a parte que deve ser emitida."""
+        if self.closed:
+            self.discarded += text
+            return ""
+
+        start = len(self._text)
+        self._text += text
+        close = find_output_close(self._text, self.condition)
+        if close is None:
+            return text
+
+        self.closed = True
+        self.discarded = self._text[max(close, start):]
+        return self._text[start:close] if close > start else ""
+
+
+class TailEstimator:
+    """
+    Média móvel (EWMA) do tamanho, em tokens, do que o modelo escreve após o fechamento.
+
+    Alimentada pelas respostas completas (invoke), usada para estimar o
+    que deixou de ser gerado quando um stream é encerrado cedo.
+    """
+
+    def __init__(self, initial_tokens: float = 150.0, alpha: float = 0.2):
+        self.alpha = alpha
+        self._value = initial_tokens
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> float:
+        with self._lock:
+            return self._value
+
+    def observe(self, tokens: int) -> None:
+        with self._lock:
+            self._value = self.alpha * tokens + (1 - self.alpha) * self._value
@@ -2,14 +2,18 @@
 
 from typing import Optional, Dict, Any
 from datetime import datetime
-from .database import get_supabase_client
+from .data_access import offload
+from .database import supabase
+from .token_verifier import TokenVerifier, TokenVerifierUnavailable
 
 
 class AuthService:
     """Gerencia autenticação de usuários via Supabase."""
 
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    def __init__(self, token_verifier: Optional[TokenVerifier] = None):
+        self.supabase = supabase
+        # Verificação local dos JWTs (None: consulta o Supabase a cada token)
+        self.token_verifier = token_verifier or TokenVerifier.from_config()
 
     def sign_up(self, email: str, password: str, full_name: str = "") -> Dict[str, Any]:
         """
@@ -139,6 +143,13 @@ class AuthService:
         Returns:
             Dict com dados do usuário ou None se inválido
         """
+        if self.token_verifier:
+            try:
+                return self.token_verifier.verify(access_token)
+            except TokenVerifierUnavailable:
+                # O verificador registra a falha uma vez por período de espera
+                pass
+
         try:
             response = self.supabase.auth.get_user(access_token)
             if response.user:
@@ -356,3 +367,13 @@ class AuthService:
                 "success": False,
                 "error": f"Erro ao processar callback: {str(e)}"
             }
+
+    # Versões assíncronas (rotas async: a chamada ao Supabase roda fora do event loop)
+    asign_up = offload(sign_up)
+    asign_in = offload(sign_in)
+    asign_out = offload(sign_out)
+    aget_user_from_token = offload(get_user_from_token)
+    aget_user_subscription = offload(get_user_subscription)
+    aget_user_usage = offload(get_user_usage)
+    alogin_google = offload(login_google)
+    ahandle_oauth_callback = offload(handle_oauth_callback)
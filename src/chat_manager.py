@@ -1,11 +1,25 @@
 """Gerenciamento de conversas e integração com limites."""
 
-from typing import Dict, Any, List, Optional
-from datetime import datetime
-from .database import get_supabase_client
-from .limits import check_user_limit, increment_usage
-
-supabase = get_supabase_client()
+import base64
+import json
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from .config import GEMConfig
+from .data_access import offload
+from .database import supabase
+from .limits import consume_quota
+from .transcripts import TranscriptWriter
+from .worker_files import claim_worker_file, release_worker_file
+
+_transcript_writer: Optional[TranscriptWriter] = None
+_transcript_writer_lock = threading.Lock()
+
+# Colunas devolvidas pela API (a barra lateral não precisa de `user_id`)
+CONVERSATION_COLUMNS = (
+    "id,title,created_at,updated_at,message_count,last_message_at,last_message_preview"
+)
+MESSAGE_COLUMNS = "id,role,content,created_at"
 
 
 def create_conversation(user_id: str, title: str = "Nova Conversa") -> Optional[str]:
@@ -55,17 +69,10 @@ def save_message(
         True se sucesso
     """
     try:
-        supabase.table("messages").insert({
-            "conversation_id": conversation_id,
-            "user_id": user_id,
-            "role": role,
-            "content": content
-        }).execute()
-
-        # Atualizar timestamp da conversa
-        supabase.table("conversations").update({
-            "updated_at": datetime.now().isoformat()
-        }).eq("id", conversation_id).execute()
+        saved = save_messages(conversation_id, user_id, [{"role": role, "content": content}])
+        if saved is None:
+            print(f"[ERROR] Conversa {conversation_id} não encontrada para o usuário")
+            return False
 
         print(f"[DEBUG] Mensagem salva: {role} em {conversation_id}")
         return True
@@ -75,6 +82,137 @@ def save_message(
         return False
 
 
+def append_messages(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Insere mensagens e atualiza os metadados das conversas (RPC `append_messages`).
+
+    Uma ida ao banco para qualquer lote: contagem, última mensagem, prévia
+    e título automático são atualizados na mesma transação, sem reler as
+    mensagens. Conversas de outro usuário são ignoradas e ids repetidos não
+    entram de novo.
+
+    Args:
+        records: Registros com `conversation_id`, `user_id`, `role`,
+            `content`, `created_at` e (opcional) `id`, em ordem
+
+    Returns:
+        Dict com `conversations` (IDs das conversas do usuário) e `messages`
+        (mensagens inseridas)
+
+    Raises:
+        Exception: Erros do Supabase são propagados ao chamador
+    """
+    result = supabase.rpc("append_messages", {"p_messages": records}).execute()
+    return result.data or {"conversations": [], "messages": []}
+
+
+def save_messages(
+    conversation_id: str,
+    user_id: str,
+    messages: List[Dict[str, str]]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Salva um lote de mensagens (ex: pergunta e resposta) de uma conversa.
+
+    Cada mensagem recebe um `created_at` crescente para manter a ordem do
+    lote; a posse da conversa e os metadados são tratados por
+    `append_messages`.
+
+    Args:
+        conversation_id: ID da conversa
+        user_id: ID do usuário
+        messages: Lista de dicts com `role` e `content`, em ordem
+
+    Returns:
+        Mensagens criadas, ou None se a conversa não pertencer ao usuário
+
+    Raises:
+        Exception: Erros do Supabase são propagados ao chamador
+    """
+    if not messages:
+        conversation = supabase.table("conversations").select("id")\
+            .eq("id", conversation_id).eq("user_id", user_id).execute()
+        return [] if conversation.data else None
+
+    now = datetime.now(timezone.utc)
+    result = append_messages([
+        {
+            "conversation_id": conversation_id,
+            "user_id": user_id,
+            "role": message["role"],
+            "content": message["content"],
+            "created_at": (now + timedelta(microseconds=index)).isoformat()
+        }
+        for index, message in enumerate(messages)
+    ])
+
+    if conversation_id not in result["conversations"]:
+        return None
+    return result["messages"]
+
+
+def write_transcript_batch(records: List[Dict[str, Any]]) -> None:
+    """
+    Grava um lote do `TranscriptWriter` (mensagens de várias conversas).
+
+    Uma única chamada a `append_messages`: mensagens de conversas de outro
+    usuário são descartadas e, como o `id` vem do envio, gravar o mesmo lote
+    de novo não duplica mensagens nem a contagem.
+
+    Args:
+        records: Registros com `id`, `conversation_id`, `user_id`, `role`,
+            `content` e `created_at`, em ordem
+
+    Raises:
+        Exception: Erros do Supabase são propagados (o writer tenta de novo)
+    """
+    result = append_messages(records)
+
+    owned = set(result["conversations"])
+    for conversation_id in {record["conversation_id"] for record in records} - owned:
+        print(f"[ERROR] Mensagens descartadas: conversa {conversation_id} não pertence ao usuário")
+
+    print(f"[DEBUG] {len(result['messages'])} mensagens gravadas em lote ({len(owned)} conversas)")
+
+
+def get_transcript_writer() -> Optional[TranscriptWriter]:
+    """Retorna o writer de mensagens do processo (None se desabilitado)."""
+    global _transcript_writer
+    config = GEMConfig.get_transcript_config()
+    if not config["enabled"]:
+        return None
+
+    with _transcript_writer_lock:
+        if _transcript_writer is None:
+            _transcript_writer = TranscriptWriter(
+                write_batch=write_transcript_batch,
+                max_queue=config["queue_size"],
+                batch_size=config["batch_size"],
+                flush_interval=config["flush_interval"],
+                max_retries=config["max_retries"],
+                backoff_max=config["backoff_max"],
+                # Um spill por worker: o replay reescreve o arquivo inteiro
+                spill_path=claim_worker_file(config["spill_path"]) if config["spill_path"] else None,
+            )
+        return _transcript_writer
+
+
+def transcript_stats() -> Optional[Dict[str, Any]]:
+    """Retorna as estatísticas do writer de mensagens (None se ainda não foi criado)."""
+    writer = _transcript_writer
+    return writer.stats() if writer else None
+
+
+def close_transcript_writer() -> None:
+    """Grava as mensagens pendentes e encerra o writer."""
+    global _transcript_writer
+    with _transcript_writer_lock:
+        writer, _transcript_writer = _transcript_writer, None
+    if writer:
+        writer.close()
+        release_worker_file(writer.spill_path)
+
+
 def load_conversation_history(conversation_id: str) -> List[Dict[str, Any]]:
     """
     Carregar histórico de mensagens.
@@ -146,8 +284,10 @@ def update_conversation_title(
         True se sucesso
     """
     try:
+        # Título escolhido pelo usuário não é sobrescrito pelo automático
         result = supabase.table("conversations").update({
             "title": title,
+            "title_set": True,
             "updated_at": datetime.now().isoformat()
         }).eq("id", conversation_id).eq("user_id", user_id).execute()
 
@@ -195,9 +335,10 @@ def process_chat_message(
     Returns:
         Dict com resposta ou erro
     """
+    consumed = False
     try:
-        # 1. Verificar limite
-        limit_check = check_user_limit(user_id, "messages")
+        # 1. Verificar limite e contar a mensagem (uma operação atômica)
+        limit_check = consume_quota(user_id, "messages")
         if not limit_check["allowed"]:
             return {
                 "error": True,
@@ -206,43 +347,37 @@ def process_chat_message(
                 "remaining": 0,
                 "limit": limit_check.get("limit", 50)
             }
+        consumed = True
 
         # 2. Obter ou criar conversa
         conv_id = get_or_create_conversation(user_id, conversation_id)
         if not conv_id:
+            consume_quota(user_id, "messages", amount=-1)
             return {
                 "error": True,
                 "message": "Erro ao criar conversa"
             }
 
-        # 3. Salvar mensagem do usuário
-        save_message(conv_id, user_id, "user", message)
-
-        # 4. Processar com agente (se fornecido)
+        # 3. Processar com agente (se fornecido)
         if agent_processor:
             response = agent_processor(message)
         else:
             # Resposta padrão se não houver processador
             response = "Agente não configurado. Configure agent_processor."
 
-        # 5. Salvar resposta do assistente
-        save_message(conv_id, user_id, "assistant", response)
+        # 4. Salvar pergunta e resposta em um lote (contagem, prévia e título
+        # automático da primeira mensagem são atualizados junto, sem reler o histórico)
+        save_messages(conv_id, user_id, [
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": response}
+        ])
 
-        # 6. Auto-gerar título se for primeira mensagem
-        messages = load_conversation_history(conv_id)
-        if len(messages) <= 2:  # user + assistant
-            title = auto_generate_title(conv_id, message)
-            update_conversation_title(conv_id, user_id, title)
-
-        # 7. Incrementar uso
-        increment_usage(user_id, "messages")
-
-        # 8. Retornar sucesso
+        # 5. Retornar sucesso
         return {
             "error": False,
             "response": response,
             "conversation_id": conv_id,
-            "remaining": limit_check["remaining"] - 1,
+            "remaining": limit_check["remaining"],
             "limit": limit_check.get("limit", 50),
             "is_premium": limit_check.get("is_premium", False)
         }
@@ -251,6 +386,9 @@ def process_chat_message(
         print(f"[ERROR] Erro ao processar chat: {e}")
         import traceback
         traceback.print_exc()
+        if consumed:
+            # Mensagem que falhou não conta para o limite
+            consume_quota(user_id, "messages", amount=-1)
         return {
             "error": True,
             "message": f"Erro ao processar mensagem: {str(e)}"
@@ -283,27 +421,141 @@ def delete_conversation(conversation_id: str, user_id: str) -> bool:
         return False
 
 
-def list_user_conversations(user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+def encode_cursor(timestamp: str, row_id: str) -> str:
     """
-    Lista conversas do usuário.
+    Gera o cursor opaco de uma página a partir da última linha entregue.
 
     Args:
-        user_id: ID do usuário
-        limit: Número máximo de conversas
+        timestamp: `updated_at` (conversas) ou `created_at` (mensagens) da linha
+        row_id: ID da linha (desempate entre timestamps iguais)
 
     Returns:
-        Lista de conversas
+        Cursor em base64 url-safe
+    """
+    raw = json.dumps([timestamp, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Lê um cursor gerado por `encode_cursor`.
+
+    Raises:
+        ValueError: Se o cursor for inválido
     """
     try:
-        conversations = supabase.table("conversations")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .order("updated_at", desc=True)\
-            .limit(limit)\
-            .execute()
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError) as error:
+        raise ValueError("Cursor inválido") from error
+    if not isinstance(timestamp, str) or not isinstance(row_id, str):
+        raise ValueError("Cursor inválido")
+    return timestamp, row_id
+
+
+def _keyset_filter(column: str, cursor: str) -> str:
+    """Filtro `or` do PostgREST para as linhas depois do cursor em ordem decrescente."""
+    timestamp, row_id = decode_cursor(cursor)
+    # Aspas: timestamps têm ':' '.' '+', reservados na sintaxe do `or`
+    timestamp = timestamp.replace('"', "")
+    row_id = row_id.replace('"', "")
+    return f'{column}.lt."{timestamp}",and({column}.eq."{timestamp}",id.lt."{row_id}")'
+
+
+def conversations_page_query(user_id: str, limit: int = 50, cursor: Optional[str] = None):
+    """
+    Monta a consulta de uma página de conversas (mais recentes primeiro).
 
-        return conversations.data if conversations.data else []
+    Busca `limit + 1` linhas: a extra só indica se há uma próxima página.
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    # Cursor inválido falha antes de tocar no cliente do banco
+    keyset = _keyset_filter("updated_at", cursor) if cursor else None
+    query = supabase.table("conversations")\
+        .select(CONVERSATION_COLUMNS)\
+        .eq("user_id", user_id)
+
+    if keyset:
+        query = query.or_(keyset)
+
+    return query\
+        .order("updated_at", desc=True)\
+        .order("id", desc=True)\
+        .limit(limit + 1)
+
+
+def messages_page_query(conversation_id: str, limit: int = 50, before: Optional[str] = None):
+    """
+    Monta a consulta de uma janela de mensagens (das mais novas para as mais antigas).
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    # Cursor inválido falha antes de tocar no cliente do banco
+    keyset = _keyset_filter("created_at", before) if before else None
+    query = supabase.table("messages")\
+        .select(MESSAGE_COLUMNS)\
+        .eq("conversation_id", conversation_id)
+
+    if keyset:
+        query = query.or_(keyset)
+
+    return query\
+        .order("created_at", desc=True)\
+        .order("id", desc=True)\
+        .limit(limit + 1)
+
+
+def conversations_page(rows: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """Separa a página de conversas e o cursor da próxima (None na última)."""
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and page:
+        last = page[-1]
+        next_cursor = encode_cursor(last["updated_at"], last["id"])
+    return {"conversations": page, "next_cursor": next_cursor}
+
+
+def messages_page(rows: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """Janela de mensagens em ordem cronológica e o cursor das mais antigas."""
+    window = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and window:
+        oldest = window[-1]
+        next_cursor = encode_cursor(oldest["created_at"], oldest["id"])
+    return {"messages": list(reversed(window)), "next_cursor": next_cursor}
+
+
+def list_user_conversations(
+    user_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Lista uma página das conversas do usuário.
+
+    Args:
+        user_id: ID do usuário
+        limit: Número máximo de conversas na página
+        cursor: `next_cursor` da página anterior (None para a primeira)
+
+    Returns:
+        Dict com `conversations` e `next_cursor` (None na última página)
+    """
+    try:
+        conversations = conversations_page_query(user_id, limit, cursor).execute()
+        return conversations_page(conversations.data or [], limit)
 
     except Exception as e:
         print(f"[ERROR] Erro ao listar conversas: {e}")
-        return []
+        return {"conversations": [], "next_cursor": None}
+
+
+# Versões assíncronas (rotas async: a chamada ao Supabase roda fora do event loop)
+acreate_conversation = offload(create_conversation)
+asave_message = offload(save_message)
+asave_messages = offload(save_messages)
+aload_conversation_history = offload(load_conversation_history)
+aprocess_chat_message = offload(process_chat_message)
@@ -19,6 +19,127 @@ class GEMConfig:
     LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.7"))  # Balanceado para criatividade e consistência
     LLM_MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", "2048"))  # Máximo de tokens na resposta
     LLM_REQUEST_TIMEOUT: float = float(os.getenv("LLM_REQUEST_TIMEOUT", "60.0"))  # Timeout adequado para respostas completas
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "langchain")  # 'langchain' (ChatOpenAI) ou 'direct' (cliente HTTP enxuto)
+
+    # Controle de admissão - limita chamadas simultâneas ao LLM por worker
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))  # Chamadas simultâneas ao provedor
+    LLM_QUEUE_MAX_SIZE: int = int(os.getenv("LLM_QUEUE_MAX_SIZE", "32"))  # Solicitações aguardando na fila
+    LLM_QUEUE_TIMEOUT: float = float(os.getenv("LLM_QUEUE_TIMEOUT", "30.0"))  # Espera máxima na fila (segundos)
+    LLM_QUEUE_POLL_INTERVAL: float = float(os.getenv("LLM_QUEUE_POLL_INTERVAL", "1.0"))  # Intervalo dos eventos 'queued'
+
+    # Degradação adaptativa - perfil mais leve quando a fila ou o TTFT sobem
+    DEGRADE_QUEUE_THRESHOLD: int = int(os.getenv("DEGRADE_QUEUE_THRESHOLD", "8"))  # Fila que dispara a degradação
+    DEGRADE_TTFT_THRESHOLD: float = float(os.getenv("DEGRADE_TTFT_THRESHOLD", "8.0"))  # TTFT médio (s) que dispara a degradação
+    DEGRADE_RECOVERY_RATIO: float = float(os.getenv("DEGRADE_RECOVERY_RATIO", "0.5"))  # Fração dos limites para voltar ao normal
+    DEGRADE_MIN_HOLD_SECONDS: float = float(os.getenv("DEGRADE_MIN_HOLD_SECONDS", "30.0"))  # Tempo mínimo em modo degradado
+    DEGRADED_HISTORY_WINDOW: int = int(os.getenv("DEGRADED_HISTORY_WINDOW", "6"))  # Mensagens recentes mantidas
+    DEGRADED_MAX_TOKENS: int = int(os.getenv("DEGRADED_MAX_TOKENS", "1024"))  # Máximo de tokens em modo degradado
+    DEGRADED_MODEL: str = os.getenv("DEGRADED_MODEL", "")  # Modelo mais rápido (vazio = mesmo modelo)
+
+    # Resiliência - falha rápida durante quedas do provedor
+    LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "5.0"))  # Timeout de conexão (segundos)
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))  # Novas tentativas antes do primeiro token
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))  # Intervalo base do backoff
+    LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "4.0"))  # Teto do backoff
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # Falhas que abrem o circuito
+    CIRCUIT_RECOVERY_TIMEOUT: float = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", "30.0"))  # Tempo em aberto antes do teste
+
+    # Pool HTTP compartilhado por todos os clientes de LLM
+    HTTP_POOL_MAX_CONNECTIONS: int = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "20"))  # Conexões simultâneas
+    HTTP_POOL_MAX_KEEPALIVE: int = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "10"))  # Conexões ociosas mantidas
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "120.0"))  # Expiração do keep-alive (s)
+    HTTP_POOL_HTTP2: bool = os.getenv("HTTP_POOL_HTTP2", "true").lower() == "true"  # HTTP/2 quando `h2` estiver instalado
+    HTTP_POOL_WARMUP: bool = os.getenv("HTTP_POOL_WARMUP", "true").lower() == "true"  # Aquece a conexão no startup
+
+    # Cache de respostas do LLM (mensagens idênticas não são reenviadas ao provedor)
+    LLM_CACHE_BACKEND: str = os.getenv("LLM_CACHE_BACKEND", "memory")  # 'memory', 'sqlite' ou 'none'
+    LLM_CACHE_TTL: float = float(os.getenv("LLM_CACHE_TTL", "600.0"))  # Validade das respostas (segundos)
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))  # Entradas antes do despejo (LRU)
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "llm_response_cache.sqlite3")  # Arquivo do backend sqlite
+    LLM_CACHE_REPLAY_CHUNK_SIZE: int = int(os.getenv("LLM_CACHE_REPLAY_CHUNK_SIZE", "24"))  # Caracteres por chunk reproduzido
+
+    # Aberturas pré-computadas dos GEMs (primeiro turno servido sem chamar o LLM)
+    OPENING_CACHE_ENABLED: bool = os.getenv("OPENING_CACHE_ENABLED", "true").lower() == "true"
+    OPENING_CACHE_MAX_ENTRIES: int = int(os.getenv("OPENING_CACHE_MAX_ENTRIES", "200"))  # Aberturas mantidas no arquivo
+    OPENING_CACHE_WORKERS: int = int(os.getenv("OPENING_CACHE_WORKERS", "1"))  # Gerações simultâneas em background
+    OPENING_PRECOMPUTE_ON_STARTUP: bool = os.getenv("OPENING_PRECOMPUTE_ON_STARTUP", "true").lower() == "true"
+
+    # Aquecimento especulativo do próximo GEM após uma conclusão
+    SPECULATIVE_WARMUP_ENABLED: bool = os.getenv("SPECULATIVE_WARMUP_ENABLED", "true").lower() == "true"  # Prompt + conexão
+    SPECULATIVE_OPENING_ENABLED: bool = os.getenv("SPECULATIVE_OPENING_ENABLED", "false").lower() == "true"  # Gera a abertura
+    SPECULATIVE_MAX_GENERATIONS: int = int(os.getenv("SPECULATIVE_MAX_GENERATIONS", "20"))  # Gerações por janela
+    SPECULATIVE_WINDOW_SECONDS: float = float(os.getenv("SPECULATIVE_WINDOW_SECONDS", "3600.0"))  # Janela do orçamento
+    SPECULATIVE_MAX_TOKENS: int = int(os.getenv("SPECULATIVE_MAX_TOKENS", "512"))  # Teto de tokens por geração
+
+    # Condições de parada por GEM (stop sequences + fim do output estruturado)
+    GEM_STOP_ENABLED: bool = os.getenv("GEM_STOP_ENABLED", "true").lower() == "true"
+    GEM_STOP_TAIL_TOKENS: float = float(os.getenv("GEM_STOP_TAIL_TOKENS", "150"))  # Estimativa inicial do texto após o fechamento
+
+    # Painel multi-modelo (GEM 4 - Laboratório Científico)
+    PANEL_ENABLED: bool = os.getenv("PANEL_ENABLED", "false").lower() == "true"
+    PANEL_GEMS: str = os.getenv("PANEL_GEMS", "gem4_laboratorio_cientifico")  # GEMs que usam o painel (separados por vírgula)
+    PANEL_MODELS: str = os.getenv("PANEL_MODELS", "")  # Modelos do painel (vazio = grupos do PANEL_CONFIG_PATH)
+    PANEL_CONFIG_PATH: str = os.getenv("PANEL_CONFIG_PATH", "config/litellm_config.yaml")
+    PANEL_BASE_URL: str = os.getenv("PANEL_BASE_URL", "")  # Proxy LiteLLM (vazio = QWEN_BASE_URL)
+    PANEL_API_KEY: str = os.getenv("PANEL_API_KEY", "")  # Chave do proxy (vazio = QWEN_API_KEY)
+    PANEL_TIMEOUT: float = float(os.getenv("PANEL_TIMEOUT", "45.0"))  # Tempo máximo por painelista (segundos)
+    PANEL_SYNTHESIS: bool = os.getenv("PANEL_SYNTHESIS", "true").lower() == "true"  # Síntese final com o LLM principal
+
+    # Chaves de idempotência dos endpoints de chat (header Idempotency-Key)
+    IDEMPOTENCY_ENABLED: bool = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+    IDEMPOTENCY_TTL: float = float(os.getenv("IDEMPOTENCY_TTL", "300.0"))  # Tempo que um resultado concluído é mantido (segundos)
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "1000"))  # Chaves mantidas em memória
+
+    # Streams SSE retomáveis (Last-Event-ID)
+    STREAM_BUFFER_SIZE: int = int(os.getenv("STREAM_BUFFER_SIZE", "2048"))  # Eventos mantidos por stream
+    STREAM_RESUME_GRACE: float = float(os.getenv("STREAM_RESUME_GRACE", "120.0"))  # Tempo retomável após o fim (segundos)
+    STREAM_HEARTBEAT_INTERVAL: float = float(os.getenv("STREAM_HEARTBEAT_INTERVAL", "10.0"))  # Heartbeat/progresso sem tokens (segundos)
+
+    # Compressão HTTP e arquivos estáticos
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1000"))  # Tamanho mínimo para gzip (bytes)
+    COMPRESSION_LEVEL: int = int(os.getenv("COMPRESSION_LEVEL", "6"))  # Nível do gzip dinâmico (1-9)
+    COMPRESSION_SSE_MODE: str = os.getenv("COMPRESSION_SSE_MODE", "off")  # SSE: "off" (sem gzip) ou "flush" (gzip por frame)
+    STATIC_PRECOMPRESS: bool = os.getenv("STATIC_PRECOMPRESS", "true").lower() == "true"  # gzip/brotli dos estáticos no startup
+
+    # Verificação local dos tokens do Supabase (sem ida à rede por requisição)
+    AUTH_LOCAL_VERIFY: bool = os.getenv("AUTH_LOCAL_VERIFY", "true").lower() == "true"
+    SUPABASE_JWT_SECRET: str = os.getenv("SUPABASE_JWT_SECRET", "")  # Segredo JWT do projeto (HS256)
+    # JWKS só quando configurado: projetos com o segredo legado (HS256) servem um JWKS vazio
+    AUTH_JWKS_URL: str = os.getenv("AUTH_JWKS_URL", "")  # Chaves públicas (usado sem SUPABASE_JWT_SECRET)
+    AUTH_JWKS_COOLDOWN: float = float(os.getenv("AUTH_JWKS_COOLDOWN", "60.0"))  # Espera após falha do JWKS (segundos)
+    AUTH_JWT_AUDIENCE: str = os.getenv("AUTH_JWT_AUDIENCE", "authenticated")
+    AUTH_TOKEN_CACHE_TTL: float = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300.0"))  # Tempo máximo de um token no cache (segundos)
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+    # Acesso ao Supabase fora do event loop
+    DB_POOL_WORKERS: int = int(os.getenv("DB_POOL_WORKERS", "16"))  # Threads dedicadas às chamadas ao banco
+    LOOP_LAG_INTERVAL: float = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))  # Amostragem do atraso do event loop (0 desativa)
+
+    # Cliente do Supabase (criado por processo na primeira chamada, não no import)
+    SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
+    SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
+    SUPABASE_POOL_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "32"))  # >= DB_POOL_WORKERS
+    SUPABASE_POOL_MAX_KEEPALIVE: int = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "16"))  # Conexões ociosas mantidas
+    SUPABASE_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("SUPABASE_POOL_KEEPALIVE_EXPIRY", "60.0"))  # Expiração do keep-alive (s)
+    SUPABASE_TIMEOUT: float = float(os.getenv("SUPABASE_TIMEOUT", "30.0"))  # Timeout das chamadas ao PostgREST (segundos)
+    SUPABASE_WARMUP: bool = os.getenv("SUPABASE_WARMUP", "true").lower() == "true"  # Abre a conexão no startup
+
+    # Motor de cota: contadores em memória gravados em lote
+    QUOTA_ENGINE_ENABLED: bool = os.getenv("QUOTA_ENGINE_ENABLED", "true").lower() == "true"
+    QUOTA_CACHE_TTL: float = float(os.getenv("QUOTA_CACHE_TTL", "60.0"))  # Recarga de assinatura/uso do banco (segundos)
+    QUOTA_FLUSH_INTERVAL: float = float(os.getenv("QUOTA_FLUSH_INTERVAL", "2.0"))  # Envio dos incrementos em lote (segundos)
+    QUOTA_JOURNAL_PATH: str = os.getenv("QUOTA_JOURNAL_PATH", "quota_journal.jsonl")  # Journal local, um slot por worker (vazio desativa)
+    QUOTA_JOURNAL_FSYNC: bool = os.getenv("QUOTA_JOURNAL_FSYNC", "true").lower() == "true"
+    QUOTA_MAX_ENTRIES: int = int(os.getenv("QUOTA_MAX_ENTRIES", "10000"))  # Usuários mantidos em memória
+
+    # Gravação das mensagens do chat em segundo plano
+    TRANSCRIPT_WRITER_ENABLED: bool = os.getenv("TRANSCRIPT_WRITER_ENABLED", "true").lower() == "true"
+    TRANSCRIPT_QUEUE_SIZE: int = int(os.getenv("TRANSCRIPT_QUEUE_SIZE", "5000"))  # Mensagens em memória (excedente vai ao spill)
+    TRANSCRIPT_BATCH_SIZE: int = int(os.getenv("TRANSCRIPT_BATCH_SIZE", "100"))
+    TRANSCRIPT_FLUSH_INTERVAL: float = float(os.getenv("TRANSCRIPT_FLUSH_INTERVAL", "0.5"))  # Espera máxima na fila (segundos)
+    TRANSCRIPT_MAX_RETRIES: int = int(os.getenv("TRANSCRIPT_MAX_RETRIES", "3"))
+    TRANSCRIPT_BACKOFF_MAX: float = float(os.getenv("TRANSCRIPT_BACKOFF_MAX", "30.0"))
+    TRANSCRIPT_SPILL_PATH: str = os.getenv("TRANSCRIPT_SPILL_PATH", "transcripts_spill.jsonl")  # Um slot por worker (vazio descarta com o banco fora)
 
     @classmethod
     def get_llm_config(cls) -> dict:
@@ -30,4 +151,191 @@ class GEMConfig:
             "timeout": cls.LLM_REQUEST_TIMEOUT,
             "api_key": cls.QWEN_API_KEY,
             "base_url": cls.QWEN_BASE_URL,
-        }
\ No newline at end of file
+        }
+
+    @classmethod
+    def get_admission_config(cls) -> dict:
+        """Retorna a configuração do controle de admissão como dicionário."""
+        return {
+            "max_concurrency": cls.LLM_MAX_CONCURRENCY,
+            "max_queue_size": cls.LLM_QUEUE_MAX_SIZE,
+            "queue_timeout": cls.LLM_QUEUE_TIMEOUT,
+            "poll_interval": cls.LLM_QUEUE_POLL_INTERVAL,
+        }
+
+    @classmethod
+    def get_degradation_config(cls) -> dict:
+        """Retorna a configuração da degradação adaptativa como dicionário."""
+        return {
+            "queue_threshold": cls.DEGRADE_QUEUE_THRESHOLD,
+            "ttft_threshold": cls.DEGRADE_TTFT_THRESHOLD,
+            "recovery_ratio": cls.DEGRADE_RECOVERY_RATIO,
+            "min_hold_seconds": cls.DEGRADE_MIN_HOLD_SECONDS,
+            "history_window": cls.DEGRADED_HISTORY_WINDOW,
+            "max_tokens": cls.DEGRADED_MAX_TOKENS,
+            "model": cls.DEGRADED_MODEL,
+        }
+
+    @classmethod
+    def get_resilience_config(cls) -> dict:
+        """Retorna a configuração de retry e circuit breaker como dicionário."""
+        return {
+            "connect_timeout": cls.LLM_CONNECT_TIMEOUT,
+            "max_retries": cls.LLM_MAX_RETRIES,
+            "retry_base_delay": cls.LLM_RETRY_BASE_DELAY,
+            "retry_max_delay": cls.LLM_RETRY_MAX_DELAY,
+            "failure_threshold": cls.CIRCUIT_FAILURE_THRESHOLD,
+            "recovery_timeout": cls.CIRCUIT_RECOVERY_TIMEOUT,
+        }
+
+    @classmethod
+    def get_http_pool_config(cls) -> dict:
+        """Retorna a configuração do pool HTTP compartilhado como dicionário."""
+        return {
+            "max_connections": cls.HTTP_POOL_MAX_CONNECTIONS,
+            "max_keepalive_connections": cls.HTTP_POOL_MAX_KEEPALIVE,
+            "keepalive_expiry": cls.HTTP_POOL_KEEPALIVE_EXPIRY,
+            "http2": cls.HTTP_POOL_HTTP2,
+            "warmup": cls.HTTP_POOL_WARMUP,
+        }
+
+    @classmethod
+    def get_response_cache_config(cls) -> dict:
+        """Retorna a configuração do cache de respostas do LLM como dicionário."""
+        return {
+            "backend": cls.LLM_CACHE_BACKEND.lower(),
+            "ttl": cls.LLM_CACHE_TTL,
+            "max_entries": cls.LLM_CACHE_MAX_ENTRIES,
+            "path": cls.LLM_CACHE_PATH,
+            "replay_chunk_size": cls.LLM_CACHE_REPLAY_CHUNK_SIZE,
+        }
+
+    @classmethod
+    def get_opening_cache_config(cls) -> dict:
+        """Retorna a configuração das aberturas pré-computadas como dicionário."""
+        return {
+            "enabled": cls.OPENING_CACHE_ENABLED,
+            "max_entries": cls.OPENING_CACHE_MAX_ENTRIES,
+            "max_workers": cls.OPENING_CACHE_WORKERS,
+            "precompute_on_startup": cls.OPENING_PRECOMPUTE_ON_STARTUP,
+        }
+
+    @classmethod
+    def get_speculation_config(cls) -> dict:
+        """Retorna a configuração do aquecimento especulativo como dicionário."""
+        return {
+            "warmup_enabled": cls.SPECULATIVE_WARMUP_ENABLED,
+            "opening_enabled": cls.SPECULATIVE_OPENING_ENABLED,
+            "max_generations": cls.SPECULATIVE_MAX_GENERATIONS,
+            "window_seconds": cls.SPECULATIVE_WINDOW_SECONDS,
+            "max_tokens": cls.SPECULATIVE_MAX_TOKENS,
+        }
+
+    @classmethod
+    def get_stop_config(cls) -> dict:
+        """Retorna a configuração das condições de parada como dicionário."""
+        return {
+            "enabled": cls.GEM_STOP_ENABLED,
+            "tail_tokens": cls.GEM_STOP_TAIL_TOKENS,
+        }
+
+    @classmethod
+    def get_panel_config(cls) -> dict:
+        """Retorna a configuração do painel multi-modelo como dicionário."""
+        return {
+            "enabled": cls.PANEL_ENABLED,
+            "gems": [gem.strip() for gem in cls.PANEL_GEMS.split(",") if gem.strip()],
+            "models": [model.strip() for model in cls.PANEL_MODELS.split(",") if model.strip()],
+            "config_path": cls.PANEL_CONFIG_PATH,
+            "base_url": cls.PANEL_BASE_URL,
+            "api_key": cls.PANEL_API_KEY,
+            "timeout": cls.PANEL_TIMEOUT,
+            "synthesis": cls.PANEL_SYNTHESIS,
+        }
+
+    @classmethod
+    def get_idempotency_config(cls) -> dict:
+        """Retorna a configuração das chaves de idempotência como dicionário."""
+        return {
+            "enabled": cls.IDEMPOTENCY_ENABLED,
+            "ttl": cls.IDEMPOTENCY_TTL,
+            "max_entries": cls.IDEMPOTENCY_MAX_ENTRIES,
+        }
+
+    @classmethod
+    def get_stream_config(cls) -> dict:
+        """Retorna a configuração dos streams retomáveis como dicionário."""
+        return {
+            "buffer_size": cls.STREAM_BUFFER_SIZE,
+            "resume_grace": cls.STREAM_RESUME_GRACE,
+            "heartbeat_interval": cls.STREAM_HEARTBEAT_INTERVAL,
+        }
+
+    @classmethod
+    def get_compression_config(cls) -> dict:
+        """Retorna a configuração de compressão como dicionário."""
+        return {
+            "minimum_size": cls.COMPRESSION_MIN_SIZE,
+            "compresslevel": cls.COMPRESSION_LEVEL,
+            "sse_mode": cls.COMPRESSION_SSE_MODE,
+            "static_precompress": cls.STATIC_PRECOMPRESS,
+        }
+
+    @classmethod
+    def get_auth_config(cls) -> dict:
+        """Retorna a configuração da verificação de tokens como dicionário."""
+        return {
+            "local_verify": cls.AUTH_LOCAL_VERIFY,
+            "jwt_secret": cls.SUPABASE_JWT_SECRET,
+            "jwks_url": cls.AUTH_JWKS_URL,
+            "jwks_cooldown": cls.AUTH_JWKS_COOLDOWN,
+            "audience": cls.AUTH_JWT_AUDIENCE,
+            "cache_ttl": cls.AUTH_TOKEN_CACHE_TTL,
+            "cache_max_entries": cls.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+        }
+
+    @classmethod
+    def get_data_access_config(cls) -> dict:
+        """Retorna a configuração do acesso ao banco e do monitor do event loop."""
+        return {
+            "pool_workers": cls.DB_POOL_WORKERS,
+            "loop_lag_interval": cls.LOOP_LAG_INTERVAL,
+        }
+
+    @classmethod
+    def get_supabase_config(cls) -> dict:
+        """Retorna a configuração do cliente do Supabase e do seu pool HTTP."""
+        return {
+            "url": cls.SUPABASE_URL,
+            "key": cls.SUPABASE_KEY,
+            "max_connections": cls.SUPABASE_POOL_MAX_CONNECTIONS,
+            "max_keepalive_connections": cls.SUPABASE_POOL_MAX_KEEPALIVE,
+            "keepalive_expiry": cls.SUPABASE_POOL_KEEPALIVE_EXPIRY,
+            "timeout": cls.SUPABASE_TIMEOUT,
+            "warmup": cls.SUPABASE_WARMUP,
+        }
+
+    @classmethod
+    def get_quota_config(cls) -> dict:
+        """Retorna a configuração do motor de cota como dicionário."""
+        return {
+            "enabled": cls.QUOTA_ENGINE_ENABLED,
+            "ttl": cls.QUOTA_CACHE_TTL,
+            "flush_interval": cls.QUOTA_FLUSH_INTERVAL,
+            "journal_path": cls.QUOTA_JOURNAL_PATH,
+            "journal_fsync": cls.QUOTA_JOURNAL_FSYNC,
+            "max_entries": cls.QUOTA_MAX_ENTRIES,
+        }
+
+    @classmethod
+    def get_transcript_config(cls) -> dict:
+        """Retorna a configuração da gravação das mensagens em segundo plano."""
+        return {
+            "enabled": cls.TRANSCRIPT_WRITER_ENABLED,
+            "queue_size": cls.TRANSCRIPT_QUEUE_SIZE,
+            "batch_size": cls.TRANSCRIPT_BATCH_SIZE,
+            "flush_interval": cls.TRANSCRIPT_FLUSH_INTERVAL,
+            "max_retries": cls.TRANSCRIPT_MAX_RETRIES,
+            "backoff_max": cls.TRANSCRIPT_BACKOFF_MAX,
+            "spill_path": cls.TRANSCRIPT_SPILL_PATH,
+        }
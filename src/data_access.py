@@ -0,0 +1,129 @@
+"""
+Acesso assíncrono ao Supabase.
+
+O cliente `supabase` é síncrono: cada ida ao PostgREST (ou ao Auth) bloqueia
+a thread que a executa. Chamado direto de um `async def`, isso congela o
+event loop e todos os streams SSE em andamento. As funções de `limits`,
+`chat_manager` e `AuthService` continuam síncronas (também rodam dentro das
+threads do GEMService); as versões assíncronas delas executam a chamada em
+um pool de threads dedicado e limitado, separado do pool padrão usado pelos
+streams.
+
+Consultas independentes de uma mesma rota rodam em paralelo com
+`gather_queries`, então a rota espera a mais lenta e não a soma de todas.
+
+Exemplo:
+    result = await execute(supabase.table("conversations").select("*").eq("user_id", user_id))
+    limit_check = await acheck_user_limit(user_id, "messages")
+    results = await gather_queries(
+        subscription=auth_service.aget_user_subscription(user_id),
+        usage=aget_usage_stats(user_id),
+    )
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from .config import GEMConfig
+from .metrics import metrics
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Retorna o pool de threads das chamadas ao banco (criado sob demanda)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, GEMConfig.get_data_access_config()["pool_workers"])
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="supabase")
+        return _executor
+
+
+def shutdown_db_executor() -> None:
+    """Encerra o pool (as chamadas em andamento terminam normalmente)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Executa uma chamada síncrona ao banco no pool dedicado.
+
+    Args:
+        func: Função bloqueante (consulta, RPC, chamada ao Auth)
+        *args: Argumentos posicionais de `func`
+        **kwargs: Argumentos nomeados de `func`
+
+    Returns:
+        O retorno de `func`; exceções são propagadas ao chamador
+    """
+    global _in_flight
+    loop = asyncio.get_running_loop()
+    operation = getattr(func, "__name__", "call")
+    started = time.perf_counter()
+    _in_flight += 1
+    metrics.set_gauge("db_calls_in_flight", _in_flight)
+    try:
+        return await loop.run_in_executor(get_db_executor(), functools.partial(func, *args, **kwargs))
+    finally:
+        _in_flight -= 1
+        metrics.set_gauge("db_calls_in_flight", _in_flight)
+        metrics.observe("db_call_seconds", time.perf_counter() - started, operation=operation)
+
+
+async def execute(query: Any) -> Any:
+    """Executa uma query do PostgREST já montada (`.execute()` roda no pool)."""
+    return await run_db(query.execute)
+
+
+async def gather_queries(**queries: Awaitable[Any]) -> Dict[str, Any]:
+    """
+    Executa consultas independentes em paralelo.
+
+    Args:
+        **queries: Corrotinas nomeadas (ex: `usage=aget_usage_stats(user_id)`)
+
+    Returns:
+        Dict com o resultado de cada consulta pelo nome; a primeira exceção
+        é propagada ao chamador
+    """
+    started = time.perf_counter()
+    results = await asyncio.gather(*queries.values())
+    metrics.observe("db_fanout_seconds", time.perf_counter() - started, width=len(queries))
+    return dict(zip(queries.keys(), results))
+
+
+def offload(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """
+    Cria a versão assíncrona de uma função (ou método) síncrona de acesso ao banco.
+
+    Exemplo:
+        acheck_user_limit = offload(check_user_limit)
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_db(func, *args, **kwargs)
+
+    wrapper.__doc__ = f"Versão assíncrona de `{func.__name__}` (executa no pool do banco)."
+    return wrapper
+
+
+def db_pool_stats() -> Dict[str, Any]:
+    """Retorna o tamanho do pool e as chamadas em andamento."""
+    return {
+        "workers": GEMConfig.get_data_access_config()["pool_workers"],
+        "in_flight": _in_flight,
+    }
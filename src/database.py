@@ -1,13 +1,184 @@
-from supabase import create_client, Client
+"""
+Cliente do Supabase por processo.
+
+O cliente não é mais criado no import: `get_supabase_client()` o cria na
+primeira chamada, com um `httpx.Client` próprio (pool limitado, keep-alive),
+e o recria após um fork (workers do gunicorn com preload não compartilham
+conexões com o processo pai). Importar `src.web.app` não abre conexões nem
+exige SUPABASE_URL/SUPABASE_KEY; a falta delas aparece na primeira consulta.
+
+Os módulos usam o proxy `supabase`, que resolve o cliente a cada acesso:
+
+    from .database import supabase
+    supabase.table("conversations").select("*").execute()
+
+Em testes e benchmarks, `set_supabase_client` troca o cliente do processo
+(ex: por um apontado para `src.testing.LocalPostgREST`).
+"""
+
 import os
-from dotenv import load_dotenv
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+from supabase import Client, ClientOptions, create_client
+
+from .config import GEMConfig
+from .metrics import metrics
+
+_lock = threading.Lock()
+_client: Optional[Client] = None
+_http_client: Optional[httpx.Client] = None
+_override: Optional[Any] = None
+_owner_pid: Optional[int] = None
+
+
+def _ensure_current_process() -> None:
+    """Descarta o cliente herdado de outro processo (requer o lock)."""
+    global _client, _http_client, _owner_pid  # pylint: disable=global-statement
+    if _owner_pid != os.getpid():
+        # O socket herdado via fork é do processo pai: não é fechado aqui
+        _client = None
+        _http_client = None
+        _owner_pid = os.getpid()
+
+
+def _create_http_client(config: Dict[str, Any]) -> httpx.Client:
+    """Pool HTTP usado pelo PostgREST, Auth e Storage do cliente."""
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=config["keepalive_expiry"],
+        ),
+        timeout=config["timeout"],
+        follow_redirects=True,
+    )
+
+
+def create_supabase_client(
+    url: Optional[str] = None,
+    key: Optional[str] = None,
+    http_client: Optional[httpx.Client] = None
+) -> Client:
+    """
+    Cria um cliente do Supabase (sem cache).
+
+    Args:
+        url: URL do projeto (padrão: SUPABASE_URL)
+        key: Chave da API (padrão: SUPABASE_KEY)
+        http_client: Pool HTTP a usar (padrão: um novo, configurado por SUPABASE_POOL_*)
+
+    Returns:
+        Cliente do Supabase
+
+    Raises:
+        RuntimeError: Se a URL ou a chave não estiverem configuradas
+    """
+    config = GEMConfig.get_supabase_config()
+    url = url or config["url"]
+    key = key or config["key"]
+    if not url or not key:
+        raise RuntimeError("SUPABASE_URL e SUPABASE_KEY precisam estar configuradas")
+
+    options = ClientOptions(httpx_client=http_client or _create_http_client(config))
+    return create_client(url, key, options=options)
+
+
+def get_supabase_client() -> Client:
+    """Retorna o cliente do Supabase do processo (criado sob demanda)."""
+    global _client, _http_client  # pylint: disable=global-statement
+    if _override is not None:
+        return _override
+
+    with _lock:
+        _ensure_current_process()
+        if _client is None:
+            http_client = _create_http_client(GEMConfig.get_supabase_config())
+            try:
+                _client = create_supabase_client(http_client=http_client)
+            except Exception:
+                http_client.close()
+                raise
+            _http_client = http_client
+            print(f"[DEBUG] Cliente do Supabase criado (pid {os.getpid()})")
+        return _client
+
+
+def set_supabase_client(client: Optional[Any]) -> None:
+    """
+    Substitui o cliente do processo (testes e benchmarks).
+
+    Args:
+        client: Cliente a usar (None volta ao cliente configurado)
+    """
+    global _override  # pylint: disable=global-statement
+    _override = client
+
+
+def close_supabase_client() -> None:
+    """Fecha o pool HTTP do cliente (chamado no shutdown da aplicação)."""
+    global _client, _http_client  # pylint: disable=global-statement
+    with _lock:
+        _ensure_current_process()
+        http_client = _http_client
+        _client = None
+        _http_client = None
+    if http_client is not None:
+        http_client.close()
+
+
+def warm_up_supabase(timeout: float = 5.0) -> bool:
+    """
+    Abre (e mantém em keep-alive) a conexão com o PostgREST.
+
+    Args:
+        timeout: Timeout da requisição de aquecimento
+
+    Returns:
+        True se a conexão foi estabelecida (qualquer status HTTP conta)
+    """
+    try:
+        client = get_supabase_client()
+        rest_url = str(client.rest_url).rstrip("/")
+        client.postgrest.session.head(f"{rest_url}/", headers={"apikey": client.supabase_key}, timeout=timeout)
+        metrics.inc("supabase_warmups", result="ok")
+        return True
+    except (httpx.HTTPError, RuntimeError, AttributeError) as error:
+        print(f"[ERROR] Falha ao aquecer conexão com o Supabase: {error}")
+        metrics.inc("supabase_warmups", result="error")
+        return False
+
+
+def supabase_pool_stats() -> Dict[str, Any]:
+    """Retorna as conexões abertas e ociosas do pool do Supabase."""
+    with _lock:
+        http_client = _http_client if _owner_pid == os.getpid() else None
+
+    connections = idle = 0
+    if http_client is not None:
+        pool = getattr(http_client._transport, "_pool", None)  # pylint: disable=protected-access
+        for connection in getattr(pool, "connections", []):
+            connections += 1
+            if connection.is_idle():
+                idle += 1
+
+    return {
+        "created": http_client is not None,
+        "max_connections": GEMConfig.SUPABASE_POOL_MAX_CONNECTIONS,
+        "connections": connections,
+        "idle_connections": idle,
+    }
+
+
+class _LazySupabase:
+    """Proxy que resolve o cliente do processo a cada acesso."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_supabase_client(), name)
 
-load_dotenv()
+    def __repr__(self) -> str:
+        return "<cliente do Supabase (lazy)>"
 
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
 
-def get_supabase_client():
-    return supabase
+supabase: Any = _LazySupabase()
@@ -1,10 +1,13 @@
 """Sistema de limites de uso para free tier e premium."""
 
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, List, Optional
 from datetime import datetime
-from .database import get_supabase_client
-
-supabase = get_supabase_client()
+from .config import GEMConfig
+from .data_access import offload
+from .database import supabase
+from .quota import QuotaEngine, QuotaState, USAGE_FIELDS
+from .worker_files import claim_worker_file, release_worker_file
 
 # Limites do plano gratuito
 FREE_TIER_LIMITS = {
@@ -13,6 +16,96 @@ FREE_TIER_LIMITS = {
     "pdfs_per_month": 2
 }
 
+_quota_engine: Optional[QuotaEngine] = None
+_quota_engine_lock = threading.Lock()
+
+
+def _load_quota_state(user_id: str, month_year: str) -> QuotaState:
+    """
+    Carrega assinatura e uso do mês de um usuário (criando os registros iniciais).
+
+    Args:
+        user_id: ID do usuário
+        month_year: Mês no formato 'YYYY-MM'
+
+    Returns:
+        Estado usado pelo QuotaEngine
+    """
+    subscription = supabase.table("subscriptions")\
+        .select("status")\
+        .eq("user_id", user_id)\
+        .order("created_at", desc=True)\
+        .limit(1)\
+        .execute()
+
+    if not subscription.data:
+        supabase.table("subscriptions").insert({
+            "user_id": user_id,
+            "status": "free",
+            "plan_name": "free"
+        }).execute()
+        subscription_status = "free"
+    else:
+        subscription_status = subscription.data[0]["status"]
+
+    usage: Dict[str, int] = {}
+    if subscription_status != "active":
+        result = supabase.table("usage")\
+            .select(",".join(USAGE_FIELDS.values()))\
+            .eq("user_id", user_id)\
+            .eq("month_year", month_year)\
+            .execute()
+        if result.data:
+            usage = {column: result.data[0].get(column) or 0 for column in USAGE_FIELDS.values()}
+
+    return QuotaState(user_id=user_id, month_year=month_year, status=subscription_status, usage=usage)
+
+
+def _apply_usage_deltas(deltas: List[Dict[str, Any]]) -> None:
+    """Soma um lote de incrementos na tabela `usage` com uma única chamada RPC."""
+    supabase.rpc("apply_usage_deltas", {"p_deltas": deltas}).execute()
+    print(f"[DEBUG] Uso gravado em lote: {len(deltas)} contadores")
+
+
+def get_quota_engine() -> Optional[QuotaEngine]:
+    """Retorna o motor de cota do processo (None se desabilitado)."""
+    global _quota_engine
+    config = GEMConfig.get_quota_config()
+    if not config["enabled"]:
+        return None
+
+    with _quota_engine_lock:
+        if _quota_engine is None:
+            _quota_engine = QuotaEngine(
+                load_state=_load_quota_state,
+                apply_deltas=_apply_usage_deltas,
+                limits=FREE_TIER_LIMITS,
+                ttl=config["ttl"],
+                flush_interval=config["flush_interval"],
+                # Cada worker usa o próprio journal (o slot de um worker que caiu é reaplicado por quem o reservar)
+                journal_path=claim_worker_file(config["journal_path"]) if config["journal_path"] else None,
+                journal_fsync=config["journal_fsync"],
+                max_entries=config["max_entries"],
+            )
+            _quota_engine.start()
+        return _quota_engine
+
+
+def quota_stats() -> Optional[Dict[str, Any]]:
+    """Retorna as estatísticas do motor de cota (None se ainda não foi criado)."""
+    engine = _quota_engine
+    return engine.stats() if engine else None
+
+
+def close_quota_engine() -> None:
+    """Grava os incrementos pendentes e encerra o motor de cota."""
+    global _quota_engine
+    with _quota_engine_lock:
+        engine, _quota_engine = _quota_engine, None
+    if engine:
+        engine.stop()
+        release_worker_file(engine.journal_path)
+
 
 def check_user_limit(user_id: str, limit_type: str = "messages") -> Dict[str, Any]:
     """
@@ -26,6 +119,11 @@ def check_user_limit(user_id: str, limit_type: str = "messages") -> Dict[str, An
         Dict com informações sobre o limite
     """
     try:
+        # Com o motor de cota a decisão é feita em memória
+        engine = get_quota_engine()
+        if engine:
+            return engine.check(user_id, limit_type)
+
         # 1. Buscar assinatura do usuário
         subscription = supabase.table("subscriptions")\
             .select("*")\
@@ -127,6 +225,12 @@ def increment_usage(user_id: str, usage_type: str = "messages") -> bool:
         True se sucesso, False caso contrário
     """
     try:
+        # Com o motor de cota o incremento vai para o lote (journal local)
+        engine = get_quota_engine()
+        if engine:
+            engine.increment(user_id, usage_type)
+            return True
+
         current_month = datetime.now().strftime("%Y-%m")
 
         # Mapear tipo de uso para campo do banco
@@ -147,6 +251,56 @@ def increment_usage(user_id: str, usage_type: str = "messages") -> bool:
         return False
 
 
+def consume_quota(user_id: str, usage_type: str = "messages", amount: int = 1) -> Dict[str, Any]:
+    """
+    Verifica o limite e conta o uso em uma única operação atômica.
+
+    Substitui o par `check_user_limit` + `increment_usage`: é uma única
+    chamada à função SQL `consume_quota`, que trava a linha do mês e compara
+    com o limite do plano no banco. Vale também com o motor de cota: ele é
+    atômico só dentro do processo, e com vários workers dois deles podiam
+    liberar juntos o último uso do mês. O motor continua servindo
+    `check_user_limit`, `increment_usage` e as estatísticas.
+
+    Args:
+        user_id: ID do usuário
+        usage_type: Tipo de uso ('messages', 'images', 'pdfs')
+        amount: Usos a consumir (negativo devolve usos, ex: geração falhou)
+
+    Returns:
+        Dict no formato de `check_user_limit`, já descontado o uso
+    """
+    try:
+        result = supabase.rpc("consume_quota", {
+            "p_user_id": user_id,
+            "p_month_year": datetime.now().strftime("%Y-%m"),
+            "p_field": USAGE_FIELDS.get(usage_type, f"{usage_type}_analyzed"),
+            "p_amount": amount,
+            "p_limit": FREE_TIER_LIMITS.get(f"{usage_type}_per_month", 50)
+        }).execute()
+
+        # O uso em memória do motor ficou para trás: a próxima leitura busca o banco
+        engine = get_quota_engine()
+        if engine:
+            engine.invalidate(user_id)
+
+        decision = dict(result.data)
+        if not decision["allowed"]:
+            decision["message"] = f"Limite de {decision['limit']} {usage_type}/mês atingido. Faça upgrade para continuar!"
+        return decision
+
+    except Exception as e:
+        print(f"[ERROR] Erro ao consumir cota: {e}")
+        # Em caso de erro, permitir (fallback seguro)
+        return {
+            "allowed": True,
+            "remaining": "unknown",
+            "plan": "free",
+            "is_premium": False,
+            "error": str(e)
+        }
+
+
 def get_usage_stats(user_id: str) -> Dict[str, Any]:
     """
     Obtém estatísticas de uso do usuário no mês atual.
@@ -160,13 +314,18 @@ def get_usage_stats(user_id: str) -> Dict[str, Any]:
     try:
         current_month = datetime.now().strftime("%Y-%m")
 
-        usage = supabase.table("usage")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .eq("month_year", current_month)\
-            .execute()
+        engine = get_quota_engine()
+        if engine:
+            # Inclui os incrementos que ainda não foram gravados
+            usage_data = [engine.usage(user_id)]
+        else:
+            usage_data = supabase.table("usage")\
+                .select("*")\
+                .eq("user_id", user_id)\
+                .eq("month_year", current_month)\
+                .execute().data
 
-        if not usage.data:
+        if not usage_data:
             return {
                 "messages_count": 0,
                 "images_analyzed": 0,
@@ -176,7 +335,7 @@ def get_usage_stats(user_id: str) -> Dict[str, Any]:
                 "pdfs_remaining": FREE_TIER_LIMITS["pdfs_per_month"]
             }
 
-        data = usage.data[0]
+        data = usage_data[0]
         return {
             "messages_count": data.get("messages_count", 0),
             "images_analyzed": data.get("images_analyzed", 0),
@@ -219,9 +378,20 @@ def reset_monthly_usage(user_id: str) -> bool:
             .eq("month_year", current_month)\
             .execute()
 
+        engine = get_quota_engine()
+        if engine:
+            engine.invalidate(user_id)
+
         print(f"[DEBUG] Uso resetado para usuário {user_id}")
         return True
 
     except Exception as e:
         print(f"[ERROR] Erro ao resetar uso: {e}")
         return False
+
+
+# Versões assíncronas (rotas async: a chamada ao Supabase roda fora do event loop)
+acheck_user_limit = offload(check_user_limit)
+aconsume_quota = offload(consume_quota)
+aincrement_usage = offload(increment_usage)
+aget_usage_stats = offload(get_usage_stats)
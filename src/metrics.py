@@ -0,0 +1,96 @@
+"""Métricas em memória do processo (contadores, gauges e observações)."""
+
+import threading
+from typing import Any, Dict
+
+
+def _metric_key(name: str, labels: Dict[str, Any]) -> str:
+    """Monta a chave da métrica no formato `nome{label=valor,...}`."""
+    if not labels:
+        return name
+    rendered = ",".join(f"{key}={labels[key]}" for key in sorted(labels))
+    return f"{name}{{{rendered}}}"
+
+
+class MetricsRegistry:
+    """
+    Registro simples de métricas, seguro para uso entre threads.
+
+    - Contadores: valores que só crescem (ex: requisições, transições)
+    - Gauges: valores instantâneos (ex: modo atual, fila)
+    - Observações: contagem, soma, mínimo, máximo e último valor (ex: latências)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._observations: Dict[str, Dict[str, float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Incrementa um contador."""
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        """Define o valor atual de um gauge."""
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Registra uma observação (ex: latência em segundos)."""
+        key = _metric_key(name, labels)
+        with self._lock:
+            stats = self._observations.get(key)
+            if stats is None:
+                self._observations[key] = {
+                    "count": 1,
+                    "sum": value,
+                    "min": value,
+                    "max": value,
+                    "last": value,
+                }
+                return
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["min"] = min(stats["min"], value)
+            stats["max"] = max(stats["max"], value)
+            stats["last"] = value
+
+    def get_counter(self, name: str, **labels: Any) -> float:
+        """Retorna o valor atual de um contador (0 se inexistente)."""
+        with self._lock:
+            return self._counters.get(_metric_key(name, labels), 0)
+
+    def get_gauge(self, name: str, **labels: Any) -> float:
+        """Retorna o valor atual de um gauge (0 se inexistente)."""
+        with self._lock:
+            return self._gauges.get(_metric_key(name, labels), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Retorna uma cópia de todas as métricas registradas."""
+        with self._lock:
+            observations = {}
+            for key, stats in self._observations.items():
+                observations[key] = {
+                    **stats,
+                    "avg": stats["sum"] / stats["count"] if stats["count"] else 0,
+                }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "observations": observations,
+            }
+
+    def reset(self) -> None:
+        """Limpa todas as métricas (útil em testes)."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._observations.clear()
+
+
+# Registro global do processo
+metrics = MetricsRegistry()
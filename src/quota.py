@@ -0,0 +1,388 @@
+"""
+Contadores de uso em memória com gravação adiada (write-behind).
+
+Cada mensagem custava cerca de seis idas ao Supabase só para a cota
+(assinatura, uso, inserts e o RPC de incremento). O `QuotaEngine` mantém,
+por usuário, o status da assinatura e os contadores do mês com TTL: a
+decisão de cota é feita em memória e os incrementos são acumulados e
+enviados em lote a cada `flush_interval` segundos.
+
+Antes de entrar no lote, cada incremento é anexado a um journal local
+(JSON por linha, com fsync). Se o processo cair antes do flush, o journal é
+reaplicado no próximo startup; depois de um flush bem-sucedido ele é
+reescrito só com o que ainda está pendente.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import metrics
+
+# Tipo de uso -> coluna da tabela `usage`
+USAGE_FIELDS = {
+    "messages": "messages_count",
+    "images": "images_analyzed",
+    "pdfs": "pdfs_analyzed",
+}
+
+PendingKey = Tuple[str, str, str]  # (user_id, month_year, coluna)
+
+
+def usage_field(usage_type: str) -> str:
+    """'messages' -> 'messages_count', 'images' -> 'images_analyzed'."""
+    return USAGE_FIELDS.get(usage_type) or (
+        f"{usage_type}_count" if usage_type == "messages" else f"{usage_type}_analyzed"
+    )
+
+
+def current_month() -> str:
+    """Mês corrente no formato 'YYYY-MM'."""
+    return datetime.now().strftime("%Y-%m")
+
+
+@dataclass
+class QuotaState:
+    """Status da assinatura e uso do mês já persistido, carregados do banco."""
+
+    user_id: str
+    month_year: str
+    status: str
+    usage: Dict[str, int] = field(default_factory=dict)
+    expires_at: float = 0.0
+
+
+class QuotaEngine:
+    """
+    Decisões de cota em memória com incrementos gravados em lote.
+
+    Exemplo:
+        engine = QuotaEngine(load_state=carregar, apply_deltas=gravar, limits=FREE_TIER_LIMITS)
+        engine.start()
+        if engine.check(user_id)["allowed"]:
+            engine.increment(user_id)
+    """
+
+    def __init__(
+        self,
+        load_state: Callable[[str, str], QuotaState],
+        apply_deltas: Callable[[List[Dict[str, Any]]], None],
+        limits: Dict[str, int],
+        ttl: float = 60.0,
+        flush_interval: float = 2.0,
+        journal_path: Optional[str] = None,
+        journal_fsync: bool = True,
+        max_entries: int = 10000
+    ):
+        """
+        Inicializa o motor de cota.
+
+        Args:
+            load_state: Carrega assinatura e uso do mês de um usuário (user_id, mês)
+            apply_deltas: Soma um lote de incrementos no banco
+            limits: Limites do plano gratuito (`messages_per_month`, ...)
+            ttl: Tempo (segundos) até recarregar assinatura e uso do banco
+            flush_interval: Intervalo (segundos) entre os envios em lote
+            journal_path: Arquivo do journal local (None desativa)
+            journal_fsync: Se cada incremento faz fsync antes de ser aceito
+            max_entries: Usuários mantidos em memória
+        """
+        self.load_state = load_state
+        self.apply_deltas = apply_deltas
+        self.limits = limits
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.journal_path = journal_path
+        self.journal_fsync = journal_fsync
+        self.max_entries = max(1, max_entries)
+
+        self._states: "OrderedDict[str, QuotaState]" = OrderedDict()
+        self._pending: Dict[PendingKey, int] = {}
+        self._in_flight: Dict[PendingKey, int] = {}
+        self._flush_generation = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._journal = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._recover()
+
+    # ------------------------------------------------------------------ cota
+
+    def check(self, user_id: str, limit_type: str = "messages") -> Dict[str, Any]:
+        """
+        Decide se o usuário pode usar o recurso (mesmo formato de `check_user_limit`).
+
+        Só acessa o banco quando o estado do usuário não está em memória ou
+        expirou; o restante é uma consulta a dicionários.
+        """
+        state = self._state(user_id)
+        with self._lock:
+            return self._decide(state, limit_type, 0)
+
+    def consume(self, user_id: str, usage_type: str = "messages", amount: int = 1) -> Dict[str, Any]:
+        """
+        Verifica e conta o uso de forma atômica no processo (mesmo formato de `consume_quota`).
+
+        Requisições paralelas do mesmo usuário não passam juntas pelo último
+        uso disponível. Com `amount` negativo devolve usos (ex: geração falhou).
+        """
+        state = self._state(user_id)
+        with self._lock:
+            decision = self._decide(state, usage_type, amount)
+            if decision["allowed"]:
+                self._add_pending((user_id, state.month_year, usage_field(usage_type)), amount)
+        return decision
+
+    def increment(self, user_id: str, usage_type: str = "messages", amount: int = 1) -> None:
+        """Conta um uso: anota no journal e no lote pendente (sem ida ao banco)."""
+        key = (user_id, current_month(), usage_field(usage_type))
+        with self._lock:
+            self._add_pending(key, amount)
+
+    def usage(self, user_id: str) -> Dict[str, int]:
+        """Contadores do mês do usuário, incluindo incrementos ainda não gravados."""
+        state = self._state(user_id)
+        with self._lock:
+            return {column: self._usage(state, column) for column in USAGE_FIELDS.values()}
+
+    def invalidate(self, user_id: str) -> None:
+        """Descarta o estado em memória (ex: após mudança de plano)."""
+        with self._lock:
+            self._states.pop(user_id, None)
+
+    # ----------------------------------------------------------------- flush
+
+    def start(self) -> None:
+        """Inicia a thread que envia os incrementos em lote."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="quota-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Interrompe a thread e faz um último flush."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    def flush(self) -> int:
+        """
+        Envia os incrementos pendentes em um único lote.
+
+        Returns:
+            Número de incrementos gravados (0 se não havia nada ou se falhou)
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+                self._flush_generation += 1
+
+            deltas = [
+                {"user_id": user_id, "month_year": month_year, "field": column, "amount": amount}
+                for (user_id, month_year, column), amount in batch.items()
+            ]
+            started = time.perf_counter()
+            try:
+                self.apply_deltas(deltas)
+            except Exception as error:  # pylint: disable=broad-except
+                print(f"[ERROR] Falha ao gravar uso em lote (nova tentativa no próximo flush): {error}")
+                metrics.inc("quota_flushes", result="error")
+                with self._lock:
+                    for key, amount in batch.items():
+                        self._pending[key] = self._pending.get(key, 0) + amount
+                    self._in_flight = {}
+                return 0
+
+            with self._lock:
+                self._in_flight = {}
+                # O uso gravado passa a fazer parte do estado carregado
+                for (user_id, month_year, column), amount in batch.items():
+                    state = self._states.get(user_id)
+                    if state and state.month_year == month_year:
+                        state.usage[column] = state.usage.get(column, 0) + amount
+                self._rewrite_journal()
+
+            metrics.inc("quota_flushes", result="ok")
+            metrics.observe("quota_flush_seconds", time.perf_counter() - started)
+            return sum(batch.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna usuários em memória e incrementos pendentes."""
+        with self._lock:
+            return {
+                "users": len(self._states),
+                "pending_keys": len(self._pending),
+                "pending": sum(self._pending.values()),
+                "flush_interval": self.flush_interval,
+                "journal": self.journal_path,
+            }
+
+    # -------------------------------------------------------------- internos
+
+    def _state(self, user_id: str) -> QuotaState:
+        """Estado do usuário em memória, recarregado do banco após o TTL ou na virada do mês."""
+        month_year = current_month()
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(user_id)
+            if state and state.month_year == month_year and now < state.expires_at:
+                self._states.move_to_end(user_id)
+                metrics.inc("quota_state_cache", result="hit")
+                return state
+
+        metrics.inc("quota_state_cache", result="miss")
+        with self._lock:
+            generation = self._flush_generation
+            flushing = bool(self._in_flight)
+
+        state = self.load_state(user_id, month_year)
+        state.expires_at = now + self.ttl
+        with self._lock:
+            # Sem flush durante a carga: o uso lido não inclui nada pendente ou em
+            # envio, e o próximo flush soma o lote a este estado
+            if not flushing and generation == self._flush_generation:
+                self._store_state(state)
+                return state
+
+        # Um lote estava em envio: o uso lido pode já incluí-lo (seria contado
+        # duas vezes). Recarrega sem flush em andamento.
+        metrics.inc("quota_state_cache", result="reload")
+        with self._flush_lock:
+            state = self.load_state(user_id, month_year)
+            state.expires_at = now + self.ttl
+            with self._lock:
+                self._store_state(state)
+        return state
+
+    def _store_state(self, state: QuotaState) -> None:
+        """Guarda o estado carregado, descartando os mais antigos (chamado com o lock adquirido)."""
+        self._states[state.user_id] = state
+        self._states.move_to_end(state.user_id)
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+
+    def _usage(self, state: QuotaState, column: str) -> int:
+        """Uso persistido + incrementos pendentes e em envio (chamado com o lock adquirido)."""
+        key = (state.user_id, state.month_year, column)
+        return state.usage.get(column, 0) + self._pending.get(key, 0) + self._in_flight.get(key, 0)
+
+    def _decide(self, state: QuotaState, limit_type: str, amount: int) -> Dict[str, Any]:
+        """
+        Decide a cota a partir do estado em memória (chamado com o lock adquirido).
+
+        Args:
+            state: Estado do usuário
+            limit_type: Tipo de limite ('messages', 'images', 'pdfs')
+            amount: Usos que serão consumidos (0 só verifica)
+        """
+        if state.status == "active":
+            metrics.inc("quota_checks", plan="premium")
+            return {
+                "allowed": True,
+                "remaining": "unlimited",
+                "plan": "premium",
+                "is_premium": True
+            }
+
+        current_usage = self._usage(state, usage_field(limit_type))
+        max_limit = self.limits.get(f"{limit_type}_per_month", 50)
+        metrics.inc("quota_checks", plan="free")
+
+        # Verificar (amount=0) bloqueia no limite; devoluções (amount<0) sempre passam
+        if amount >= 0 and current_usage + max(amount, 1) > max_limit:
+            return {
+                "allowed": False,
+                "remaining": 0,
+                "current_usage": current_usage,
+                "limit": max_limit,
+                "plan": "free",
+                "is_premium": False,
+                "message": f"Limite de {max_limit} {limit_type}/mês atingido. Faça upgrade para continuar!"
+            }
+
+        current_usage = max(current_usage + amount, 0)
+        return {
+            "allowed": True,
+            "remaining": max_limit - current_usage,
+            "current_usage": current_usage,
+            "limit": max_limit,
+            "plan": "free",
+            "is_premium": False
+        }
+
+    def _add_pending(self, key: PendingKey, amount: int) -> None:
+        """Anota um incremento no journal e no lote (chamado com o lock adquirido)."""
+        self._append_journal(key, amount)
+        self._pending[key] = self._pending.get(key, 0) + amount
+        metrics.inc("quota_increments")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _append_journal(self, key: PendingKey, amount: int) -> None:
+        """Anexa um incremento ao journal (chamado com o lock adquirido)."""
+        if not self.journal_path:
+            return
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        user_id, month_year, column = key
+        self._journal.write(json.dumps(
+            {"user_id": user_id, "month_year": month_year, "field": column, "amount": amount}
+        ) + "\n")
+        self._journal.flush()
+        if self.journal_fsync:
+            os.fsync(self._journal.fileno())
+
+    def _rewrite_journal(self) -> None:
+        """Reescreve o journal só com os pendentes (chamado com o lock adquirido)."""
+        if not self.journal_path:
+            return
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+        temp_path = f"{self.journal_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            for (user_id, month_year, column), amount in self._pending.items():
+                handle.write(json.dumps(
+                    {"user_id": user_id, "month_year": month_year, "field": column, "amount": amount}
+                ) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self.journal_path)
+
+    def _recover(self) -> None:
+        """Reaplica incrementos de um journal deixado por um processo interrompido."""
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return
+        recovered = 0
+        with open(self.journal_path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                    key = (entry["user_id"], entry["month_year"], entry["field"])
+                    self._pending[key] = self._pending.get(key, 0) + int(entry["amount"])
+                    recovered += 1
+                except (ValueError, KeyError, TypeError):
+                    # Linha truncada por uma queda no meio da escrita
+                    continue
+        if recovered:
+            print(f"[DEBUG] Journal de uso recuperado: {recovered} incrementos pendentes")
+            metrics.inc("quota_journal_recovered", recovered)
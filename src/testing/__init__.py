@@ -0,0 +1,7 @@
+"""Servidores e clientes locais que imitam serviços externos em testes e benchmarks."""
+
+from .fake_llm_server import FakeLLMServer
+from .postgrest import LocalPostgREST
+from .quota_rpc import LocalQuotaRPC
+
+__all__ = ["FakeLLMServer", "LocalPostgREST", "LocalQuotaRPC"]
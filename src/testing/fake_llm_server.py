@@ -0,0 +1,228 @@
+"""
+Servidor local compatível com a API de chat da OpenAI.
+
+Permite testar e medir o caminho de chamadas ao LLM sem rede externa,
+incluindo a injeção de falhas (conexão derrubada, erros HTTP, lentidão).
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional
+
+# Modos de falha aceitos por `FakeLLMServer.inject`
+FAILURE_DROP = "drop"  # Fecha a conexão sem responder (erro de conexão no cliente)
+FAILURE_SERVER_ERROR = "error"  # Responde HTTP 503
+FAILURE_SLOW = "slow"  # Espera `slow_seconds` antes de responder
+
+
+class _FakeLLMHandler(BaseHTTPRequestHandler):
+    """Handler HTTP que atende /chat/completions e /models."""
+
+    server: "_FakeHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        """Silencia o log padrão do http.server."""
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        owner = self.server.owner
+        owner._record_request(self.path, None)
+        body = json.dumps({"object": "list", "data": [{"id": owner.model, "object": "model"}]}).encode()
+        self._send(200, body, "application/json")
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        owner = self.server.owner
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        owner._record_request(self.path, payload)
+
+        failure = owner._next_failure()
+        if failure == FAILURE_DROP:
+            self.close_connection = True
+            self.connection.close()
+            return
+        if failure == FAILURE_SERVER_ERROR:
+            self._send(503, b'{"error": {"message": "indisponivel"}}', "application/json")
+            return
+        if failure == FAILURE_SLOW:
+            time.sleep(owner.slow_seconds)
+
+        if not self.path.rstrip("/").endswith("chat/completions"):
+            self._send(404, b'{"error": {"message": "not found"}}', "application/json")
+            return
+
+        reply = owner.reply_for(payload)
+        model = payload.get("model", owner.model)
+
+        if payload.get("stream"):
+            self._stream_reply(reply, model)
+        else:
+            body = json.dumps({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(reply.split()), "total_tokens": 0},
+            }).encode()
+            self._send(200, body, "application/json")
+
+    def _stream_reply(self, reply: str, model: str) -> None:
+        owner = self.server.owner
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        for piece in owner.split_reply(reply):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            try:
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                owner._record_disconnect()
+                return
+            if owner.chunk_delay:
+                time.sleep(owner.chunk_delay)
+
+        try:
+            final = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            owner._record_disconnect()
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    owner: "FakeLLMServer"
+
+
+class FakeLLMServer:
+    """
+    Servidor OpenAI-compatível em uma thread local.
+
+    Exemplo:
+        with FakeLLMServer(reply="Olá!") as server:
+            llm = ChatOpenAI(base_url=server.base_url, api_key="fake", max_retries=0)
+            server.inject("drop", times=2)  # As duas próximas chamadas falham
+    """
+
+    def __init__(
+        self,
+        reply: str = "Olá! Resposta do servidor local.",
+        model: str = "fake-model",
+        chunk_size: int = 8,
+        chunk_delay: float = 0.0,
+        slow_seconds: float = 1.0,
+    ):
+        """
+        Inicializa o servidor (ainda sem escutar).
+
+        Args:
+            reply: Texto devolvido em cada resposta
+            model: Nome do modelo reportado
+            chunk_size: Caracteres por chunk no modo streaming
+            chunk_delay: Atraso (segundos) entre chunks
+            slow_seconds: Atraso aplicado pela falha 'slow'
+        """
+        self.reply = reply
+        self.model = model
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_delay = chunk_delay
+        self.slow_seconds = slow_seconds
+
+        self.requests: List[Dict[str, Any]] = []
+        self.disconnects = 0
+        self._failures: Deque[str] = deque()
+        self._lock = threading.Lock()
+        self._server: Optional[_FakeHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """URL base no formato esperado pelos clientes OpenAI (…/v1)."""
+        if not self._server:
+            raise RuntimeError("Servidor não iniciado")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def chat_requests(self) -> List[Dict[str, Any]]:
+        """Requisições recebidas em /chat/completions."""
+        with self._lock:
+            return [r for r in self.requests if r["path"].rstrip("/").endswith("chat/completions")]
+
+    def start(self) -> "FakeLLMServer":
+        """Inicia o servidor em uma porta livre."""
+        self._server = _FakeHTTPServer(("127.0.0.1", 0), _FakeLLMHandler)
+        self._server.owner = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Encerra o servidor."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def inject(self, failure: str, times: int = 1) -> None:
+        """Agenda falhas para as próximas `times` requisições POST."""
+        with self._lock:
+            self._failures.extend([failure] * times)
+
+    def reply_for(self, payload: Dict[str, Any]) -> str:
+        """Texto da resposta para um payload (sobrescreva para respostas dinâmicas)."""
+        return self.reply
+
+    def split_reply(self, reply: str) -> List[str]:
+        """Divide a resposta nos chunks enviados via SSE."""
+        return [reply[i:i + self.chunk_size] for i in range(0, len(reply), self.chunk_size)]
+
+    def _next_failure(self) -> Optional[str]:
+        with self._lock:
+            return self._failures.popleft() if self._failures else None
+
+    def _record_request(self, path: str, payload: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            self.requests.append({"path": path, "payload": payload})
+
+    def _record_disconnect(self) -> None:
+        with self._lock:
+            self.disconnects += 1
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
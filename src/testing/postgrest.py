@@ -0,0 +1,466 @@
+"""
+Servidor local compatível com o PostgREST (a API REST do Supabase).
+
+Atende o subconjunto usado pelo projeto (select com filtros, `or`/`and`,
+order, limit/offset, count, insert/upsert, update, delete e RPC) sobre
+tabelas em memória. O cliente real do Supabase aponta para ele com
+`create_supabase_client(url=server.url, key="local")`, então testes e
+benchmarks passam pelo mesmo caminho HTTP (pool, keep-alive, serialização)
+que a aplicação usa em produção, sem rede externa.
+
+`append_messages` já vem registrada com a mesma semântica da migração; as
+funções de cota podem ser registradas a partir de `LocalQuotaRPC`.
+"""
+
+import fnmatch
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+Row = Dict[str, Any]
+Predicate = Callable[[Row], bool]
+
+REST_PREFIX = "/rest/v1/"
+SINGULAR_MEDIA_TYPE = "application/vnd.pgrst.object+json"
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "or", "and", "on_conflict", "columns"}
+
+# Valores padrão das colunas (além de `id` e `created_at`), como no schema
+TABLE_DEFAULTS: Dict[str, Row] = {
+    "conversations": {"title": "Nova Conversa", "message_count": 0, "title_set": False,
+                      "last_message_at": None, "last_message_preview": None},
+    "usage": {"messages_count": 0, "images_analyzed": 0, "pdfs_analyzed": 0},
+}
+
+# Restrições únicas além da chave primária `id`
+TABLE_UNIQUE: Dict[str, List[Tuple[str, ...]]] = {
+    "usage": [("user_id", "month_year")],
+}
+
+
+class PostgRESTError(Exception):
+    """Erro devolvido no formato do PostgREST (`code`, `message`, status HTTP)."""
+
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Separa por vírgulas fora de parênteses e aspas."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _coerce(raw: str, sample: Any) -> Any:
+    """Converte o valor da URL para o tipo da coluna."""
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, int):
+        return int(raw)
+    if isinstance(sample, float):
+        return float(raw)
+    return raw
+
+
+def _compare(op: str, column: str, raw: str) -> Predicate:
+    """Predicado de um filtro `coluna=op.valor`."""
+    if op == "is":
+        expected = {"null": None, "true": True, "false": False}[raw.lower()]
+        return lambda row: row.get(column) is expected
+
+    if op == "in":
+        options = [_unquote(item) for item in _split_top_level(raw.strip("()"))]
+        return lambda row: row.get(column) is not None and row[column] in [
+            _coerce(option, row[column]) for option in options
+        ]
+
+    value = _unquote(raw)
+    if op in ("like", "ilike"):
+        pattern = value.replace("%", "*")
+
+        def matches(row: Row) -> bool:
+            current = row.get(column)
+            if current is None:
+                return False
+            if op == "ilike":
+                return fnmatch.fnmatchcase(str(current).lower(), pattern.lower())
+            return fnmatch.fnmatchcase(str(current), pattern)
+        return matches
+
+    operators = {
+        "eq": lambda a, b: a == b,
+        "neq": lambda a, b: a != b,
+        "gt": lambda a, b: a > b,
+        "gte": lambda a, b: a >= b,
+        "lt": lambda a, b: a < b,
+        "lte": lambda a, b: a <= b,
+    }
+    if op not in operators:
+        raise PostgRESTError(400, "PGRST100", f"Operador não suportado: {op}")
+
+    def compare(row: Row) -> bool:
+        current = row.get(column)
+        if current is None:
+            return False
+        return operators[op](current, _coerce(value, current))
+    return compare
+
+
+def _condition(expression: str) -> Predicate:
+    """Predicado de uma condição de `or=(...)` (ex: `id.lt.5` ou `and(...)`)."""
+    for group, combine in (("and(", all), ("or(", any)):
+        if expression.startswith(group):
+            predicates = [_condition(part) for part in _split_top_level(expression[len(group):-1])]
+            return lambda row, predicates=predicates, combine=combine: combine(p(row) for p in predicates)
+
+    column, op, value = expression.split(".", 2)
+    return _compare(op, column, value)
+
+
+class LocalPostgREST:
+    """
+    PostgREST em memória, servido por HTTP em uma thread local.
+
+    Exemplo:
+        with LocalPostgREST(latency=0.02) as server:
+            server.tables["conversations"] = [{"id": "conv-1", "user_id": "user-1", ...}]
+            client = create_supabase_client(url=server.url, key="local")
+            set_supabase_client(client)
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Inicializa o servidor (ainda sem escutar).
+
+        Args:
+            latency: Atraso (segundos) aplicado a cada requisição, como uma ida ao banco
+        """
+        self.latency = latency
+        self.tables: Dict[str, List[Row]] = {}
+        self.functions: Dict[str, Callable[..., Any]] = {"append_messages": self.append_messages}
+        self.requests: List[Tuple[str, str]] = []  # (método, caminho)
+        self._lock = threading.RLock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # ------------------------------------------------------------ ciclo de vida
+
+    @property
+    def url(self) -> str:
+        """URL do projeto (o cliente acrescenta /rest/v1)."""
+        if not self._server:
+            raise RuntimeError("Servidor não iniciado")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalPostgREST":
+        """Inicia o servidor em uma porta livre."""
+        self._server = _PostgRESTHTTPServer(("127.0.0.1", 0), _PostgRESTHandler)
+        self._server.owner = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Encerra o servidor."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "LocalPostgREST":
+        return self.start()
+
+    def __exit__(self, *_: Any) -> None:
+        self.stop()
+
+    def register_rpc(self, name: str, function: Callable[..., Any]) -> None:
+        """Registra uma função chamada com os parâmetros do RPC como argumentos nomeados."""
+        self.functions[name] = function
+
+    # --------------------------------------------------------------- operações
+
+    def select(self, table: str, params: List[Tuple[str, str]]) -> List[Row]:
+        """GET: filtra, ordena, pagina e projeta as linhas."""
+        with self._lock:
+            rows = [dict(row) for row in self.tables.get(table, []) if self._matches(row, params)]
+
+        order = dict(params).get("order")
+        if order:
+            for term in reversed(order.split(",")):
+                column, *modifiers = term.split(".")
+                present = [row for row in rows if row.get(column) is not None]
+                missing = [row for row in rows if row.get(column) is None]
+                present.sort(key=lambda row: row[column], reverse="desc" in modifiers)
+                # Padrão do Postgres: nulos por último no asc e primeiro no desc
+                nulls_first = "nullsfirst" in modifiers or ("desc" in modifiers and "nullslast" not in modifiers)
+                rows = missing + present if nulls_first else present + missing
+
+        offset = int(dict(params).get("offset", 0))
+        limit = dict(params).get("limit")
+        rows = rows[offset:offset + int(limit) if limit is not None else None]
+        return [self._project(row, dict(params).get("select", "*")) for row in rows]
+
+    def insert(
+        self,
+        table: str,
+        rows: List[Row],
+        on_conflict: Optional[str] = None,
+        resolution: Optional[str] = None
+    ) -> List[Row]:
+        """POST: insere linhas (com `resolution` de upsert, como o header Prefer)."""
+        conflict_columns = tuple(on_conflict.split(",")) if on_conflict else ("id",)
+        written = []
+        with self._lock:
+            stored = self.tables.setdefault(table, [])
+            for row in rows:
+                new_row = {**TABLE_DEFAULTS.get(table, {}), **row}
+                new_row.setdefault("id", str(uuid.uuid4()))
+                new_row.setdefault("created_at", _now())
+                if table == "conversations":
+                    new_row.setdefault("updated_at", new_row["created_at"])
+
+                existing = self._find_conflict(table, stored, new_row, conflict_columns)
+                if existing is not None:
+                    if resolution == "ignore-duplicates":
+                        continue
+                    if resolution != "merge-duplicates":
+                        raise PostgRESTError(409, "23505", f"duplicate key value violates unique constraint on {table}")
+                    existing.update(row)
+                    written.append(dict(existing))
+                    continue
+
+                stored.append(new_row)
+                written.append(dict(new_row))
+        return written
+
+    def update(self, table: str, params: List[Tuple[str, str]], values: Row) -> List[Row]:
+        """PATCH: atualiza as linhas filtradas."""
+        with self._lock:
+            updated = []
+            for row in self.tables.get(table, []):
+                if self._matches(row, params):
+                    row.update(values)
+                    updated.append(dict(row))
+            return updated
+
+    def delete(self, table: str, params: List[Tuple[str, str]]) -> List[Row]:
+        """DELETE: remove as linhas filtradas."""
+        with self._lock:
+            rows = self.tables.get(table, [])
+            removed = [row for row in rows if self._matches(row, params)]
+            self.tables[table] = [row for row in rows if not self._matches(row, params)]
+            return removed
+
+    def call(self, name: str, params: Row) -> Any:
+        """POST /rpc/<nome>."""
+        function = self.functions.get(name)
+        if function is None:
+            raise PostgRESTError(404, "PGRST202", f"Could not find the function public.{name}")
+        return function(**params)
+
+    def append_messages(self, p_messages: List[Row]) -> Row:
+        """Mesma lógica de `public.append_messages` (supabase/migrations)."""
+        owned, inserted = [], []
+        with self._lock:
+            conversations = self.tables.setdefault("conversations", [])
+            messages = self.tables.setdefault("messages", [])
+            known_ids = {message["id"] for message in messages}
+
+            pairs = list(dict.fromkeys((m["conversation_id"], m["user_id"]) for m in p_messages))
+            for conversation_id, user_id in pairs:
+                conversation = next(
+                    (c for c in conversations if c["id"] == conversation_id and c["user_id"] == user_id), None
+                )
+                if conversation is None:
+                    continue
+                owned.append(conversation_id)
+
+                rows = []
+                for message in p_messages:
+                    if (message["conversation_id"], message["user_id"]) != (conversation_id, user_id):
+                        continue
+                    row = {**message, "id": message.get("id") or str(uuid.uuid4())}
+                    row.setdefault("created_at", _now())
+                    if row["id"] in known_ids:
+                        continue
+                    known_ids.add(row["id"])
+                    rows.append(row)
+                if not rows:
+                    continue
+
+                rows.sort(key=lambda row: row["created_at"])
+                messages.extend(rows)
+                inserted.extend(dict(row) for row in rows)
+
+                last = rows[-1]
+                conversation["message_count"] = conversation.get("message_count", 0) + len(rows)
+                if not conversation.get("last_message_at") or last["created_at"] >= conversation["last_message_at"]:
+                    conversation["last_message_at"] = last["created_at"]
+                    conversation["last_message_preview"] = last["content"][:120]
+
+                question = next((row["content"] for row in rows if row["role"] == "user"), None)
+                if question is not None and not conversation.get("title_set"):
+                    conversation["title"] = question[:50] + ("..." if len(question) > 50 else "")
+                    conversation["title_set"] = True
+                conversation["updated_at"] = _now()
+
+        return {"conversations": owned, "messages": inserted}
+
+    # ---------------------------------------------------------------- internos
+
+    def _matches(self, row: Row, params: List[Tuple[str, str]]) -> bool:
+        for key, value in params:
+            if key in ("or", "and"):
+                predicate = _condition(f"{key}{value}")
+            elif key in RESERVED_PARAMS:
+                continue
+            else:
+                op, _, raw = value.partition(".")
+                predicate = _compare(op, key, raw)
+            if not predicate(row):
+                return False
+        return True
+
+    @staticmethod
+    def _project(row: Row, select: str) -> Row:
+        columns = [column.strip() for column in select.split(",")]
+        if "*" in columns:
+            return row
+        if any("(" in column for column in columns):
+            raise PostgRESTError(400, "PGRST100", "Recursos embutidos não são suportados")
+        return {column: row.get(column) for column in columns}
+
+    @staticmethod
+    def _find_conflict(table: str, stored: List[Row], row: Row, columns: Tuple[str, ...]) -> Optional[Row]:
+        for unique in [columns, ("id",), *TABLE_UNIQUE.get(table, [])]:
+            for existing in stored:
+                if all(existing.get(column) == row.get(column) for column in unique):
+                    return existing
+        return None
+
+
+class _PostgRESTHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    owner: LocalPostgREST
+
+
+class _PostgRESTHandler(BaseHTTPRequestHandler):
+    """Traduz as requisições HTTP do cliente para as operações em memória."""
+
+    server: _PostgRESTHTTPServer
+    protocol_version = "HTTP/1.1"
+    # Cabeçalhos e corpo saem em writes separados: sem isso o keep-alive espera o ACK atrasado
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        """Silencia o log padrão do http.server."""
+
+    def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+        self._send(200, None)
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        self._handle("GET")
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        self._handle("POST")
+
+    def do_PATCH(self) -> None:  # pylint: disable=invalid-name
+        self._handle("PATCH")
+
+    def do_DELETE(self) -> None:  # pylint: disable=invalid-name
+        self._handle("DELETE")
+
+    def _handle(self, method: str) -> None:
+        owner = self.server.owner
+        url = urlsplit(self.path)
+        owner.requests.append((method, url.path))
+        if owner.latency:
+            time.sleep(owner.latency)
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"null") if length else None
+        params = parse_qsl(url.query, keep_blank_values=True)
+        prefer = {
+            key.strip(): value.strip()
+            for key, _, value in (item.partition("=") for item in self.headers.get("Prefer", "").split(","))
+            if key.strip()
+        }
+
+        if not url.path.startswith(REST_PREFIX):
+            self._send(404, {"code": "PGRST000", "message": f"Caminho não suportado: {url.path}"})
+            return
+        resource = url.path[len(REST_PREFIX):].strip("/")
+
+        try:
+            if resource.startswith("rpc/"):
+                self._send(200, owner.call(resource[len("rpc/"):], body or {}))
+                return
+
+            if method == "GET":
+                rows = owner.select(resource, params)
+                total = len(owner.select(resource, [p for p in params if p[0] not in ("limit", "offset")]))
+                self._send_rows(rows, total if prefer.get("count") else None)
+            elif method == "POST":
+                rows = body if isinstance(body, list) else [body]
+                created = owner.insert(resource, rows, dict(params).get("on_conflict"), prefer.get("resolution"))
+                self._send_rows(created, status=201, minimal=prefer.get("return") == "minimal")
+            elif method == "PATCH":
+                self._send_rows(owner.update(resource, params, body or {}), minimal=prefer.get("return") == "minimal")
+            else:
+                self._send_rows(owner.delete(resource, params), minimal=prefer.get("return") == "minimal")
+        except PostgRESTError as error:
+            self._send(error.status, {"code": error.code, "message": error.message, "details": None, "hint": None})
+
+    def _send_rows(self, rows: List[Row], total: Optional[int] = None, status: int = 200, minimal: bool = False) -> None:
+        headers = {}
+        if total is not None:
+            headers["Content-Range"] = f"0-{len(rows) - 1}/{total}" if rows else f"*/{total}"
+
+        if minimal:
+            self._send(204 if status == 200 else status, None, headers)
+        elif SINGULAR_MEDIA_TYPE in self.headers.get("Accept", ""):
+            if len(rows) != 1:
+                self._send(406, {"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned"})
+            else:
+                self._send(status, rows[0], headers)
+        else:
+            self._send(status, rows, headers)
+
+    def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = b"" if payload is None and status in (201, 204) or self.command == "HEAD" else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
@@ -0,0 +1,119 @@
+"""
+Equivalente local das funções SQL de cota (supabase/migrations).
+
+Implementa `consume_quota` e `apply_usage_deltas` com a mesma semântica das
+funções do banco, sobre tabelas em memória protegidas por um lock (o papel
+do `FOR UPDATE`). Expõe `rpc(nome, parâmetros).execute().data` como o
+cliente do Supabase, então pode substituir o cliente em testes e benchmarks.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+USAGE_COLUMNS = ("messages_count", "images_analyzed", "pdfs_analyzed")
+DEFAULT_LIMITS = {"messages_count": 50, "images_analyzed": 5, "pdfs_analyzed": 2}
+
+
+@dataclass
+class RPCResponse:
+    """Resposta no formato do cliente do Supabase."""
+
+    data: Any
+
+
+class _RPCCall:
+    """Chamada pendente; executada em `execute()` como no cliente real."""
+
+    def __init__(self, owner: "LocalQuotaRPC", name: str, params: Dict[str, Any]):
+        self.owner = owner
+        self.name = name
+        self.params = params
+
+    def execute(self) -> RPCResponse:
+        handler = getattr(self.owner, self.name, None)
+        if handler is None:
+            raise ValueError(f"Função RPC desconhecida: {self.name}")
+        self.owner.calls.append(self.name)
+        return RPCResponse(handler(**self.params))
+
+
+class LocalQuotaRPC:
+    """
+    Tabelas `subscriptions` e `usage` em memória com as funções de cota.
+
+    Exemplo:
+        backend = LocalQuotaRPC()
+        backend.subscriptions["user-1"] = "active"
+        backend.rpc("consume_quota", {"p_user_id": "user-1", ...}).execute().data
+    """
+
+    def __init__(self):
+        self.subscriptions: Dict[str, str] = {}  # user_id -> status
+        self.usage: Dict[Tuple[str, str], Dict[str, int]] = {}  # (user_id, mês) -> colunas
+        self.calls: List[str] = []
+        self._lock = threading.Lock()
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> _RPCCall:
+        """Prepara a chamada de uma função (como `supabase.rpc`)."""
+        return _RPCCall(self, name, params)
+
+    def consume_quota(
+        self,
+        p_user_id: str,
+        p_month_year: str,
+        p_field: str,
+        p_amount: int = 1,
+        p_limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Mesma lógica de `public.consume_quota`."""
+        if p_field not in USAGE_COLUMNS:
+            raise ValueError(f"Campo de uso inválido: {p_field}")
+
+        with self._lock:
+            status = self.subscriptions.setdefault(p_user_id, "free")
+            row = self.usage.setdefault((p_user_id, p_month_year), dict.fromkeys(USAGE_COLUMNS, 0))
+            current = row[p_field]
+
+            if status != "active":
+                limit = p_limit if p_limit is not None else DEFAULT_LIMITS[p_field]
+                if p_amount >= 0 and current + max(p_amount, 1) > limit:
+                    return {
+                        "allowed": False,
+                        "remaining": 0,
+                        "current_usage": current,
+                        "limit": limit,
+                        "plan": "free",
+                        "is_premium": False,
+                    }
+
+            current = max(current + p_amount, 0)
+            row[p_field] = current
+
+        if status == "active":
+            return {
+                "allowed": True,
+                "remaining": "unlimited",
+                "current_usage": current,
+                "plan": "premium",
+                "is_premium": True,
+            }
+        return {
+            "allowed": True,
+            "remaining": limit - current,
+            "current_usage": current,
+            "limit": limit,
+            "plan": "free",
+            "is_premium": False,
+        }
+
+    def apply_usage_deltas(self, p_deltas: List[Dict[str, Any]]) -> None:
+        """Mesma lógica de `public.apply_usage_deltas`."""
+        with self._lock:
+            for delta in p_deltas:
+                if delta["field"] not in USAGE_COLUMNS:
+                    raise ValueError(f"Campo de uso inválido: {delta['field']}")
+                row = self.usage.setdefault(
+                    (delta["user_id"], delta["month_year"]), dict.fromkeys(USAGE_COLUMNS, 0)
+                )
+                row[delta["field"]] += int(delta["amount"])
@@ -0,0 +1,183 @@
+"""
+Verificação local dos access tokens do Supabase.
+
+`AuthService.get_user_from_token` chamava `auth.get_user` (ida e volta ao
+Supabase) em toda requisição autenticada. Os tokens são JWTs assinados:
+com o segredo do projeto (HS256) ou com as chaves públicas do JWKS
+(RS256/ES256) a assinatura e a expiração são verificadas localmente, e os
+claims decodificados ficam em um LRU com TTL indexado pelo hash do token.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+
+from .config import GEMConfig
+from .metrics import metrics
+
+HS_ALGORITHMS = ["HS256"]
+JWKS_ALGORITHMS = ["RS256", "ES256"]
+
+
+class TokenVerifierUnavailable(Exception):
+    """Não há como verificar localmente (sem segredo e JWKS indisponível)."""
+
+
+def token_hash(token: str) -> str:
+    """Hash do token usado como chave do cache (o token não fica em memória)."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def user_from_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte os claims do Supabase no formato de usuário da aplicação."""
+    metadata = claims.get("user_metadata") or {}
+    return {
+        "user_id": claims["sub"],
+        "email": claims.get("email"),
+        "full_name": metadata.get("full_name", ""),
+    }
+
+
+class TokenVerifier:
+    """
+    Verifica JWTs localmente e memoriza os usuários decodificados.
+
+    Exemplo:
+        verifier = TokenVerifier(secret=os.getenv("SUPABASE_JWT_SECRET"))
+        user = verifier.verify(token)  # None se inválido ou expirado
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        jwks_url: Optional[str] = None,
+        audience: Optional[str] = "authenticated",
+        cache_ttl: float = 300.0,
+        max_entries: int = 10000,
+        leeway: float = 5.0,
+        unavailable_cooldown: float = 60.0
+    ):
+        """
+        Inicializa o verificador.
+
+        Args:
+            secret: Segredo JWT do projeto (HS256)
+            jwks_url: URL do JWKS (chaves assimétricas), usada sem segredo
+            audience: Audience esperado (None desativa a verificação)
+            cache_ttl: Tempo máximo de um usuário no cache (limitado pelo `exp`)
+            max_entries: Tokens mantidos no cache
+            leeway: Tolerância de relógio na validação de `exp`/`nbf` (segundos)
+            unavailable_cooldown: Espera (segundos) antes de buscar de novo um JWKS que falhou
+        """
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.cache_ttl = cache_ttl
+        self.max_entries = max(1, max_entries)
+        self.leeway = leeway
+        self.unavailable_cooldown = unavailable_cooldown
+        self._unavailable_until = 0.0
+        self._jwks_client = jwt.PyJWKClient(jwks_url, cache_keys=True) if jwks_url and not secret else None
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> Optional["TokenVerifier"]:
+        """Cria o verificador a partir de GEMConfig (None quando desabilitado)."""
+        config = GEMConfig.get_auth_config()
+        if not config["local_verify"] or not (config["jwt_secret"] or config["jwks_url"]):
+            return None
+        return cls(
+            secret=config["jwt_secret"] or None,
+            jwks_url=config["jwks_url"] or None,
+            audience=config["audience"] or None,
+            cache_ttl=config["cache_ttl"],
+            max_entries=config["cache_max_entries"],
+            unavailable_cooldown=config["jwks_cooldown"],
+        )
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o usuário do token, ou None se a assinatura/expiração forem inválidas.
+
+        Raises:
+            TokenVerifierUnavailable: Se a chave de verificação não puder ser obtida
+        """
+        key = token_hash(token)
+        now = time.time()
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                expires_at, user = entry
+                if now < expires_at:
+                    self._cache.move_to_end(key)
+                    metrics.inc("auth_token_cache", result="hit")
+                    return user
+                del self._cache[key]
+
+        metrics.inc("auth_token_cache", result="miss")
+        claims = self._decode(token)
+        if claims is None:
+            metrics.inc("auth_token_verifications", result="invalid")
+            return None
+
+        metrics.inc("auth_token_verifications", result="valid")
+        user = user_from_claims(claims)
+        expires_at = min(now + self.cache_ttl, float(claims.get("exp", now + self.cache_ttl)))
+
+        with self._lock:
+            self._cache[key] = (expires_at, user)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+        return user
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna o tamanho do cache e o modo de verificação."""
+        with self._lock:
+            entries = len(self._cache)
+        return {
+            "entries": entries,
+            "mode": "hs256" if self.secret else "jwks",
+            "cache_ttl": self.cache_ttl,
+        }
+
+    def _decode(self, token: str) -> Optional[Dict[str, Any]]:
+        """Valida assinatura, `exp` e audience; None se o token for inválido."""
+        try:
+            if self.secret:
+                key, algorithms = self.secret, HS_ALGORITHMS
+            elif self._jwks_client:
+                if time.monotonic() < self._unavailable_until:
+                    # Falhou há pouco: não refaz a busca do JWKS a cada requisição
+                    raise TokenVerifierUnavailable("JWKS indisponível (aguardando nova tentativa)")
+                key, algorithms = self._jwks_client.get_signing_key_from_jwt(token).key, JWKS_ALGORITHMS
+            else:
+                raise TokenVerifierUnavailable("Nenhuma chave configurada")
+
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=algorithms,
+                audience=self.audience,
+                leeway=self.leeway,
+                options={"require": ["exp", "sub"], "verify_aud": self.audience is not None},
+            )
+        except jwt.InvalidTokenError as error:
+            print(f"[DEBUG] Token rejeitado na verificação local: {error}")
+            return None
+        except jwt.PyJWTError as error:
+            # JWKS fora do ar, vazio (projeto com segredo HS256) ou sem o `kid`:
+            # o chamador decide o fallback (consulta remota)
+            self._unavailable_until = time.monotonic() + self.unavailable_cooldown
+            print(f"[ERROR] Verificação local indisponível por {self.unavailable_cooldown:.0f}s: {error}")
+            metrics.inc("auth_jwks_failures")
+            raise TokenVerifierUnavailable(str(error)) from error
+
+        return claims
@@ -0,0 +1,294 @@
+"""
+Gravação das mensagens do chat em segundo plano (write-behind).
+
+Salvar a troca no caminho da requisição fazia cada resposta esperar os
+inserts no Supabase. O `TranscriptWriter` recebe os registros em uma fila
+limitada em memória e uma única thread os grava em lotes (por tamanho ou
+por tempo), com retentativas e backoff exponencial.
+
+Ordem por conversa:
+- cada registro recebe `id` e `created_at` no momento do envio, crescente
+  dentro da conversa, então a leitura por `created_at` segue a ordem da fala
+- uma única thread grava em ordem FIFO, e o arquivo de spill (gravado
+  quando o banco está fora) é sempre reaplicado antes da fila
+
+Como o `id` é gerado aqui, uma retentativa depois de um insert que chegou
+ao banco (mas cuja resposta se perdeu) não duplica mensagens.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .metrics import metrics
+
+Record = Dict[str, Any]
+
+
+class TranscriptWriter:
+    """
+    Fila limitada de mensagens gravadas em lote por uma thread dedicada.
+
+    Exemplo:
+        writer = TranscriptWriter(write_batch=gravar_mensagens, spill_path="transcripts_spill.jsonl")
+        writer.submit(conversation_id, user_id, [{"role": "user", "content": "Olá"}])
+        ...
+        writer.close()  # grava o que restou (ou manda para o spill)
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Record]], None],
+        max_queue: int = 1000,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        spill_path: Optional[str] = None
+    ):
+        """
+        Inicializa o writer e inicia a thread de gravação.
+
+        Args:
+            write_batch: Grava um lote de registros no banco (levanta exceção se falhar)
+            max_queue: Registros mantidos em memória (o excedente vai para o spill)
+            batch_size: Registros por lote (um lote cheio é gravado na hora)
+            flush_interval: Espera máxima (segundos) de um registro na fila
+            max_retries: Retentativas de um lote antes de mandá-lo para o spill
+            backoff_base: Espera (segundos) da primeira retentativa, dobrada a cada falha
+            backoff_max: Espera máxima entre retentativas
+            spill_path: Arquivo JSONL usado com o banco fora do ar, exclusivo do processo
+                (ver `claim_worker_file`; None descarta)
+        """
+        self.write_batch = write_batch
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.spill_path = spill_path
+
+        self._queue: Deque[Record] = deque()
+        self._condition = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._closing = False
+        self._last_created_at: "OrderedDict[str, datetime]" = OrderedDict()
+        self._written = 0
+        self._spilled = 0
+
+        self._thread = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, conversation_id: str, user_id: str, messages: List[Dict[str, str]]) -> bool:
+        """
+        Enfileira mensagens de uma conversa (sem ida ao banco).
+
+        Args:
+            conversation_id: ID da conversa
+            user_id: ID do dono da conversa
+            messages: Dicts com `role` e `content`, em ordem
+
+        Returns:
+            True se as mensagens foram aceitas (fila ou spill), False se o
+            writer já foi encerrado
+        """
+        with self._condition:
+            if self._closing:
+                return False
+
+            records = [self._record(conversation_id, user_id, message) for message in messages]
+            overflow = len(self._queue) + len(records) > self.max_queue
+            if not overflow:
+                self._queue.extend(records)
+                metrics.inc("transcript_records", len(records), result="queued")
+                metrics.set_gauge("transcript_queue_size", len(self._queue))
+                if len(self._queue) >= self.batch_size:
+                    self._condition.notify()
+
+        if overflow:
+            # Fila cheia: os registros vão direto para o disco, fora do lock da
+            # fila (o fsync não segura quem enfileira nem o writer)
+            metrics.inc("transcript_records", result="overflow")
+            self._spill(records)
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Para de aceitar mensagens e grava o que restou (o que falhar vai para o spill)."""
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna o tamanho da fila e os totais gravados e enviados ao spill."""
+        with self._condition:
+            queued = len(self._queue)
+        return {
+            "queued": queued,
+            "written": self._written,
+            "spilled": self._spilled,
+            "spill_pending": self._spill_exists(),
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+        }
+
+    # -------------------------------------------------------------- internos
+
+    def _record(self, conversation_id: str, user_id: str, message: Dict[str, str]) -> Record:
+        """Cria o registro com `id` e `created_at` crescente na conversa (com o lock adquirido)."""
+        created_at = datetime.now(timezone.utc)
+        previous = self._last_created_at.get(conversation_id)
+        if previous is not None and created_at <= previous:
+            created_at = previous + timedelta(microseconds=1)
+
+        self._last_created_at[conversation_id] = created_at
+        self._last_created_at.move_to_end(conversation_id)
+        while len(self._last_created_at) > 10000:
+            self._last_created_at.popitem(last=False)
+
+        return {
+            "id": str(uuid.uuid4()),
+            "conversation_id": conversation_id,
+            "user_id": user_id,
+            "role": message["role"],
+            "content": message["content"],
+            "created_at": created_at.isoformat(),
+        }
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closing or len(self._queue) >= self.batch_size,
+                    timeout=self.flush_interval,
+                )
+                closing = self._closing
+
+            self._drain()
+
+            if closing:
+                with self._condition:
+                    if not self._queue:
+                        return
+
+    def _drain(self) -> None:
+        """Reaplica o spill e grava a fila em lotes; se o banco cair, o resto vai para o spill."""
+        if not self._replay_spill():
+            # O spill tem registros mais antigos: a fila espera atrás deles
+            self._spill(self._take(len(self._queue)))
+            return
+
+        while True:
+            batch = self._take(self.batch_size)
+            if not batch:
+                return
+            if not self._write_with_retry(batch):
+                self._spill(batch + self._take(len(self._queue)))
+                return
+
+    def _take(self, count: int) -> List[Record]:
+        """Retira até `count` registros do início da fila."""
+        with self._condition:
+            batch = [self._queue.popleft() for _ in range(min(count, len(self._queue)))]
+            metrics.set_gauge("transcript_queue_size", len(self._queue))
+        return batch
+
+    def _write_with_retry(self, batch: List[Record]) -> bool:
+        """Grava um lote com backoff exponencial; False depois da última tentativa."""
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                self.write_batch(batch)
+            except Exception as error:  # pylint: disable=broad-except
+                print(f"[ERROR] Falha ao gravar {len(batch)} mensagens (tentativa {attempt + 1}): {error}")
+                metrics.inc("transcript_batches", result="error")
+                if attempt == self.max_retries or self._stop.is_set():
+                    return False
+                self._stop.wait(min(self.backoff_base * (2 ** attempt), self.backoff_max))
+                continue
+
+            self._written += len(batch)
+            metrics.inc("transcript_batches", result="ok")
+            metrics.observe("transcript_batch_seconds", time.perf_counter() - started)
+            return True
+        return False
+
+    def _spill(self, records: List[Record]) -> None:
+        """Anexa registros ao arquivo de spill (descartados se não houver arquivo)."""
+        if not records:
+            return
+        if not self.spill_path:
+            print(f"[ERROR] {len(records)} mensagens descartadas (sem arquivo de spill)")
+            metrics.inc("transcript_records", len(records), result="dropped")
+            return
+
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as handle:
+                for record in records:
+                    handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            self._spilled += len(records)
+        metrics.inc("transcript_records", len(records), result="spilled")
+
+    def _spill_exists(self) -> bool:
+        return bool(self.spill_path) and os.path.exists(self.spill_path) and os.path.getsize(self.spill_path) > 0
+
+    def _replay_spill(self) -> bool:
+        """
+        Grava os registros do spill, mais antigos que os da fila.
+
+        Returns:
+            True se o spill está vazio ao final, False se o banco ainda falha
+        """
+        if not self._spill_exists():
+            return True
+
+        with self._spill_lock:
+            records = []
+            with open(self.spill_path, encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Linha truncada por uma queda no meio da escrita
+                        continue
+
+            written = 0
+            for start in range(0, len(records), self.batch_size):
+                batch = records[start:start + self.batch_size]
+                try:
+                    self.write_batch(batch)
+                except Exception as error:  # pylint: disable=broad-except
+                    print(f"[ERROR] Spill ainda pendente ({len(records) - written} mensagens): {error}")
+                    break
+                written += len(batch)
+
+            remaining = records[written:]
+            temp_path = f"{self.spill_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                for record in remaining:
+                    handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temp_path, self.spill_path)
+
+        if written:
+            self._written += written
+            metrics.inc("transcript_records", written, result="replayed")
+            print(f"[DEBUG] Spill reaplicado: {written} mensagens gravadas")
+
+        if remaining:
+            # Banco ainda fora: espera antes de tentar de novo
+            self._stop.wait(self.backoff_base)
+            return False
+        return True
@@ -1,25 +1,55 @@
 """Aplicação FastAPI para interação web com o sistema SAC Learning GEMS."""
 
-import json
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import List, Literal, Optional, Tuple
 
-from fastapi import Depends, FastAPI, Request, status, Cookie, HTTPException
+from fastapi import Depends, FastAPI, Request, status, Cookie, HTTPException, Query, WebSocket
 from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.middleware.gzip import GZipMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
 from ..agents import GEMService, GEMResponse
 from ..agents.gems import get_all_gems, get_gem_info
+from ..agents.http_pool import close_http_clients, pool_stats, warm_up
+from ..config import GEMConfig
 from ..auth_service import AuthService
-from ..database import get_supabase_client
-from ..limits import check_user_limit, get_usage_stats
-from ..chat_manager import process_chat_message, save_message
+from ..data_access import db_pool_stats, execute, gather_queries, get_db_executor, run_db, shutdown_db_executor
+from ..database import close_supabase_client, get_supabase_client, supabase_pool_stats, warm_up_supabase
+from ..chat_manager import (
+    CONVERSATION_COLUMNS,
+    asave_messages,
+    save_messages,
+    close_transcript_writer,
+    get_transcript_writer,
+    transcript_stats,
+    conversations_page,
+    conversations_page_query,
+    messages_page,
+    messages_page_query,
+)
+from ..limits import acheck_user_limit, aget_usage_stats, close_quota_engine, consume_quota, quota_stats
+from ..metrics import metrics
+from ..transcripts import TranscriptWriter
+from .chat_socket import ChatSocketSession
+from .compression import CompressionMiddleware
+from .loop_monitor import EventLoopLagMonitor
+from .payloads import client_event, history_payload
+from .static_assets import PrecompressedStaticFiles
+from .streams import LAST_EVENT_ID_HEADER, StreamRegistry, parse_last_event_id, with_progress
+from .idempotency import (
+    IDEMPOTENCY_HEADER,
+    MAX_KEY_LENGTH,
+    REPLAYED_HEADER,
+    IdempotencyConflict,
+    IdempotencyRecord,
+    IdempotencyStore,
+    fingerprint,
+)
 
 
 TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
@@ -27,11 +57,30 @@ STATIC_DIR = Path(__file__).resolve().parent / "static"
 
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
+STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
 
 class MessagePayload(BaseModel):
     """Estrutura do payload enviado pelo frontend."""
 
     message: str
+    conversation_id: Optional[str] = None  # Se informado, a troca é salva na conversa
+
+
+class MessageRecord(BaseModel):
+    """Mensagem de uma conversa."""
+
+    role: Literal["user", "assistant"]
+    content: str
+
+
+class MessageBatchPayload(BaseModel):
+    """Lote de mensagens salvas juntas (ex: pergunta e resposta)."""
+
+    messages: List[MessageRecord] = Field(min_length=1, max_length=50)
 
 
 class LoginPayload(BaseModel):
@@ -56,6 +105,62 @@ def get_gem_service() -> GEMService:
     return GEMService(state_file="user_journey_web.json")
 
 
+@lru_cache
+def get_idempotency_store() -> Optional[IdempotencyStore]:
+    """Retorna o registro de chaves de idempotência do processo (None se desabilitado)."""
+
+    return IdempotencyStore.from_config()
+
+
+def claim_idempotency_key(
+    request: Request,
+    store: Optional[IdempotencyStore],
+    endpoint: str,
+    user: Optional[dict],
+    message: str,
+) -> Tuple[Optional[IdempotencyRecord], bool, Optional[JSONResponse]]:
+    """
+    Reserva o header Idempotency-Key da requisição.
+
+    Returns:
+        Tupla (registro, criado, resposta de erro). Sem header (ou com o
+        recurso desabilitado) o registro é None e a requisição segue normal.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER, "").strip()
+    if store is None or not key:
+        return None, True, None
+
+    if len(key) > MAX_KEY_LENGTH:
+        return None, True, JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "invalid_idempotency_key", "message": f"{IDEMPOTENCY_HEADER} muito longa"},
+        )
+
+    user_id = user["user_id"] if user else "anonymous"
+    try:
+        record, created = store.claim(f"{endpoint}:{user_id}", key, fingerprint(message))
+    except IdempotencyConflict as error:
+        return None, True, JSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            content={"error": "idempotency_conflict", "message": str(error)},
+        )
+    return record, created, None
+
+
+@lru_cache
+def get_stream_registry() -> StreamRegistry:
+    """Retorna o registro de streams retomáveis do processo."""
+
+    return StreamRegistry.from_config()
+
+
+@lru_cache
+def get_loop_monitor() -> Optional[EventLoopLagMonitor]:
+    """Retorna o monitor de atraso do event loop (None se desabilitado)."""
+
+    return EventLoopLagMonitor.from_config()
+
+
 @lru_cache
 def get_auth_service() -> AuthService:
     """Retorna uma instância reutilizável do serviço de autenticação."""
@@ -70,13 +175,20 @@ async def get_current_user(
     """
     Obtém o usuário atual a partir do token no header Authorization.
     Retorna None se não autenticado.
+
+    O resultado fica em `request.state`, então as várias cadeias de
+    dependências de uma requisição resolvem o usuário uma única vez.
     """
+    if hasattr(request.state, "current_user"):
+        return request.state.current_user
+
     auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return None
+    user = None
+    if auth_header and auth_header.startswith("Bearer "):
+        token = auth_header.replace("Bearer ", "")
+        user = await run_db(auth_service.get_user_from_token, token)
 
-    token = auth_header.replace("Bearer ", "")
-    user = auth_service.get_user_from_token(token)
+    request.state.current_user = user
     return user
 
 
@@ -95,15 +207,164 @@ async def require_auth(
     return user
 
 
+def persist_exchange(
+    user: Optional[dict],
+    conversation_id: Optional[str],
+    message: str,
+    answer: str,
+    writer: Optional[TranscriptWriter] = None,
+) -> Optional[bool]:
+    """
+    Salva a pergunta e a resposta na conversa em um único lote.
+
+    Com o `TranscriptWriter` a troca só é enfileirada (a gravação e a
+    verificação de posse da conversa acontecem em segundo plano); sem ele,
+    é gravada na hora.
+
+    Returns:
+        True se salvou (ou enfileirou), False se falhou, None se não havia o
+        que salvar (usuário anônimo, sem conversa ou sem resposta)
+    """
+    if not user or not conversation_id or not answer:
+        return None
+
+    exchange = [
+        {"role": "user", "content": message},
+        {"role": "assistant", "content": answer},
+    ]
+    if writer:
+        return writer.submit(conversation_id, user["user_id"], exchange)
+
+    try:
+        saved = save_messages(conversation_id, user["user_id"], exchange)
+    except Exception as error:  # pylint: disable=broad-except
+        print(f"[ERROR] Erro ao salvar a troca na conversa {conversation_id}: {error}")
+        return False
+
+    return saved is not None
+
+
+def process_chat_request(
+    payload: MessagePayload,
+    service: GEMService,
+    user: Optional[dict],
+    writer: Optional[TranscriptWriter] = None,
+) -> Tuple[int, dict]:
+    """Executa /api/chat e retorna (status_code, conteúdo)."""
+
+    user_id = user["user_id"] if user else None
+    is_premium = False
+
+    # Se usuário autenticado, reservar a mensagem (verificação e incremento atômicos)
+    if user:
+        limit_check = consume_quota(user["user_id"], "messages")
+        is_premium = limit_check.get("is_premium", False)
+
+        # Bloquear se atingiu o limite
+        if not limit_check["allowed"]:
+            return status.HTTP_402_PAYMENT_REQUIRED, {
+                "error": "limit_exceeded",
+                "message": limit_check["message"],
+                "remaining": 0,
+                "limit": limit_check.get("limit", 50),
+                "upgrade_required": True
+            }
+
+    # Processar mensagem normalmente
+    gem_response: GEMResponse = service.process_message(
+        payload.message,
+        user_id=user_id,
+        is_premium=is_premium,
+    )
+    status_code = status.HTTP_200_OK if gem_response.error is None else status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    # Mensagem que falhou não conta para o limite
+    if user and gem_response.error:
+        limit_check = consume_quota(user["user_id"], "messages", amount=-1)
+
+    content = {
+        "message": payload.message,
+        "answer": gem_response.answer,
+        "gem_id": gem_response.gem_id,
+        "gem_name": gem_response.gem_name,
+        "is_orchestrator": gem_response.is_orchestrator,
+        "error": gem_response.error,
+        "mode": gem_response.mode,
+    }
+
+    if payload.conversation_id and not gem_response.error:
+        content["persisted"] = persist_exchange(
+            user, payload.conversation_id, payload.message, gem_response.answer, writer
+        )
+
+    # Adicionar informações de limite se autenticado
+    if user:
+        content["remaining"] = limit_check.get("remaining", "unknown")
+        content["is_premium"] = limit_check.get("is_premium", False)
+
+    return status_code, content
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepara recursos compartilhados no startup e os libera no shutdown."""
+
+    if GEMConfig.HTTP_POOL_WARMUP:
+        llm_config = GEMConfig.get_llm_config()
+        # Aquece a conexão com o LLM em background para não atrasar o startup
+        asyncio.get_running_loop().run_in_executor(
+            None, warm_up, llm_config["base_url"], llm_config["api_key"]
+        )
+
+    if GEMConfig.SUPABASE_WARMUP and GEMConfig.SUPABASE_URL:
+        # Cria o cliente do worker e abre a conexão com o PostgREST antes da primeira requisição
+        asyncio.get_running_loop().run_in_executor(get_db_executor(), warm_up_supabase)
+
+    if GEMConfig.OPENING_PRECOMPUTE_ON_STARTUP:
+        # Gera as aberturas dos GEMs em background (respeita overrides de teste)
+        service_factory = app.dependency_overrides.get(get_gem_service, get_gem_service)
+        precompute = getattr(service_factory(), "precompute_openings", None)
+        if precompute:
+            precompute()
+
+    # Prova que as chamadas bloqueantes (Supabase, LLM) não travam o loop
+    loop_monitor = get_loop_monitor()
+    if loop_monitor:
+        loop_monitor.start()
+
+    yield
+
+    if loop_monitor:
+        await loop_monitor.stop()
+    await close_http_clients()
+    # Últimas mensagens e incrementos de uso antes de fechar o pool do banco
+    await run_db(close_transcript_writer)
+    await run_db(close_quota_engine)
+    shutdown_db_executor()
+    close_supabase_client()
+
+
 def create_app() -> FastAPI:
     """Cria e configura a aplicação FastAPI."""
 
-    app = FastAPI(title="SAC Learning GEMS", version="1.0.0")
+    app = FastAPI(title="SAC Learning GEMS", version="1.0.0", lifespan=lifespan)
+
+    compression_config = GEMConfig.get_compression_config()
 
-    # Adiciona compressão gzip para melhorar performance
-    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    # Gzip para respostas dinâmicas; SSE fica sem buffer (ver COMPRESSION_SSE_MODE)
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=compression_config["minimum_size"],
+        compresslevel=compression_config["compresslevel"],
+        sse_mode=compression_config["sse_mode"],
+    )
 
-    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+    # Estáticos comprimidos uma vez no startup e servidos com URL versionada
+    static_files = PrecompressedStaticFiles(
+        directory=STATIC_DIR, precompress=compression_config["static_precompress"]
+    )
+    app.mount("/static", static_files, name="static")
+    templates.env.globals["static_url"] = lambda path: f"/static/{static_files.url_path(path)}"
 
     @app.get("/", response_class=HTMLResponse)
     async def read_home(request: Request) -> HTMLResponse:
@@ -130,7 +391,7 @@ def create_app() -> FastAPI:
     ) -> JSONResponse:
         """Cria uma nova conta de usuário."""
 
-        result = auth_service.sign_up(
+        result = await auth_service.asign_up(
             email=payload.email,
             password=payload.password,
             full_name=payload.full_name
@@ -145,7 +406,7 @@ def create_app() -> FastAPI:
     ) -> JSONResponse:
         """Realiza login do usuário."""
 
-        result = auth_service.sign_in(
+        result = await auth_service.asign_in(
             email=payload.email,
             password=payload.password
         )
@@ -158,7 +419,7 @@ def create_app() -> FastAPI:
     ) -> JSONResponse:
         """Realiza logout do usuário."""
 
-        result = auth_service.sign_out()
+        result = await auth_service.asign_out()
         return JSONResponse(content=result)
 
     @app.get("/api/auth/me")
@@ -168,15 +429,13 @@ def create_app() -> FastAPI:
     ) -> JSONResponse:
         """Retorna informações do usuário autenticado."""
 
-        # Buscar subscription do usuário
-        subscription = auth_service.get_user_subscription(user["user_id"])
-        usage = auth_service.get_user_usage(user["user_id"])
+        # Subscription e uso são independentes: a rota espera só a consulta mais lenta
+        results = await gather_queries(
+            subscription=auth_service.aget_user_subscription(user["user_id"]),
+            usage=auth_service.aget_user_usage(user["user_id"]),
+        )
 
-        return JSONResponse(content={
-            **user,
-            "subscription": subscription,
-            "usage": usage
-        })
+        return JSONResponse(content={**user, **results})
 
     @app.get("/api/auth/google")
     async def google_login_endpoint(
@@ -184,7 +443,7 @@ def create_app() -> FastAPI:
     ) -> JSONResponse:
         """Inicia o fluxo de login com Google."""
 
-        result = auth_service.login_google()
+        result = await auth_service.alogin_google()
         return JSONResponse(content=result)
 
     @app.get("/auth/callback")
@@ -195,7 +454,7 @@ def create_app() -> FastAPI:
         """Callback do OAuth (Google) - processa o código e redireciona."""
 
         try:
-            result = auth_service.handle_oauth_callback(code)
+            result = await auth_service.ahandle_oauth_callback(code)
 
             # Verificar se result é um dicionário
             if not isinstance(result, dict):
@@ -258,64 +517,60 @@ def create_app() -> FastAPI:
     @app.get("/api/usage")
     async def usage_endpoint(
         user: dict = Depends(require_auth),
+        auth_service: AuthService = Depends(get_auth_service),
     ) -> JSONResponse:
-        """Retorna estatísticas de uso do usuário."""
+        """Retorna estatísticas de uso e o plano do usuário."""
+
+        results = await gather_queries(
+            stats=aget_usage_stats(user["user_id"]),
+            subscription=auth_service.aget_user_subscription(user["user_id"]),
+        )
+        is_premium = (results["subscription"] or {}).get("status") == "active"
 
-        stats = get_usage_stats(user["user_id"])
-        return JSONResponse(content=stats)
+        return JSONResponse(content={
+            **results["stats"],
+            "plan": "premium" if is_premium else "free",
+            "is_premium": is_premium,
+        })
 
     @app.post("/api/chat")
     async def chat_endpoint(
+        request: Request,
         payload: MessagePayload,
         service: GEMService = Depends(get_gem_service),
         user: Optional[dict] = Depends(get_current_user),
+        idempotency: Optional[IdempotencyStore] = Depends(get_idempotency_store),
+        writer: Optional[TranscriptWriter] = Depends(get_transcript_writer),
     ) -> JSONResponse:
         """Processa uma mensagem enviada pelo usuário."""
 
-        # Se usuário autenticado, verificar limites
-        if user:
-            limit_check = check_user_limit(user["user_id"], "messages")
+        record, created, rejection = claim_idempotency_key(request, idempotency, "chat", user, payload.message)
+        if rejection:
+            return rejection
 
-            # Bloquear se atingiu o limite
-            if not limit_check["allowed"]:
+        if record and not created:
+            # Repetição: aguarda a execução original em vez de gerar de novo
+            replayed = await record.wait_response()
+            if replayed is None:
                 return JSONResponse(
-                    status_code=status.HTTP_402_PAYMENT_REQUIRED,
-                    content={
-                        "error": "limit_exceeded",
-                        "message": limit_check["message"],
-                        "remaining": 0,
-                        "limit": limit_check.get("limit", 50),
-                        "upgrade_required": True
-                    }
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    content={"error": "idempotent_request_failed", "message": "A requisição original falhou; tente novamente"},
+                    headers={REPLAYED_HEADER: "true"},
                 )
+            return JSONResponse(status_code=replayed[0], content=replayed[1], headers={REPLAYED_HEADER: "true"})
 
-        # Processar mensagem normalmente
-        gem_response: GEMResponse = service.process_message(payload.message)
-        status_code = status.HTTP_200_OK if gem_response.error is None else status.HTTP_500_INTERNAL_SERVER_ERROR
-
-        # Se usuário autenticado, usar chat_manager para salvar
-        if user and not gem_response.error:
-            # Incrementar uso através do chat_manager
-            # (já incrementa automaticamente no process_chat_message)
-            from ..limits import increment_usage
-            increment_usage(user["user_id"], "messages")
-
-        content = {
-            "message": payload.message,
-            "answer": gem_response.answer,
-            "gem_id": gem_response.gem_id,
-            "gem_name": gem_response.gem_name,
-            "is_orchestrator": gem_response.is_orchestrator,
-            "error": gem_response.error,
-        }
-
-        # Adicionar informações de limite se autenticado
-        if user:
-            limit_check = check_user_limit(user["user_id"], "messages")
-            content["remaining"] = limit_check.get("remaining", "unknown")
-            content["is_premium"] = limit_check.get("is_premium", False)
-
-        return JSONResponse(status_code=status_code, content=content)
+        response = None
+        try:
+            # Limites no Supabase e geração no LLM são síncronos: rodam em thread
+            status_code, content = await run_in_threadpool(process_chat_request, payload, service, user, writer)
+            response = (status_code, content)
+            return JSONResponse(status_code=status_code, content=content)
+        finally:
+            if record:
+                await record.finish(response)
+                # Só respostas bem-sucedidas são reaproveitadas por novas tentativas
+                if response is None or response[0] != status.HTTP_200_OK:
+                    idempotency.release(record)
 
     @app.get("/api/status")
     async def status_endpoint(
@@ -326,6 +581,32 @@ def create_app() -> FastAPI:
         status_text = service.get_status()
         return JSONResponse(content={"status": status_text})
 
+    @app.get("/api/metrics")
+    async def metrics_endpoint(
+        service: GEMService = Depends(get_gem_service),
+        idempotency: Optional[IdempotencyStore] = Depends(get_idempotency_store),
+        streams: StreamRegistry = Depends(get_stream_registry),
+        loop_monitor: Optional[EventLoopLagMonitor] = Depends(get_loop_monitor),
+    ) -> JSONResponse:
+        """Retorna as métricas do processo (fila de admissão, modo de carga, cache, latências)."""
+
+        return JSONResponse(content={
+            **metrics.snapshot(),
+            "admission": service.admission.stats(),
+            "load_mode": service.get_load_mode(),
+            "http_pool": pool_stats(),
+            "response_cache": service.response_cache.stats() if service.response_cache else None,
+            "openings": service.openings.stats() if service.openings else None,
+            "speculation": service.speculative_budget.stats(),
+            "idempotency": idempotency.stats() if idempotency else None,
+            "streams": streams.stats(),
+            "db_pool": db_pool_stats(),
+            "supabase_pool": supabase_pool_stats(),
+            "quota": quota_stats(),
+            "transcripts": transcript_stats(),
+            "event_loop": loop_monitor.stats() if loop_monitor else None,
+        })
+
     @app.get("/api/gems")
     async def list_gems_endpoint(
         service: GEMService = Depends(get_gem_service),
@@ -352,8 +633,8 @@ def create_app() -> FastAPI:
                 content={"error": "GEM não encontrado"}
             )
 
-        # Atualiza o GEM atual no serviço
-        service.activate_gem(gem_id)
+        # Atualiza o GEM atual no serviço (grava o estado da jornada em disco)
+        await run_in_threadpool(service.activate_gem, gem_id)
 
         return JSONResponse(content={
             "message": f"Navegado para {gem_info['name']} {gem_info['emoji']}",
@@ -367,82 +648,189 @@ def create_app() -> FastAPI:
     ) -> JSONResponse:
         """Reinicia a jornada do usuário."""
 
-        message = service.reset()
+        # Faz backup e regrava o arquivo de estado: fora do event loop
+        message = await run_in_threadpool(service.reset)
         return JSONResponse(content={"message": message})
 
     @app.post("/api/chat/stream")
     async def chat_stream_endpoint(
+        request: Request,
         payload: MessagePayload,
         service: GEMService = Depends(get_gem_service),
+        user: Optional[dict] = Depends(get_current_user),
+        idempotency: Optional[IdempotencyStore] = Depends(get_idempotency_store),
+        streams: StreamRegistry = Depends(get_stream_registry),
+        writer: Optional[TranscriptWriter] = Depends(get_transcript_writer),
     ) -> StreamingResponse:
-        """Processa uma mensagem com streaming de resposta."""
+        """
+        Processa uma mensagem com streaming de resposta.
+
+        Os eventos são numerados e a geração continua em background se a
+        conexão cair; o cliente retoma com GET /api/chat/stream/{stream_id}.
+        """
+
+        record, created, rejection = claim_idempotency_key(request, idempotency, "chat_stream", user, payload.message)
+        if rejection:
+            return rejection
+
+        if record and not created:
+            # Repetição: acompanha o stream em andamento ou reproduz o concluído
+            after = parse_last_event_id(request.headers.get(LAST_EVENT_ID_HEADER), record.stream.stream_id)
+            return StreamingResponse(
+                record.stream.follow(after),
+                media_type="text/event-stream",
+                headers={**STREAM_HEADERS, REPLAYED_HEADER: "true"},
+            )
+
+        user_id = user["user_id"] if user else None
+        failed = False
+
+        # Antes de qualquer await: uma repetição concorrente com a mesma chave
+        # já encontra o buffer no registro e passa a acompanhá-lo
+        buffer = streams.create(owner=user_id)
+        if record:
+            record.stream = buffer
 
         async def event_generator():
+            nonlocal failed
             try:
-                yield f"data: {json.dumps({'type': 'start'}, ensure_ascii=False)}\n\n"
-                for chunk in service.process_message_stream(payload.message):
-                    event_type = chunk.get("type")
-
-                    if event_type == "chunk":
-                        chunk_data = {
-                            "type": "chunk",
-                            "content": str(chunk.get("content", "")),
-                            "accumulated": str(chunk.get("accumulated", "")),
-                            "gem_id": chunk.get("gem_id"),
-                            "gem_name": chunk.get("gem_name"),
-                            "is_orchestrator": chunk.get("is_orchestrator", False)
-                        }
-                        yield f"data: {json.dumps(chunk_data, ensure_ascii=False)}\n\n"
-
-                    elif event_type == "done":
-                        final_data = {
-                            "type": "done",
-                            "message": str(payload.message),
-                            "answer": str(chunk.get("answer", "")),
-                            "gem_id": chunk.get("gem_id"),
-                            "gem_name": chunk.get("gem_name"),
-                            "is_orchestrator": chunk.get("is_orchestrator", False),
-                            "error": chunk.get("error")
-                        }
-                        yield f"data: {json.dumps(final_data, ensure_ascii=False)}\n\n"
-
-                    elif event_type == "error":
-                        error_data = {
-                            "type": "error",
-                            "error": str(chunk.get("error", "Erro desconhecido"))
-                        }
-                        yield f"data: {json.dumps(error_data, ensure_ascii=False)}\n\n"
+                # Usuários premium têm prioridade na fila de admissão do LLM
+                is_premium = False
+                if user:
+                    is_premium = (await acheck_user_limit(user_id, "messages")).get("is_premium", False)
+
+                # Modo com a carga de agora; o do turno vem no progresso 'prompt_ready'
+                start_data = {"type": "start", "mode": service.get_load_mode(), "stream_id": buffer.stream_id}
+                yield start_data
+
+                # O gerador do serviço é síncrono (bloqueia na fila e no LLM),
+                # então é consumido em thread para não travar o event loop
+                stream = service.process_message_stream(
+                    payload.message,
+                    user_id=user_id,
+                    is_premium=is_premium,
+                )
+                events = with_progress(iterate_in_threadpool(stream), streams.heartbeat_interval)
+                answer = ""
+                async for chunk in events:
+                    event = client_event(chunk, payload.message)
+                    if event is None:
+                        continue
+                    if event["type"] == "error":
+                        failed = True
+                    elif event["type"] == "done" and not event["error"]:
+                        answer = event["answer"]
+                    yield event
 
                     await asyncio.sleep(0)
 
+                # A troca é salva pelo servidor: o resultado não depende da aba continuar aberta
+                if payload.conversation_id and not failed:
+                    if writer:
+                        # Só enfileira: não espera o Supabase nem disputa o pool do banco
+                        persisted = persist_exchange(user, payload.conversation_id, payload.message, answer, writer)
+                    else:
+                        persisted = await run_db(persist_exchange, user, payload.conversation_id, payload.message, answer)
+                    if persisted is not None:
+                        yield {"type": "persisted", "conversation_id": payload.conversation_id, "saved": persisted}
+
             except Exception as e:
+                failed = True
                 error_data = {
                     "type": "error",
                     "error": str(e)
                 }
-                yield f"data: {json.dumps(error_data, ensure_ascii=False)}\n\n"
+                yield error_data
 
+        async def produce() -> None:
+            # A geração não depende da conexão de quem a iniciou: reconexões
+            # e repetições acompanham o mesmo buffer e nada é gerado duas vezes
+            try:
+                async for event in event_generator():
+                    await buffer.append(event)
+            finally:
+                await buffer.finish()
+                if record:
+                    await record.finish()
+                    if failed:
+                        idempotency.release(record)
+
+        buffer.task = asyncio.create_task(produce())
         return StreamingResponse(
-            event_generator(),
+            buffer.follow(),
             media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "X-Accel-Buffering": "no",
-            }
+            headers=STREAM_HEADERS,
+        )
+
+    @app.get("/api/chat/stream/{stream_id}")
+    async def resume_chat_stream_endpoint(
+        stream_id: str,
+        request: Request,
+        user: Optional[dict] = Depends(get_current_user),
+        streams: StreamRegistry = Depends(get_stream_registry),
+    ) -> StreamingResponse:
+        """Retoma um stream a partir do Last-Event-ID (header ou query `last_event_id`)."""
+
+        buffer = streams.get(stream_id, owner=user["user_id"] if user else None)
+        if buffer is None:
+            return JSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"error": "stream_not_found", "message": "Stream expirado ou inexistente"},
+            )
+
+        last_event_id = request.headers.get(LAST_EVENT_ID_HEADER) or request.query_params.get("last_event_id")
+        return StreamingResponse(
+            buffer.follow(parse_last_event_id(last_event_id, stream_id)),
+            media_type="text/event-stream",
+            headers=STREAM_HEADERS,
         )
 
+    @app.websocket("/ws/chat")
+    async def chat_socket_endpoint(
+        websocket: WebSocket,
+        service: GEMService = Depends(get_gem_service),
+        auth_service: AuthService = Depends(get_auth_service),
+    ) -> None:
+        """
+        Chat via WebSocket: uma conexão autenticada por aba.
+
+        O token vem do header Authorization ou do parâmetro `token` (o
+        navegador não envia headers no handshake). A autenticação é resolvida
+        uma vez por conexão; a cota, a cada mensagem.
+        """
+
+        auth_header = websocket.headers.get("Authorization", "")
+        token = auth_header.replace("Bearer ", "") if auth_header.startswith("Bearer ") else websocket.query_params.get("token")
+
+        user = None
+        if token:
+            user = await run_db(auth_service.get_user_from_token, token)
+            if not user:
+                await websocket.close(code=4401, reason="Token inválido")
+                return
+
+        limit_check = await acheck_user_limit(user["user_id"], "messages") if user else None
+
+        await websocket.accept()
+        await ChatSocketSession(websocket, service, user=user, limit_check=limit_check).run()
+
     # ========== ROTAS DE GERENCIAMENTO DE CONVERSAS ==========
 
     @app.get("/api/conversations")
     async def list_conversations_endpoint(
+        limit: int = Query(30, ge=1, le=100),
+        cursor: Optional[str] = None,
         user: dict = Depends(require_auth),
     ) -> JSONResponse:
-        """Lista todas as conversas do usuário autenticado."""
+        """Lista uma página das conversas do usuário (cursor em `next_cursor`)."""
 
-        supabase = get_supabase_client()
-        result = supabase.table("conversations").select("*").eq("user_id", user["user_id"]).order("updated_at", desc=True).execute()
+        try:
+            query = conversations_page_query(user["user_id"], limit, cursor)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
 
-        return JSONResponse(content={"conversations": result.data})
+        result = await execute(query)
+        return JSONResponse(content=conversations_page(result.data or [], limit))
 
     @app.post("/api/conversations")
     async def create_conversation_endpoint(
@@ -451,34 +839,46 @@ def create_app() -> FastAPI:
         """Cria uma nova conversa."""
 
         supabase = get_supabase_client()
-        result = supabase.table("conversations").insert({
+        result = await execute(supabase.table("conversations").insert({
             "user_id": user["user_id"],
             "title": "Nova Conversa"
-        }).execute()
+        }))
 
         return JSONResponse(content={"conversation": result.data[0]})
 
     @app.get("/api/conversations/{conversation_id}")
     async def get_conversation_endpoint(
         conversation_id: str,
+        limit: int = Query(50, ge=1, le=200),
+        before: Optional[str] = None,
         user: dict = Depends(require_auth),
     ) -> JSONResponse:
-        """Obtém uma conversa específica com suas mensagens."""
+        """
+        Obtém uma conversa com a janela das mensagens mais recentes.
+
+        Mensagens mais antigas vêm com `before=<next_cursor>`.
+        """
 
         supabase = get_supabase_client()
 
-        # Verificar se a conversa pertence ao usuário
-        conv_result = supabase.table("conversations").select("*").eq("id", conversation_id).eq("user_id", user["user_id"]).execute()
+        try:
+            messages_query = messages_page_query(conversation_id, limit, before)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+
+        # Conversa e mensagens em paralelo; as mensagens só são devolvidas
+        # se a conversa pertencer ao usuário
+        results = await gather_queries(
+            conversation=execute(supabase.table("conversations").select(CONVERSATION_COLUMNS).eq("id", conversation_id).eq("user_id", user["user_id"])),
+            messages=execute(messages_query),
+        )
 
-        if not conv_result.data:
+        if not results["conversation"].data:
             raise HTTPException(status_code=404, detail="Conversa não encontrada")
 
-        # Buscar mensagens da conversa
-        messages_result = supabase.table("messages").select("*").eq("conversation_id", conversation_id).order("created_at").execute()
-
         return JSONResponse(content={
-            "conversation": conv_result.data[0],
-            "messages": messages_result.data
+            "conversation": results["conversation"].data[0],
+            **messages_page(results["messages"].data or [], limit),
         })
 
     @app.put("/api/conversations/{conversation_id}")
@@ -491,10 +891,11 @@ def create_app() -> FastAPI:
 
         supabase = get_supabase_client()
 
-        result = supabase.table("conversations").update({
+        result = await execute(supabase.table("conversations").update({
             "title": title,
+            "title_set": True,
             "updated_at": datetime.now().isoformat()
-        }).eq("id", conversation_id).eq("user_id", user["user_id"]).execute()
+        }).eq("id", conversation_id).eq("user_id", user["user_id"]))
 
         if not result.data:
             raise HTTPException(status_code=404, detail="Conversa não encontrada")
@@ -511,7 +912,7 @@ def create_app() -> FastAPI:
         supabase = get_supabase_client()
 
         # Deletar conversa (mensagens serão deletadas em cascata)
-        result = supabase.table("conversations").delete().eq("id", conversation_id).eq("user_id", user["user_id"]).execute()
+        result = await execute(supabase.table("conversations").delete().eq("id", conversation_id).eq("user_id", user["user_id"]))
 
         if not result.data:
             raise HTTPException(status_code=404, detail="Conversa não encontrada")
@@ -525,30 +926,38 @@ def create_app() -> FastAPI:
         content: str,
         user: dict = Depends(require_auth),
     ) -> JSONResponse:
-        """Salva uma mensagem em uma conversa."""
+        """
+        Salva uma mensagem em uma conversa.
 
-        supabase = get_supabase_client()
+        Mantido para clientes antigos; prefira o lote em JSON
+        (`/api/conversations/{conversation_id}/messages/batch`).
+        """
 
-        # Verificar se a conversa existe e pertence ao usuário
-        conv_result = supabase.table("conversations").select("id").eq("id", conversation_id).eq("user_id", user["user_id"]).execute()
+        saved = await asave_messages(conversation_id, user["user_id"], [{"role": role, "content": content}])
 
-        if not conv_result.data:
+        if saved is None:
             raise HTTPException(status_code=404, detail="Conversa não encontrada")
 
-        # Criar mensagem
-        message_result = supabase.table("messages").insert({
-            "conversation_id": conversation_id,
-            "user_id": user["user_id"],
-            "role": role,
-            "content": content
-        }).execute()
+        return JSONResponse(content={"message": saved[0]})
 
-        # Atualizar timestamp da conversa
-        supabase.table("conversations").update({
-            "updated_at": datetime.now().isoformat()
-        }).eq("id", conversation_id).execute()
+    @app.post("/api/conversations/{conversation_id}/messages/batch")
+    async def save_messages_batch_endpoint(
+        conversation_id: str,
+        payload: MessageBatchPayload,
+        user: dict = Depends(require_auth),
+    ) -> JSONResponse:
+        """Salva várias mensagens de uma conversa em um único insert."""
+
+        saved = await asave_messages(
+            conversation_id,
+            user["user_id"],
+            [message.model_dump() for message in payload.messages],
+        )
+
+        if saved is None:
+            raise HTTPException(status_code=404, detail="Conversa não encontrada")
 
-        return JSONResponse(content={"message": message_result.data[0]})
+        return JSONResponse(content={"messages": saved})
 
     @app.get("/api/history")
     async def history_endpoint(
@@ -556,23 +965,7 @@ def create_app() -> FastAPI:
     ) -> JSONResponse:
         """Retorna o histórico de conversas salvo para reconstruir o chat."""
 
-        state = service.orchestrator.state
-        current_gem = state.get("current_gem")
-        conversations = state.get("gem_conversations", {})
-        completed_gems = state.get("completed_gems", [])
-        active_history = None
-
-        if current_gem:
-            active_history = conversations.get(current_gem)
-            if not active_history:
-                active_history = service.gem_histories.get(current_gem)
-
-        payload = {
-            "current_gem": current_gem,
-            "conversations": conversations,
-            "active_history": active_history,
-            "completed_gems": completed_gems,
-        }
+        payload = history_payload(service)
 
         return JSONResponse(content=payload)
 
@@ -0,0 +1,205 @@
+"""
+Transporte de chat via WebSocket (`/ws/chat`).
+
+Uma conexão por aba do navegador: a autenticação é resolvida uma vez na
+abertura, e o mesmo socket multiplexa envio de mensagens, deltas da
+resposta, cancelamento e envio de status/histórico. A cota é consumida a
+cada mensagem (`consume_quota`), então o plano e o saldo valem no momento
+do envio, não da conexão.
+
+Protocolo (JSON):
+    Cliente -> servidor
+        {"type": "message", "id": "r1", "message": "..."}
+        {"type": "cancel", "id": "r1"}
+        {"type": "status"} | {"type": "history"} | {"type": "ping"}
+    Servidor -> cliente
+        {"type": "ready", "authenticated": ..., "is_premium": ..., "mode": ...}
+        eventos do stream com o "id" da mensagem (start, queued, chunk,
+        panel_chunk, panel_status, done, error, cancelled)
+        {"type": "status", ...} | {"type": "history", ...} | {"type": "pong"}
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from ..agents import GEMService
+from ..metrics import metrics
+from .payloads import client_event, history_payload
+
+
+class ChatSocketSession:
+    """Estado de uma conexão `/ws/chat`."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        service: GEMService,
+        user: Optional[dict] = None,
+        limit_check: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Inicializa a sessão.
+
+        Args:
+            websocket: Conexão já aceita
+            service: Serviço GEMS que processa as mensagens
+            user: Usuário autenticado (None para anônimos)
+            limit_check: Resultado de `check_user_limit` na abertura (só informa o frame `ready`)
+        """
+        self.websocket = websocket
+        self.service = service
+        self.user = user
+        self.user_id = user["user_id"] if user else None
+        self.is_premium = False
+        self.remaining: Optional[int] = None
+        self._update_plan(limit_check or {})
+        self._tasks: Dict[str, "asyncio.Task[None]"] = {}
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, data: Dict[str, Any]) -> None:
+        """Envia um frame (as tasks das mensagens compartilham o socket)."""
+        async with self._send_lock:
+            await self.websocket.send_json(data)
+
+    async def run(self) -> None:
+        """Atende a conexão até o cliente desconectar."""
+        metrics.inc("ws_connections")
+        await self.send({
+            "type": "ready",
+            "authenticated": self.user is not None,
+            "is_premium": self.is_premium,
+            "remaining": self.remaining,
+            "mode": self.service.get_load_mode(),
+        })
+
+        try:
+            while True:
+                frame = await self.websocket.receive_json()
+                await self.dispatch(frame)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+
+    async def dispatch(self, frame: Dict[str, Any]) -> None:
+        """Trata um frame recebido do cliente."""
+        kind = frame.get("type") if isinstance(frame, dict) else None
+        request_id = str(frame.get("id", "")) if isinstance(frame, dict) else ""
+
+        if kind == "message":
+            message = str(frame.get("message", "")).strip()
+            if not request_id or not message:
+                await self.send({"type": "error", "id": request_id, "error": "Frame 'message' requer 'id' e 'message'"})
+                return
+            if request_id in self._tasks:
+                await self.send({"type": "error", "id": request_id, "error": "Mensagem já em andamento"})
+                return
+            task = asyncio.create_task(self._run_message(request_id, message))
+            self._tasks[request_id] = task
+            task.add_done_callback(lambda _, request_id=request_id: self._tasks.pop(request_id, None))
+
+        elif kind == "cancel":
+            task = self._tasks.get(request_id)
+            if task:
+                task.cancel()
+
+        elif kind == "status":
+            await self.send({
+                "type": "status",
+                "status": self.service.get_status(),
+                "mode": self.service.get_load_mode(),
+                "current_gem": self.service.orchestrator.get_current_gem(),
+            })
+
+        elif kind == "history":
+            await self.send({"type": "history", **history_payload(self.service)})
+
+        elif kind == "ping":
+            await self.send({"type": "pong"})
+
+        else:
+            await self.send({"type": "error", "id": request_id or None, "error": f"Tipo de frame desconhecido: {kind}"})
+
+    async def _run_message(self, request_id: str, message: str) -> None:
+        """Transmite a resposta de uma mensagem com o id do pedido em cada frame."""
+        # Reserva a mensagem antes de gerar: mensagens paralelas (nesta ou em
+        # outras conexões) não passam juntas do limite
+        limit_check = await self._consume_quota(1)
+        if limit_check is not None and not limit_check["allowed"]:
+            await self.send({
+                "type": "error",
+                "id": request_id,
+                "error": "limit_exceeded",
+                "message": limit_check.get("message"),
+                "limit": limit_check.get("limit"),
+                "upgrade_required": True,
+            })
+            return
+
+        await self.send({"type": "start", "id": request_id, "mode": self.service.get_load_mode()})
+
+        # O gerador do serviço é síncrono: consumido em thread, como no SSE
+        stream = self.service.process_message_stream(
+            message,
+            user_id=self.user_id,
+            is_premium=self.is_premium,
+        )
+        # A reserva é mantida só com a resposta concluída; em erro é devolvida
+        # antes do frame final, para a próxima mensagem já ver o saldo certo
+        settled = False
+        try:
+            async for chunk in iterate_in_threadpool(stream):
+                event = client_event(chunk, message)
+                if event is None:
+                    continue
+                if event["type"] in ("done", "error") and not settled:
+                    settled = True
+                    if event["type"] == "error" or event.get("error"):
+                        await self._consume_quota(-1)
+                await self.send({**event, "id": request_id})
+        except asyncio.CancelledError:
+            metrics.inc("ws_cancellations")
+            # Fecha o gerador (libera a admissão e o stream do LLM)
+            await run_in_threadpool(stream.close)
+            if not settled:
+                await self._consume_quota(-1)
+            await self._send_quietly({"type": "cancelled", "id": request_id})
+            raise
+        except Exception as error:  # pylint: disable=broad-except
+            print(f"[ERROR] Erro no WebSocket de chat: {error}")
+            if not settled:
+                settled = True
+                await self._consume_quota(-1)
+            await self._send_quietly({"type": "error", "id": request_id, "error": str(error)})
+
+        if not settled:
+            # Stream terminou sem resposta
+            await self._consume_quota(-1)
+
+    async def _consume_quota(self, amount: int) -> Optional[Dict[str, Any]]:
+        """Consome (ou devolve, com `amount` negativo) mensagens do usuário autenticado."""
+        if not self.user_id:
+            return None
+
+        from ..limits import aconsume_quota  # pylint: disable=import-outside-toplevel
+        limit_check = await aconsume_quota(self.user_id, "messages", amount)
+        self._update_plan(limit_check)
+        return limit_check
+
+    def _update_plan(self, limit_check: Dict[str, Any]) -> None:
+        """Atualiza plano e saldo com a última decisão de cota."""
+        self.is_premium = limit_check.get("is_premium", False)
+        # Saldo do plano gratuito (None para premium ou desconhecido)
+        remaining = limit_check.get("remaining")
+        self.remaining = remaining if isinstance(remaining, int) else None
+
+    async def _send_quietly(self, data: Dict[str, Any]) -> None:
+        """Envia um frame ignorando um socket já fechado."""
+        try:
+            await self.send(data)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
@@ -0,0 +1,121 @@
+"""
+Política de compressão das respostas HTTP.
+
+O `GZipMiddleware` do Starlette comprime qualquer resposta acima do tamanho
+mínimo, inclusive `text/event-stream`: o buffer do gzip segura os frames e
+atrasa a entrega dos tokens. Este middleware:
+
+- não comprime SSE por padrão (`sse_mode="off"`)
+- opcionalmente comprime SSE com flush a cada frame (`sse_mode="flush"`)
+- não recomprime respostas que já têm Content-Encoding (estáticos pré-comprimidos)
+- delega as demais respostas ao `GZipResponder` do Starlette
+"""
+
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..metrics import metrics
+
+SSE_MODE_OFF = "off"
+SSE_MODE_FLUSH = "flush"
+
+EVENT_STREAM = "text/event-stream"
+
+
+class CompressionMiddleware:
+    """Gzip ciente de streaming (SSE sem buffer)."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1000,
+        compresslevel: int = 6,
+        sse_mode: str = SSE_MODE_OFF
+    ):
+        """
+        Inicializa o middleware.
+
+        Args:
+            app: Aplicação ASGI
+            minimum_size: Tamanho mínimo (bytes) para comprimir
+            compresslevel: Nível do gzip (1-9)
+            sse_mode: 'off' (SSE sem compressão) ou 'flush' (gzip com flush por frame)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.sse_mode = sse_mode
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("Accept-Encoding", ""):
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Decide a compressão de uma resposta a partir do header inicial."""
+
+    def __init__(self, middleware: CompressionMiddleware, send: Send):
+        self.middleware = middleware
+        self._send = send
+        self._mode = None  # 'passthrough', 'sse' ou 'gzip'
+        self._gzip = None
+        self._compressor = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+
+            if "content-encoding" in headers:
+                self._mode = "passthrough"
+            elif content_type.startswith(EVENT_STREAM):
+                if self.middleware.sse_mode == SSE_MODE_FLUSH:
+                    self._mode = "sse"
+                    self._start_sse(message)
+                else:
+                    self._mode = "passthrough"
+                    metrics.inc("http_compression", kind="sse_skipped")
+            else:
+                self._mode = "gzip"
+                self._gzip = GZipResponder(
+                    None, self.middleware.minimum_size, compresslevel=self.middleware.compresslevel
+                )
+                self._gzip.send = self._send
+                await self._gzip.send_with_gzip(message)
+                return
+
+            await self._send(message)
+            return
+
+        if self._mode == "gzip":
+            await self._gzip.send_with_gzip(message)
+        elif self._mode == "sse" and message["type"] == "http.response.body":
+            await self._send(self._compress_frame(message))
+        else:
+            await self._send(message)
+
+    def _start_sse(self, message: Message) -> None:
+        """Prepara o gzip do SSE (sem Content-Length, um flush por frame)."""
+        headers = MutableHeaders(raw=message["headers"])
+        headers["Content-Encoding"] = "gzip"
+        headers.add_vary_header("Accept-Encoding")
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        # wbits=31: formato gzip
+        self._compressor = zlib.compressobj(self.middleware.compresslevel, zlib.DEFLATED, 31)
+        metrics.inc("http_compression", kind="sse_flush")
+
+    def _compress_frame(self, message: Message) -> Message:
+        """Comprime um frame e faz Z_SYNC_FLUSH para que ele saia imediatamente."""
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        data = self._compressor.compress(body)
+        data += self._compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+        return {**message, "body": data}
@@ -0,0 +1,168 @@
+"""
+Chaves de idempotência dos endpoints de chat.
+
+Retentativas do frontend e cliques duplos reenviavam a mesma mensagem,
+gerando duas respostas do LLM, duas entradas no histórico do GEM e dois
+incrementos de uso. Com o header `Idempotency-Key`, a primeira requisição
+executa a geração e as repetições (mesmo usuário, mesma chave) se conectam
+ao stream em andamento ou recebem o resultado já concluído.
+
+O armazenamento é em memória, no processo, com TTL curto.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from ..config import GEMConfig
+from ..metrics import metrics
+
+if TYPE_CHECKING:
+    from .streams import StreamBuffer
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(Exception):
+    """A chave já foi usada com outro conteúdo."""
+
+
+def fingerprint(*parts: Any) -> str:
+    """Hash do conteúdo da requisição (detecta reuso da chave com outra mensagem)."""
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+class IdempotencyRecord:
+    """
+    Estado de uma chave: em andamento ou concluída.
+
+    Endpoints com streaming apontam para o buffer do stream em `stream`;
+    o endpoint JSON guarda `(status_code, conteúdo)` em `response`.
+    """
+
+    def __init__(self, key: str, request_fingerprint: str):
+        self.key = key
+        self.fingerprint = request_fingerprint
+        self.stream: Optional["StreamBuffer"] = None
+        self.response: Optional[Tuple[int, Dict[str, Any]]] = None
+        self.finished = False
+        self.finished_at: Optional[float] = None
+        self._condition = asyncio.Condition()
+
+    async def finish(self, response: Optional[Tuple[int, Dict[str, Any]]] = None) -> None:
+        """Marca a chave como concluída (com a resposta JSON, quando houver)."""
+        async with self._condition:
+            self.response = response
+            self.finished = True
+            self.finished_at = time.monotonic()
+            self._condition.notify_all()
+
+    async def wait_response(self) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Aguarda a conclusão e retorna a resposta JSON (None se a execução falhou)."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.finished)
+        return self.response
+
+
+class IdempotencyStore:
+    """
+    Registro em memória das chaves recentes.
+
+    Exemplo:
+        record, created = store.claim("chat:user-1", key, fingerprint(message))
+        if not created:
+            return await record.wait_response()  # Repetição: não gera de novo
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1000):
+        """
+        Inicializa o registro.
+
+        Args:
+            ttl: Tempo que um resultado concluído é mantido (segundos)
+            max_entries: Número máximo de chaves mantidas
+        """
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._records: "OrderedDict[str, IdempotencyRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> Optional["IdempotencyStore"]:
+        """Cria o registro a partir de GEMConfig (None quando desabilitado)."""
+        config = GEMConfig.get_idempotency_config()
+        if not config["enabled"]:
+            return None
+        return cls(ttl=config["ttl"], max_entries=config["max_entries"])
+
+    def claim(self, scope: str, key: str, request_fingerprint: str) -> Tuple[IdempotencyRecord, bool]:
+        """
+        Reserva a chave ou retorna o registro existente.
+
+        Args:
+            scope: Endpoint e usuário (chaves de usuários diferentes não colidem)
+            key: Valor do header Idempotency-Key
+            request_fingerprint: Hash do conteúdo da requisição
+
+        Returns:
+            Tupla (registro, criado). `criado` é False para repetições.
+
+        Raises:
+            IdempotencyConflict: Se a chave já foi usada com outro conteúdo
+        """
+        record_key = f"{scope}:{key}"
+        with self._lock:
+            self._purge()
+            record = self._records.get(record_key)
+            if record is not None:
+                if record.fingerprint != request_fingerprint:
+                    metrics.inc("idempotency_requests", result="conflict")
+                    raise IdempotencyConflict(f"Idempotency-Key '{key}' já usada com outra mensagem")
+                metrics.inc("idempotency_requests", result="replayed" if record.finished else "attached")
+                return record, False
+
+            record = IdempotencyRecord(record_key, request_fingerprint)
+            self._records[record_key] = record
+            self._evict()
+
+        metrics.inc("idempotency_requests", result="new")
+        return record, True
+
+    def release(self, record: IdempotencyRecord) -> None:
+        """Esquece a chave (execução com erro: uma nova tentativa pode gerar de novo)."""
+        with self._lock:
+            if self._records.get(record.key) is record:
+                del self._records[record.key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna o número de chaves em andamento e concluídas."""
+        with self._lock:
+            in_flight = sum(1 for record in self._records.values() if not record.finished)
+            return {
+                "entries": len(self._records),
+                "in_flight": in_flight,
+                "ttl": self.ttl,
+            }
+
+    def _purge(self) -> None:
+        """Remove resultados concluídos há mais de `ttl` segundos."""
+        now = time.monotonic()
+        expired = [
+            key for key, record in self._records.items()
+            if record.finished and now - record.finished_at > self.ttl
+        ]
+        for key in expired:
+            del self._records[key]
+
+    def _evict(self) -> None:
+        """Descarta as chaves concluídas mais antigas acima do limite."""
+        for key in list(self._records):
+            if len(self._records) <= self.max_entries:
+                return
+            if self._records[key].finished:
+                del self._records[key]
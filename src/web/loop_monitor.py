@@ -0,0 +1,87 @@
+"""
+Monitor do atraso do event loop.
+
+Uma tarefa dorme `interval` segundos e mede quanto acordou atrasada. Com o
+loop livre o atraso fica perto de zero; uma chamada bloqueante dentro de um
+`async def` (ex: uma consulta síncrona ao Supabase) aparece como atraso do
+tamanho da chamada. As amostras vão para `event_loop_lag_seconds`.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from ..config import GEMConfig
+from ..metrics import metrics
+
+
+class EventLoopLagMonitor:
+    """
+    Mede periodicamente o atraso do event loop.
+
+    Exemplo:
+        monitor = EventLoopLagMonitor(interval=0.5)
+        monitor.start()
+        ...
+        await monitor.stop()
+    """
+
+    def __init__(self, interval: float = 0.5):
+        """
+        Inicializa o monitor.
+
+        Args:
+            interval: Intervalo entre as amostras (segundos)
+        """
+        self.interval = interval
+        self.samples = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls) -> Optional["EventLoopLagMonitor"]:
+        """Cria o monitor a partir de GEMConfig (None quando desabilitado)."""
+        interval = GEMConfig.get_data_access_config()["loop_lag_interval"]
+        return cls(interval=interval) if interval > 0 else None
+
+    def start(self) -> None:
+        """Inicia a amostragem no event loop atual."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Interrompe a amostragem."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def record(self, lag: float) -> None:
+        """Registra uma amostra de atraso (segundos)."""
+        lag = max(0.0, lag)
+        self.samples += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        metrics.observe("event_loop_lag_seconds", lag)
+        metrics.set_gauge("event_loop_lag_seconds", lag)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna o último atraso, o máximo e o número de amostras."""
+        return {
+            "interval": self.interval,
+            "samples": self.samples,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "running": self._task is not None and not self._task.done(),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(time.perf_counter() - started - self.interval)
@@ -0,0 +1,87 @@
+"""Payloads enviados ao cliente, compartilhados entre SSE, WebSocket e JSON."""
+
+from typing import Any, Dict, Optional
+
+from ..agents import GEMService
+
+
+def client_event(chunk: Dict[str, Any], message: str) -> Optional[Dict[str, Any]]:
+    """
+    Converte um evento de `GEMService.process_message_stream` no formato enviado ao cliente.
+
+    Usado pelo SSE e pelo WebSocket. Retorna None para eventos internos.
+    """
+    event_type = chunk.get("type")
+
+    if event_type == "queued":
+        return {
+            "type": "queued",
+            "position": chunk.get("position"),
+            "queue_size": chunk.get("queue_size"),
+        }
+
+    if event_type == "progress":
+        return {
+            key: chunk.get(key)
+            for key in ("type", "stage", "position", "elapsed", "gem_id", "mode")
+            if key in chunk
+        }
+
+    if event_type in ("panel_chunk", "panel_status"):
+        # Cada painelista do GEM 4 tem seu próprio canal
+        return {
+            key: chunk.get(key)
+            for key in ("type", "panelist", "content", "accumulated", "status", "error", "elapsed", "gem_id")
+            if key in chunk
+        }
+
+    if event_type == "chunk":
+        return {
+            "type": "chunk",
+            "content": str(chunk.get("content", "")),
+            "accumulated": str(chunk.get("accumulated", "")),
+            "gem_id": chunk.get("gem_id"),
+            "gem_name": chunk.get("gem_name"),
+            "is_orchestrator": chunk.get("is_orchestrator", False)
+        }
+
+    if event_type == "done":
+        return {
+            "type": "done",
+            "message": str(message),
+            "answer": str(chunk.get("answer", "")),
+            "gem_id": chunk.get("gem_id"),
+            "gem_name": chunk.get("gem_name"),
+            "is_orchestrator": chunk.get("is_orchestrator", False),
+            "error": chunk.get("error"),
+            "mode": chunk.get("mode", "normal")
+        }
+
+    if event_type == "error":
+        return {
+            "type": "error",
+            "error": str(chunk.get("error", "Erro desconhecido"))
+        }
+
+    return None
+
+
+def history_payload(service: GEMService) -> Dict[str, Any]:
+    """Histórico salvo para reconstruir o chat (GEM atual, conversas e concluídos)."""
+    state = service.orchestrator.state
+    current_gem = state.get("current_gem")
+    conversations = state.get("gem_conversations", {})
+    completed_gems = state.get("completed_gems", [])
+    active_history = None
+
+    if current_gem:
+        active_history = conversations.get(current_gem)
+        if not active_history:
+            active_history = service.gem_histories.get(current_gem)
+
+    return {
+        "current_gem": current_gem,
+        "conversations": conversations,
+        "active_history": active_history,
+        "completed_gems": completed_gems,
+    }
@@ -286,6 +286,32 @@ textarea.addEventListener('input', () => {
   textarea.style.height = textarea.scrollHeight + 'px';
 });
 
+// Chave de idempotência: reenvios da mesma mensagem em poucos segundos
+// (clique duplo, nova tentativa) reutilizam a chave e não geram de novo
+const IDEMPOTENCY_WINDOW_MS = 10000;
+let lastIdempotency = null;
+
+const idempotencyKeyFor = (message) => {
+  const now = Date.now();
+  if (lastIdempotency && lastIdempotency.message === message && now - lastIdempotency.at < IDEMPOTENCY_WINDOW_MS) {
+    return lastIdempotency.key;
+  }
+  const key = window.crypto && window.crypto.randomUUID
+    ? window.crypto.randomUUID()
+    : `${now}-${Math.random().toString(36).slice(2)}`;
+  lastIdempotency = { message, key, at: now };
+  return key;
+};
+
+const STREAM_MAX_RECONNECTS = 5;
+
+const PROGRESS_LABELS = {
+  accepted: "Pensando...",
+  queued: "Na fila...",
+  prompt_ready: "Preparando o contexto...",
+  waiting_model: "Aguardando o modelo...",
+};
+
 // Handler para streaming de resposta
 const handleStreamingResponse = async (message, options = {}) => {
   const displayMessage = typeof options.displayMessage === 'string' ? options.displayMessage : message;
@@ -304,112 +330,179 @@ const handleStreamingResponse = async (message, options = {}) => {
   let gemName = null;
   let isOrchestrator = false;
   let buffer = ""; // Buffer para acumular chunks incompletos
+  const panelOutputs = {}; // Painel multi-IA (GEM 4): texto/status por painelista
 
   try {
-    const response = await fetch("/api/chat/stream", {
+    const authHeader = window.authManager ? window.authManager.getAuthHeader() : {};
+    let response = await fetch("/api/chat/stream", {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: { "Content-Type": "application/json", "Idempotency-Key": idempotencyKeyFor(message), ...authHeader },
       body: JSON.stringify({ message }),
     });
 
-    const reader = response.body.getReader();
-    const decoder = new TextDecoder();
+    // Retomada: a geração continua no servidor se a conexão cair
+    let streamId = null;
+    let lastEventId = null;
+    let finished = false;
+    let reconnects = 0;
 
     while (true) {
-      const { value, done } = await reader.read();
-      if (done) break;
-
-      const chunk = decoder.decode(value);
-      buffer += chunk;
-      const lines = buffer.split('\n');
-
-      // Mantém a última linha no buffer se não terminar com \n
-      buffer = lines.pop() || "";
-
-      for (const line of lines) {
-        if (line.startsWith('data: ')) {
-          try {
-            const jsonStr = line.slice(6).trim();
-            if (!jsonStr) continue; // Ignora linhas vazias
-            const data = JSON.parse(jsonStr);
-
-          if (data.type === 'start') {
-            // Mostra indicador de digitação
-            responseContainer.innerHTML = `
-              <div class="loading-indicator">
-                <div class="loading-content">
-                  <div class="loading-spinner"></div>
-                  <span class="loading-text">Pensando...</span>
-                </div>
-              </div>
-            `;
-            scrollToBottom();
-          } else if (data.type === 'chunk') {
-            accumulated = data.accumulated;
-            gemName = data.gem_name;
-            isOrchestrator = data.is_orchestrator;
-
-            // Atualiza a resposta em tempo real
-            const gemLabel = formatGemLabel(gemName, isOrchestrator);
-            const tagClass = isOrchestrator ? "chat-message__tag chat-message__tag--system" : "chat-message__tag";
-            const tagText = isOrchestrator ? "Orquestrador" : gemName || "GEM";
-            const svgIcon = isOrchestrator
-              ? '<svg viewBox="0 0 24 24"><path d="M12 2L2 7L12 12L22 7L12 2Z"/><path d="M2 17L12 22L22 17V12L12 17L2 12V17Z"/></svg>'
-              : '<svg viewBox="0 0 24 24"><path d="M12 12C15.315 12 18 9.315 18 6C18 2.685 15.315 0 12 0C8.685 0 6 2.685 6 6C6 9.315 8.685 12 12 12ZM12 14.25C7.995 14.25 0 16.26 0 20.25V22.5H24V20.25C24 16.26 16.005 14.25 12 14.25Z"/></svg>';
-
-            const formattedAnswer = accumulated
-              .replace(/\n/g, '<br>')
-              .replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>')
-              .replace(/`(.*?)`/g, '<code>$1</code>');
-
-            responseContainer.innerHTML = `
-              <div class="chat-message__meta">
-                <span class="chat-message__role">${svgIcon}${gemLabel}</span>
-                <span class="${tagClass}">${tagText}</span>
-              </div>
-              ${displayMessage !== null ? `<p class="chat-message__question">${sanitize(displayMessage)}</p>` : ''}
-              <div class="chat-message__answer streaming">${formattedAnswer}<span class="typing-cursor">▊</span></div>
-            `;
-            scrollToBottom();
-          } else if (data.type === 'done') {
-            // Remove cursor de digitação e mostra resposta final
-            const normalized = {
-              message: displayMessage !== null ? displayMessage : '', // Use empty string if null
-              answer: data.answer ?? "",
-              gem_name: data.gem_name,
-              is_orchestrator: data.is_orchestrator ?? false,
-              error: data.error ? sanitize(data.error) : "",
-            };
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
 
-            // Replace container with the full message if displayMessage is not null, otherwise just update the sidebar
-            if (displayMessage !== null) {
-              // Remove the streaming class before replacing
-              const answerElement = responseContainer.querySelector('.chat-message__answer');
-              if (answerElement) {
-                answerElement.classList.remove('streaming');
+      try {
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+
+          const chunk = decoder.decode(value, { stream: true });
+          buffer += chunk;
+          const lines = buffer.split('\n');
+
+          // Mantém a última linha no buffer se não terminar com \n
+          buffer = lines.pop() || "";
+
+          for (const line of lines) {
+            if (line.startsWith('id: ')) {
+              lastEventId = line.slice(4).trim();
+            } else if (line.startsWith('data: ')) {
+              try {
+                const jsonStr = line.slice(6).trim();
+                if (!jsonStr) continue; // Ignora linhas vazias
+                const data = JSON.parse(jsonStr);
+
+              if (data.type === 'start') {
+                streamId = data.stream_id || null;
+                // Mostra indicador de digitação
+                responseContainer.innerHTML = `
+                  <div class="loading-indicator">
+                    <div class="loading-content">
+                      <div class="loading-spinner"></div>
+                      <span class="loading-text">Pensando...</span>
+                    </div>
+                  </div>
+                `;
+                scrollToBottom();
+              } else if (data.type === 'queued') {
+                // Atualiza indicador com a posição na fila de admissão
+                const loadingText = responseContainer.querySelector('.loading-text');
+                if (loadingText) {
+                  loadingText.textContent = `Na fila... posição ${data.position}`;
+                }
+              } else if (data.type === 'progress') {
+                // Etapa atual enquanto o primeiro token não chega
+                const loadingText = responseContainer.querySelector('.loading-text');
+                if (loadingText && PROGRESS_LABELS[data.stage]) {
+                  const position = data.stage === 'queued' && data.position ? ` posição ${data.position}` : '';
+                  const elapsed = data.elapsed ? ` (${Math.round(data.elapsed)}s)` : '';
+                  loadingText.textContent = `${PROGRESS_LABELS[data.stage]}${position}${elapsed}`;
+                }
+              } else if (data.type === 'panel_chunk' || data.type === 'panel_status') {
+                // Um bloco por painelista; substituído quando a síntese começa
+                const panelist = panelOutputs[data.panelist] || { text: "", status: "gerando..." };
+                if (data.type === 'panel_chunk') {
+                  panelist.text = data.accumulated;
+                } else {
+                  panelist.status = data.status === 'ok' ? 'concluído' : data.status;
+                }
+                panelOutputs[data.panelist] = panelist;
+
+                const blocks = Object.entries(panelOutputs).map(([name, output]) => `
+                  <div class="chat-message__panelist">
+                    <strong>🤖 ${sanitize(name)}</strong> <em>(${sanitize(output.status)})</em>
+                    <div>${sanitize(output.text).replace(/\n/g, '<br>')}</div>
+                  </div>
+                `).join('');
+
+                responseContainer.innerHTML = `
+                  ${displayMessage !== null ? `<p class="chat-message__question">${sanitize(displayMessage)}</p>` : ''}
+                  <div class="chat-message__answer streaming">${blocks}</div>
+                `;
+                scrollToBottom();
+              } else if (data.type === 'chunk') {
+                accumulated = data.accumulated;
+                gemName = data.gem_name;
+                isOrchestrator = data.is_orchestrator;
+
+                // Atualiza a resposta em tempo real
+                const gemLabel = formatGemLabel(gemName, isOrchestrator);
+                const tagClass = isOrchestrator ? "chat-message__tag chat-message__tag--system" : "chat-message__tag";
+                const tagText = isOrchestrator ? "Orquestrador" : gemName || "GEM";
+                const svgIcon = isOrchestrator
+                  ? '<svg viewBox="0 0 24 24"><path d="M12 2L2 7L12 12L22 7L12 2Z"/><path d="M2 17L12 22L22 17V12L12 17L2 12V17Z"/></svg>'
+                  : '<svg viewBox="0 0 24 24"><path d="M12 12C15.315 12 18 9.315 18 6C18 2.685 15.315 0 12 0C8.685 0 6 2.685 6 6C6 9.315 8.685 12 12 12ZM12 14.25C7.995 14.25 0 16.26 0 20.25V22.5H24V20.25C24 16.26 16.005 14.25 12 14.25Z"/></svg>';
+
+                const formattedAnswer = accumulated
+                  .replace(/\n/g, '<br>')
+                  .replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>')
+                  .replace(/`(.*?)`/g, '<code>$1</code>');
+
+                responseContainer.innerHTML = `
+                  <div class="chat-message__meta">
+                    <span class="chat-message__role">${svgIcon}${gemLabel}</span>
+                    <span class="${tagClass}">${tagText}</span>
+                  </div>
+                  ${displayMessage !== null ? `<p class="chat-message__question">${sanitize(displayMessage)}</p>` : ''}
+                  <div class="chat-message__answer streaming">${formattedAnswer}<span class="typing-cursor">▊</span></div>
+                `;
+                scrollToBottom();
+              } else if (data.type === 'done') {
+                finished = true;
+                // Remove cursor de digitação e mostra resposta final
+                const normalized = {
+                  message: displayMessage !== null ? displayMessage : '', // Use empty string if null
+                  answer: data.answer ?? "",
+                  gem_name: data.gem_name,
+                  is_orchestrator: data.is_orchestrator ?? false,
+                  error: data.error ? sanitize(data.error) : "",
+                };
+
+                // Replace container with the full message if displayMessage is not null, otherwise just update the sidebar
+                if (displayMessage !== null) {
+                  // Remove the streaming class before replacing
+                  const answerElement = responseContainer.querySelector('.chat-message__answer');
+                  if (answerElement) {
+                    answerElement.classList.remove('streaming');
+                  }
+                  // Adiciona animação de conclusão
+                  responseContainer.style.transition = 'all 0.3s ease-out';
+                  responseContainer.replaceWith(buildMessage(normalized));
+                  scrollToBottom();
+                } else {
+                  // For commands that shouldn't be shown in chat, just update sidebar and remove loading indicator
+                  responseContainer.remove();
+                }
+
+                // Atualiza sidebar se existir
+                if (window.updateGemsSidebar) {
+                  window.updateGemsSidebar();
+                }
+              } else if (data.type === 'error') {
+                finished = true;
+                throw new Error(data.error);
+              }
+              } catch (parseError) {
+                // Ignora erros de parsing de JSON incompleto
+                console.warn('Erro ao fazer parse de linha SSE:', line, parseError);
               }
-              // Adiciona animação de conclusão
-              responseContainer.style.transition = 'all 0.3s ease-out';
-              responseContainer.replaceWith(buildMessage(normalized));
-              scrollToBottom();
-            } else {
-              // For commands that shouldn't be shown in chat, just update sidebar and remove loading indicator
-              responseContainer.remove();
-            }
-
-            // Atualiza sidebar se existir
-            if (window.updateGemsSidebar) {
-              window.updateGemsSidebar();
             }
-          } else if (data.type === 'error') {
-            throw new Error(data.error);
-          }
-          } catch (parseError) {
-            // Ignora erros de parsing de JSON incompleto
-            console.warn('Erro ao fazer parse de linha SSE:', line, parseError);
           }
         }
+      } catch (readError) {
+        if (!streamId || reconnects >= STREAM_MAX_RECONNECTS) throw readError;
+        console.warn('Conexão do stream caiu, retomando:', readError);
       }
+
+      if (finished || !streamId || reconnects >= STREAM_MAX_RECONNECTS) break;
+
+      // Reconecta e recebe apenas os eventos posteriores ao último id
+      reconnects += 1;
+      buffer = "";
+      await new Promise((resolve) => setTimeout(resolve, 500 * reconnects));
+      response = await fetch(`/api/chat/stream/${streamId}`, {
+        headers: { ...(lastEventId ? { "Last-Event-ID": lastEventId } : {}), ...authHeader },
+      });
+      if (!response.ok) throw new Error('Não foi possível retomar a resposta');
     }
   } catch (error) {
     console.error('Erro no streaming:', error);
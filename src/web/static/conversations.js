@@ -2,25 +2,34 @@
  * Gerenciamento de conversas
  */
 
+// Conversas por página na barra lateral e mensagens por janela do chat
+const CONVERSATIONS_PAGE_SIZE = 30;
+const MESSAGES_PAGE_SIZE = 50;
+
 class ConversationManager {
   constructor(authManager) {
     this.authManager = authManager;
     this.currentConversationId = null;
+    this.conversationsCursor = null;
+    this.messagesCursor = null;
   }
 
-  async loadConversations() {
+  async loadConversations(cursor = null) {
     try {
-      const response = await fetch('/api/conversations', {
+      const params = new URLSearchParams({ limit: CONVERSATIONS_PAGE_SIZE });
+      if (cursor) params.set('cursor', cursor);
+
+      const response = await fetch(`/api/conversations?${params}`, {
         headers: this.authManager.getAuthHeader()
       });
 
       if (!response.ok) throw new Error('Erro ao carregar conversas');
 
       const data = await response.json();
-      return data.conversations || [];
+      return { conversations: data.conversations || [], nextCursor: data.next_cursor || null };
     } catch (error) {
       console.error('Erro ao carregar conversas:', error);
-      return [];
+      return { conversations: [], nextCursor: null };
     }
   }
 
@@ -45,9 +54,12 @@ class ConversationManager {
     }
   }
 
-  async getConversation(conversationId) {
+  async getConversation(conversationId, before = null) {
     try {
-      const response = await fetch(`/api/conversations/${conversationId}`, {
+      const params = new URLSearchParams({ limit: MESSAGES_PAGE_SIZE });
+      if (before) params.set('before', before);
+
+      const response = await fetch(`/api/conversations/${conversationId}?${params}`, {
         headers: this.authManager.getAuthHeader()
       });
 
@@ -98,21 +110,28 @@ class ConversationManager {
   }
 
   async saveMessage(conversationId, role, content) {
+    const saved = await this.saveMessages(conversationId, [{ role, content }]);
+    return saved ? saved[0] : null;
+  }
+
+  async saveMessages(conversationId, messages) {
+    // Pergunta e resposta vão juntas no corpo JSON (respostas longas não cabem na URL)
     try {
-      const response = await fetch(`/api/conversations/${conversationId}/messages?role=${role}&content=${encodeURIComponent(content)}`, {
+      const response = await fetch(`/api/conversations/${conversationId}/messages/batch`, {
         method: 'POST',
         headers: {
           ...this.authManager.getAuthHeader(),
           'Content-Type': 'application/json'
-        }
+        },
+        body: JSON.stringify({ messages })
       });
 
-      if (!response.ok) throw new Error('Erro ao salvar mensagem');
+      if (!response.ok) throw new Error('Erro ao salvar mensagens');
 
       const data = await response.json();
-      return data.message;
+      return data.messages;
     } catch (error) {
-      console.error('Erro ao salvar mensagem:', error);
+      console.error('Erro ao salvar mensagens:', error);
       return null;
     }
   }
@@ -126,7 +145,7 @@ class ConversationManager {
   }
 
   async renderConversationsList(containerElement) {
-    const conversations = await this.loadConversations();
+    const { conversations, nextCursor } = await this.loadConversations();
 
     if (conversations.length === 0) {
       containerElement.innerHTML = `
@@ -138,15 +157,29 @@ class ConversationManager {
       return;
     }
 
-    containerElement.innerHTML = conversations.map(conv => {
-      const date = new Date(conv.updated_at || conv.created_at);
+    containerElement.innerHTML = '';
+    this.appendConversationItems(containerElement, conversations, nextCursor);
+  }
+
+  appendConversationItems(containerElement, conversations, nextCursor) {
+    this.conversationsCursor = nextCursor;
+    containerElement.querySelector('.conversation-load-more')?.remove();
+
+    containerElement.insertAdjacentHTML('beforeend', conversations.map(conv => {
+      // Metadados mantidos pelo servidor: nada de recarregar as mensagens
+      const date = new Date(conv.last_message_at || conv.updated_at || conv.created_at);
       const dateStr = date.toLocaleDateString('pt-BR', { day: '2-digit', month: '2-digit' });
+      const count = conv.message_count ? ` · ${conv.message_count} mensagens` : '';
+      const preview = conv.last_message_preview
+        ? `<div class="conversation-preview">${this.escapeHtml(conv.last_message_preview)}</div>`
+        : '';
 
       return `
         <div class="conversation-item" data-id="${conv.id}">
           <div class="conversation-info">
-            <div class="conversation-title">${conv.title}</div>
-            <div class="conversation-date">${dateStr}</div>
+            <div class="conversation-title">${this.escapeHtml(conv.title)}</div>
+            ${preview}
+            <div class="conversation-date">${dateStr}${count}</div>
           </div>
           <button class="conversation-delete" data-id="${conv.id}" title="Deletar conversa">
             <svg width="16" height="16" viewBox="0 0 24 24" fill="none">
@@ -155,32 +188,49 @@ class ConversationManager {
           </button>
         </div>
       `;
-    }).join('');
+    }).join(''));
+
+    // Adicionar event listeners (só nos itens novos)
+    containerElement.querySelectorAll('.conversation-item:not([data-bound])').forEach(item => {
+      item.dataset.bound = 'true';
 
-    // Adicionar event listeners
-    containerElement.querySelectorAll('.conversation-item').forEach(item => {
       item.addEventListener('click', async (e) => {
         if (e.target.closest('.conversation-delete')) return;
 
         const convId = item.dataset.id;
         await this.loadConversationMessages(convId);
       });
-    });
 
-    containerElement.querySelectorAll('.conversation-delete').forEach(btn => {
-      btn.addEventListener('click', async (e) => {
+      item.querySelector('.conversation-delete').addEventListener('click', async (e) => {
         e.stopPropagation();
 
         if (!confirm('Deseja realmente deletar esta conversa?')) return;
 
-        const convId = btn.dataset.id;
-        const success = await this.deleteConversation(convId);
+        const success = await this.deleteConversation(item.dataset.id);
 
         if (success) {
           await this.renderConversationsList(containerElement);
         }
       });
     });
+
+    if (nextCursor) {
+      const loadMore = document.createElement('button');
+      loadMore.className = 'conversation-load-more';
+      loadMore.textContent = 'Carregar mais';
+      loadMore.addEventListener('click', async () => {
+        loadMore.disabled = true;
+        const page = await this.loadConversations(this.conversationsCursor);
+        this.appendConversationItems(containerElement, page.conversations, page.nextCursor);
+      });
+      containerElement.appendChild(loadMore);
+    }
+  }
+
+  escapeHtml(text) {
+    const element = document.createElement('div');
+    element.textContent = text || '';
+    return element.innerHTML;
   }
 
   async loadConversationMessages(conversationId) {
@@ -200,20 +250,42 @@ class ConversationManager {
 
     chatHistory.innerHTML = '';
 
-    // Renderizar mensagens
+    // Renderizar a janela mais recente; as anteriores vêm sob demanda
     data.messages.forEach(msg => {
       this.appendMessageToChat(msg.role, msg.content);
     });
+    this.setOlderMessagesButton(chatHistory, conversationId, data.next_cursor);
   }
 
-  appendMessageToChat(role, content) {
-    const chatHistory = document.getElementById('chat-history');
-    const emptyState = document.getElementById('empty-state');
+  setOlderMessagesButton(chatHistory, conversationId, nextCursor) {
+    this.messagesCursor = nextCursor;
+    chatHistory.querySelector('.messages-load-older')?.remove();
+
+    if (!nextCursor) return;
+
+    const loadOlder = document.createElement('button');
+    loadOlder.className = 'messages-load-older';
+    loadOlder.textContent = 'Carregar mensagens anteriores';
+    loadOlder.addEventListener('click', async () => {
+      loadOlder.disabled = true;
+      const data = await this.getConversation(conversationId, this.messagesCursor);
+      if (!data || this.currentConversationId !== conversationId) return;
+
+      // Mantém a posição de leitura ao inserir acima
+      const previousHeight = chatHistory.scrollHeight;
+      const fragment = document.createDocumentFragment();
+      data.messages.forEach(msg => {
+        fragment.appendChild(this.createMessageElement(msg.role, msg.content));
+      });
+      loadOlder.after(fragment);
+      chatHistory.scrollTop += chatHistory.scrollHeight - previousHeight;
 
-    if (emptyState) {
-      emptyState.style.display = 'none';
-    }
+      this.setOlderMessagesButton(chatHistory, conversationId, data.next_cursor);
+    });
+    chatHistory.prepend(loadOlder);
+  }
 
+  createMessageElement(role, content) {
     const messageDiv = document.createElement('div');
     messageDiv.className = `message message--${role}`;
     messageDiv.innerHTML = `
@@ -221,8 +293,18 @@ class ConversationManager {
         <div class="message__text">${this.formatMessage(content)}</div>
       </div>
     `;
+    return messageDiv;
+  }
+
+  appendMessageToChat(role, content) {
+    const chatHistory = document.getElementById('chat-history');
+    const emptyState = document.getElementById('empty-state');
+
+    if (emptyState) {
+      emptyState.style.display = 'none';
+    }
 
-    chatHistory.appendChild(messageDiv);
+    chatHistory.appendChild(this.createMessageElement(role, content));
     chatHistory.scrollTop = chatHistory.scrollHeight;
   }
 
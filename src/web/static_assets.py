@@ -0,0 +1,159 @@
+"""
+Arquivos estáticos pré-comprimidos com URLs versionadas por conteúdo.
+
+No startup cada arquivo é lido uma vez, recebe um hash de conteúdo e é
+comprimido (gzip e, se o pacote `brotli` estiver instalado, brotli). Os
+templates usam `static_url('app.js')`, que gera `/static/app.<hash>.js`:
+
+- URL versionada: `Cache-Control: immutable` por um ano
+- URL original: `no-cache` com ETag forte (revalidação barata)
+
+Arquivos não carregados no startup seguem pelo `StaticFiles` padrão.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from ..metrics import metrics
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - brotli é opcional
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+COMPRESSIBLE_SUFFIXES = {".js", ".css", ".html", ".svg", ".json", ".txt", ".map"}
+
+
+@dataclass
+class StaticAsset:
+    """Arquivo estático carregado em memória."""
+
+    path: str
+    hashed_path: str
+    digest: str
+    media_type: str
+    content: bytes
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+
+def hashed_name(path: str, digest: str) -> str:
+    """`js/app.js` -> `js/app.<hash>.js`."""
+    stem, dot, suffix = path.rpartition(".")
+    if not dot or "/" in suffix:
+        return f"{path}.{digest}"
+    return f"{stem}.{digest}.{suffix}"
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    `StaticFiles` com conteúdo pré-comprimido, ETag forte e URLs versionadas.
+
+    Exemplo:
+        static_files = PrecompressedStaticFiles(directory=STATIC_DIR)
+        app.mount("/static", static_files, name="static")
+        static_files.url_path("app.js")  # "app.3f2a1b9c0d.js"
+    """
+
+    def __init__(self, directory: Path, precompress: bool = True, minimum_size: int = 1024, **kwargs):
+        """
+        Inicializa e carrega os arquivos.
+
+        Args:
+            directory: Diretório dos arquivos estáticos
+            precompress: Se gera as versões gzip/brotli no startup
+            minimum_size: Tamanho mínimo (bytes) para pré-comprimir
+        """
+        super().__init__(directory=directory, **kwargs)
+        self.precompress = precompress
+        self.minimum_size = minimum_size
+        self._assets: Dict[str, StaticAsset] = {}
+        self._routes: Dict[str, Tuple[StaticAsset, bool]] = {}  # URL -> (arquivo, versionada)
+        self._load(Path(directory))
+
+    def url_path(self, path: str) -> str:
+        """Caminho versionado de um arquivo (o original se não estiver carregado)."""
+        asset = self._assets.get(path)
+        return asset.hashed_path if asset else path
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna o número de arquivos e os bytes economizados pela compressão."""
+        return {
+            "assets": len(self._assets),
+            "bytes": sum(len(asset.content) for asset in self._assets.values()),
+            "gzip_bytes": sum(len(asset.gzip or asset.content) for asset in self._assets.values()),
+        }
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        route = self._routes.get(path.replace("\\", "/"))
+        if route is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        asset, immutable = route
+        request_headers = Headers(scope=scope)
+        body, encoding = self._select_encoding(asset, request_headers.get("accept-encoding", ""))
+
+        etag = f'"{asset.digest}-{encoding}"' if encoding else f'"{asset.digest}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+
+        if etag in [tag.strip() for tag in request_headers.get("if-none-match", "").split(",")]:
+            metrics.inc("static_responses", result="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        metrics.inc("static_responses", result=encoding or "identity")
+        return Response(body if scope["method"] == "GET" else b"", media_type=asset.media_type, headers=headers)
+
+    @staticmethod
+    def _select_encoding(asset: StaticAsset, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """Escolhe brotli > gzip > identidade conforme o Accept-Encoding."""
+        accepted = {part.split(";")[0].strip() for part in accept_encoding.split(",")}
+        if asset.br and "br" in accepted:
+            return asset.br, "br"
+        if asset.gzip and "gzip" in accepted:
+            return asset.gzip, "gzip"
+        return asset.content, None
+
+    def _load(self, directory: Path) -> None:
+        """Lê, versiona e comprime os arquivos do diretório."""
+        if not directory.is_dir():
+            return
+
+        for file_path in sorted(directory.rglob("*")):
+            if not file_path.is_file():
+                continue
+
+            path = file_path.relative_to(directory).as_posix()
+            content = file_path.read_bytes()
+            digest = hashlib.sha256(content).hexdigest()[:16]
+            media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            asset = StaticAsset(path, hashed_name(path, digest), digest, media_type, content)
+
+            if self.precompress and file_path.suffix in COMPRESSIBLE_SUFFIXES and len(content) >= self.minimum_size:
+                # mtime=0: saída determinística (mesmo ETag entre processos)
+                compressed = gzip.compress(content, compresslevel=9, mtime=0)
+                asset.gzip = compressed if len(compressed) < len(content) else None
+                if brotli is not None:
+                    compressed = brotli.compress(content)
+                    asset.br = compressed if len(compressed) < len(content) else None
+
+            self._assets[path] = asset
+            self._routes[path] = (asset, False)
+            self._routes[asset.hashed_path] = (asset, True)
@@ -0,0 +1,264 @@
+"""
+Streams SSE retomáveis.
+
+Cada stream de `/api/chat/stream` recebe um id e seus eventos são
+numerados (`id: <stream_id>:<seq>`). A geração roda em uma task própria e
+os eventos ficam em um buffer circular por stream, mantido por um período
+de carência depois do fim. Um cliente que perdeu a conexão reconecta com o
+header `Last-Event-ID` e recebe apenas o que faltou, sem chamar o LLM de
+novo nem duplicar o turno no histórico.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from ..config import GEMConfig
+from ..metrics import metrics
+
+LAST_EVENT_ID_HEADER = "Last-Event-ID"
+HEARTBEAT_FRAME = ": keepalive\n\n"
+
+# Etapas anteriores ao primeiro token (repetidas em frames 'progress')
+_WAITING_STAGES = ("accepted", "queued", "prompt_ready", "waiting_model")
+
+
+def format_event(stream_id: str, seq: int, data: Dict[str, Any]) -> str:
+    """Formata um evento SSE numerado."""
+    return f"id: {stream_id}:{seq}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def with_progress(
+    events: AsyncIterator[Dict[str, Any]],
+    interval: float
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Repassa os eventos do serviço e, enquanto nenhum token chega, repete a
+    etapa atual (fila, prompt pronto, aguardando o modelo) a cada `interval`
+    (None desativa).
+
+    Sem isso, um TTFT de 10-30 s deixa a conexão ociosa e proxies/navegadores
+    a derrubam, o que gera novas tentativas.
+    """
+    iterator = events.__aiter__()
+    started_at = time.monotonic()
+    progress: Optional[Dict[str, Any]] = {"type": "progress", "stage": "accepted"}
+    pending = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({pending}, timeout=interval if interval and progress else None)
+            if not done:
+                metrics.inc("sse_progress_frames", stage=progress["stage"])
+                yield {**progress, "elapsed": round(time.monotonic() - started_at, 1)}
+                continue
+
+            try:
+                event = pending.result()
+            except StopAsyncIteration:
+                return
+            pending = asyncio.ensure_future(iterator.__anext__())
+
+            event_type = event.get("type")
+            if event_type == "queued":
+                progress = {"type": "progress", "stage": "queued", "position": event.get("position")}
+            elif event_type == "progress" and event.get("stage") in _WAITING_STAGES:
+                progress = {"type": "progress", "stage": event["stage"]}
+            elif event_type not in ("start", "progress"):
+                # Tokens (ou o fim) chegaram: daqui em diante só heartbeats
+                progress = None
+            yield event
+    finally:
+        pending.cancel()
+
+
+def parse_last_event_id(value: Optional[str], stream_id: str) -> int:
+    """
+    Extrai o número do último evento recebido pelo cliente.
+
+    Returns:
+        Sequência do último evento (0 se ausente ou de outro stream)
+    """
+    if not value:
+        return 0
+    prefix, _, seq = value.strip().rpartition(":")
+    if prefix != stream_id or not seq.isdigit():
+        return 0
+    return int(seq)
+
+
+class StreamBuffer:
+    """
+    Buffer circular dos eventos de um stream.
+
+    Exemplo:
+        stream = registry.create(owner="user-1")
+        await stream.append({"type": "chunk", ...})
+        async for frame in stream.follow(after=last_seq):
+            ...
+    """
+
+    def __init__(
+        self,
+        stream_id: str,
+        owner: Optional[str] = None,
+        max_events: int = 2048,
+        heartbeat_interval: Optional[float] = None
+    ):
+        """
+        Inicializa o buffer.
+
+        Args:
+            stream_id: Identificador do stream
+            owner: Usuário dono do stream (None para anônimos)
+            max_events: Eventos mantidos (os mais antigos são descartados)
+            heartbeat_interval: Intervalo dos comentários de keepalive sem eventos (None desativa)
+        """
+        self.stream_id = stream_id
+        self.owner = owner
+        self.heartbeat_interval = heartbeat_interval
+        self.finished = False
+        self.finished_at: Optional[float] = None
+        self.task: Optional["asyncio.Task[None]"] = None  # Produtor (mantém a referência)
+        self._events: Deque[Tuple[int, str]] = deque(maxlen=max(1, max_events))
+        self._next_seq = 1
+        self._condition = asyncio.Condition()
+
+    @property
+    def last_seq(self) -> int:
+        """Número do último evento emitido."""
+        return self._next_seq - 1
+
+    async def append(self, data: Dict[str, Any]) -> None:
+        """Numera um evento, guarda no buffer e acorda quem acompanha o stream."""
+        async with self._condition:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._events.append((seq, format_event(self.stream_id, seq, data)))
+            self._condition.notify_all()
+
+    async def finish(self) -> None:
+        """Marca o fim da geração (o buffer ainda fica disponível na carência)."""
+        async with self._condition:
+            self.finished = True
+            self.finished_at = time.monotonic()
+            self._condition.notify_all()
+
+    async def follow(self, after: int = 0) -> AsyncIterator[str]:
+        """
+        Transmite os eventos posteriores a `after` e acompanha os próximos até o fim.
+
+        Se parte do intervalo já saiu do buffer, a transmissão continua do
+        evento mais antigo disponível (chunks trazem o texto acumulado).
+        Sem eventos por `heartbeat_interval`, envia um comentário SSE.
+        """
+        if after:
+            metrics.inc("sse_stream_resumes")
+        cursor = after
+        while True:
+            async with self._condition:
+                try:
+                    await asyncio.wait_for(
+                        self._condition.wait_for(lambda: self.last_seq > cursor or self.finished),
+                        timeout=self.heartbeat_interval,
+                    )
+                except asyncio.TimeoutError:
+                    pending = None
+                else:
+                    pending = [(seq, frame) for seq, frame in self._events if seq > cursor]
+                finished = self.finished
+
+            if pending is None:
+                yield HEARTBEAT_FRAME
+                continue
+
+            if pending and pending[0][0] > cursor + 1:
+                metrics.inc("sse_stream_resume_gaps")
+            for seq, frame in pending:
+                yield frame
+                cursor = seq
+
+            if finished and cursor >= self.last_seq:
+                return
+
+
+class StreamRegistry:
+    """Streams ativos e recém-concluídos do processo."""
+
+    def __init__(
+        self,
+        max_events: int = 2048,
+        grace_seconds: float = 120.0,
+        heartbeat_interval: Optional[float] = None
+    ):
+        """
+        Inicializa o registro.
+
+        Args:
+            max_events: Tamanho do buffer de cada stream
+            grace_seconds: Tempo que um stream concluído continua retomável
+            heartbeat_interval: Intervalo de heartbeat/progresso sem tokens (None desativa)
+        """
+        self.max_events = max_events
+        self.grace_seconds = grace_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self._streams: Dict[str, StreamBuffer] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "StreamRegistry":
+        """Cria o registro a partir de GEMConfig."""
+        config = GEMConfig.get_stream_config()
+        return cls(
+            max_events=config["buffer_size"],
+            grace_seconds=config["resume_grace"],
+            heartbeat_interval=config["heartbeat_interval"] or None,
+        )
+
+    def create(self, owner: Optional[str] = None) -> StreamBuffer:
+        """Registra um novo stream."""
+        stream = StreamBuffer(
+            uuid.uuid4().hex,
+            owner=owner,
+            max_events=self.max_events,
+            heartbeat_interval=self.heartbeat_interval,
+        )
+        with self._lock:
+            self._purge()
+            self._streams[stream.stream_id] = stream
+            active = len(self._streams)
+        metrics.set_gauge("sse_streams_buffered", active)
+        return stream
+
+    def get(self, stream_id: str, owner: Optional[str] = None) -> Optional[StreamBuffer]:
+        """Retorna o stream se ainda estiver retomável e pertencer ao usuário."""
+        with self._lock:
+            self._purge()
+            stream = self._streams.get(stream_id)
+        if stream is None or stream.owner != owner:
+            return None
+        return stream
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna o número de streams em andamento e em carência."""
+        with self._lock:
+            running = sum(1 for stream in self._streams.values() if not stream.finished)
+            return {
+                "streams": len(self._streams),
+                "running": running,
+                "buffer_size": self.max_events,
+                "grace_seconds": self.grace_seconds,
+            }
+
+    def _purge(self) -> None:
+        """Remove streams concluídos há mais tempo que a carência."""
+        now = time.monotonic()
+        expired = [
+            stream_id for stream_id, stream in self._streams.items()
+            if stream.finished and now - stream.finished_at > self.grace_seconds
+        ]
+        for stream_id in expired:
+            del self._streams[stream_id]
@@ -0,0 +1,92 @@
+"""
+Arquivos locais por worker (journal de cota, spill de mensagens).
+
+Com vários workers (gunicorn/uvicorn --workers) no mesmo diretório, um
+arquivo fixo era reescrito por um worker (descartando as linhas dos
+outros) e reaplicado por todos no startup. Cada processo reserva um slot
+`<nome>.<n><ext>` com um flock exclusivo em `<nome>.<n><ext>.lock`:
+
+    path = claim_worker_file("quota_journal.jsonl")  # quota_journal.0.jsonl
+    ...
+    release_worker_file(path)
+
+O lock pertence ao processo e é liberado pelo sistema quando ele cai,
+então o worker que o substitui reserva o mesmo slot e reaplica o arquivo.
+"""
+
+import os
+import threading
+from typing import IO, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, um arquivo por pid
+    fcntl = None
+
+_lock = threading.Lock()
+_claimed: Dict[str, IO[str]] = {}
+_owner_pid: Optional[int] = None
+
+
+def worker_file_path(path: str, slot: str) -> str:
+    """'quota_journal.jsonl', '0' -> 'quota_journal.0.jsonl'."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{slot}{ext}"
+
+
+def _ensure_current_process() -> None:
+    """Fecha os locks herdados via fork (requer o lock)."""
+    global _owner_pid  # pylint: disable=global-statement
+    if _owner_pid != os.getpid():
+        # O processo pai continua com a própria cópia do lock
+        for handle in _claimed.values():
+            handle.close()
+        _claimed.clear()
+        _owner_pid = os.getpid()
+
+
+def claim_worker_file(path: str, max_slots: int = 256) -> str:
+    """
+    Reserva o primeiro slot livre de `path` para este processo.
+
+    Args:
+        path: Arquivo configurado (ex: QUOTA_JOURNAL_PATH)
+        max_slots: Slots tentados (workers simultâneos no mesmo diretório)
+
+    Returns:
+        Caminho do arquivo do slot reservado
+
+    Raises:
+        RuntimeError: Se todos os slots estiverem em uso
+    """
+    if fcntl is None:
+        return worker_file_path(path, f"pid{os.getpid()}")
+
+    with _lock:
+        _ensure_current_process()
+        for slot in range(max_slots):
+            candidate = worker_file_path(path, str(slot))
+            if candidate in _claimed:
+                continue
+            handle = open(f"{candidate}.lock", "a", encoding="utf-8")  # pylint: disable=consider-using-with
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                continue
+            _claimed[candidate] = handle
+            print(f"[DEBUG] Arquivo do worker reservado: {candidate} (pid {os.getpid()})")
+            return candidate
+
+    raise RuntimeError(f"Nenhum slot livre para {path} ({max_slots} em uso)")
+
+
+def release_worker_file(path: Optional[str]) -> None:
+    """Libera o slot reservado por `claim_worker_file` (o arquivo continua no disco)."""
+    if not path:
+        return
+    with _lock:
+        _ensure_current_process()
+        handle = _claimed.pop(path, None)
+    if handle is not None:
+        handle.close()
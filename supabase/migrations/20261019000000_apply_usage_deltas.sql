@@ -0,0 +1,46 @@
+-- Gravação em lote dos contadores de uso (src/quota.py).
+--
+-- O QuotaEngine acumula os incrementos em memória e os envia a cada
+-- QUOTA_FLUSH_INTERVAL segundos em uma única chamada:
+--   select apply_usage_deltas('[{"user_id": "...", "month_year": "2026-10",
+--                                "field": "messages_count", "amount": 3}]');
+
+create or replace function public.apply_usage_deltas(p_deltas jsonb)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_delta jsonb;
+  v_field text;
+  v_rows integer;
+begin
+  for v_delta in select * from jsonb_array_elements(p_deltas) loop
+    v_field := v_delta->>'field';
+    if v_field not in ('messages_count', 'images_analyzed', 'pdfs_analyzed') then
+      raise exception 'Campo de uso inválido: %', v_field;
+    end if;
+
+    execute format(
+      'update usage set %1$I = coalesce(%1$I, 0) + $1, updated_at = now()
+        where user_id = $2 and month_year = $3',
+      v_field
+    ) using (v_delta->>'amount')::integer, (v_delta->>'user_id')::uuid, v_delta->>'month_year';
+
+    get diagnostics v_rows = row_count;
+    if v_rows = 0 then
+      execute format(
+        'insert into usage (user_id, month_year, %I) values ($1, $2, $3)',
+        v_field
+      ) using (v_delta->>'user_id')::uuid, v_delta->>'month_year', (v_delta->>'amount')::integer;
+    end if;
+  end loop;
+end;
+$$;
+
+-- Só o backend (chave service_role) chama a função: com security definer e
+-- execução liberada, qualquer cliente com a chave anon alteraria o uso de
+-- qualquer usuário (inclusive com valores negativos)
+revoke execute on function public.apply_usage_deltas(jsonb) from public, anon, authenticated;
+grant execute on function public.apply_usage_deltas(jsonb) to service_role;
@@ -0,0 +1,106 @@
+-- Verificação e incremento de cota atômicos (src/limits.py: consume_quota).
+--
+-- Substitui o par check_user_limit + increment_usage, que exigia várias idas
+-- ao banco e deixava requisições paralelas passarem juntas em 49/50. A linha
+-- do mês é travada (FOR UPDATE) antes da comparação com o limite do plano.
+-- `p_amount` negativo devolve usos (ex: a geração falhou).
+--
+--   select consume_quota('<user_id>', '2026-10', 'messages_count', 1, 50);
+
+-- Uma linha de uso por usuário e mês (necessária para o upsert)
+create unique index if not exists usage_user_id_month_year_key on usage (user_id, month_year);
+
+create or replace function public.consume_quota(
+  p_user_id uuid,
+  p_month_year text,
+  p_field text,
+  p_amount integer default 1,
+  p_limit integer default null
+)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_status text;
+  v_limit integer;
+  v_current integer;
+begin
+  if p_field not in ('messages_count', 'images_analyzed', 'pdfs_analyzed') then
+    raise exception 'Campo de uso inválido: %', p_field;
+  end if;
+
+  select status into v_status
+    from subscriptions
+   where user_id = p_user_id
+   order by created_at desc
+   limit 1;
+
+  if v_status is null then
+    insert into subscriptions (user_id, status, plan_name) values (p_user_id, 'free', 'free');
+    v_status := 'free';
+  end if;
+
+  insert into usage (user_id, month_year, messages_count, images_analyzed, pdfs_analyzed)
+  values (p_user_id, p_month_year, 0, 0, 0)
+  on conflict (user_id, month_year) do nothing;
+
+  -- Requisições paralelas do mesmo usuário esperam aqui
+  execute format(
+    'select coalesce(%I, 0) from usage where user_id = $1 and month_year = $2 for update',
+    p_field
+  ) into v_current using p_user_id, p_month_year;
+
+  if v_status <> 'active' then
+    -- Padrão espelha FREE_TIER_LIMITS (o cliente envia p_limit)
+    v_limit := coalesce(p_limit, case p_field
+      when 'messages_count' then 50
+      when 'images_analyzed' then 5
+      else 2
+    end);
+
+    if p_amount >= 0 and v_current + greatest(p_amount, 1) > v_limit then
+      return jsonb_build_object(
+        'allowed', false,
+        'remaining', 0,
+        'current_usage', v_current,
+        'limit', v_limit,
+        'plan', 'free',
+        'is_premium', false
+      );
+    end if;
+  end if;
+
+  v_current := greatest(v_current + p_amount, 0);
+  execute format(
+    'update usage set %I = $1, updated_at = now() where user_id = $2 and month_year = $3',
+    p_field
+  ) using v_current, p_user_id, p_month_year;
+
+  if v_status = 'active' then
+    return jsonb_build_object(
+      'allowed', true,
+      'remaining', 'unlimited',
+      'current_usage', v_current,
+      'plan', 'premium',
+      'is_premium', true
+    );
+  end if;
+
+  return jsonb_build_object(
+    'allowed', true,
+    'remaining', v_limit - v_current,
+    'current_usage', v_current,
+    'limit', v_limit,
+    'plan', 'free',
+    'is_premium', false
+  );
+end;
+$$;
+
+-- Só o backend (chave service_role) chama a função: liberada para anon ou
+-- authenticated, um cliente zeraria a própria cota com `p_amount` negativo
+-- ou escolheria o `p_limit`
+revoke execute on function public.consume_quota(uuid, text, text, integer, integer) from public, anon, authenticated;
+grant execute on function public.consume_quota(uuid, text, text, integer, integer) to service_role;
@@ -0,0 +1,113 @@
+-- Metadados das conversas mantidos a cada lote de mensagens (src/chat_manager.py).
+--
+-- Antes, cada troca recarregava todas as mensagens da conversa só para saber
+-- se era a primeira (título automático), e a barra lateral não tinha prévia.
+-- `append_messages` insere o lote e atualiza contagem, última mensagem,
+-- prévia e título na mesma transação, com a conversa travada (FOR UPDATE):
+--   select append_messages('[{"id": "...", "conversation_id": "...", "user_id": "...",
+--                             "role": "user", "content": "Olá", "created_at": "..."}]');
+--
+-- Mensagens de conversas de outro usuário são ignoradas; ids repetidos
+-- (lote reenviado) não entram de novo nem contam duas vezes.
+
+alter table conversations
+  add column if not exists message_count integer not null default 0,
+  add column if not exists title_set boolean not null default false,
+  add column if not exists last_message_at timestamptz,
+  add column if not exists last_message_preview text;
+
+update conversations c
+   set message_count = s.total,
+       last_message_at = s.last_at,
+       last_message_preview = s.preview
+  from (
+    select conversation_id,
+           count(*) as total,
+           max(created_at) as last_at,
+           (array_agg(left(content, 120) order by created_at desc))[1] as preview
+      from messages
+     group by conversation_id
+  ) s
+ where s.conversation_id = c.id;
+
+update conversations set title_set = true where title is distinct from 'Nova Conversa';
+
+create or replace function public.append_messages(p_messages jsonb)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_conversation record;
+  v_owned jsonb := '[]'::jsonb;
+  v_inserted jsonb := '[]'::jsonb;
+  v_rows jsonb;
+  v_last jsonb;
+  v_question text;
+begin
+  for v_conversation in
+    select distinct (m->>'conversation_id')::uuid as conversation_id, (m->>'user_id')::uuid as user_id
+      from jsonb_array_elements(p_messages) m
+  loop
+    -- Lotes paralelos da mesma conversa atualizam a contagem em sequência
+    perform 1 from conversations
+     where id = v_conversation.conversation_id and user_id = v_conversation.user_id
+       for update;
+    if not found then
+      continue;
+    end if;
+    v_owned := v_owned || to_jsonb(v_conversation.conversation_id);
+
+    with inserted as (
+      insert into messages (id, conversation_id, user_id, role, content, created_at)
+      select coalesce(m.id, gen_random_uuid()), m.conversation_id, m.user_id, m.role, m.content,
+             coalesce(m.created_at, now())
+        from jsonb_to_recordset(p_messages)
+             as m(id uuid, conversation_id uuid, user_id uuid, role text, content text, created_at timestamptz)
+       where m.conversation_id = v_conversation.conversation_id and m.user_id = v_conversation.user_id
+      on conflict (id) do nothing
+      returning id, conversation_id, user_id, role, content, created_at
+    )
+    select coalesce(jsonb_agg(to_jsonb(inserted) order by created_at), '[]'::jsonb) into v_rows
+      from inserted;
+
+    if jsonb_array_length(v_rows) = 0 then
+      continue;
+    end if;
+    v_inserted := v_inserted || v_rows;
+    v_last := v_rows->-1;
+
+    -- Primeira pergunta do lote: vira o título se a conversa ainda não tem um
+    select r->>'content' into v_question
+      from jsonb_array_elements(v_rows) r
+     where r->>'role' = 'user'
+     limit 1;
+
+    update conversations c
+       set message_count = c.message_count + jsonb_array_length(v_rows),
+           last_message_preview = case
+             when c.last_message_at is null or (v_last->>'created_at')::timestamptz >= c.last_message_at
+               then left(v_last->>'content', 120)
+             else c.last_message_preview
+           end,
+           last_message_at = greatest(c.last_message_at, (v_last->>'created_at')::timestamptz),
+           -- Mesma regra de auto_generate_title: 50 caracteres e reticências
+           title = case
+             when c.title_set or v_question is null then c.title
+             when length(v_question) > 50 then left(v_question, 50) || '...'
+             else v_question
+           end,
+           title_set = c.title_set or v_question is not null,
+           updated_at = now()
+     where c.id = v_conversation.conversation_id;
+  end loop;
+
+  return jsonb_build_object('conversations', v_owned, 'messages', v_inserted);
+end;
+$$;
+
+-- Só o backend (chave service_role) chama a função: o `user_id` vem do lote,
+-- então um cliente com a chave anon gravaria mensagens em nome de outro usuário
+revoke execute on function public.append_messages(jsonb) from public, anon, authenticated;
+grant execute on function public.append_messages(jsonb) to service_role;
@@ -0,0 +1,28 @@
+"""Configuração compartilhada dos testes: banco local em vez do Supabase."""
+
+import pytest
+
+from src.config import GEMConfig
+from src.database import create_supabase_client, set_supabase_client
+from src.testing import LocalPostgREST
+
+
+@pytest.fixture(autouse=True, scope="session")
+def local_supabase():
+    """Aponta o cliente do processo para um PostgREST em memória (testes rodam offline)."""
+    with LocalPostgREST() as server:
+        set_supabase_client(create_supabase_client(url=server.url, key="local"))
+        try:
+            yield server
+        finally:
+            set_supabase_client(None)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def local_worker_files(tmp_path_factory):
+    """Journal de cota e spill de mensagens num diretório temporário (nada é criado na raiz do repositório)."""
+    directory = tmp_path_factory.mktemp("worker_files")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(GEMConfig, "QUOTA_JOURNAL_PATH", str(directory / "quota_journal.jsonl"))
+        patch.setattr(GEMConfig, "TRANSCRIPT_SPILL_PATH", str(directory / "transcripts_spill.jsonl"))
+        yield directory
@@ -0,0 +1,111 @@
+"""Testes do controle de admissão das chamadas ao LLM."""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src.agents import GEMService
+from src.agents.admission import AdmissionController, AdmissionRejected
+
+
+class DummyLLM:
+    """LLM mínimo para exercitar o caminho de streaming."""
+
+    def invoke(self, messages, **kwargs):  # pragma: no cover - não usado
+        return SimpleNamespace(content="dummy")
+
+    def stream(self, messages, **kwargs):
+        yield SimpleNamespace(content="olá")
+
+
+def test_admits_up_to_concurrency_limit() -> None:
+    controller = AdmissionController(max_concurrency=2, max_queue_size=4)
+
+    first = controller.enqueue("a")
+    second = controller.enqueue("b")
+    third = controller.enqueue("c")
+
+    assert first.admitted and second.admitted
+    assert not third.admitted
+    assert third.position == 1
+
+    first.release()
+
+    assert third.admitted
+    assert controller.stats()["active"] == 2
+
+
+def test_wide_ticket_waits_for_enough_slots_without_being_overtaken() -> None:
+    controller = AdmissionController(max_concurrency=3, max_queue_size=4)
+
+    running = controller.enqueue("a", weight=2)
+    panel = controller.enqueue("b", weight=2)
+    single = controller.enqueue("c")
+
+    assert running.admitted
+    assert not panel.admitted and not single.admitted
+    assert controller.stats()["active"] == 2
+
+    running.release()
+
+    assert panel.admitted
+    assert single.admitted
+    assert controller.stats()["active"] == 3
+
+
+def test_rejects_when_queue_is_full() -> None:
+    controller = AdmissionController(max_concurrency=1, max_queue_size=1)
+
+    controller.enqueue("a")
+    controller.enqueue("b")
+
+    with pytest.raises(AdmissionRejected):
+        controller.enqueue("c")
+
+
+def test_premium_users_jump_ahead_of_free_users() -> None:
+    controller = AdmissionController(max_concurrency=1, max_queue_size=4)
+
+    running = controller.enqueue("a")
+    free = controller.enqueue("b")
+    premium = controller.enqueue("c", is_premium=True)
+
+    assert premium.position == 1
+    assert free.position == 2
+
+    running.release()
+
+    assert premium.admitted
+    assert not free.admitted
+
+
+def test_users_alternate_within_the_same_class() -> None:
+    controller = AdmissionController(max_concurrency=1, max_queue_size=4)
+
+    running = controller.enqueue("heavy")
+    heavy_again = controller.enqueue("heavy")
+    other = controller.enqueue("light")
+
+    running.release()
+    assert heavy_again.admitted
+
+    # Com "heavy" ocupando a vaga, o próximo da fila é o outro usuário
+    late_heavy = controller.enqueue("heavy")
+    assert other.position == 1
+    assert late_heavy.position == 2
+
+
+def test_stream_emits_queued_events_while_waiting(tmp_path: Path) -> None:
+    controller = AdmissionController(max_concurrency=1, max_queue_size=4)
+    service = GEMService(llm=DummyLLM(), state_file=str(tmp_path / "journey.json"), admission=controller)
+    service._admission_config = {**service._admission_config, "poll_interval": 0.01, "queue_timeout": 0.05}
+    service.process_message("iniciar")
+
+    blocker = controller.enqueue("outro")
+    events = list(service.process_message_stream("oi", user_id="u1"))
+    blocker.release()
+
+    assert events[0] == {"type": "queued", "position": 1, "queue_size": 1}
+    assert events[-1]["type"] == "error"
+    assert controller.stats() == {"active": 0, "waiting": 0, "max_concurrency": 1, "max_queue_size": 4}
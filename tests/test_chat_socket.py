@@ -0,0 +1,150 @@
+"""Testes do transporte de chat via WebSocket."""
+
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from src import limits
+from src.web import app as app_module
+from src.web.app import create_app, get_auth_service, get_gem_service
+
+
+class SocketGEMService:
+    """Serviço fake com stream lento (permite cancelar no meio)."""
+
+    def __init__(self, chunks: int = 3, delay: float = 0.0) -> None:
+        self.chunks = chunks
+        self.delay = delay
+        self.closed = False
+        self.orchestrator = SimpleNamespace(
+            get_current_gem=lambda: "gem1_mestre_mapeamento",
+            state={"current_gem": "gem1_mestre_mapeamento", "gem_conversations": {}, "completed_gems": []},
+        )
+        self.gem_histories = {}
+
+    def process_message_stream(self, message: str, **_: object):
+        if message == "falhe":
+            yield {"type": "error", "error": "LLM indisponível"}
+            return
+        accumulated = ""
+        try:
+            for index in range(self.chunks):
+                time.sleep(self.delay)
+                accumulated += f"{index} "
+                yield {"type": "chunk", "content": f"{index} ", "accumulated": accumulated, "gem_id": "gem1", "gem_name": "GEM 1"}
+            yield {"type": "done", "answer": accumulated, "gem_id": "gem1", "gem_name": "GEM 1"}
+        except GeneratorExit:
+            self.closed = True
+            raise
+
+    def get_status(self) -> str:
+        return "GEM 1 em andamento"
+
+    def get_load_mode(self) -> str:
+        return "normal"
+
+
+def build_client(service: SocketGEMService) -> TestClient:
+    app = create_app()
+    app.dependency_overrides[get_gem_service] = lambda: service
+    return TestClient(app)
+
+
+def test_socket_streams_a_message_and_pushes_status_and_history() -> None:
+    client = build_client(SocketGEMService())
+
+    with client.websocket_connect("/ws/chat") as socket:
+        assert socket.receive_json()["type"] == "ready"
+
+        socket.send_json({"type": "message", "id": "r1", "message": "Olá"})
+        frames = []
+        while not frames or frames[-1]["type"] != "done":
+            frames.append(socket.receive_json())
+
+        socket.send_json({"type": "status"})
+        status = socket.receive_json()
+        socket.send_json({"type": "history"})
+        history = socket.receive_json()
+
+    assert [frame["type"] for frame in frames] == ["start", "chunk", "chunk", "chunk", "done"]
+    assert all(frame["id"] == "r1" for frame in frames)
+    assert frames[-1]["answer"] == "0 1 2 "
+    assert status["status"] == "GEM 1 em andamento"
+    assert history["current_gem"] == "gem1_mestre_mapeamento"
+
+
+def test_cancel_stops_the_generation() -> None:
+    service = SocketGEMService(chunks=200, delay=0.01)
+    client = build_client(service)
+
+    with client.websocket_connect("/ws/chat") as socket:
+        socket.receive_json()
+        socket.send_json({"type": "message", "id": "r1", "message": "Olá"})
+        assert socket.receive_json()["type"] == "start"
+        assert socket.receive_json()["type"] == "chunk"
+
+        socket.send_json({"type": "cancel", "id": "r1"})
+        frame = socket.receive_json()
+        while frame["type"] == "chunk":
+            frame = socket.receive_json()
+
+    assert frame == {"type": "cancelled", "id": "r1"}
+    assert service.closed
+
+
+class FakeQuota:
+    """Cota atômica em memória com o formato de `consume_quota`."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.used = 0
+        self.calls = []
+
+    async def consume(self, user_id: str, usage_type: str = "messages", amount: int = 1) -> dict:
+        self.calls.append(amount)
+        if amount > 0 and self.used + amount > self.limit:
+            return {"allowed": False, "remaining": 0, "limit": self.limit, "is_premium": False,
+                    "message": "Limite atingido"}
+        self.used = max(self.used + amount, 0)
+        return {"allowed": True, "remaining": self.limit - self.used, "limit": self.limit, "is_premium": False}
+
+
+def receive_until(socket, *types: str) -> dict:
+    frame = socket.receive_json()
+    while frame["type"] not in types:
+        frame = socket.receive_json()
+    return frame
+
+
+def test_quota_is_consumed_per_message_and_refunded_on_failure(monkeypatch) -> None:
+    quota = FakeQuota(limit=1)
+    monkeypatch.setattr(limits, "aconsume_quota", quota.consume)
+
+    async def limit_at_connect(user_id: str, usage_type: str) -> dict:
+        return {"allowed": True, "remaining": 1, "is_premium": False}
+
+    monkeypatch.setattr(app_module, "acheck_user_limit", limit_at_connect)
+    app = create_app()
+    app.dependency_overrides[get_gem_service] = lambda: SocketGEMService()
+    app.dependency_overrides[get_auth_service] = lambda: SimpleNamespace(
+        get_user_from_token=lambda token: {"user_id": "user-1"}
+    )
+    client = TestClient(app)
+
+    with client.websocket_connect("/ws/chat?token=abc") as socket:
+        assert socket.receive_json()["remaining"] == 1
+
+        # A falha devolve a mensagem reservada
+        socket.send_json({"type": "message", "id": "r1", "message": "falhe"})
+        assert receive_until(socket, "error")["error"] == "LLM indisponível"
+
+        socket.send_json({"type": "message", "id": "r2", "message": "Olá"})
+        assert receive_until(socket, "done")["id"] == "r2"
+
+        socket.send_json({"type": "message", "id": "r3", "message": "Olá"})
+        blocked = receive_until(socket, "error")
+
+    assert blocked["error"] == "limit_exceeded"
+    assert blocked["id"] == "r3"
+    assert quota.used == 1
@@ -0,0 +1,89 @@
+"""Testes da política de compressão e dos estáticos pré-comprimidos."""
+
+import asyncio
+import gzip
+import re
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.web.app import create_app
+from src.web.compression import CompressionMiddleware
+
+FRAMES = [f"data: {{\"n\": {n}, \"texto\": \"{'x' * 600}\"}}\n\n" for n in range(3)]
+
+
+def build_app(sse_mode: str) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, sse_mode=sse_mode)
+
+    @app.get("/sse")
+    async def sse() -> StreamingResponse:
+        async def frames():
+            for frame in FRAMES:
+                yield frame
+        return StreamingResponse(frames(), media_type="text/event-stream")
+
+    @app.get("/text")
+    async def text() -> PlainTextResponse:
+        return PlainTextResponse("texto " * 200)
+
+    return TestClient(app)
+
+
+def test_sse_is_not_compressed_by_default() -> None:
+    client = build_app("off")
+
+    sse = client.get("/sse", headers={"Accept-Encoding": "gzip"})
+    text = client.get("/text", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in sse.headers
+    assert sse.text == "".join(FRAMES)
+    assert text.headers["content-encoding"] == "gzip"
+
+
+def test_flush_mode_compresses_each_sse_frame_independently() -> None:
+    async def sse_app(scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+        for index, frame in enumerate(FRAMES):
+            await send({"type": "http.response.body", "body": frame.encode(), "more_body": index < len(FRAMES) - 1})
+
+    sent = []
+
+    async def send(message) -> None:
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(sse_app, minimum_size=100, sse_mode="flush")(scope, None, send))
+
+    assert (b"content-encoding", b"gzip") in sent[0]["headers"]
+    bodies = [message["body"] for message in sent[1:]]
+    # Cada frame sai decodificável assim que é enviado (sem esperar o buffer do gzip)
+    decoder = zlib.decompressobj(31)
+    assert [decoder.decompress(body).decode() for body in bodies] == FRAMES
+    assert gzip.decompress(b"".join(bodies)).decode() == "".join(FRAMES)
+
+
+def test_static_assets_are_versioned_precompressed_and_immutable() -> None:
+    client = TestClient(create_app())
+
+    page = client.get("/login").text
+    css_url = re.search(r'href="(/static/styles\.[0-9a-f]+\.css)"', page).group(1)
+
+    hashed = client.get(css_url, headers={"Accept-Encoding": "gzip"})
+    assert hashed.status_code == 200
+    assert hashed.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert hashed.headers["content-encoding"] == "gzip"
+    assert hashed.headers["etag"].endswith('-gzip"')
+
+    plain = client.get("/static/styles.css", headers={"Accept-Encoding": "identity"})
+    assert plain.headers["cache-control"] == "no-cache"
+    assert plain.content == hashed.content
+
+    cached = client.get(
+        css_url, headers={"Accept-Encoding": "gzip", "If-None-Match": hashed.headers["etag"]}
+    )
+    assert cached.status_code == 304
+    assert client.get("/static/bg-sac.png").status_code == 200
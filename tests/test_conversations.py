@@ -0,0 +1,115 @@
+"""Testes da paginação por cursor de conversas e mensagens."""
+
+from urllib.parse import unquote
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import chat_manager
+from src.chat_manager import (
+    conversations_page,
+    conversations_page_query,
+    decode_cursor,
+    encode_cursor,
+    messages_page,
+)
+from src.web.app import create_app, require_auth
+
+STAMP = "2026-10-19T12:00:00.123456+00:00"
+
+
+def test_cursor_round_trip_and_rejection() -> None:
+    cursor = encode_cursor(STAMP, "conv-9")
+
+    assert decode_cursor(cursor) == (STAMP, "conv-9")
+    with pytest.raises(ValueError):
+        decode_cursor("não é um cursor")
+
+
+def test_conversation_query_uses_keyset_and_projection() -> None:
+    params = unquote(str(conversations_page_query("user-1", 20, encode_cursor(STAMP, "conv-9")).request.params))
+
+    assert "select=id,title,created_at,updated_at" in params
+    assert f'updated_at.lt."{STAMP}",and(updated_at.eq."{STAMP}",id.lt."conv-9")' in params
+    assert "order=updated_at.desc,id.desc" in params
+    assert "limit=21" in params
+
+
+def test_pages_expose_the_next_cursor_only_when_there_is_more() -> None:
+    rows = [{"id": f"conv-{n}", "updated_at": f"2026-10-{19 - n:02d}"} for n in range(3)]
+
+    page = conversations_page(rows, limit=2)
+    assert [row["id"] for row in page["conversations"]] == ["conv-0", "conv-1"]
+    assert decode_cursor(page["next_cursor"]) == ("2026-10-18", "conv-1")
+    assert conversations_page(rows, limit=3)["next_cursor"] is None
+
+    # Mensagens chegam das mais novas para as mais antigas e saem em ordem cronológica
+    newest_first = [{"id": f"msg-{n}", "created_at": f"t{9 - n}"} for n in range(4)]
+    window = messages_page(newest_first, limit=3)
+    assert [message["id"] for message in window["messages"]] == ["msg-2", "msg-1", "msg-0"]
+    assert decode_cursor(window["next_cursor"]) == ("t7", "msg-2")
+
+
+def test_invalid_cursor_is_a_client_error() -> None:
+    app = create_app()
+    app.dependency_overrides[require_auth] = lambda: {"user_id": "user-1"}
+    client = TestClient(app)
+
+    assert client.get("/api/conversations", params={"cursor": "%%%"}).status_code == 400
+    assert client.get("/api/conversations", params={"limit": 500}).status_code == 422
+    assert client.get("/api/conversations/conv-1", params={"before": "%%%"}).status_code == 400
+
+
+class RecordingSupabase:
+    """Cliente fake: registra tabelas consultadas e chamadas RPC."""
+
+    def __init__(self, owned: set) -> None:
+        self.owned = owned
+        self.tables = []
+        self.rpcs = []
+
+    def table(self, name: str):
+        self.tables.append(name)
+        return self
+
+    def rpc(self, name: str, params: dict):
+        self.rpcs.append((name, params))
+        messages = params["p_messages"]
+        self.result = {
+            "conversations": sorted({m["conversation_id"] for m in messages} & self.owned),
+            "messages": [{"id": f"msg-{n}", **m} for n, m in enumerate(messages) if m["conversation_id"] in self.owned],
+        }
+        return self
+
+    def select(self, *_):
+        return self
+
+    def eq(self, *_):
+        self.result = [{"id": "conv-1"}]
+        return self
+
+    def execute(self):
+        return type("Result", (), {"data": self.result})()
+
+
+def test_chat_turn_updates_metadata_without_rereading_history(monkeypatch) -> None:
+    fake = RecordingSupabase(owned={"conv-1"})
+    monkeypatch.setattr(chat_manager, "supabase", fake)
+    monkeypatch.setattr(chat_manager, "consume_quota", lambda *_, **__: {"allowed": True, "remaining": 10})
+
+    result = chat_manager.process_chat_message("user-1", "Olá", "conv-1", agent_processor=lambda _: "Oi!")
+
+    assert result["error"] is False
+    assert "messages" not in fake.tables
+    [(name, params)] = fake.rpcs
+    assert name == "append_messages"
+    assert [(m["role"], m["content"]) for m in params["p_messages"]] == [("user", "Olá"), ("assistant", "Oi!")]
+    assert params["p_messages"][0]["created_at"] < params["p_messages"][1]["created_at"]
+
+
+def test_save_messages_reports_conversations_of_other_users(monkeypatch) -> None:
+    monkeypatch.setattr(chat_manager, "supabase", RecordingSupabase(owned={"conv-1"}))
+    question = [{"role": "user", "content": "Olá"}]
+
+    assert len(chat_manager.save_messages("conv-1", "user-1", question)) == 1
+    assert chat_manager.save_messages("conv-2", "user-1", question) is None
@@ -0,0 +1,72 @@
+"""Testes do acesso ao banco fora do event loop e do monitor de atraso."""
+
+import asyncio
+import time
+
+from src.data_access import execute, gather_queries, offload, run_db
+from src.metrics import metrics
+from src.web.loop_monitor import EventLoopLagMonitor
+
+
+def slow_query(seconds: float) -> str:
+    time.sleep(seconds)
+    return "ok"
+
+
+async def measure_lag(call) -> float:
+    monitor = EventLoopLagMonitor(interval=0.02)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    await call()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+    return monitor.max_lag
+
+
+def test_offloaded_calls_keep_the_event_loop_responsive() -> None:
+    async def blocking() -> None:
+        slow_query(0.3)
+
+    async def offloaded() -> None:
+        assert await run_db(slow_query, 0.3) == "ok"
+
+    assert asyncio.run(measure_lag(blocking)) >= 0.2
+    assert asyncio.run(measure_lag(offloaded)) < 0.1
+
+
+def test_offload_wraps_functions_and_methods() -> None:
+    class Repository:
+        def __init__(self) -> None:
+            self.calls = []
+
+        def save(self, value: str) -> str:
+            self.calls.append(value)
+            return value.upper()
+
+        asave = offload(save)
+
+    class Query:
+        def execute(self) -> list:
+            return ["linha"]
+
+    repository = Repository()
+
+    assert asyncio.run(repository.asave("abc")) == "ABC"
+    assert repository.calls == ["abc"]
+    assert Repository.asave.__name__ == "save"
+    assert asyncio.run(execute(Query())) == ["linha"]
+    assert "db_call_seconds{operation=save}" in metrics.snapshot()["observations"]
+
+
+def test_gather_queries_runs_independent_queries_concurrently() -> None:
+    async def fan_out() -> dict:
+        return await gather_queries(
+            subscription=run_db(slow_query, 0.2),
+            usage=run_db(slow_query, 0.2),
+        )
+
+    started = time.perf_counter()
+    results = asyncio.run(fan_out())
+
+    assert results == {"subscription": "ok", "usage": "ok"}
+    assert time.perf_counter() - started < 0.35
@@ -0,0 +1,85 @@
+"""Testes do cliente do Supabase por processo e do PostgREST local."""
+
+import os
+import subprocess
+import sys
+
+from src import chat_manager, database
+from src.database import warm_up_supabase
+from src.testing import LocalPostgREST, LocalQuotaRPC
+
+
+def test_importing_the_app_needs_no_credentials() -> None:
+    env = {key: value for key, value in os.environ.items() if not key.startswith("SUPABASE_")}
+    script = (
+        "import src.web.app\n"
+        "from src.database import supabase\n"
+        "try:\n"
+        "    supabase.table('conversations')\n"
+        "except RuntimeError as error:\n"
+        "    print('lazy:', error)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True, timeout=60, check=False,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert "lazy: SUPABASE_URL e SUPABASE_KEY" in result.stdout
+
+
+def test_client_is_created_once_per_process(monkeypatch) -> None:
+    created = []
+
+    def fake_create(**kwargs):
+        created.append(kwargs)
+        return object()
+
+    monkeypatch.setattr(database, "create_supabase_client", fake_create)
+    monkeypatch.setattr(database, "_override", None)
+    monkeypatch.setattr(database, "_client", None)
+    monkeypatch.setattr(database, "_http_client", None)
+    monkeypatch.setattr(database, "_owner_pid", os.getpid())
+
+    first = database.get_supabase_client()
+    assert database.get_supabase_client() is first
+
+    # Depois de um fork o pid muda: o cliente herdado é descartado
+    monkeypatch.setattr(database, "_owner_pid", -1)
+    assert database.get_supabase_client() is not first
+    assert len(created) == 2
+
+
+def test_conversation_flow_through_the_local_postgrest(local_supabase: LocalPostgREST) -> None:
+    assert warm_up_supabase() is True
+
+    conversation_id = chat_manager.create_conversation("user-db")
+    for turn in range(3):
+        chat_manager.save_messages(conversation_id, "user-db", [
+            {"role": "user", "content": f"pergunta {turn}"},
+            {"role": "assistant", "content": f"resposta {turn}"},
+        ])
+
+    page = chat_manager.list_user_conversations("user-db", limit=10)
+    [conversation] = page["conversations"]
+    assert conversation["title"] == "pergunta 0"
+    assert conversation["message_count"] == 6
+    assert conversation["last_message_preview"] == "resposta 2"
+
+    newest = chat_manager.messages_page(chat_manager.messages_page_query(conversation_id, 4).execute().data, 4)
+    older = chat_manager.messages_page(
+        chat_manager.messages_page_query(conversation_id, 4, newest["next_cursor"]).execute().data, 4
+    )
+    assert [m["content"] for m in older["messages"] + newest["messages"]] == [
+        f"{role} {turn}" for turn in range(3) for role in ("pergunta", "resposta")
+    ]
+    assert chat_manager.save_messages(conversation_id, "user-db-2", [{"role": "user", "content": "x"}]) is None
+
+
+def test_rpc_functions_can_be_registered(local_supabase: LocalPostgREST, monkeypatch) -> None:
+    # Via monkeypatch: a função some do servidor compartilhado ao fim do teste
+    monkeypatch.setitem(local_supabase.functions, "consume_quota", LocalQuotaRPC().consume_quota)
+    params = {"p_user_id": "user-db", "p_month_year": "2026-10", "p_field": "messages_count", "p_limit": 1}
+
+    assert database.supabase.rpc("consume_quota", params).execute().data["allowed"] is True
+    assert database.supabase.rpc("consume_quota", params).execute().data["allowed"] is False
+    assert local_supabase.requests[-1] == ("POST", "/rest/v1/rpc/consume_quota")
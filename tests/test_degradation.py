@@ -0,0 +1,105 @@
+"""Testes da degradação adaptativa sob carga."""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.agents import GEMService
+from src.agents.admission import AdmissionController
+from src.agents.degradation import (
+    MODE_DEGRADED,
+    MODE_NORMAL,
+    DegradationController,
+    LoadProfile,
+)
+from src.agents.stop_conditions import DEFAULT_STOP_SEQUENCES
+from src.metrics import metrics
+
+
+class RecordingLLM:
+    """Registra mensagens e parâmetros recebidos em cada chamada."""
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    def invoke(self, messages, **kwargs):  # pragma: no cover - não usado
+        self.calls.append((messages, kwargs))
+        return SimpleNamespace(content="ok")
+
+    def stream(self, messages, **kwargs):
+        self.calls.append((messages, kwargs))
+        yield SimpleNamespace(content="ok")
+
+
+def test_enters_degraded_mode_when_queue_is_deep() -> None:
+    controller = DegradationController(queue_threshold=3, min_hold_seconds=0)
+
+    assert controller.evaluate(queue_depth=1).mode == MODE_NORMAL
+    assert controller.evaluate(queue_depth=3).mode == MODE_DEGRADED
+    assert metrics.get_gauge("llm_degraded_mode") == 1
+
+
+def test_recovers_only_below_the_recovery_threshold() -> None:
+    controller = DegradationController(queue_threshold=4, recovery_ratio=0.5, min_hold_seconds=0)
+
+    controller.evaluate(queue_depth=4)
+    assert controller.evaluate(queue_depth=3).mode == MODE_DEGRADED
+    assert controller.evaluate(queue_depth=2).mode == MODE_NORMAL
+
+
+def test_high_ttft_triggers_degradation() -> None:
+    controller = DegradationController(ttft_threshold=5.0, min_hold_seconds=60)
+
+    controller.observe_ttft(12.0)
+
+    assert controller.evaluate(queue_depth=0).mode == MODE_DEGRADED
+
+
+def test_degraded_profile_trims_history_and_overrides_params(tmp_path: Path) -> None:
+    llm = RecordingLLM()
+    degradation = DegradationController(
+        queue_threshold=0,
+        degraded_profile=LoadProfile(
+            mode=MODE_DEGRADED,
+            history_window=2,
+            compact_context=True,
+            max_tokens=256,
+            model="qwen-turbo",
+        ),
+    )
+    service = GEMService(llm=llm, state_file=str(tmp_path / "journey.json"), degradation=degradation)
+    service.process_message("iniciar")
+    service.gem_histories["gem1_mestre_mapeamento"] = [
+        {"role": "system", "content": "prompt completo"},
+        {"role": "user", "content": "primeira"},
+        {"role": "assistant", "content": "resposta"},
+    ]
+
+    events = list(service.process_message_stream("segunda"))
+
+    messages, kwargs = llm.calls[-1]
+    assert kwargs == {"max_tokens": 256, "model": "qwen-turbo", "stop": list(DEFAULT_STOP_SEQUENCES)}
+    assert [m["content"] for m in messages[1:]] == ["resposta", "segunda"]
+    assert "Mestre do Mapeamento" in messages[0]["content"]
+    assert events[-1]["mode"] == MODE_DEGRADED
+
+
+def test_load_mode_reflects_the_current_queue_before_any_call(tmp_path: Path) -> None:
+    admission = AdmissionController(max_concurrency=1, max_queue_size=4)
+    degradation = DegradationController(queue_threshold=1, min_hold_seconds=0)
+    service = GEMService(
+        llm=RecordingLLM(), state_file=str(tmp_path / "journey.json"), admission=admission, degradation=degradation
+    )
+    service.process_message("iniciar")
+
+    running = admission.enqueue("outro")
+    waiting = admission.enqueue("mais-um")
+    # Nenhuma chamada avaliou a carga ainda: o frame 'start' já sai degradado
+    assert service.get_load_mode() == MODE_DEGRADED
+
+    waiting.release()
+    running.release()
+    events = list(service.process_message_stream("oi"))
+
+    prompt_ready = next(event for event in events if event.get("stage") == "prompt_ready")
+    assert prompt_ready["mode"] == MODE_NORMAL
+    assert events[-1]["mode"] == MODE_NORMAL
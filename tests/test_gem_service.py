@@ -14,11 +14,11 @@ class DummyLLM:
     def __init__(self) -> None:
         self.calls = []
 
-    def invoke(self, messages):  # pragma: no cover - caminhos evitados nos testes
+    def invoke(self, messages, **kwargs):  # pragma: no cover - caminhos evitados nos testes
         self.calls.append(messages)
         return SimpleNamespace(content="dummy")
 
-    def stream(self, messages):  # pragma: no cover - não usado
+    def stream(self, messages, **kwargs):  # pragma: no cover - não usado
         yield SimpleNamespace(content="dummy")
 
 
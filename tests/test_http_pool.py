@@ -0,0 +1,43 @@
+"""Testes do pool HTTP compartilhado pelos clientes de LLM."""
+
+from langchain_openai import ChatOpenAI
+
+from src.agents import http_pool
+from src.testing import FakeLLMServer
+
+
+def test_clients_are_shared_and_recreated_after_fork() -> None:
+    first = http_pool.get_http_client()
+
+    assert http_pool.get_http_client() is first
+
+    # Simula um processo filho herdando o cliente do pai
+    http_pool._owner_pid = -1
+    assert http_pool.get_http_client() is not first
+
+
+def test_warm_up_keeps_a_connection_alive() -> None:
+    with FakeLLMServer() as server:
+        assert http_pool.warm_up(server.base_url) is True
+
+        stats = http_pool.pool_stats()
+
+    assert stats["connections"] >= 1
+    assert stats["idle_connections"] >= 1
+    assert stats["in_flight"] == 0
+
+
+def test_streaming_through_the_pool_releases_in_flight_count() -> None:
+    with FakeLLMServer(reply="texto em partes", chunk_size=4) as server:
+        llm = ChatOpenAI(
+            model="fake-model",
+            api_key="fake",
+            base_url=server.base_url,
+            max_retries=0,
+            http_client=http_pool.get_http_client(),
+        )
+
+        chunks = [chunk.content for chunk in llm.stream([{"role": "user", "content": "oi"}])]
+
+    assert "".join(chunks) == "texto em partes"
+    assert http_pool.pool_stats()["in_flight"] == 0
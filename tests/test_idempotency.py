@@ -0,0 +1,119 @@
+"""Testes das chaves de idempotência dos endpoints de chat."""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+from fastapi.testclient import TestClient
+
+from src.agents import GEMResponse
+from src.web import app as app_module
+from src.web.app import create_app, get_current_user, get_gem_service, get_idempotency_store
+from src.web.idempotency import IdempotencyStore
+
+
+class CountingGEMService:
+    """Serviço fake que conta as gerações."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.stream_calls = 0
+        self.orchestrator = SimpleNamespace(get_current_gem=lambda: "gem1_mestre_mapeamento", state={})
+
+    def process_message(self, message: str, **_: object) -> GEMResponse:
+        self.calls += 1
+        return GEMResponse(
+            answer=f"Resposta {self.calls}",
+            gem_id="gem1_mestre_mapeamento",
+            gem_name="Mestre do Mapeamento",
+            is_orchestrator=False,
+        )
+
+    def process_message_stream(self, message: str, **_: object):
+        self.stream_calls += 1
+        for text in ("Olá", "Olá!"):
+            yield {"type": "chunk", "content": text, "accumulated": text, "gem_id": "gem1", "gem_name": "GEM 1"}
+        yield {"type": "done", "answer": f"Resposta {self.stream_calls}", "gem_id": "gem1", "gem_name": "GEM 1"}
+
+    def get_load_mode(self) -> str:
+        return "normal"
+
+
+def build_client() -> tuple[TestClient, CountingGEMService]:
+    service = CountingGEMService()
+    app = create_app()
+    app.dependency_overrides[get_gem_service] = lambda: service
+    store = IdempotencyStore(ttl=60)
+    app.dependency_overrides[get_idempotency_store] = lambda: store
+    return TestClient(app), service
+
+
+def test_duplicate_chat_request_is_replayed_without_a_second_generation() -> None:
+    client, service = build_client()
+    headers = {"Idempotency-Key": "abc-123"}
+
+    first = client.post("/api/chat", json={"message": "Olá"}, headers=headers)
+    second = client.post("/api/chat", json={"message": "Olá"}, headers=headers)
+    other = client.post("/api/chat", json={"message": "Olá"}, headers={"Idempotency-Key": "outra"})
+
+    assert service.calls == 2
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert other.json()["answer"] == "Resposta 2"
+
+
+def test_reusing_a_key_with_another_message_is_rejected() -> None:
+    client, service = build_client()
+    headers = {"Idempotency-Key": "abc-123"}
+
+    client.post("/api/chat", json={"message": "Olá"}, headers=headers)
+    response = client.post("/api/chat", json={"message": "Outra mensagem"}, headers=headers)
+
+    assert response.status_code == 422
+    assert response.json()["error"] == "idempotency_conflict"
+    assert service.calls == 1
+
+
+def test_duplicate_stream_replays_the_same_events() -> None:
+    client, service = build_client()
+    headers = {"Idempotency-Key": "stream-1"}
+
+    first = client.post("/api/chat/stream", json={"message": "Olá"}, headers=headers)
+    second = client.post("/api/chat/stream", json={"message": "Olá"}, headers=headers)
+
+    assert service.stream_calls == 1
+    assert second.text == first.text
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert '"answer": "Resposta 1"' in second.text
+
+
+def test_concurrent_duplicate_stream_follows_the_first_one(monkeypatch) -> None:
+    service = CountingGEMService()
+    app = create_app()
+    app.dependency_overrides[get_gem_service] = lambda: service
+    store = IdempotencyStore(ttl=60)
+    app.dependency_overrides[get_idempotency_store] = lambda: store
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": "user-1"}
+
+    async def slow_limit_check(user_id: str, action: str) -> dict:
+        # A primeira requisição ainda espera a cota quando a repetição chega
+        await asyncio.sleep(0.1)
+        return {"allowed": True, "is_premium": False}
+
+    monkeypatch.setattr(app_module, "acheck_user_limit", slow_limit_check)
+
+    async def send_twice() -> list:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Idempotency-Key": "stream-concorrente"}
+            return await asyncio.gather(
+                client.post("/api/chat/stream", json={"message": "Olá"}, headers=headers),
+                client.post("/api/chat/stream", json={"message": "Olá"}, headers=headers),
+            )
+
+    first, second = asyncio.run(send_twice())
+
+    assert [first.status_code, second.status_code] == [200, 200]
+    assert service.stream_calls == 1
+    assert second.text == first.text
+    assert '"answer": "Resposta 1"' in second.text
@@ -0,0 +1,82 @@
+"""Testes do cliente direto OpenAI-compatível (sem LangChain)."""
+
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+from langchain_openai import ChatOpenAI
+
+from src.agents import GEMService
+from src.agents.llm_client import LLMChunk, LLMHTTPError, OpenAICompatibleClient
+from src.agents.resilience import reset_circuit_breakers
+from src.testing import FakeLLMServer
+
+MESSAGES = [{"role": "system", "content": "Seja breve."}, {"role": "user", "content": "oi"}]
+
+
+@pytest.fixture()
+def fake_server():
+    with FakeLLMServer(reply="Resposta com acentuação e várias partes", chunk_size=5) as server:
+        yield server
+
+
+def build_client(server: FakeLLMServer) -> OpenAICompatibleClient:
+    return OpenAICompatibleClient(model="fake-model", api_key="fake", base_url=server.base_url, timeout=5)
+
+
+def test_stream_matches_langchain_path(fake_server: FakeLLMServer) -> None:
+    langchain_llm = ChatOpenAI(model="fake-model", api_key="fake", base_url=fake_server.base_url, max_retries=0)
+    direct_llm = build_client(fake_server)
+
+    expected = [chunk.content for chunk in langchain_llm.stream(MESSAGES) if chunk.content]
+    chunks = list(direct_llm.stream(MESSAGES))
+
+    assert [chunk.content for chunk in chunks] == expected
+    assert direct_llm.invoke(MESSAGES).content == langchain_llm.invoke(MESSAGES).content
+
+
+def test_request_carries_overrides(fake_server: FakeLLMServer) -> None:
+    list(build_client(fake_server).stream(MESSAGES, max_tokens=32, model="outro-modelo"))
+
+    payload = fake_server.chat_requests[-1]["payload"]
+    assert payload["stream"] is True
+    assert payload["max_tokens"] == 32
+    assert payload["model"] == "outro-modelo"
+    assert payload["messages"] == MESSAGES
+
+
+def test_async_stream(fake_server: FakeLLMServer) -> None:
+    async def collect() -> str:
+        client = OpenAICompatibleClient(
+            model="fake-model",
+            api_key="fake",
+            base_url=fake_server.base_url,
+            timeout=5,
+            http_async_client=httpx.AsyncClient(),
+        )
+        return "".join([chunk.content async for chunk in client.astream(MESSAGES)])
+
+    assert asyncio.run(collect()) == fake_server.reply
+
+
+def test_http_error_exposes_status_code(fake_server: FakeLLMServer) -> None:
+    fake_server.inject("error")
+
+    with pytest.raises(LLMHTTPError) as error:
+        list(build_client(fake_server).stream(MESSAGES))
+
+    assert error.value.status_code == 503
+
+
+def test_service_extracts_direct_chunks(tmp_path: Path, fake_server: FakeLLMServer) -> None:
+    reset_circuit_breakers()
+    service = GEMService(llm=build_client(fake_server), state_file=str(tmp_path / "journey.json"))
+    service.process_message("iniciar")
+
+    events = list(service.process_message_stream("olá"))
+
+    assert service._extract_chunk_content(LLMChunk("abc")) == "abc"
+    assert service._extract_chunk_content(LLMChunk("")) == ""
+    assert events[-1]["type"] == "done"
+    assert events[-1]["answer"].startswith(fake_server.reply)
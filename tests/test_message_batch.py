@@ -0,0 +1,119 @@
+"""Testes do salvamento de mensagens em lote."""
+
+import json
+
+from fastapi.testclient import TestClient
+
+from src.web import app as app_module
+from src.web.app import create_app, get_current_user, get_gem_service, get_transcript_writer, require_auth
+
+USER = {"user_id": "user-1", "email": None, "full_name": ""}
+
+
+class AnsweringGEMService:
+    """Serviço fake que responde em dois chunks."""
+
+    def process_message_stream(self, message: str, **_: object):
+        yield {"type": "chunk", "content": "Um ", "accumulated": "Um "}
+        yield {"type": "chunk", "content": "dois", "accumulated": "Um dois"}
+        yield {"type": "done", "answer": "Um dois"}
+
+    def get_load_mode(self) -> str:
+        return "normal"
+
+
+class RecordingStore:
+    """Registra os lotes recebidos; conversas desconhecidas devolvem None."""
+
+    def __init__(self) -> None:
+        self.batches = []
+
+    def save(self, conversation_id: str, user_id: str, messages: list):
+        if conversation_id != "conv-1":
+            return None
+        self.batches.append((conversation_id, user_id, messages))
+        return [{"id": f"msg-{index}", **message} for index, message in enumerate(messages)]
+
+
+def test_batch_endpoint_saves_all_messages_in_one_call(monkeypatch) -> None:
+    store = RecordingStore()
+
+    async def asave_messages(*args):
+        return store.save(*args)
+
+    monkeypatch.setattr(app_module, "asave_messages", asave_messages)
+    app = create_app()
+    app.dependency_overrides[require_auth] = lambda: USER
+    client = TestClient(app)
+    long_answer = "resposta " * 5000
+    batch = {"messages": [{"role": "user", "content": "Olá"}, {"role": "assistant", "content": long_answer}]}
+
+    response = client.post("/api/conversations/conv-1/messages/batch", json=batch)
+
+    assert response.status_code == 200
+    assert [message["id"] for message in response.json()["messages"]] == ["msg-0", "msg-1"]
+    assert store.batches == [("conv-1", "user-1", batch["messages"])]
+    assert client.post("/api/conversations/outra/messages/batch", json=batch).status_code == 404
+    assert client.post("/api/conversations/conv-1/messages/batch", json={"messages": []}).status_code == 422
+    assert client.post(
+        "/api/conversations/conv-1/messages/batch",
+        json={"messages": [{"role": "system", "content": "x"}]},
+    ).status_code == 422
+
+
+def test_stream_persists_the_finished_exchange(monkeypatch) -> None:
+    store = RecordingStore()
+    monkeypatch.setattr(app_module, "save_messages", store.save)
+
+    async def free_plan_check(*_):
+        return {"allowed": True, "is_premium": False}
+
+    monkeypatch.setattr(app_module, "acheck_user_limit", free_plan_check)
+    app = create_app()
+    app.dependency_overrides[get_gem_service] = AnsweringGEMService
+    app.dependency_overrides[get_current_user] = lambda: USER
+    app.dependency_overrides[get_transcript_writer] = lambda: None
+
+    body = TestClient(app).post("/api/chat/stream", json={"message": "Olá", "conversation_id": "conv-1"}).text
+    events = [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+    assert events[-1] == {"type": "persisted", "conversation_id": "conv-1", "saved": True}
+    assert store.batches == [(
+        "conv-1",
+        "user-1",
+        [{"role": "user", "content": "Olá"}, {"role": "assistant", "content": "Um dois"}],
+    )]
+
+
+def test_stream_hands_the_exchange_to_the_transcript_writer(monkeypatch) -> None:
+    class QueueingWriter:
+        def __init__(self) -> None:
+            self.submitted = []
+
+        def submit(self, conversation_id: str, user_id: str, messages: list) -> bool:
+            self.submitted.append((conversation_id, user_id, messages))
+            return True
+
+    def unexpected_save(*_):
+        raise AssertionError("a troca deveria ir para a fila")
+
+    async def free_plan_check(*_):
+        return {"allowed": True, "is_premium": False}
+
+    writer = QueueingWriter()
+    monkeypatch.setattr(app_module, "save_messages", unexpected_save)
+    monkeypatch.setattr(app_module, "acheck_user_limit", free_plan_check)
+    app = create_app()
+    app.dependency_overrides[get_gem_service] = AnsweringGEMService
+    app.dependency_overrides[get_current_user] = lambda: USER
+    app.dependency_overrides[get_transcript_writer] = lambda: writer
+
+    body = TestClient(app).post("/api/chat/stream", json={"message": "Olá", "conversation_id": "conv-1"}).text
+    events = [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+    assert events[-1] == {"type": "persisted", "conversation_id": "conv-1", "saved": True}
+    assert writer.submitted == [(
+        "conv-1",
+        "user-1",
+        [{"role": "user", "content": "Olá"}, {"role": "assistant", "content": "Um dois"}],
+    )]
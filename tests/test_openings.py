@@ -0,0 +1,73 @@
+"""Testes das aberturas pré-computadas dos GEMs."""
+
+from pathlib import Path
+
+from src.agents import GEMService
+from src.agents.gems import GEMS_SEQUENCE
+from src.agents.llm_client import OpenAICompatibleClient
+from src.agents.openings import OpeningCache, is_opening_message
+from src.agents.resilience import reset_circuit_breakers
+from src.testing import FakeLLMServer
+
+OPENING = "Oi! Que bom que você está aqui."
+
+
+def build_service(tmp_path: Path, server: FakeLLMServer) -> GEMService:
+    reset_circuit_breakers()
+    llm = OpenAICompatibleClient(model="fake-model", api_key="fake", base_url=server.base_url, timeout=5)
+    service = GEMService(llm=llm, state_file=str(tmp_path / "journey.json"))
+    service.process_message("iniciar")
+    return service
+
+
+def test_greetings_are_recognized() -> None:
+    assert is_opening_message("Olá!")
+    assert is_opening_message("  estou PRONTO para começar ")
+    assert not is_opening_message("Oi, hoje sou mãe, gestora e estudante")
+
+
+def test_precomputed_opening_is_streamed_without_calling_the_llm(tmp_path: Path) -> None:
+    with FakeLLMServer(reply=OPENING) as server:
+        service = build_service(tmp_path, server)
+
+        assert service.precompute_openings() == len(GEMS_SEQUENCE)
+        service.openings.wait(timeout=10)
+        generated = len(server.chat_requests)
+
+        events = list(service.process_message_stream("Olá!"))
+
+        assert len(server.chat_requests) == generated
+        assert server.chat_requests[0]["payload"]["messages"][-1]["content"] == "Olá"
+
+    chunks = [event for event in events if event["type"] == "chunk"]
+    assert chunks[-1]["accumulated"] == OPENING
+    assert events[-1]["type"] == "done"
+    assert events[-1]["answer"].startswith(OPENING)
+    assert (tmp_path / "journey.openings.json").exists()
+
+
+def test_other_first_messages_still_reach_the_llm(tmp_path: Path) -> None:
+    with FakeLLMServer(reply=OPENING) as server:
+        service = build_service(tmp_path, server)
+        service.precompute_openings()
+        service.openings.wait(timeout=10)
+        generated = len(server.chat_requests)
+
+        service.process_message("Hoje sou mãe, gestora e estudante")
+
+        assert len(server.chat_requests) == generated + 1
+
+
+def test_changed_instructions_replace_the_stored_opening(tmp_path: Path) -> None:
+    path = str(tmp_path / "openings.json")
+    cache = OpeningCache(path)
+    cache.store("gem1", "instruções v1", "", "abertura antiga")
+
+    assert cache.get("gem1", "instruções v2", "") is None
+    assert cache.schedule("gem1", "instruções v2", "", lambda: "abertura nova")
+    cache.wait(timeout=5)
+
+    reloaded = OpeningCache(path)
+    assert reloaded.get("gem1", "instruções v2", "") == "abertura nova"
+    assert reloaded.get("gem1", "instruções v1", "") is None
+    assert reloaded.stats()["entries"] == 1
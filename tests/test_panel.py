@@ -0,0 +1,114 @@
+"""Testes do painel multi-modelo do GEM 4."""
+
+import time
+from pathlib import Path
+
+from src.agents import GEMService
+from src.agents.admission import AdmissionController
+from src.agents.llm_client import OpenAICompatibleClient
+from src.agents.panel import PANELIST_OK, PANELIST_TIMEOUT, Panel
+from src.agents.resilience import reset_circuit_breakers
+from src.testing import FakeLLMServer
+from src.testing.fake_llm_server import FAILURE_DROP, FAILURE_SLOW
+
+SYNTHESIS = "Síntese do painel: os modelos concordam no método."
+
+
+def client(server: FakeLLMServer, model: str) -> OpenAICompatibleClient:
+    return OpenAICompatibleClient(model=model, api_key="fake", base_url=server.base_url, timeout=10)
+
+
+def test_panelists_run_in_parallel_and_slow_ones_time_out() -> None:
+    with FakeLLMServer(reply="Resposta A", chunk_delay=0.05) as fast_a, \
+            FakeLLMServer(reply="Resposta B", chunk_delay=0.05) as fast_b, \
+            FakeLLMServer(reply="Resposta lenta", slow_seconds=3) as slow:
+        slow.inject(FAILURE_SLOW)
+        panel = Panel(
+            {"qwen-max": client(fast_a, "qwen-max"), "qwen-plus": client(fast_b, "qwen-plus"),
+             "qwen-lento": client(slow, "qwen-lento")},
+            timeout=1.0,
+        )
+
+        started_at = time.monotonic()
+        run = panel.run([{"role": "user", "content": "Qual o melhor método?"}], event_fields={"gem_id": "gem4"})
+        events = []
+        while True:
+            try:
+                events.append(next(run))
+            except StopIteration as finished:
+                results = finished.value
+                break
+        elapsed = time.monotonic() - started_at
+
+    # Painelistas rápidos (~0.1s cada) em paralelo; o lento corta no timeout
+    assert elapsed < 2.0
+    assert results["qwen-max"].text == "Resposta A"
+    assert results["qwen-plus"].status == PANELIST_OK
+    assert results["qwen-lento"].status == PANELIST_TIMEOUT
+
+    chunk_panelists = {event["panelist"] for event in events if event["type"] == "panel_chunk"}
+    assert chunk_panelists == {"qwen-max", "qwen-plus"}
+    assert all(event["gem_id"] == "gem4" for event in events)
+    statuses = {event["panelist"]: event["status"] for event in events if event["type"] == "panel_status"}
+    assert statuses == {"qwen-max": "ok", "qwen-plus": "ok", "qwen-lento": "timeout"}
+
+
+def test_gem4_streams_panel_channels_then_synthesis(tmp_path: Path) -> None:
+    reset_circuit_breakers()
+    with FakeLLMServer(reply="Hipótese do modelo A") as model_a, \
+            FakeLLMServer(reply="Hipótese do modelo B") as model_b, \
+            FakeLLMServer(reply=SYNTHESIS) as synthesizer:
+        panel = Panel({"qwen-max": client(model_a, "qwen-max"), "qwen-plus": client(model_b, "qwen-plus")}, timeout=5)
+        service = GEMService(llm=client(synthesizer, "fake-model"), state_file=str(tmp_path / "journey.json"), panel=panel)
+        service._speculation_config = {**service._speculation_config, "warmup_enabled": False}
+        service.process_message("iniciar")
+        service.activate_gem("gem4_laboratorio_cientifico")
+
+        events = list(service.process_message_stream("Quero testar hábitos de estudo"))
+
+        synthesis_messages = synthesizer.chat_requests[-1]["payload"]["messages"]
+
+    panel_chunks = [event for event in events if event["type"] == "panel_chunk"]
+    assert {event["panelist"] for event in panel_chunks} == {"qwen-max", "qwen-plus"}
+    assert "Hipótese do modelo A" in synthesis_messages[-1]["content"]
+    assert "Hipótese do modelo B" in synthesis_messages[-1]["content"]
+
+    assert events[-1]["type"] == "done"
+    assert events[-1]["answer"].startswith(SYNTHESIS)
+
+
+def test_panelists_go_through_retries_and_take_one_admission_slot_each(tmp_path: Path) -> None:
+    reset_circuit_breakers()
+    admission = AdmissionController(max_concurrency=4, max_queue_size=4)
+    with FakeLLMServer(reply="Hipótese do modelo A") as model_a, \
+            FakeLLMServer(reply="Hipótese do modelo B") as model_b, \
+            FakeLLMServer(reply=SYNTHESIS) as synthesizer:
+        model_a.inject(FAILURE_DROP)
+        panel = Panel({"qwen-max": client(model_a, "qwen-max"), "qwen-plus": client(model_b, "qwen-plus")}, timeout=5)
+        service = GEMService(
+            llm=client(synthesizer, "fake-model"),
+            state_file=str(tmp_path / "journey.json"),
+            admission=admission,
+            panel=panel,
+        )
+        service._speculation_config = {**service._speculation_config, "warmup_enabled": False}
+        service._resilience_config = {
+            **service._resilience_config, "max_retries": 1, "retry_base_delay": 0.0, "retry_max_delay": 0.0
+        }
+        service.process_message("iniciar")
+        service.activate_gem("gem4_laboratorio_cientifico")
+
+        active = []
+        events = []
+        for event in service.process_message_stream("Quero testar hábitos de estudo"):
+            active.append(admission.stats()["active"])
+            events.append(event)
+
+        panelist_a_requests = len(model_a.chat_requests)
+
+    statuses = {event["panelist"]: event["status"] for event in events if event["type"] == "panel_status"}
+    assert statuses == {"qwen-max": "ok", "qwen-plus": "ok"}
+    # A conexão derrubada foi repetida pelo mesmo caminho do LLM principal
+    assert panelist_a_requests == 2
+    assert set(active) == {2}
+    assert admission.stats()["active"] == 0
@@ -0,0 +1,175 @@
+"""Testes do motor de cota com gravação em lote e do consumo atômico."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src import limits
+from src.config import GEMConfig
+from src.quota import QuotaEngine, QuotaState
+from src.testing.quota_rpc import LocalQuotaRPC
+
+LIMITS = {"messages_per_month": 3, "images_per_month": 5, "pdfs_per_month": 2}
+
+
+class FakeUsageTable:
+    """Tabelas `subscriptions`/`usage` em memória, contando as idas ao banco."""
+
+    def __init__(self, status: str = "free") -> None:
+        self.status = status
+        self.usage = {}
+        self.loads = 0
+        self.batches = []
+        self.fail = False
+
+    def load_state(self, user_id: str, month_year: str) -> QuotaState:
+        self.loads += 1
+        return QuotaState(user_id, month_year, self.status, dict(self.usage.get((user_id, month_year), {})))
+
+    def apply_deltas(self, deltas: list) -> None:
+        if self.fail:
+            raise ConnectionError("banco fora do ar")
+        self.batches.append(deltas)
+        for delta in deltas:
+            row = self.usage.setdefault((delta["user_id"], delta["month_year"]), {})
+            row[delta["field"]] = row.get(delta["field"], 0) + delta["amount"]
+
+
+def build_engine(table: FakeUsageTable, journal_path=None) -> QuotaEngine:
+    return QuotaEngine(table.load_state, table.apply_deltas, LIMITS, ttl=60, journal_path=journal_path)
+
+
+def test_decisions_are_made_in_memory_and_increments_are_batched() -> None:
+    table = FakeUsageTable()
+    engine = build_engine(table)
+
+    for _ in range(3):
+        assert engine.check("user-1")["allowed"]
+        engine.increment("user-1")
+
+    blocked = engine.check("user-1")
+    assert blocked["allowed"] is False and blocked["current_usage"] == 3
+    assert table.loads == 1
+    assert table.batches == []
+
+    assert engine.flush() == 3
+    assert len(table.batches) == 1
+    assert table.batches[0][0]["amount"] == 3
+    # Depois do flush o uso não é contado em dobro
+    assert engine.check("user-1")["current_usage"] == 3
+
+
+def test_premium_users_are_never_blocked() -> None:
+    engine = build_engine(FakeUsageTable(status="active"))
+
+    for _ in range(5):
+        engine.increment("user-1")
+
+    assert engine.check("user-1")["is_premium"] is True
+    assert engine.check("user-1")["remaining"] == "unlimited"
+
+
+def test_failed_flush_keeps_the_increments() -> None:
+    table = FakeUsageTable()
+    engine = build_engine(table)
+    engine.increment("user-1")
+    table.fail = True
+
+    assert engine.flush() == 0
+    assert engine.check("user-1")["current_usage"] == 1
+
+    table.fail = False
+    assert engine.flush() == 1
+    assert engine.stats()["pending"] == 0
+
+
+def test_journal_replays_increments_after_a_crash(tmp_path) -> None:
+    journal = tmp_path / "quota.jsonl"
+    table = FakeUsageTable()
+    crashed = build_engine(table, journal_path=str(journal))
+    crashed.increment("user-1")
+    crashed.increment("user-1")
+    # Processo cai antes do flush: só o journal sobrevive
+
+    with journal.open("a", encoding="utf-8") as handle:
+        handle.write('{"user_id": "user-1", "month')  # última linha truncada
+
+    restarted = build_engine(table, journal_path=str(journal))
+    assert restarted.check("user-1")["current_usage"] == 2
+    assert restarted.flush() == 2
+    assert journal.read_text(encoding="utf-8") == ""
+
+
+def test_state_loaded_during_a_flush_does_not_count_the_batch_twice() -> None:
+    table = FakeUsageTable()
+    loaded = threading.Event()
+
+    def load_state(user_id: str, month_year: str) -> QuotaState:
+        state = table.load_state(user_id, month_year)
+        loaded.set()
+        return state
+
+    def apply_deltas(deltas: list) -> None:
+        table.apply_deltas(deltas)
+        # O lote já está no banco, mas o flush ainda não terminou
+        engine.invalidate("user-1")
+        reader.start()
+        assert loaded.wait(5)
+
+    engine = QuotaEngine(load_state, apply_deltas, LIMITS, ttl=60)
+    engine.increment("user-1")
+    engine.increment("user-1")
+    reader = threading.Thread(target=engine.check, args=("user-1",))
+
+    assert engine.flush() == 2
+    reader.join(5)
+
+    assert engine.check("user-1")["current_usage"] == 2
+
+
+def test_parallel_consumes_never_exceed_the_limit() -> None:
+    engine = build_engine(FakeUsageTable())
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        decisions = list(pool.map(lambda _: engine.consume("user-1"), range(10)))
+
+    assert sum(decision["allowed"] for decision in decisions) == 3
+    assert engine.consume("user-1", amount=-1)["remaining"] == 1
+
+
+def test_consume_quota_is_one_rpc_per_message(monkeypatch) -> None:
+    backend = LocalQuotaRPC()
+    monkeypatch.setattr(limits, "supabase", backend)
+    monkeypatch.setattr(GEMConfig, "QUOTA_ENGINE_ENABLED", False)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        decisions = list(pool.map(lambda _: limits.consume_quota("user-1"), range(60)))
+
+    allowed = [decision for decision in decisions if decision["allowed"]]
+    assert len(allowed) == limits.FREE_TIER_LIMITS["messages_per_month"]
+    assert sorted(decision["remaining"] for decision in allowed) == list(range(50))
+    assert backend.calls == ["consume_quota"] * 60
+    assert "Faça upgrade" in next(decision for decision in decisions if not decision["allowed"])["message"]
+
+    # Devolução (a geração falhou) libera uma mensagem
+    assert limits.consume_quota("user-1", amount=-1)["remaining"] == 1
+    assert limits.consume_quota("user-1")["allowed"]
+
+
+def test_consume_quota_decides_in_the_database_even_with_the_engine(monkeypatch) -> None:
+    backend = LocalQuotaRPC()
+    table = FakeUsageTable()
+    engine = build_engine(table)
+    monkeypatch.setattr(limits, "supabase", backend)
+    monkeypatch.setattr(limits, "get_quota_engine", lambda: engine)
+    engine.check("user-1")
+
+    # A decisão fica com a RPC (atômica entre workers); o motor não conta nada
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        decisions = list(pool.map(lambda _: limits.consume_quota("user-1"), range(60)))
+
+    assert sum(decision["allowed"] for decision in decisions) == limits.FREE_TIER_LIMITS["messages_per_month"]
+    assert backend.calls == ["consume_quota"] * 60
+    assert engine.stats()["pending"] == 0
+    # O estado em memória foi descartado: a próxima leitura vai ao banco
+    engine.check("user-1")
+    assert table.loads == 2
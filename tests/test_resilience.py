@@ -0,0 +1,102 @@
+"""Testes do circuit breaker e do retry das chamadas ao LLM com servidor local."""
+
+from pathlib import Path
+
+import pytest
+from langchain_openai import ChatOpenAI
+
+from src.agents import GEMService
+from src.agents.resilience import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    reset_circuit_breakers,
+)
+from src.metrics import metrics
+from src.testing import FakeLLMServer
+
+
+@pytest.fixture()
+def fake_server():
+    with FakeLLMServer(reply="Resposta do modelo local") as server:
+        yield server
+
+
+def build_service(tmp_path: Path, server: FakeLLMServer, **resilience) -> GEMService:
+    reset_circuit_breakers()
+    llm = ChatOpenAI(
+        model="fake-model",
+        api_key="fake",
+        base_url=server.base_url,
+        max_retries=0,
+        timeout=5,
+        streaming=True,
+    )
+    service = GEMService(llm=llm, state_file=str(tmp_path / "journey.json"))
+    service._resilience_config = {
+        **service._resilience_config,
+        "retry_base_delay": 0.0,
+        "retry_max_delay": 0.0,
+        **resilience,
+    }
+    service.circuit_breaker.failure_threshold = resilience.get("failure_threshold", 5)
+    service.process_message("iniciar")
+    return service
+
+
+def test_retries_dropped_connections_before_first_token(tmp_path: Path, fake_server: FakeLLMServer) -> None:
+    service = build_service(tmp_path, fake_server, max_retries=2)
+    fake_server.inject("drop", times=2)
+
+    events = list(service.process_message_stream("olá"))
+
+    assert events[-1]["type"] == "done"
+    assert events[-1]["answer"].startswith("Resposta do modelo local")
+    assert len(fake_server.chat_requests) == 3
+    assert service.circuit_breaker.state == STATE_CLOSED
+
+
+def test_circuit_opens_and_fails_fast(tmp_path: Path, fake_server: FakeLLMServer) -> None:
+    service = build_service(tmp_path, fake_server, max_retries=0, failure_threshold=2)
+    fake_server.inject("error", times=2)
+
+    list(service.process_message_stream("primeira"))
+    list(service.process_message_stream("segunda"))
+    requests_before = len(fake_server.chat_requests)
+
+    events = list(service.process_message_stream("terceira"))
+
+    assert service.circuit_breaker.state == STATE_OPEN
+    assert events[-1]["type"] == "error"
+    assert "indisponível" in events[-1]["error"]
+    assert len(fake_server.chat_requests) == requests_before
+    assert metrics.get_counter(
+        "llm_circuit_transitions", backend=fake_server.base_url, to=STATE_OPEN
+    ) >= 1
+
+
+def test_half_open_probe_closes_the_circuit() -> None:
+    breaker = CircuitBreaker("teste", failure_threshold=1, recovery_timeout=0.0)
+
+    breaker.record_failure()
+    assert breaker.state == STATE_HALF_OPEN
+
+    breaker.before_call()
+    breaker.record_success()
+
+    assert breaker.state == STATE_CLOSED
+
+
+def test_half_open_allows_a_single_probe() -> None:
+    breaker = CircuitBreaker("teste-probe", failure_threshold=1, recovery_timeout=60.0)
+    breaker.record_failure()
+    breaker._opened_at -= 60.0
+
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
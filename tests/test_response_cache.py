@@ -0,0 +1,80 @@
+"""Testes do cache de respostas do LLM."""
+
+import time
+from pathlib import Path
+
+from src.agents import GEMService
+from src.agents.llm_client import OpenAICompatibleClient
+from src.agents.resilience import reset_circuit_breakers
+from src.agents.response_cache import (
+    MemoryCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend,
+    cache_key,
+)
+from src.testing import FakeLLMServer
+
+MESSAGES = [{"role": "system", "content": "Seja breve."}, {"role": "user", "content": "oi"}]
+
+
+def test_key_is_stable_and_sensitive_to_inputs() -> None:
+    key = cache_key("qwen-max", {"temperature": 0.7, "max_tokens": 10}, MESSAGES)
+
+    assert key == cache_key("qwen-max", {"max_tokens": 10, "temperature": 0.7}, [dict(m) for m in MESSAGES])
+    assert key != cache_key("qwen-turbo", {"temperature": 0.7, "max_tokens": 10}, MESSAGES)
+    assert key != cache_key("qwen-max", {"temperature": 0.7, "max_tokens": 20}, MESSAGES)
+    assert key != cache_key("qwen-max", {"temperature": 0.7, "max_tokens": 10}, MESSAGES[:1])
+
+
+def test_memory_backend_evicts_least_recently_used_and_expired() -> None:
+    backend = MemoryCacheBackend(max_entries=2, ttl=60.0)
+    backend.set("a", "1")
+    backend.set("b", "2")
+    backend.get("a")
+    backend.set("c", "3")
+
+    assert backend.get("b") is None
+    assert backend.get("a") == "1"
+
+    backend.ttl = 0.01
+    time.sleep(0.02)
+    assert backend.get("a") is None
+
+
+def test_sqlite_backend_persists_and_enforces_limits(tmp_path: Path) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    backend = SQLiteCacheBackend(path, max_entries=2, ttl=60.0)
+    backend.set("a", "1")
+    backend.set("b", "2")
+    backend.set("c", "3")
+
+    reopened = SQLiteCacheBackend(path, max_entries=2, ttl=60.0)
+    assert len(reopened) == 2
+    assert reopened.get("a") is None
+    assert reopened.get("c") == "3"
+
+    reopened.ttl = 0.01
+    time.sleep(0.02)
+    assert reopened.get("c") is None
+
+
+def test_identical_stream_is_replayed_from_cache(tmp_path: Path) -> None:
+    reset_circuit_breakers()
+    cache = ResponseCache(MemoryCacheBackend(), replay_chunk_size=4)
+
+    with FakeLLMServer(reply="Resposta que vem do provedor", chunk_size=6) as server:
+        def run(name: str) -> list:
+            llm = OpenAICompatibleClient(model="fake-model", api_key="fake", base_url=server.base_url, timeout=5)
+            service = GEMService(llm=llm, state_file=str(tmp_path / f"{name}.json"), response_cache=cache)
+            service.process_message("iniciar")
+            return list(service.process_message_stream("olá"))
+
+        first = run("primeiro")
+        second = run("segundo")
+        requests = len(server.chat_requests)
+
+    assert requests == 1
+    assert second[-1]["answer"] == first[-1]["answer"]
+    assert [e["type"] for e in second if e["type"] not in ("chunk", "progress")] == ["done"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["hit_ratio"] == 0.5
@@ -0,0 +1,72 @@
+"""Testes do aquecimento especulativo do próximo GEM."""
+
+import time
+from pathlib import Path
+
+from src.agents import GEMService
+from src.agents.llm_client import OpenAICompatibleClient
+from src.agents.resilience import reset_circuit_breakers
+from src.agents.speculation import SpeculativeBudget
+from src.testing import FakeLLMServer
+
+NEXT_GEM = "gem2_diagnosticador_foco"
+COMPLETION = "📋 **ID DO MAPEAMENTO**: MAPA-2025-10-001"
+
+
+def build_service(tmp_path: Path, server: FakeLLMServer, budget: int) -> GEMService:
+    reset_circuit_breakers()
+    llm = OpenAICompatibleClient(model="fake-model", api_key="fake", base_url=server.base_url, timeout=5)
+    service = GEMService(llm=llm, state_file=str(tmp_path / "journey.json"))
+    service._speculation_config = {**service._speculation_config, "opening_enabled": True}
+    service.speculative_budget = SpeculativeBudget(max_generations=budget, window_seconds=60)
+    service.process_message("iniciar")
+    return service
+
+
+def finish_warmup(service: GEMService) -> None:
+    service._warmup_thread.join(timeout=10)
+    service.openings.wait(timeout=10)
+
+
+def test_budget_limits_generations_per_window() -> None:
+    budget = SpeculativeBudget(max_generations=2, window_seconds=0.05)
+
+    assert budget.try_acquire()
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+
+    time.sleep(0.06)
+    assert budget.try_acquire()
+
+
+def test_completion_warms_up_next_gem_and_pregenerates_opening(tmp_path: Path) -> None:
+    with FakeLLMServer(reply=COMPLETION) as server:
+        service = build_service(tmp_path, server, budget=5)
+
+        service.process_message("Hoje sou mãe e gestora")
+        finish_warmup(service)
+
+        history = service.gem_histories[NEXT_GEM]
+        assert history[0]["role"] == "system"
+        assert "MAPA-2025-10-001" in history[0]["content"]
+
+        speculative = server.chat_requests[-1]["payload"]
+        assert speculative["max_tokens"] == service._speculation_config["max_tokens"]
+        requests = len(server.chat_requests)
+
+        events = list(service.process_message_stream("Oi"))
+
+        assert len(server.chat_requests) == requests
+        assert events[-1]["type"] == "done"
+        assert events[-1]["gem_id"] == NEXT_GEM
+
+
+def test_exhausted_budget_skips_speculative_generation(tmp_path: Path) -> None:
+    with FakeLLMServer(reply=COMPLETION) as server:
+        service = build_service(tmp_path, server, budget=0)
+
+        service.process_message("Hoje sou mãe e gestora")
+        finish_warmup(service)
+
+        assert len(server.chat_requests) == 1
+        assert NEXT_GEM in service.gem_histories
@@ -0,0 +1,96 @@
+"""Testes do encerramento da geração após o output estruturado."""
+
+import time
+from pathlib import Path
+
+from src.agents import GEMService
+from src.agents.llm_client import OpenAICompatibleClient
+from src.agents.resilience import reset_circuit_breakers
+from src.agents.stop_conditions import (
+    DEFAULT_STOP_SEQUENCES,
+    StructuredOutputDetector,
+    get_stop_condition,
+    trim_after_close,
+)
+from src.metrics import metrics
+from src.testing import FakeLLMServer
+
+FRAME = "═" * 44
+STRUCTURED = f"""{FRAME}
+**MAPEAMENTO M.A.P.A. COMPLETO**
+{FRAME}
+
+📋 **ID DO MAPEAMENTO**: MAPA-2025-10-001
+
+**Sua sessão com o Mestre do Mapeamento está COMPLETA! ✅**
+
+{FRAME}"""
+TAIL = "\n\nQuer que eu detalhe mais algum papel? Posso sugerir próximos passos. " * 40
+
+
+def build_service(tmp_path: Path, server: FakeLLMServer) -> GEMService:
+    reset_circuit_breakers()
+    llm = OpenAICompatibleClient(model="fake-model", api_key="fake", base_url=server.base_url, timeout=5)
+    service = GEMService(llm=llm, state_file=str(tmp_path / "journey.json"))
+    service._speculation_config = {**service._speculation_config, "warmup_enabled": False}
+    service.process_message("iniciar")
+    return service
+
+
+def test_detector_closes_on_the_final_frame_split_across_chunks() -> None:
+    detector = StructuredOutputDetector(get_stop_condition("gem1_mestre_mapeamento"))
+    text = STRUCTURED + TAIL
+    pieces = [text[i:i + 7] for i in range(0, len(text), 7)]
+
+    emitted = ""
+    for piece in pieces:
+        emitted += detector.feed(piece)
+        if detector.closed:
+            break
+
+    assert emitted == STRUCTURED
+    assert detector.discarded.startswith("\n")
+
+
+def test_frames_before_the_id_do_not_close_the_output() -> None:
+    condition = get_stop_condition("gem1_mestre_mapeamento")
+
+    assert trim_after_close(f"{FRAME}\nTítulo\n{FRAME}\nPergunta?", condition) == (
+        f"{FRAME}\nTítulo\n{FRAME}\nPergunta?",
+        None,
+    )
+    assert trim_after_close(STRUCTURED, condition) == (STRUCTURED, "")
+    assert trim_after_close(STRUCTURED + TAIL, condition) == (STRUCTURED, TAIL)
+
+
+def test_stream_stops_after_structured_output_and_closes_upstream(tmp_path: Path) -> None:
+    with FakeLLMServer(reply=STRUCTURED + TAIL, chunk_size=16, chunk_delay=0.002) as server:
+        service = build_service(tmp_path, server)
+        early_stops = metrics.get_counter("llm_early_stops", gem="gem1_mestre_mapeamento")
+
+        events = list(service.process_message_stream("Sou mãe e gestora"))
+
+        deadline = time.monotonic() + 5
+        while not server.disconnects and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert server.disconnects >= 1
+        assert server.chat_requests[-1]["payload"]["stop"] == list(DEFAULT_STOP_SEQUENCES)
+
+    chunks = [event for event in events if event["type"] == "chunk"]
+    assert chunks[-1]["accumulated"] == STRUCTURED
+    assert events[-1]["type"] == "done"
+    assert "Quer que eu detalhe" not in events[-1]["answer"]
+    assert metrics.get_counter("llm_early_stops", gem="gem1_mestre_mapeamento") == early_stops + 1
+
+
+def test_invoke_trims_the_tail_and_learns_its_size(tmp_path: Path) -> None:
+    with FakeLLMServer(reply=STRUCTURED + TAIL) as server:
+        service = build_service(tmp_path, server)
+        estimate = service.tail_estimator.value
+
+        response = service.process_message("Sou mãe e gestora")
+
+    assert response.answer.startswith(STRUCTURED)
+    assert "Quer que eu detalhe" not in response.answer
+    assert service.tail_estimator.value > estimate
@@ -0,0 +1,116 @@
+"""Testes dos streams SSE retomáveis (Last-Event-ID)."""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from src.web.app import create_app, get_gem_service, get_stream_registry
+from src.web.streams import HEARTBEAT_FRAME, StreamBuffer, StreamRegistry, parse_last_event_id
+
+
+class StreamingGEMService:
+    """Serviço fake com um stream de chunks."""
+
+    def __init__(self, first_token_delay: float = 0.0) -> None:
+        self.first_token_delay = first_token_delay
+        self.stream_calls = 0
+        self.orchestrator = SimpleNamespace(get_current_gem=lambda: "gem1_mestre_mapeamento", state={})
+
+    def process_message_stream(self, message: str, **_: object):
+        self.stream_calls += 1
+        yield {"type": "progress", "stage": "waiting_model", "gem_id": "gem1"}
+        time.sleep(self.first_token_delay)
+        accumulated = ""
+        for text in ("Um ", "dois ", "três"):
+            accumulated += text
+            yield {"type": "chunk", "content": text, "accumulated": accumulated, "gem_id": "gem1", "gem_name": "GEM 1"}
+        yield {"type": "done", "answer": accumulated, "gem_id": "gem1", "gem_name": "GEM 1"}
+
+    def get_load_mode(self) -> str:
+        return "normal"
+
+
+def parse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        if block.startswith(":"):
+            continue
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["id"], json.loads(lines["data"])))
+    return events
+
+
+def test_reconnect_with_last_event_id_resumes_from_the_gap() -> None:
+    service = StreamingGEMService()
+    registry = StreamRegistry(grace_seconds=60)
+    app = create_app()
+    app.dependency_overrides[get_gem_service] = lambda: service
+    app.dependency_overrides[get_stream_registry] = lambda: registry
+    client = TestClient(app)
+
+    events = parse_events(client.post("/api/chat/stream", json={"message": "Olá"}).text)
+    stream_id = events[0][1]["stream_id"]
+    assert [event_id for event_id, _ in events] == [f"{stream_id}:{seq}" for seq in range(1, 7)]
+
+    # Cliente caiu depois do terceiro evento (primeiro chunk)
+    resumed = client.get(f"/api/chat/stream/{stream_id}", headers={"Last-Event-ID": events[2][0]})
+
+    assert service.stream_calls == 1
+    assert [event for _, event in parse_events(resumed.text)] == [event for _, event in events[3:]]
+    assert client.get("/api/chat/stream/desconhecido").status_code == 404
+
+
+def test_slow_first_token_gets_heartbeats_and_progress_frames() -> None:
+    service = StreamingGEMService(first_token_delay=0.5)
+    registry = StreamRegistry(heartbeat_interval=0.1)
+    app = create_app()
+    app.dependency_overrides[get_gem_service] = lambda: service
+    app.dependency_overrides[get_stream_registry] = lambda: registry
+    client = TestClient(app)
+
+    body = client.post("/api/chat/stream", json={"message": "Olá"}).text
+    events = [event for _, event in parse_events(body)]
+
+    assert HEARTBEAT_FRAME in body
+    waiting = [event for event in events if event["type"] == "progress" and event["stage"] == "waiting_model"]
+    assert len(waiting) >= 3
+    assert waiting[-1]["elapsed"] >= 0.2
+    # Depois do primeiro token não há mais frames de progresso
+    first_chunk = next(index for index, event in enumerate(events) if event["type"] == "chunk")
+    assert all(event["type"] != "progress" for event in events[first_chunk:])
+
+
+def test_follower_receives_events_appended_after_it_attached() -> None:
+    async def scenario() -> list:
+        stream = StreamBuffer("s1")
+        await stream.append({"n": 1})
+        received = []
+
+        async def follow() -> None:
+            async for frame in stream.follow():
+                received.append(frame)
+
+        follower = asyncio.create_task(follow())
+        await asyncio.sleep(0)
+        await stream.append({"n": 2})
+        await stream.finish()
+        await asyncio.wait_for(follower, timeout=1)
+        return received
+
+    assert asyncio.run(scenario()) == ['id: s1:1\ndata: {"n": 1}\n\n', 'id: s1:2\ndata: {"n": 2}\n\n']
+
+
+def test_evicted_gap_resumes_from_the_oldest_buffered_event() -> None:
+    async def scenario() -> list:
+        stream = StreamBuffer("s1", max_events=2)
+        for n in range(1, 5):
+            await stream.append({"n": n})
+        await stream.finish()
+        return [frame async for frame in stream.follow(after=1)]
+
+    assert [frame.split("\n")[0] for frame in asyncio.run(scenario())] == ["id: s1:3", "id: s1:4"]
+    assert parse_last_event_id("s1:7", "s1") == 7
+    assert parse_last_event_id("outro:7", "s1") == 0
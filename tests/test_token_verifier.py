@@ -0,0 +1,152 @@
+"""Testes da verificação local de tokens e da memoização do usuário."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from src.metrics import metrics
+from src.token_verifier import TokenVerifier, TokenVerifierUnavailable
+from src.web.app import get_auth_service, get_current_user, require_auth
+
+SECRET = "segredo-de-teste-com-tamanho-suficiente"
+
+
+def make_token(secret: str = SECRET, expires_in: float = 3600, **claims) -> str:
+    payload = {
+        "sub": "user-1",
+        "email": "ana@example.com",
+        "aud": "authenticated",
+        "exp": int(time.time() + expires_in),
+        "user_metadata": {"full_name": "Ana"},
+        **claims,
+    }
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+class JWKSServer:
+    """Servidor local do JWKS, contando as requisições."""
+
+    def __init__(self, keys: list) -> None:
+        self.keys = keys
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - nome do BaseHTTPRequestHandler
+                server.requests += 1
+                body = json.dumps({"keys": server.keys}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/auth/v1/.well-known/jwks.json"
+
+    def __enter__(self) -> "JWKSServer":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture(scope="module")
+def rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def public_jwk(private_key, kid: str) -> dict:
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    return {**jwk, "kid": kid, "alg": "RS256", "use": "sig"}
+
+
+def make_rs256_token(private_key, kid: str = "chave-1") -> str:
+    payload = {"sub": "user-1", "email": "ana@example.com", "aud": "authenticated", "exp": int(time.time() + 3600)}
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+def test_rs256_token_is_verified_with_the_jwks(rsa_key) -> None:
+    with JWKSServer([public_jwk(rsa_key, "chave-1")]) as server:
+        verifier = TokenVerifier(jwks_url=server.url)
+
+        assert verifier.verify(make_rs256_token(rsa_key))["user_id"] == "user-1"
+        assert verifier.verify(make_rs256_token(rsa.generate_private_key(65537, 2048))) is None
+
+
+def test_empty_jwks_makes_local_verification_unavailable_for_a_while(rsa_key) -> None:
+    # Projetos com o segredo legado (HS256) servem um JWKS sem chaves
+    with JWKSServer([]) as server:
+        verifier = TokenVerifier(jwks_url=server.url)
+
+        for _ in range(3):
+            with pytest.raises(TokenVerifierUnavailable):
+                verifier.verify(make_rs256_token(rsa_key))
+
+    # Depois da falha o JWKS não é buscado de novo a cada requisição
+    assert server.requests == 1
+
+
+def test_valid_token_is_verified_locally_and_cached() -> None:
+    verifier = TokenVerifier(secret=SECRET)
+    token = make_token()
+    hits = metrics.get_counter("auth_token_cache", result="hit")
+
+    assert verifier.verify(token) == {"user_id": "user-1", "email": "ana@example.com", "full_name": "Ana"}
+    assert verifier.verify(token)["user_id"] == "user-1"
+    assert metrics.get_counter("auth_token_cache", result="hit") == hits + 1
+
+
+def test_invalid_tokens_are_rejected() -> None:
+    verifier = TokenVerifier(secret=SECRET)
+
+    assert verifier.verify(make_token(expires_in=-60)) is None
+    assert verifier.verify(make_token(secret="outro-segredo-com-tamanho-suficiente")) is None
+    assert verifier.verify(make_token(aud="anon")) is None
+    assert verifier.verify("não-é-um-jwt") is None
+
+
+def test_cache_entry_does_not_outlive_the_token() -> None:
+    verifier = TokenVerifier(secret=SECRET, cache_ttl=300, leeway=0)
+    token = make_token(expires_in=1)
+
+    assert verifier.verify(token) is not None
+    time.sleep(1.1)
+    assert verifier.verify(token) is None
+
+
+def test_current_user_is_resolved_once_per_request() -> None:
+    class CountingAuthService:
+        calls = 0
+
+        def get_user_from_token(self, token: str) -> dict:
+            self.calls += 1
+            return {"user_id": "user-1", "email": None, "full_name": ""}
+
+    auth_service = CountingAuthService()
+    app = FastAPI()
+    app.dependency_overrides[get_auth_service] = lambda: auth_service
+
+    def other_chain(user: dict = Depends(require_auth)) -> str:
+        return user["user_id"]
+
+    @app.get("/eco")
+    async def eco(user=Depends(get_current_user), same=Depends(other_chain)) -> dict:
+        return {"user": user["user_id"], "same": same}
+
+    response = TestClient(app).get("/eco", headers={"Authorization": "Bearer token"})
+
+    assert response.json() == {"user": "user-1", "same": "user-1"}
+    assert auth_service.calls == 1
@@ -0,0 +1,134 @@
+"""Testes da gravação das mensagens do chat em segundo plano."""
+
+import os
+import threading
+
+from src.transcripts import TranscriptWriter
+
+
+class FakeMessagesTable:
+    """Tabela `messages` em memória que pode ficar fora do ar."""
+
+    def __init__(self) -> None:
+        self.rows = {}
+        self.batches = []
+        self.fail = False
+        self.written = threading.Event()
+
+    def write_batch(self, records: list) -> None:
+        if self.fail:
+            raise ConnectionError("banco fora do ar")
+        self.batches.append([record["id"] for record in records])
+        for record in records:
+            self.rows.setdefault(record["id"], record)
+        self.written.set()
+
+    def contents(self, conversation_id: str) -> list:
+        rows = [row for row in self.rows.values() if row["conversation_id"] == conversation_id]
+        return [row["content"] for row in sorted(rows, key=lambda row: row["created_at"])]
+
+
+def exchange(question: str, answer: str) -> list:
+    return [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+
+
+def test_full_batches_are_written_at_once_and_the_rest_on_close() -> None:
+    table = FakeMessagesTable()
+    writer = TranscriptWriter(table.write_batch, batch_size=4, flush_interval=60)
+
+    writer.submit("conv-1", "user-1", exchange("p1", "r1"))
+    writer.submit("conv-2", "user-2", exchange("p2", "r2"))
+    assert table.written.wait(5)
+    writer.submit("conv-1", "user-1", exchange("p3", "r3"))
+    writer.close()
+
+    assert [len(batch) for batch in table.batches] == [4, 2]
+    assert table.contents("conv-1") == ["p1", "r1", "p3", "r3"]
+    assert writer.submit("conv-1", "user-1", exchange("p4", "r4")) is False
+
+
+def test_failed_batches_are_retried_with_backoff() -> None:
+    table = FakeMessagesTable()
+    attempts = []
+
+    def flaky_write(records: list) -> None:
+        attempts.append(len(records))
+        if len(attempts) < 3:
+            raise ConnectionError("timeout")
+        table.write_batch(records)
+
+    writer = TranscriptWriter(flaky_write, batch_size=2, flush_interval=60, backoff_base=0.01)
+    writer.submit("conv-1", "user-1", exchange("p1", "r1"))
+    assert table.written.wait(5)
+    writer.close()
+
+    assert attempts == [2, 2, 2]
+    assert table.contents("conv-1") == ["p1", "r1"]
+
+
+def test_spill_keeps_messages_while_the_database_is_down(tmp_path) -> None:
+    spill_path = str(tmp_path / "spill.jsonl")
+    table = FakeMessagesTable()
+    table.fail = True
+
+    writer = TranscriptWriter(
+        table.write_batch, flush_interval=60, max_retries=1, backoff_base=0.01, spill_path=spill_path
+    )
+    writer.submit("conv-1", "user-1", exchange("p1", "r1"))
+    writer.submit("conv-1", "user-1", exchange("p2", "r2"))
+    writer.close()
+    assert writer.stats()["spill_pending"] is True
+    assert table.rows == {}
+
+    # Outro processo (ou o mesmo após reiniciar) grava o spill antes das mensagens novas
+    table.fail = False
+    restarted = TranscriptWriter(table.write_batch, flush_interval=60, spill_path=spill_path)
+    restarted.submit("conv-1", "user-1", exchange("p3", "r3"))
+    restarted.close()
+
+    assert table.contents("conv-1") == ["p1", "r1", "p2", "r2", "p3", "r3"]
+    assert restarted.stats()["spill_pending"] is False
+
+
+def test_overflow_goes_to_the_spill_instead_of_being_lost(tmp_path) -> None:
+    spill_path = str(tmp_path / "spill.jsonl")
+    table = FakeMessagesTable()
+    writer = TranscriptWriter(table.write_batch, max_queue=2, batch_size=10, flush_interval=60, spill_path=spill_path)
+
+    writer.submit("conv-1", "user-1", exchange("p1", "r1"))
+    writer.submit("conv-1", "user-1", exchange("p2", "r2"))
+    writer.close()
+
+    assert writer.stats()["spilled"] == 2
+    assert table.contents("conv-1") == ["p1", "r1", "p2", "r2"]
+
+
+def test_overflow_spill_does_not_hold_the_queue_lock(tmp_path, monkeypatch) -> None:
+    table = FakeMessagesTable()
+    writer = TranscriptWriter(table.write_batch, max_queue=1, batch_size=10, flush_interval=60,
+                              spill_path=str(tmp_path / "spill.jsonl"))
+    fsync_started, release_fsync = threading.Event(), threading.Event()
+    real_fsync = os.fsync
+
+    def slow_fsync(fd: int) -> None:
+        fsync_started.set()
+        release_fsync.wait(5)
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+    overflow = threading.Thread(target=writer.submit, args=("conv-1", "user-1", exchange("p1", "r1")))
+    overflow.start()
+    assert fsync_started.wait(5)
+
+    # Com o disco lento a fila continua acessível
+    stats = []
+    reader = threading.Thread(target=lambda: stats.append(writer.stats()))
+    reader.start()
+    reader.join(2)
+    answered = not reader.is_alive()
+    release_fsync.set()
+    overflow.join(5)
+    writer.close()
+
+    assert answered and stats[0]["queued"] == 0
+    assert table.contents("conv-1") == ["p1", "r1"]
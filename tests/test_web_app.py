@@ -1,8 +1,11 @@
 """Testes para a app FastAPI com o serviço GEMS."""
 
+import asyncio
+import time
 from types import SimpleNamespace
 from typing import Iterable
 
+import httpx
 from fastapi.testclient import TestClient
 
 from src.agents import GEMResponse
@@ -27,17 +30,20 @@ class FakeGEMService:
             state={},
         )
 
-    def process_message(self, message: str) -> GEMResponse:
+    def process_message(self, message: str, **_: object) -> GEMResponse:
         self.last_message = message
         return self._response
 
-    def process_message_stream(self, message: str):  # pragma: no cover - generator
+    def process_message_stream(self, message: str, **_: object):  # pragma: no cover - generator
         for chunk in self._stream:
             yield chunk
 
     def get_status(self) -> str:
         return self._status
 
+    def get_load_mode(self) -> str:
+        return "normal"
+
     def activate_gem(self, gem_id: str) -> str:  # pragma: no cover - não usado
         return f"Ativado: {gem_id}"
 
@@ -130,3 +136,29 @@ def test_chat_stream_endpoint_streams_chunks() -> None:
     body = b"".join(response.iter_bytes())
     assert b"data: {\"type\": \"chunk\"" in body
     assert b"data: {\"type\": \"done\"" in body
+
+
+def test_slow_chat_does_not_block_other_requests() -> None:
+    class SlowGEMService(FakeGEMService):
+        def process_message(self, message: str, **kwargs: object) -> GEMResponse:
+            time.sleep(0.5)  # LLM síncrono
+            return super().process_message(message, **kwargs)
+
+    service = SlowGEMService(GEMResponse(answer="Resposta", gem_id="gem1", gem_name="GEM 1"), status_text="ok")
+    app = create_app()
+    app.dependency_overrides[get_gem_service] = lambda: service
+
+    async def chat_and_status() -> float:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = time.perf_counter()
+            chat = asyncio.create_task(client.post("/api/chat", json={"message": "Olá"}))
+            await asyncio.sleep(0.05)
+            status_response = await client.get("/api/status")
+            elapsed = time.perf_counter() - started
+            assert status_response.status_code == 200
+            assert (await chat).json()["answer"] == "Resposta"
+            return elapsed
+
+    # O status responde enquanto o chat ainda espera o LLM
+    assert asyncio.run(chat_and_status()) < 0.3
@@ -0,0 +1,48 @@
+"""Testes dos arquivos locais reservados por worker."""
+
+import subprocess
+import sys
+
+from src.worker_files import claim_worker_file, release_worker_file
+
+
+def test_each_claim_gets_its_own_slot_until_released(tmp_path) -> None:
+    base = str(tmp_path / "journal.jsonl")
+
+    first = claim_worker_file(base)
+    second = claim_worker_file(base)
+    release_worker_file(first)
+    third = claim_worker_file(base)
+
+    assert first == str(tmp_path / "journal.0.jsonl")
+    assert second == str(tmp_path / "journal.1.jsonl")
+    assert third == first
+    release_worker_file(second)
+    release_worker_file(third)
+
+
+def test_slot_of_a_dead_worker_is_claimed_again(tmp_path) -> None:
+    base = str(tmp_path / "journal.jsonl")
+    # Outro worker reserva o slot 0 (informa no stderr) e fica vivo até receber uma linha
+    worker = subprocess.Popen(
+        [sys.executable, "-c", (
+            "import sys; from src.worker_files import claim_worker_file; "
+            f"path = claim_worker_file({base!r}); print(path, file=sys.stderr, flush=True); sys.stdin.readline()"
+        )],
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert worker.stderr.readline().strip() == str(tmp_path / "journal.0.jsonl")
+        while_alive = claim_worker_file(base)
+    finally:
+        worker.stdin.close()
+        worker.wait(timeout=10)
+
+    after_exit = claim_worker_file(base)
+
+    assert while_alive == str(tmp_path / "journal.1.jsonl")
+    assert after_exit == str(tmp_path / "journal.0.jsonl")
+    release_worker_file(while_alive)
+    release_worker_file(after_exit)